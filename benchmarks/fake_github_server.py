@@ -0,0 +1,285 @@
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Lock, Thread
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlencode, urlparse
+import json
+import re
+import time
+
+# Slug, and identifier of the team in the fake organisation
+TEAM_SLUG = "example-team"
+TEAM_ID = 1
+
+# Date used for every timestamp in the fake organisation
+_TIMESTAMP = "2020-01-01T00:00:00Z"
+
+
+class FakeGitHubServer(ThreadingHTTPServer):
+
+    def __init__(self, organisation: str = "example-org", repos: int = 100, contributors_per_repo: int = 5,
+                 users: Optional[int] = None, latency: float = 0.0, rate_limit: Optional[int] = None,
+                 rate_limit_window: float = 3600.0) -> None:
+        """Local HTTP server standing in for the GitHub REST API v3, serving a generated GitHub organisation.
+
+        The organisation has ``repos`` repositories, named 'repo-00000', 'repo-00001', and so on, each with
+        ``contributors_per_repo`` contributors drawn from ``users`` users, and one team, ``TEAM_SLUG``. The team
+        starts with access to every other repository; ``PUT`` requests add it to the others. Responses are generated
+        when requested, so large organisations use little memory. Lists are paginated with ``Link`` headers, like the
+        GitHub API, and contributors are returned without their names, so reading a name sends one more request to
+        complete the user, as with GitHub.
+
+        Every response has ``X-RateLimit-*`` headers. With ``rate_limit``, requests beyond ``rate_limit`` in each
+        ``rate_limit_window`` seconds get a ``403`` "API rate limit exceeded" response. Each response is delayed by
+        ``latency`` seconds. All requests are counted in the ``requests`` attribute, by verb, and URL path template, for
+        example 'GET /repos/{org}/{repo}'.
+
+        Use as a context manager, which serves requests in a background thread; the base URL is in the ``base_url``
+        attribute.
+
+        Args:
+            organisation: Default: 'example-org'. The login of the organisation.
+            repos: Default: 100. The number of repositories in the organisation.
+            contributors_per_repo: Default: 5. The number of contributors of each repository.
+            users: Default: None. The number of distinct users contributing to the repositories. If None, this is the
+                larger of ``repos``, and ``contributors_per_repo``.
+            latency: Default: 0.0. The number of seconds to delay each response.
+            rate_limit: Default: None. The number of requests allowed in each rate limit window. If None, requests are
+                never rate limited.
+            rate_limit_window: Default: 3600.0. The number of seconds in each rate limit window.
+
+        """
+        super().__init__(("127.0.0.1", 0), FakeGitHubRequestHandler)
+        self.daemon_threads = True
+        self.base_url = f"http://127.0.0.1:{self.server_address[1]}"
+
+        # Instantiate attributes
+        self.organisation = organisation
+        self.repos = repos
+        self.contributors_per_repo = contributors_per_repo
+        self.users = max(repos, contributors_per_repo) if users is None else users
+        self.latency = latency
+        self.rate_limit = rate_limit
+        self.rate_limit_window = rate_limit_window
+        self.requests: Counter = Counter()
+        self.rate_limited = 0
+
+        # Repositories the team has access to, and the rate limit window, guarded by a lock
+        self._lock = Lock()
+        self._team_repos = set(range(0, repos, 2))
+        self._window_start = time.time()
+        self._window_used = 0
+        self._thread: Optional[Thread] = None
+
+        # Routes, as tuples of the HTTP verb, the URL path template, and the method returning the response
+        self.routes: List[Tuple[str, str, Callable]] = [
+            ("GET", "/orgs/{org}", self._get_organisation),
+            ("GET", "/orgs/{org}/repos", self._list_repos),
+            ("GET", "/orgs/{org}/teams/{slug}", self._get_team),
+            ("GET", "/repos/{org}/{repo}", self._get_repo),
+            ("GET", "/repos/{org}/{repo}/contributors", self._list_contributors),
+            ("GET", "/repos/{org}/{repo}/teams", self._list_repo_teams),
+            ("GET", "/users/{login}", self._get_user),
+            ("PUT", "/teams/{team_id}/repos/{org}/{repo}", self._put_team_repo),
+        ]
+        self._patterns = [re.compile(re.sub(r"\{(\w+)\}", r"(?P<\1>[^/]+)", t)) for _, t, _ in self.routes]
+
+    def __enter__(self) -> "FakeGitHubServer":
+        """Serve requests in a background thread."""
+        self._thread = Thread(target=self.serve_forever, kwargs={"poll_interval": 0.01}, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        """Stop serving requests, and close the server."""
+        self.shutdown()
+        self.server_close()
+
+    def get_rate_limit(self) -> Tuple[bool, Dict[str, str]]:
+        """Use one request from the rate limit window, and get the rate limit headers of its response.
+
+        Returns:
+            A tuple of whether the request is allowed, and a dictionary of the rate limit response headers.
+
+        """
+        if self.rate_limit is None:
+            return True, {"X-RateLimit-Limit": "5000", "X-RateLimit-Remaining": "5000",
+                          "X-RateLimit-Reset": str(int(time.time() + self.rate_limit_window))}
+
+        # Start a new window if the current one has ended, and use a request if any remain
+        with self._lock:
+            now = time.time()
+            if now >= self._window_start + self.rate_limit_window:
+                self._window_start, self._window_used = now, 0
+            allowed = self._window_used < self.rate_limit
+            self._window_used += allowed
+            self.rate_limited += not allowed
+            remaining = self.rate_limit - self._window_used
+        return allowed, {"X-RateLimit-Limit": str(self.rate_limit), "X-RateLimit-Remaining": str(remaining),
+                         "X-RateLimit-Reset": str(int(self._window_start + self.rate_limit_window))}
+
+    def respond(self, verb: str, url: str) -> Tuple[int, Dict[str, str], Any]:
+        """Get the response to a request.
+
+        Args:
+            verb: The HTTP verb of the request.
+            url: The URL path of the request, including any query string.
+
+        Returns:
+            A tuple of the status code, a dictionary of headers, and a JSON-serialisable body, or None for no content.
+
+        """
+        parsed_url = urlparse(url)
+        query = {k: v[-1] for k, v in parse_qs(parsed_url.query).items()}
+
+        # Find the route of the request, and count the request by its URL path template
+        route, method, match = "(unknown)", None, None
+        for (route_verb, template, route_method), pattern in zip(self.routes, self._patterns):
+            if route_verb == verb and pattern.fullmatch(parsed_url.path):
+                route, method, match = template, route_method, pattern.fullmatch(parsed_url.path)
+                break
+        with self._lock:
+            self.requests[f"{verb} {route}"] += 1
+
+        # Respond with a rate limit error, or a 404 for an unknown route, organisation, or object
+        allowed, headers = self.get_rate_limit()
+        if not allowed:
+            return 403, headers, {"message": f"API rate limit exceeded for {self.server_address[0]}.",
+                                  "documentation_url": "https://docs.github.com/rest/overview/resources-in-the-rest-api"
+                                                       "#rate-limiting"}
+        response = None if match is None else method(query, **match.groupdict())
+        if response is None:
+            return 404, headers, {"message": "Not Found"}
+        status, response_headers, body = response
+        return status, {**headers, **response_headers}, body
+
+    def _get_repo_index(self, org: str, repo: str) -> Optional[int]:
+        """Get the index of a repository of the organisation from its name, or None if it does not exist."""
+        match = re.fullmatch(r"repo-(\d+)", repo)
+        index = int(match.group(1)) if match and org == self.organisation else None
+        return index if index is not None and index < self.repos else None
+
+    def _paginate(self, path: str, query: Dict[str, str], count: int,
+                  get_element: Callable[[int], Dict[str, Any]]) -> Tuple[int, Dict[str, str], List[Dict[str, Any]]]:
+        """Get a page of a list of ``count`` elements, with ``Link`` headers to the next, and last pages."""
+        per_page, page = min(int(query.get("per_page", 30)), 100), max(int(query.get("page", 1)), 1)
+        last_page = max((count + per_page - 1) // per_page, 1)
+
+        # Add links to the next, and last pages, with the page number as the last query parameter
+        links = {"next": page + 1, "last": last_page} if page < last_page else {}
+        base_query = {k: v for k, v in query.items() if k != "page"}
+        headers = {"Link": ", ".join(f'<{self.base_url}{path}?{urlencode({**base_query, "page": p})}>; rel="{r}"'
+                                     for r, p in links.items())} if links else {}
+        return 200, headers, [get_element(i) for i in range((page - 1) * per_page, min(page * per_page, count))]
+
+    def _get_organisation(self, query: Dict[str, str], org: str) -> Optional[Tuple[int, Dict[str, str], Any]]:
+        """Get the organisation."""
+        if org != self.organisation:
+            return None
+        return 200, {}, {"login": org, "id": 1, "url": f"{self.base_url}/orgs/{org}", "type": "Organization",
+                         "repos_url": f"{self.base_url}/orgs/{org}/repos", "public_repos": self.repos,
+                         "created_at": _TIMESTAMP, "updated_at": _TIMESTAMP}
+
+    def _repo(self, index: int) -> Dict[str, Any]:
+        """Get the data of a repository."""
+        name = f"repo-{index:05d}"
+        return {
+            "id": index + 1, "name": name, "full_name": f"{self.organisation}/{name}", "private": index % 3 == 0,
+            "owner": {"login": self.organisation, "id": 1, "type": "Organization",
+                      "url": f"{self.base_url}/users/{self.organisation}"},
+            "url": f"{self.base_url}/repos/{self.organisation}/{name}",
+            "html_url": f"https://github.com/{self.organisation}/{name}",
+            "description": f"Repository {index} of {self.organisation}", "fork": False, "language": "Python",
+            "default_branch": "main", "size": index % 1000, "stargazers_count": index % 50, "archived": False,
+            "created_at": _TIMESTAMP, "updated_at": _TIMESTAMP, "pushed_at": _TIMESTAMP,
+        }
+
+    def _list_repos(self, query: Dict[str, str], org: str) -> Optional[Tuple[int, Dict[str, str], Any]]:
+        """List the repositories of the organisation."""
+        if org != self.organisation:
+            return None
+        return self._paginate(f"/orgs/{org}/repos", query, self.repos, self._repo)
+
+    def _get_repo(self, query: Dict[str, str], org: str, repo: str) -> Optional[Tuple[int, Dict[str, str], Any]]:
+        """Get a repository."""
+        index = self._get_repo_index(org, repo)
+        return None if index is None else (200, {}, self._repo(index))
+
+    def _user(self, index: int, complete: bool = False) -> Dict[str, Any]:
+        """Get the data of a user; only completed users have a name."""
+        login = f"user-{index:05d}"
+        user = {"login": login, "id": index + 1000, "type": "User", "url": f"{self.base_url}/users/{login}",
+                "html_url": f"https://github.com/{login}", "site_admin": False}
+        return {**user, "name": f"User {index}", "company": "Example", "created_at": _TIMESTAMP} if complete else user
+
+    def _list_contributors(self, query: Dict[str, str], org: str,
+                           repo: str) -> Optional[Tuple[int, Dict[str, str], Any]]:
+        """List the contributors of a repository, without their names."""
+        index = self._get_repo_index(org, repo)
+        if index is None:
+            return None
+        start = index * self.contributors_per_repo
+        return self._paginate(f"/repos/{org}/{repo}/contributors", query, self.contributors_per_repo,
+                              lambda i: {**self._user((start + i) % self.users), "contributions": 100 - i})
+
+    def _get_user(self, query: Dict[str, str], login: str) -> Optional[Tuple[int, Dict[str, str], Any]]:
+        """Get a user, with their name."""
+        match = re.fullmatch(r"user-(\d+)", login)
+        if match is None or int(match.group(1)) >= self.users:
+            return None
+        return 200, {}, self._user(int(match.group(1)), True)
+
+    def _team(self) -> Dict[str, Any]:
+        """Get the data of the team."""
+        return {"id": TEAM_ID, "name": "Example team", "slug": TEAM_SLUG, "permission": "pull",
+                "url": f"{self.base_url}/teams/{TEAM_ID}"}
+
+    def _get_team(self, query: Dict[str, str], org: str, slug: str) -> Optional[Tuple[int, Dict[str, str], Any]]:
+        """Get the team by its slug."""
+        return (200, {}, self._team()) if org == self.organisation and slug == TEAM_SLUG else None
+
+    def _list_repo_teams(self, query: Dict[str, str], org: str,
+                         repo: str) -> Optional[Tuple[int, Dict[str, str], Any]]:
+        """List the teams with access to a repository."""
+        index = self._get_repo_index(org, repo)
+        if index is None:
+            return None
+        with self._lock:
+            has_team = index in self._team_repos
+        return self._paginate(f"/repos/{org}/{repo}/teams", query, int(has_team), lambda i: self._team())
+
+    def _put_team_repo(self, query: Dict[str, str], team_id: str, org: str,
+                       repo: str) -> Optional[Tuple[int, Dict[str, str], Any]]:
+        """Add the team to a repository, or update its permission."""
+        index = self._get_repo_index(org, repo)
+        if team_id != str(TEAM_ID) or index is None:
+            return None
+        with self._lock:
+            self._team_repos.add(index)
+        return 204, {}, None
+
+
+class FakeGitHubRequestHandler(BaseHTTPRequestHandler):
+
+    # Keep connections alive between requests, like the GitHub API, without delaying small responses
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def _respond(self) -> None:
+        """Respond to a request with the response of the fake GitHub server, after its latency."""
+        self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        status, headers, body = self.server.respond(self.command, self.path)
+        content = b"" if body is None else json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        for k, v in {"Content-Type": "application/json; charset=utf-8", **headers}.items():
+            self.send_header(k, v)
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    do_GET = do_PUT = do_POST = do_PATCH = do_DELETE = _respond
+
+    def log_message(self, *args: Any) -> None:
+        """Silence the request logs."""
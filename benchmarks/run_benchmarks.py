@@ -0,0 +1,359 @@
+from argparse import ArgumentParser
+from benchmarks.fake_github_server import TEAM_SLUG, FakeGitHubServer
+from datetime import datetime, timezone
+from github import Github
+from src.make_data.add_team_with_permissions_to_all_repositories import add_team_with_permissions_to_all_repositories
+from src.make_data.extract_attribute_from_dict_of_paginated_lists import extract_attribute_from_dict_of_paginated_lists
+from src.make_data.find_organisation_repos import find_organisation_repos
+from src.make_data.get_items_for_all_repos import get_items_for_all_repos
+from src.utils.github_connection import add_connection_hook, remove_connection_hook
+from src.utils.request_accountant import RequestAccountant
+from time import perf_counter
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+import json
+import multiprocessing as mp
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import threading
+
+# Default numbers of repositories in the fake GitHub organisation
+DEFAULT_REPOS = (10, 100, 1000)
+
+# Keys identifying the same benchmark in results from different commits
+RESULT_KEYS = ("scenario", "repos", "latency", "rate_limit", "rate_limit_window", "cpu_count")
+
+# Measurements compared between results, and the increase in each, on top of the threshold ratio, that is a
+# regression; small runs vary by more than the threshold ratio, and the number of requests does not vary between runs
+REGRESSION_MARGINS = {"seconds": 0.05, "requests": 0, "peak_memory_bytes": 1024 ** 2}
+
+
+def _find_organisation_repos(g: Github, organisation: str, cpu_count: int) -> Callable[[], Any]:
+    """Prepare to list all the repositories of the organisation."""
+    return lambda: list(find_organisation_repos(g, organisation))
+
+
+def _get_items_for_all_repos(g: Github, organisation: str, cpu_count: int) -> Callable[[], Any]:
+    """Prepare to get, and materialise the contributors of every repository."""
+    repositories = list(find_organisation_repos(g, organisation))
+    return lambda: get_items_for_all_repos(g, "get_contributors", repositories, cpu_count, materialise=True)
+
+
+def _extract_attribute_from_dict_of_paginated_lists(g: Github, organisation: str, cpu_count: int) -> Callable[[], Any]:
+    """Prepare to get the names of the contributors of every repository, completing each contributor."""
+    repositories = list(find_organisation_repos(g, organisation))
+    contributors = get_items_for_all_repos(g, "get_contributors", repositories, cpu_count, refetch_repositories=False)
+    return lambda: extract_attribute_from_dict_of_paginated_lists(contributors, "name", cpu_count)
+
+
+def _add_team_with_permissions_to_all_repositories(g: Github, organisation: str,
+                                                   cpu_count: int) -> Callable[[], Any]:
+    """Prepare to add the team with push permissions to every repository."""
+    repositories = list(find_organisation_repos(g, organisation))
+    team = g.get_organization(organisation).get_team_by_slug(TEAM_SLUG)
+    return lambda: add_team_with_permissions_to_all_repositories(team, "push", repositories, cpu_count)
+
+
+# Benchmark scenarios; each function sends any API requests it needs beforehand, and returns a function to time
+SCENARIOS: Dict[str, Callable[[Github, str, int], Callable[[], Any]]] = {
+    "find_organisation_repos": _find_organisation_repos,
+    "get_items_for_all_repos": _get_items_for_all_repos,
+    "extract_attribute_from_dict_of_paginated_lists": _extract_attribute_from_dict_of_paginated_lists,
+    "add_team_with_permissions_to_all_repositories": _add_team_with_permissions_to_all_repositories,
+}
+
+
+class _RequestTimer:
+
+    def __init__(self) -> None:
+        """Connection hook timing each GitHub API request sent by this process, from sending it to its response."""
+        self.seconds: List[float] = []
+        self._local = threading.local()
+
+    def before_request(self, verb: str, url: str, headers: Dict[str, str]) -> None:
+        """Start timing a request."""
+        self._local.time_start = perf_counter()
+
+    def after_response(self, verb: str, url: str, headers: Dict[str, str], response: Any) -> Any:
+        """Stop timing a request."""
+        self.seconds.append(perf_counter() - self._local.time_start)
+        return response
+
+
+def _get_latency_distribution(seconds: List[float]) -> Dict[str, float]:
+    """Get the mean, and percentiles of the latencies of the requests, in seconds.
+
+    Examples:
+        >>> _get_latency_distribution([0.1, 0.2, 0.3, 0.4])
+        {'mean': 0.25, 'p50': 0.25, 'p95': 0.385, 'p99': 0.397, 'max': 0.4}
+
+    """
+    if len(seconds) < 2:
+        return dict.fromkeys(["mean", "p50", "p95", "p99", "max"], seconds[0] if seconds else 0.0)
+    percentiles = statistics.quantiles(seconds, n=100, method="inclusive")
+    return {"mean": statistics.fmean(seconds), "p50": statistics.median(seconds), "p95": percentiles[94],
+            "p99": percentiles[98], "max": max(seconds)}
+
+
+def _get_max_rss() -> int:
+    """Get the peak resident set size of this process, in bytes; ``getrusage`` gives kilobytes, except on macOS."""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * (1 if sys.platform == "darwin" else 1024)
+
+
+def _get_failed_run(error: str) -> Dict[str, Any]:
+    """Get the measurements of a run of a benchmark scenario that failed before it could be measured."""
+    return {"seconds": 0.0, "requests": 0, "requests_per_second": 0.0, "rate_limited_requests": 0,
+            "latency_seconds": _get_latency_distribution([]), "peak_memory_bytes": 0, "max_rss_bytes": 0,
+            "requests_by_function": {}, "error": error}
+
+
+def _run_scenario(scenario: str, base_url: str, organisation: str, cpu_count: int, per_page: int) -> Dict[str, Any]:
+    """Run a benchmark scenario once, and measure it.
+
+    Only the function returned by the scenario is measured. Its peak memory is the increase in the peak resident set
+    size of this process whilst it runs, which does not include any worker processes. This is measured with
+    ``resource.getrusage`` rather than ``tracemalloc``, which would slow down every allocation, and so the timings.
+
+    Args:
+        scenario: The name of the scenario in ``SCENARIOS``.
+        base_url: The base URL of the fake GitHub server.
+        organisation: The login of the organisation.
+        cpu_count: The number of CPUs to parallelise the API requests.
+        per_page: The number of items per page for paginated API requests.
+
+    Returns:
+        A dictionary of the measurements of the scenario. If the scenario could not be prepared, for example as its
+        API requests were rate limited, the measurements are zero, and 'error' is the exception raised.
+
+    """
+
+    # Prepare the scenario, returning a failed run if it raises an exception
+    g = Github(base_url=base_url, per_page=per_page)
+    try:
+        run = SCENARIOS[scenario](g, organisation, cpu_count)
+    except Exception as e:
+        return _get_failed_run(repr(e))
+
+    # Time each request, and count the requests by function, whilst running the scenario
+    timer, accountant, error = _RequestTimer(), RequestAccountant(), None
+    add_connection_hook(timer)
+    accountant.start()
+    max_rss_start = _get_max_rss()
+    time_start = perf_counter()
+    try:
+        run()
+    except Exception as e:
+        error = repr(e)
+    seconds = perf_counter() - time_start
+    max_rss = _get_max_rss()
+    accountant.stop()
+    remove_connection_hook(timer)
+
+    # Return the measurements
+    report = accountant.get_report()
+    return {
+        "seconds": seconds,
+        "requests": report["total"]["requests"],
+        "requests_per_second": report["total"]["requests"] / seconds if seconds else 0.0,
+        "rate_limited_requests": report["total"]["statuses"].get(403, 0),
+        "latency_seconds": _get_latency_distribution(timer.seconds),
+        "peak_memory_bytes": max_rss - max_rss_start,
+        "max_rss_bytes": max_rss,
+        "requests_by_function": {k: v["requests"] for k, v in report["functions"].items()},
+        "error": error,
+    }
+
+
+def _run_scenario_in_child(connection: Any, *args: Any) -> None:
+    """Run a benchmark scenario with ``_run_scenario``, and send its measurements through a pipe."""
+    connection.send(_run_scenario(*args))
+    connection.close()
+
+
+def run_benchmark(scenario: str, repos: int, latency: float = 0.0, rate_limit: Optional[int] = None,
+                  rate_limit_window: float = 3600.0, cpu_count: int = mp.cpu_count(), repeat: int = 3,
+                  per_page: int = 100) -> Dict[str, Any]:
+    """Run a benchmark scenario against a fake GitHub server, and measure it.
+
+    Each run of the scenario starts with a new fake GitHub server, in this process, and runs in a new forked process,
+    so sessions, caches, and memory from earlier runs do not affect it. The measurements of the median run by duration
+    are returned.
+
+    Args:
+        scenario: The name of the scenario in ``SCENARIOS``.
+        repos: The number of repositories in the fake GitHub organisation.
+        latency: Default: 0.0. The number of seconds the fake GitHub server delays each response.
+        rate_limit: Default: None. The number of requests allowed by the fake GitHub server in each rate limit
+            window. If None, requests are never rate limited.
+        rate_limit_window: Default: 3600.0. The number of seconds in each rate limit window.
+        cpu_count: Default: maximum number of CPUs. The number of CPUs to parallelise the API requests.
+        repeat: Default: 3. The number of times to run the scenario.
+        per_page: Default: 100. The number of items per page for paginated API requests.
+
+    Returns:
+        A dictionary of the benchmark parameters, the measurements of the median run, and the throughput in
+        repositories per second.
+
+    """
+    context, runs = mp.get_context("fork"), []
+    for _ in range(repeat):
+        with FakeGitHubServer(repos=repos, latency=latency, rate_limit=rate_limit,
+                              rate_limit_window=rate_limit_window) as server:
+            receiver, sender = context.Pipe(duplex=False)
+            process = context.Process(target=_run_scenario_in_child,
+                                      args=(sender, scenario, server.base_url, server.organisation, cpu_count,
+                                            per_page))
+            process.start()
+
+            # Close this process's end of the pipe, so a child that exits without sending its measurements is
+            # recorded as a failed run, rather than waited for forever
+            sender.close()
+            try:
+                runs.append(receiver.recv())
+            except EOFError:
+                runs.append(_get_failed_run("EOFError('benchmark process exited without sending its measurements')"))
+            process.join()
+
+    # Return the parameters, and the measurements of the median run
+    run = sorted(runs, key=lambda r: r["seconds"])[(len(runs) - 1) // 2]
+    return {"scenario": scenario, "repos": repos, "latency": latency, "rate_limit": rate_limit,
+            "rate_limit_window": rate_limit_window, "cpu_count": cpu_count, "repeat": repeat, **run,
+            "repos_per_second": repos / run["seconds"] if run["seconds"] else 0.0}
+
+
+def get_metadata() -> Dict[str, Any]:
+    """Get the commit, and environment the benchmarks were run in, so results from different commits can be compared.
+
+    Returns:
+        A dictionary with the commit hash, whether the working tree has uncommitted changes, the time, the Python
+        version, the platform, and the number of CPUs.
+
+    """
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+        dirty = bool(subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], capture_output=True,
+                                    text=True, check=True).stdout.strip())
+    except (OSError, subprocess.CalledProcessError):
+        commit, dirty = None, None
+    return {"commit": commit, "dirty": dirty, "time": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(), "platform": platform.platform(), "cpu_count": mp.cpu_count()}
+
+
+def format_results(results: List[Dict[str, Any]]) -> str:
+    """Format benchmark results as a text table.
+
+    Args:
+        results: A list of the outputs of ``run_benchmark``.
+
+    Returns:
+        The table as a multi-line string.
+
+    """
+    lines = [f"{'scenario':<48} {'repos':>6} {'seconds':>9} {'repos/s':>9} {'requests':>9} {'requests/s':>10} "
+             f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'peak MiB':>9}"]
+    for r in results:
+        latency = r["latency_seconds"]
+        lines.append(f"{r['scenario']:<48} {r['repos']:>6,} {r['seconds']:>9.3f} {r['repos_per_second']:>9,.1f} "
+                     f"{r['requests']:>9,} {r['requests_per_second']:>10,.1f} {latency['p50'] * 1000:>8.2f} "
+                     f"{latency['p95'] * 1000:>8.2f} {latency['p99'] * 1000:>8.2f} "
+                     f"{r['peak_memory_bytes'] / 1024 ** 2:>9.2f}")
+        if r["error"]:
+            lines.append(f"  Error: {r['error']}")
+    return "\n".join(lines)
+
+
+def compare_results(baseline: List[Dict[str, Any]], results: List[Dict[str, Any]],
+                    threshold: float = 1.2) -> Tuple[str, List[str]]:
+    """Compare benchmark results with the results of a baseline, for example from an earlier commit.
+
+    Args:
+        baseline: A list of the outputs of ``run_benchmark`` for the baseline.
+        results: A list of the outputs of ``run_benchmark`` to compare with ``baseline``.
+        threshold: Default: 1.2. The ratio of a measurement to its baseline above which it is a regression, if it also
+            increased by more than its margin in ``REGRESSION_MARGINS``. Any increase in the number of requests is a
+            regression.
+
+    Returns:
+        A tuple of the comparison as a text table of the ratio of each measurement to its baseline, and a list of
+        descriptions of the regressions.
+
+    """
+    baseline_by_key = {tuple(b.get(k) for k in RESULT_KEYS): b for b in baseline}
+    lines, regressions = [f"{'scenario':<48} {'repos':>6} " + " ".join(f"{m:>20}" for m in REGRESSION_MARGINS)], []
+    for r in results:
+        b = baseline_by_key.get(tuple(r[k] for k in RESULT_KEYS))
+        if b is None:
+            continue
+
+        # Get the ratio of each measurement to its baseline, and check if it is a regression
+        ratios = []
+        for measurement, margin in REGRESSION_MARGINS.items():
+            increase = r[measurement] - b[measurement]
+            ratios.append(r[measurement] / b[measurement] if b[measurement] else float("inf") if increase > 0 else 1.0)
+            if increase > margin and (measurement == "requests" or r[measurement] > b[measurement] * threshold):
+                regressions.append(f"{r['scenario']} with {r['repos']:,} repositories: {measurement} increased from "
+                                   f"{b[measurement]:,.3f} to {r[measurement]:,.3f}")
+        lines.append(f"{r['scenario']:<48} {r['repos']:>6,} " + " ".join(f"{x:>19.2f}x" for x in ratios))
+    return "\n".join(lines), regressions
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """Run the benchmarks from the command line, and optionally save, and compare them with a baseline.
+
+    Args:
+        argv: Default: None. The command line arguments. If None, these are ``sys.argv[1:]``.
+
+    Returns:
+        The exit status; 1 if any benchmark regressed from the baseline, otherwise 0.
+
+    """
+    parser = ArgumentParser(description="Benchmark the src package against a fake GitHub server.")
+    parser.add_argument("--scenarios", nargs="+", choices=list(SCENARIOS), default=list(SCENARIOS),
+                        help="Scenarios to run. Default: all scenarios.")
+    parser.add_argument("--repos", nargs="+", type=int, default=list(DEFAULT_REPOS),
+                        help="Numbers of repositories in the fake organisation. Default: 10 100 1000.")
+    parser.add_argument("--latency", type=float, default=0.0,
+                        help="Seconds to delay each response of the fake GitHub server. Default: 0.0.")
+    parser.add_argument("--rate-limit", type=int, default=None,
+                        help="Requests allowed by the fake GitHub server in each rate limit window. Default: no "
+                             "rate limit.")
+    parser.add_argument("--rate-limit-window", type=float, default=3600.0,
+                        help="Seconds in each rate limit window of the fake GitHub server. Default: 3600.0.")
+    parser.add_argument("--cpu-count", type=int, default=mp.cpu_count(),
+                        help="Number of CPUs to parallelise the API requests. Default: maximum number of CPUs.")
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="Number of runs of each benchmark; the median run is reported. Default: 3.")
+    parser.add_argument("--output", default=None, help="File path to save the results as JSON.")
+    parser.add_argument("--compare", default=None, help="File path of saved results to compare the results with.")
+    parser.add_argument("--threshold", type=float, default=1.2,
+                        help="Ratio to the compared results above which a measurement is a regression. Default: 1.2.")
+    args = parser.parse_args(argv)
+
+    # Run the benchmarks, and print the results
+    results = [run_benchmark(s, n, args.latency, args.rate_limit, args.rate_limit_window, args.cpu_count, args.repeat)
+               for n in args.repos for s in args.scenarios]
+    print(format_results(results))
+
+    # Save the results, if required
+    if args.output is not None:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump({"metadata": get_metadata(), "results": results}, f, indent=2)
+
+    # Compare the results with the baseline, if required, and fail if any regressed
+    if args.compare is None:
+        return 0
+    with open(args.compare) as f:
+        baseline = json.load(f)
+    comparison, regressions = compare_results(baseline["results"], results, args.threshold)
+    print(f"\nCompared with commit {baseline['metadata']['commit']}:\n{comparison}")
+    for regression in regressions:
+        print(f"Regression: {regression}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
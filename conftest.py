@@ -1,11 +1,14 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from py.path import local
 from src.utils.logger import create_logger
-from typing import Dict, Union
+from threading import Thread
+from typing import Any, Dict, Iterator, List, Tuple, Union
 from unittest.mock import MagicMock
 import logging
 import json
 import os
 import pytest
+import time
 
 
 @pytest.fixture
@@ -45,9 +48,9 @@ def patch_src_utils_logger_create_logger(mocker) -> MagicMock:
 
 
 @pytest.fixture
-def patch_src_utils_logger_time(mocker) -> MagicMock:
-    """Patch the `time.time` function imported in src/utils/logger.py."""
-    return mocker.patch("src.utils.logger.time")
+def patch_src_utils_logger_perf_counter(mocker) -> MagicMock:
+    """Patch the `time.perf_counter` function imported in src/utils/logger.py."""
+    return mocker.patch("src.utils.logger.perf_counter")
 
 
 @pytest.fixture
@@ -65,6 +68,28 @@ def example_log_file(temporary_log_directory) -> Dict[str, Union[logging.Logger,
     return {"logger": temporary_log, "path": temporary_log_filepath}
 
 
+@pytest.fixture
+def example_queue_log_file(temporary_log_directory) -> Iterator[Dict[str, Union[logging.Logger, str]]]:
+    """Create a temporary log file, written through a queue, for testing purposes."""
+
+    # Create a temporary directory to store the log file, and define a file path to a log file
+    temporary_log_file = temporary_log_directory.join("temporary_queue.log")
+    temporary_log_filepath = os.path.join(temporary_log_file.dirname, temporary_log_file.basename)
+
+    # Create a log file written through a queue, with a unique name, so each test has its own handlers
+    temporary_log = create_logger(f"temporary_queue_log_{temporary_log_directory.basename}", temporary_log_filepath,
+                                  use_queue=True)
+
+    # Yield a dictionary containing the log, and its filepath, then stop its listeners, and remove its handlers
+    yield {"logger": temporary_log, "path": temporary_log_filepath}
+    for handler in temporary_log.handlers[:]:
+        for listener in handler.listeners:
+            listener.stop()
+            for listener_handler in listener.handlers:
+                listener_handler.close()
+        temporary_log.removeHandler(handler)
+
+
 @pytest.fixture
 def temporary_json_directory(tmpdir_factory) -> local:
     """Create a temporary directory for a JSON file"""
@@ -96,6 +121,12 @@ def patch_find_organisation_repos_github(mocker) -> MagicMock:
     return mocker.patch("src.make_data.find_organisation_repos.Github")
 
 
+@pytest.fixture
+def patch_find_organisation_repos_fetch_all_pages(mocker) -> MagicMock:
+    """Patch the `fetch_all_pages` function imported into find_organisation_repos.py."""
+    return mocker.patch("src.make_data.find_organisation_repos.fetch_all_pages")
+
+
 @pytest.fixture
 def patch_get_items_for_repo_github(mocker) -> MagicMock:
     """Patch the `github.Github` class imported into get_items_for_repo.py."""
@@ -126,12 +157,30 @@ def patch_get_items_for_all_repo_parallelise_dictionary_processing(mocker) -> Ma
     return mocker.patch("src.make_data.get_items_for_all_repos.parallelise_dictionary_processing")
 
 
+@pytest.fixture
+def patch_get_items_for_all_repo_parallelise_dictionary_checkpointing(mocker) -> MagicMock:
+    """Patch the `parallelise_dictionary_checkpointing` function imported into get_items_for_all_repo.py."""
+    return mocker.patch("src.make_data.get_items_for_all_repos.parallelise_dictionary_checkpointing")
+
+
+@pytest.fixture
+def patch_get_items_for_all_repo_parallelise_dictionary_streaming(mocker) -> MagicMock:
+    """Patch the `parallelise_dictionary_streaming` function imported into get_items_for_all_repo.py."""
+    return mocker.patch("src.make_data.get_items_for_all_repos.parallelise_dictionary_streaming")
+
+
 @pytest.fixture
 def patch_multiprocessing_pool(mocker) -> MagicMock:
     """Patch the `multiprocessing.Pool` function."""
     return mocker.patch("multiprocessing.Pool")
 
 
+@pytest.fixture
+def patch_thread_pool(mocker) -> MagicMock:
+    """Patch the `multiprocessing.pool.ThreadPool` class imported into parallelise_dictionary_processing.py."""
+    return mocker.patch("src.utils.parallelise_dictionary_processing.ThreadPool")
+
+
 @pytest.fixture
 def patch_multiprocessing_pool_enter_imap_unordered(patch_multiprocessing_pool: MagicMock) -> MagicMock:
     """Patch the `imap_unordered` function within an open `multiprocessing.Pool` context manager."""
@@ -190,7 +239,80 @@ def patch_add_team_with_permissions_to_all_repositories_partial(mocker) -> Magic
     return mocker.patch("src.make_data.add_team_with_permissions_to_all_repositories.partial")
 
 
+@pytest.fixture
+def patch_add_team_with_permissions_to_all_repositories_plan_team_permissions(mocker) -> MagicMock:
+    """Patch `plan_team_permissions` function from add_team_with_permissions_to_all_repositories.py."""
+    return mocker.patch("src.make_data.add_team_with_permissions_to_all_repositories.plan_team_permissions")
+
+
+@pytest.fixture
+def patch_add_team_with_permissions_to_all_repositories_parallelise_dictionary_checkpointing(mocker) -> MagicMock:
+    """Patch `parallelise_dictionary_checkpointing` function from add_team_with_permissions_to_all_repositories.py."""
+    return mocker.patch("src.make_data.add_team_with_permissions_to_all_repositories."
+                        "parallelise_dictionary_checkpointing")
+
+
 @pytest.fixture
 def patch_add_team_with_permissions_to_all_repositories_parallelise_processing(mocker) -> MagicMock:
     """Patch `parallelise_processing` function from add_team_with_permissions_to_all_repositories.py."""
     return mocker.patch("src.make_data.add_team_with_permissions_to_all_repositories.parallelise_processing")
+
+
+class StubGitHubServer(ThreadingHTTPServer):
+
+    def __init__(self) -> None:
+        """Local HTTP server that serves canned GitHub API responses.
+
+        Responses are set in the `routes` attribute, where keys are request paths including any query string, and
+        values are tuples of the status code, a dictionary of headers, and a JSON-serialisable body. All requests are
+        recorded in the `requests` attribute, and the number of connections opened in the `connections` attribute.
+        Each response is delayed by the number of seconds in the `latency` attribute.
+        """
+        super().__init__(("127.0.0.1", 0), StubGitHubRequestHandler)
+        self.base_url = f"http://127.0.0.1:{self.server_address[1]}"
+        self.routes: Dict[str, Tuple[int, Dict[str, str], Any]] = {}
+        self.requests: List[Tuple[str, str, Dict[str, str]]] = []
+        self.connections = 0
+        self.latency = 0.0
+
+    def verify_request(self, request: Any, client_address: Tuple[str, int]) -> bool:
+        """Count each new connection."""
+        self.connections += 1
+        return True
+
+
+class StubGitHubRequestHandler(BaseHTTPRequestHandler):
+
+    # Keep connections alive between requests, like the GitHub API, without delaying small responses
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def _respond(self) -> None:
+        """Record the request, and respond with the canned response for its path, or a 404 if there is none."""
+        self.server.requests.append((self.command, self.path, dict(self.headers)))
+        self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        time.sleep(self.server.latency)
+        status, headers, body = self.server.routes.get(self.path, (404, {}, {"message": "Not Found"}))
+        content = b"" if body is None else json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        for k, v in {"Content-Type": "application/json", **headers}.items():
+            self.send_header(k, v)
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    do_GET = do_PUT = do_POST = do_PATCH = do_DELETE = _respond
+
+    def log_message(self, *args: Any) -> None:
+        """Silence the request logs."""
+
+
+@pytest.fixture
+def stub_github_server() -> Iterator[StubGitHubServer]:
+    """Run a local HTTP server serving canned GitHub API responses for the duration of a test."""
+    server = StubGitHubServer()
+    thread = Thread(target=server.serve_forever, kwargs={"poll_interval": 0.01}, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
@@ -4,11 +4,54 @@ from src.make_data.add_team_with_permissions_to_all_repositories import (
     check_team_added_already
 )
 from src.make_data.extract_attribute_from_dict_of_paginated_lists import (
+    batch_extract_attribute_from_dict_of_paginated_lists,
     extract_attribute_from_dict_of_paginated_lists,
     extract_attribute_from_paginated_list_elements
 )
 from src.make_data.find_organisation_repos import find_organisation_repos
-from src.make_data.get_items_for_repo import get_items_for_repo
-from src.make_data.get_items_for_all_repos import get_items_for_all_repos
+from src.make_data.find_organisation_repos_async import find_organisation_repos_async
+from src.make_data.get_items_for_repo import get_items_for_repo, materialise_items
+from src.make_data.get_items_for_all_repos import get_items_for_all_repos, stream_items_for_all_repos
+from src.make_data.get_items_for_all_repos_async import get_items_for_all_repos_async, get_items_for_repo_async
+from src.make_data.reconcile_team_permissions import (
+    apply_team_permissions_plan,
+    diff_team_repository_permissions,
+    estimate_request_seconds,
+    get_team_repository_permissions,
+    plan_team_permissions,
+    reconcile_team_permissions
+)
+from src.make_data.sync_organisation_repos import (
+    find_changed_organisation_repos,
+    load_snapshot,
+    save_snapshot,
+    sync_organisation_repos
+)
+from src.utils.async_github_session import AsyncGithubSession, parse_link_header
+from src.utils.columnar_result import ColumnarResult
+from src.utils.entity_store import EntityStore
+from src.utils.fetch_all_pages import fetch_all_pages
+from src.utils.github_connection import (
+    HTTPConnection,
+    HTTPSConnection,
+    add_connection_hook,
+    close_sessions,
+    get_request_count,
+    get_session,
+    remove_connection_hook,
+    reserve_connections
+)
+from src.utils.http_cache import CachedResponse, HTTPCache
+from src.utils.journal import Journal
 from src.utils.logger import Log, create_logger, logger
-from src.utils.parallelise_dictionary_processing import parallelise_dictionary_processing, parallelise_processing
+from src.utils.metrics import MetricsRegistry, metrics
+from src.utils.parallelise_dictionary_processing import (
+    parallelise_dictionary_checkpointing,
+    parallelise_dictionary_processing,
+    parallelise_dictionary_streaming,
+    parallelise_processing
+)
+from src.utils.rate_limiter import RateLimiter
+from src.utils.request_accountant import RequestAccountant
+from src.utils.retry_policy import DeadLetter, RetryPolicy
+from src.utils.worker_pool import WorkerPool
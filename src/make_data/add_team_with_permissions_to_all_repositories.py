@@ -1,9 +1,13 @@
 from functools import partial
 from github import PaginatedList, Repository, Team
 from src.make_data.extract_attribute_from_dict_of_paginated_lists import extract_attribute_from_paginated_list_elements
+from src.make_data.reconcile_team_permissions import estimate_request_seconds, plan_team_permissions
+from src.utils.journal import Journal
 from src.utils.logger import Log, logger
-from src.utils.parallelise_dictionary_processing import parallelise_processing
-from typing import List, Union
+from src.utils.parallelise_dictionary_processing import parallelise_dictionary_checkpointing, parallelise_processing
+from src.utils.retry_policy import DeadLetter, RetryPolicy
+from src.utils.worker_pool import WorkerPool
+from typing import Any, Container, Dict, List, Optional, Union
 import multiprocessing as mp
 
 
@@ -51,10 +55,76 @@ def add_team_with_permissions_to_repository(team: Team.Team, permission: str,
     team.set_repo_permission(repository, permission)
 
 
+@Log(logger, level="debug")
+def _add_team_with_permissions_to_key_repository(team: Team.Team, permission: str,
+                                                 repository: Repository.Repository) -> Dict[str, str]:
+    """Add a team to a GitHub repository with ``add_team_with_permissions_to_repository``, keyed by its full name.
+
+    Args:
+        team: A ``github.Team.Team`` object containing the GitHub organisation team to add to the repository with set
+            permissions.
+        permission: A permission level to provide the ``team`` within ``repository``.
+        repository: A ``github.Repository.Repository`` object containing the GitHub organisation repository of interest.
+
+    Returns:
+        A dictionary of one key-value pair, where the key is the full name of ``repository``, and the value is
+        ``permission``.
+
+    """
+    add_team_with_permissions_to_repository(team, permission, repository)
+    return {repository.full_name: permission}
+
+
+@Log(logger, level="debug")
+def _cost_plan_without_reconciling(plan: Dict[str, Any], cpu_count: int,
+                                   skip: Container[str] = ()) -> Dict[str, Any]:
+    """Replace the cost of applying a plan with the cost of adding the team to each repository without reconciling.
+
+    A plan made by ``plan_team_permissions`` counts the API requests of ``apply_team_permissions_plan``. Without a dry
+    run, ``add_team_with_permissions_to_all_repositories`` instead requests the teams of every repository, adds the team
+    where it is missing, and sets its permission level for every repository, so the plan's counts are replaced.
+
+    Args:
+        plan: A plan made by ``plan_team_permissions``.
+        cpu_count: The number of CPUs to parallelise the API requests.
+        skip: Default: (). The full names of repositories that will be skipped, for example as they are already
+            recorded in a ``Journal`` object.
+
+    Returns:
+        A copy of ``plan``, where 'api_requests' has the number of 'read', and 'write' API requests to add the team
+        to each repository not in ``skip``, and the 'budget' of 'rate_limit', and 'estimated_seconds' are updated to
+        match.
+
+    """
+
+    # Get the repositories that will be processed, and the repositories the team will be added to
+    repositories = [r for r in [*plan["add"], *plan["change"], *plan["no_op"]] if r not in skip]
+    additions = [r for r in plan["add"] if r not in skip]
+
+    # Count one page of teams per repository, and a request to set the permission level for each repository, plus a
+    # request to add the team where it is missing
+    read_requests, write_requests = len(repositories), len(repositories) + len(additions)
+    remaining = plan["rate_limit"]["remaining"]
+
+    # Return a copy of the plan with the updated cost
+    return {
+        **plan,
+        "api_requests": {"read": read_requests, "write": write_requests},
+        "rate_limit": {**plan["rate_limit"],
+                       "budget": (read_requests + write_requests) / remaining if remaining else None},
+        "estimated_seconds": estimate_request_seconds(read_requests + write_requests, cpu_count),
+    }
+
+
 @Log(logger)
 def add_team_with_permissions_to_all_repositories(team: Team.Team, permission: str,
                                                   repositories: Union[List, PaginatedList.PaginatedList],
-                                                  cpu_count: int = mp.cpu_count(), max_chunksize: int = 1000) -> None:
+                                                  cpu_count: int = mp.cpu_count(), max_chunksize: int = 1000,
+                                                  executor: Union[str, WorkerPool] = "thread", dry_run: bool = False,
+                                                  journal: Optional[Journal] = None,
+                                                  retry_policy: Optional[RetryPolicy] = None,
+                                                  dead_letters: Optional[List[DeadLetter]] = None,
+                                                  adaptive_chunks: bool = False) -> Optional[Dict[str, Any]]:
     """Add a team to a list of GitHub repositories if it isn't already added, and set its permission level.
 
     Args:
@@ -66,17 +136,49 @@ def add_team_with_permissions_to_all_repositories(team: Team.Team, permission: s
             ``github.Repository.Repository`` objects of the GitHub organisation repositories.
         cpu_count: Default: maximum number of CPUs. The number of CPUs to parallelise the processing.
         max_chunksize: Default: 1000. The maximum number of iterables per CPU.
+        executor: Default: 'thread'. The executor backend to parallelise the processing; either 'thread',
+            'process', or a ``WorkerPool`` object to re-use its workers.
+        dry_run: Default: False. If True, no changes are made; instead, a plan of the changes is made with
+            ``plan_team_permissions``, and returned. The plan's 'api_requests', and 'estimated_seconds' are the cost
+            of running this function without a dry run; the plan can instead be applied later with the fewer API
+            requests of ``apply_team_permissions_plan``.
+        journal: Default: None. A ``Journal`` object. If given, each repository's full name is recorded in ``journal``
+            as soon as the team is added to it, and repositories already in ``journal`` are skipped; a run that failed
+            part way through then resumes from where it stopped.
+        retry_policy: Default: None. A ``RetryPolicy`` object. If given, each repository is retried on transient API
+            errors, and repositories that still fail are skipped, instead of aborting the run.
+        dead_letters: Default: None. A list, where a ``DeadLetter`` object is appended for each repository skipped by
+            ``retry_policy``.
+        adaptive_chunks: Default: False. If True, repositories are sent to the workers in chunks sized from the
+            observed time per repository, so a few slow repositories do not hold up a large chunk of other ones.
 
     Returns:
-        None. Each repository in ``repositories`` will have ``team`` with ``permission`` access to it.
+        None. Each repository in ``repositories`` will have ``team`` with ``permission`` access to it. If ``dry_run``
+        is True, the plan of the changes is returned instead, and no changes are made.
 
     .. _documentation:
         https://docs.github.com/en/free-pro-team@latest/rest/reference/teams#add-or-update-team-repository-permissions
 
     """
 
+    # Return the plan of the changes, without making them, if required
+    if dry_run:
+        plan = plan_team_permissions(team, permission, repositories, cpu_count, executor)
+        return _cost_plan_without_reconciling(plan, cpu_count, () if journal is None else journal)
+
+    # Add the team to each repository not already in the journal, recording each repository as it completes, if
+    # required
+    if journal is not None:
+        partial_add_team_with_permissions_to_key_repository = partial(_add_team_with_permissions_to_key_repository,
+                                                                      team, permission)
+        _ = parallelise_dictionary_checkpointing(partial_add_team_with_permissions_to_key_repository, repositories,
+                                                 journal, lambda r: r.full_name, cpu_count, executor=executor,
+                                                 retry_policy=retry_policy, dead_letters=dead_letters)
+        return None
+
     # Partially complete the first two arguments of the `add_team_with_permissions_to_repository` function
     partial_add_team_with_permissions_to_repository = partial(add_team_with_permissions_to_repository, team, permission)
 
     # Parallelise the request to set all repositories with `team` having `permission` permissions
-    _ = parallelise_processing(partial_add_team_with_permissions_to_repository, repositories, cpu_count, max_chunksize)
+    _ = parallelise_processing(partial_add_team_with_permissions_to_repository, repositories, cpu_count, max_chunksize,
+                               executor, retry_policy, dead_letters, adaptive_chunks)
@@ -1,29 +1,38 @@
+from collections import ChainMap
 from functools import partial
-from github import PaginatedList, UnknownObjectException
+from github import Github, GithubObject, PaginatedList, UnknownObjectException
 from src.utils.logger import Log, logger
 from src.utils.parallelise_dictionary_processing import parallelise_dictionary_processing
-from typing import Any, Dict, List, Optional, Union
+from src.utils.worker_pool import WorkerPool
+from typing import Any, Dict, List, Mapping, MutableMapping, Optional, Union
 
 
 @Log(logger, level="debug")
-def extract_attribute_from_paginated_list_elements(pl: Union[List, PaginatedList.PaginatedList],
+def extract_attribute_from_paginated_list_elements(pl: Optional[Union[List, PaginatedList.PaginatedList]],
                                                    attribute_name: str) -> Optional[List[Any]]:
     """Extract a given attribute from the elements of a ``github.PaginatedList.PaginatedList`` object.
 
     Args:
-        pl: A list or ``github.PaginatedList.PaginatedList`` object.
-        attribute_name: A valid attribute of the elements in ``pl``.
+        pl: A list or ``github.PaginatedList.PaginatedList`` object. Elements can also be dictionaries, for example
+            from ``get_items_for_all_repos`` with ``materialise=True``. If None, None is returned.
+        attribute_name: A valid attribute of the elements in ``pl``, or a key if the elements are dictionaries.
 
     Returns:
-        A list of the attribute ``attribute_name`` for each of the elements in ``pl``. If an error was returned in the
+        A list of the attribute ``attribute_name`` for each of the elements in ``pl``. Elements that are dictionaries
+        without the key ``attribute_name`` give None, as they cannot be completed like PyGithub objects; use
+        ``batch_extract_attribute_from_dict_of_paginated_lists`` to complete them. If an error was returned in the
         original API request, None is returned instead.
 
     """
 
+    # Return None if there are no elements, for example if an error was already returned when materialising them
+    if pl is None:
+        return None
+
     # Return the attribute attribute_name from each element of pl; if an error was returned in the API request, return
     # None instead of raising the UnknownObjectException exception
     try:
-        return [getattr(e, attribute_name) for e in pl]
+        return [e.get(attribute_name) if isinstance(e, Mapping) else getattr(e, attribute_name) for e in pl]
     except UnknownObjectException:
         return None
 
@@ -51,10 +60,165 @@ def _extract_attributes_from_key_paginated_list_pair(pl: Dict[Any, Union[List, P
     return {dictionary_key: extract_attribute_from_paginated_list_elements(pl[dictionary_key], attribute_name)}
 
 
+@Log(logger, level="debug")
+def _list_key_paginated_list_pair(pl: Dict[Any, Union[List, PaginatedList.PaginatedList]],
+                                  dictionary_key: Any) -> Dict[Any, Optional[List[Any]]]:
+    """Page through a list or ``github.PaginatedList.PaginatedList`` object in a key-value pair.
+
+    Args:
+        pl: A dictionary of keys and values, where the values are lists or ``github.PaginatedList.PaginatedList``
+            objects.
+        dictionary_key: A valid key in ``pl``.
+
+    Returns:
+        A dictionary of one key-value pair, where the key is ``dictionary_key``, and the value is a list of all the
+        elements in ``pl[dictionary_key]``. If an error was returned in the original API request, or the value is None,
+        None is returned instead as the value.
+
+    """
+    try:
+        return {dictionary_key: None if pl[dictionary_key] is None else list(pl[dictionary_key])}
+    except UnknownObjectException:
+        return {dictionary_key: None}
+
+
+def _get_data(element: Any) -> Optional[MutableMapping[str, Any]]:
+    """Get the data of an element that can be completed; the raw data of a PyGithub object, or a dictionary itself."""
+    if isinstance(element, GithubObject.CompletableGithubObject):
+        return element._rawData
+    return element if isinstance(element, MutableMapping) else None
+
+
+def _is_missing_attribute(element: Any, attribute_name: str) -> bool:
+    """Check if an element is a PyGithub object, or dictionary with an API URL, missing an attribute from its data."""
+    data = _get_data(element)
+    return data is not None and attribute_name not in data and bool(data.get("url"))
+
+
+@Log(logger, level="debug")
+def _complete_element(g: Optional[Github],
+                      element: Union[GithubObject.CompletableGithubObject, MutableMapping[str, Any]]
+                      ) -> Dict[str, Optional[Dict[str, Any]]]:
+    """Request the complete data of a PyGithub object, or a dictionary of its data from its API URL.
+
+    The data is requested explicitly, rather than by getting a missing attribute, as PyGithub objects passed to
+    worker processes no longer complete themselves lazily.
+
+    Args:
+        g: A ``github.Github`` object to request the data of dictionaries with. PyGithub objects are requested with
+            their own connection.
+        element: A ``github.GithubObject.CompletableGithubObject`` object, for example a ``github.NamedUser.NamedUser``
+            object from a ``github.PaginatedList.PaginatedList`` object, or a dictionary of its data, for example from
+            ``get_items_for_all_repos`` with ``materialise=True``.
+
+    Returns:
+        A dictionary of one key-value pair, where the key is the API URL of ``element``, and the value is the
+        dictionary of its complete data. If an error was returned in the API request, for example as the user has been
+        deleted, the value is None instead.
+
+    """
+    url = _get_data(element)["url"]
+    requester = element._requester if isinstance(element, GithubObject.GithubObject) else g._Github__requester
+    try:
+        _, data = requester.requestJsonAndCheck("GET", url)
+    except UnknownObjectException:
+        data = None
+    return {url: data}
+
+
+@Log(logger)
+def batch_extract_attribute_from_dict_of_paginated_lists(
+        pl: Dict[Any, Union[List, PaginatedList.PaginatedList]], attribute_name: str, cpu_count: int = 1,
+        max_chunksize: int = 1000, executor: Union[str, WorkerPool] = "thread",
+        cache: Optional[MutableMapping[str, Dict[str, Any]]] = None, g: Optional[Github] = None
+) -> Dict:
+    """Extract a given attribute from ``github.PaginatedList.PaginatedList`` object(s) in a dictionary, in batches.
+
+    If ``attribute_name`` is not in the API response of a list, for example the ``name`` of repository contributors,
+    PyGithub sends another API request for each element to get it. Instead, the elements missing ``attribute_name``
+    are deduplicated across all the lists by their API URL, and each unique element is requested once, in parallel.
+    The completed data is then filled back into every duplicate element.
+
+    Elements can also be dictionaries of data with an API ``url``, for example from ``get_items_for_all_repos`` with
+    ``materialise=True``, a ``Journal`` object, or an ``EntityStore`` object. These are completed in the same way, with
+    the ``github.Github`` object ``g``.
+
+    Args:
+        pl: A dictionary of keys and values, where the values are lists or ``github.PaginatedList.PaginatedList``
+            objects, or lists of dictionaries.
+        attribute_name: A valid attribute of the elements in ``pl``.
+        cpu_count: Default: 1. The number of CPUs to parallelise the API requests. Set to one because of `GitHub API
+            abuse rate limits`__; this can be raised safely once a ``RateLimiter`` object has been added with
+            ``add_connection_hook``.
+        max_chunksize: Default: 1000. The maximum number of elements per CPU to request.
+        executor: Default: 'thread'. The executor backend to parallelise the API requests; either 'thread',
+            'process', or a ``WorkerPool`` object to re-use its workers.
+        cache: Default: None. A dictionary where keys are API URLs, and values are the completed data of the
+            element. Elements in ``cache`` with ``attribute_name`` are not requested again, and newly completed
+            elements are added to it, so it can be re-used across calls, for example to extract several attributes.
+            An ``EntityStore`` object can be used, to share the completed data with interned results.
+        g: Default: None. A ``github.Github`` object to complete elements that are dictionaries. Required if any
+            dictionary is missing ``attribute_name``.
+
+    Returns:
+        A dictionary of key-value pairs, where the keys are the same as in ``pl``, but the values are the desired
+        attribute ``attribute_name`` from the ``github.PaginatedList.PaginatedList`` values of ``pl``. If an error was
+        returned in the original API request, or in the API request to complete any of its elements, None is returned
+        instead as the value.
+
+    Raises:
+        ValueError: If an element that is a dictionary is missing ``attribute_name``, and ``g`` is None.
+
+    .. _limits:
+        https://docs.github.com/en/rest/guides/best-practices-for-integrators#dealing-with-abuse-rate-limits
+
+    __ limits_
+
+    """
+
+    # Page through all the lists in parallel
+    elements = parallelise_dictionary_processing(partial(_list_key_paginated_list_pair, pl), pl.keys(), cpu_count,
+                                                 max_chunksize, executor)
+
+    # Get the elements missing `attribute_name` from their data, keeping one element per API URL not in the cache
+    cache = {} if cache is None else cache
+    missing = [e for v in elements.values() for e in (v or []) if _is_missing_attribute(e, attribute_name)]
+    unique = {_get_data(e)["url"]: e for e in missing if attribute_name not in cache.get(_get_data(e)["url"], {})}
+    if g is None and any(not isinstance(e, GithubObject.GithubObject) for e in unique.values()):
+        raise ValueError(f"Elements that are dictionaries are missing {attribute_name!r}; pass a github.Github object "
+                         f"as g to complete them")
+
+    # Complete each unique element in parallel, keeping the API URLs of any elements that could not be completed
+    completed = parallelise_dictionary_processing(partial(_complete_element, g), unique.values(), cpu_count,
+                                                  max_chunksize, executor) if unique else {}
+    not_found = {url for url, data in completed.items() if data is None}
+    cache.update({url: data for url, data in completed.items() if data is not None})
+
+    # Fill the completed data back into all the duplicate elements, and, like completing each element lazily, return
+    # None for the lists with an element that could not be completed
+    for e in missing:
+        url = _get_data(e)["url"]
+        if url in not_found:
+            continue
+        if isinstance(e, GithubObject.GithubObject):
+            e._storeAndUseAttributes(e._headers, {**e._rawData, **cache[url]})
+        else:
+            # Fill the data of an `EntityStore` reference into its shared data, rather than its relationship fields
+            (e.maps[-1] if isinstance(e, ChainMap) else e).update({k: v for k, v in cache[url].items() if k not in e})
+    failed = {k for k, v in elements.items()
+              if any(_is_missing_attribute(e, attribute_name) and _get_data(e)["url"] in not_found for e in v or [])}
+
+    # Return the attribute attribute_name from each element
+    return {k: None if k in failed else extract_attribute_from_paginated_list_elements(v, attribute_name)
+            for k, v in elements.items()}
+
+
 @Log(logger)
 def extract_attribute_from_dict_of_paginated_lists(pl: Dict[Any, Union[List, PaginatedList.PaginatedList]],
                                                    attribute_name: str, cpu_count: int = 1,
-                                                   max_chunksize: int = 1000) -> Dict:
+                                                   max_chunksize: int = 1000,
+                                                   executor: Union[str, WorkerPool] = "thread",
+                                                   batch_completion: bool = False, g: Optional[Github] = None) -> Dict:
     """Extract a given attribute from ``github.PaginatedList.PaginatedList`` object(s) in a dictionary.
 
     Args:
@@ -62,8 +226,15 @@ def extract_attribute_from_dict_of_paginated_lists(pl: Dict[Any, Union[List, Pag
             objects.
         attribute_name: A valid attribute of the elements in ``pl``.
         cpu_count: Default: 1. The number of CPUs to parallelise the API requests. Set to one because of `GitHub API
-            abuse rate limits`__.
+            abuse rate limits`__; this can be raised safely once a ``RateLimiter`` object has been added with
+            ``add_connection_hook``.
         max_chunksize: Default: 1000. The maximum number of repositories per CPU to call.
+        executor: Default: 'thread'. The executor backend to parallelise the API requests; either 'thread',
+            'process', or a ``WorkerPool`` object to re-use its workers.
+        batch_completion: Default: False. If True, use ``batch_extract_attribute_from_dict_of_paginated_lists`` to
+            request each unique element missing ``attribute_name`` from its data once, rather than once per element.
+        g: Default: None. A ``github.Github`` object to complete elements that are dictionaries, if
+            ``batch_completion`` is True. Otherwise, dictionaries missing ``attribute_name`` give None.
 
     Returns:
         A dictionary of key-value pairs, where the keys are the same as in ``pl``, but the values are the desired
@@ -76,13 +247,18 @@ def extract_attribute_from_dict_of_paginated_lists(pl: Dict[Any, Union[List, Pag
 
     """
 
+    # Batch the API requests needed to complete elements missing attribute_name, if required
+    if batch_completion:
+        return batch_extract_attribute_from_dict_of_paginated_lists(pl, attribute_name, cpu_count, max_chunksize,
+                                                                    executor, g=g)
+
     # Partially complete arguments of the _extract_attributes_from_key_paginated_list_pair function
     partial_extract_attributes_from_key_paginated_list_pair = partial(_extract_attributes_from_key_paginated_list_pair,
                                                                       pl, attribute_name)
 
     # Parallelise the attribute extraction, and return the compiled output
     return parallelise_dictionary_processing(partial_extract_attributes_from_key_paginated_list_pair,
-                                             pl.keys(), cpu_count, max_chunksize)
+                                             pl.keys(), cpu_count, max_chunksize, executor)
 
 
 if __name__ == "__main__":
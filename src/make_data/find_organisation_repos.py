@@ -1,11 +1,16 @@
 from github import Github, PaginatedList, Repository
+from src.utils.fetch_all_pages import fetch_all_pages
 from src.utils.logger import Log, logger
-from typing import Union
+from src.utils.worker_pool import WorkerPool
+from typing import List, Union
+import multiprocessing as mp
 
 
 @Log(logger)
 def find_organisation_repos(g: Github, organisation: str, repository_type: str = "all", sort: str = "full_name",
-                            direction: str = "asc") -> Union[PaginatedList.PaginatedList, Repository.Repository]:
+                            direction: str = "asc", parallel_pages: bool = False, cpu_count: int = mp.cpu_count(),
+                            executor: Union[str, WorkerPool] = "thread"
+                            ) -> Union[PaginatedList.PaginatedList, Repository.Repository, List[Repository.Repository]]:
     """Get repositories for a GitHub organisation.
 
     For accepted string values for ``repository_type``, ``sort``, and ``direction``, see the
@@ -18,10 +23,17 @@ def find_organisation_repos(g: Github, organisation: str, repository_type: str =
         repository_type: The repository types required.
         sort: How the return should be sorted.
         direction: The direction of ``sort``.
+        parallel_pages: Default: False. If True, all pages of repositories are requested in parallel with
+            ``fetch_all_pages``, and returned as a list.
+        cpu_count: Default: maximum number of CPUs. The number of CPUs to parallelise the API requests, if
+            ``parallel_pages`` is True.
+        executor: Default: 'thread'. The executor backend to parallelise the API requests, if ``parallel_pages`` is
+            True; either 'thread', 'process', or a ``WorkerPool`` object to re-use its workers.
 
     Returns:
         A ``github.PaginatedList.PaginatedList`` or ``github.Repository.Repository`` object containing the GitHub
-        repositories in a GitHub organisation.
+        repositories in a GitHub organisation. If ``parallel_pages`` is True, a list of ``github.Repository.Repository``
+        objects instead.
 
     .. _reference:
         https://docs.github.com/en/free-pro-team@latest/rest/reference/repos#list-organization-repositories
@@ -33,8 +45,11 @@ def find_organisation_repos(g: Github, organisation: str, repository_type: str =
     # Get the organisation
     g_organisation = g.get_organization(organisation)
 
-    # Return all repositories
-    return g_organisation.get_repos(repository_type, sort, direction)
+    # Return all repositories, requesting all their pages in parallel if required
+    organisation_repositories = g_organisation.get_repos(repository_type, sort, direction)
+    if parallel_pages:
+        return fetch_all_pages(organisation_repositories, cpu_count, executor)
+    return organisation_repositories
 
 
 if __name__ == "__main__":
@@ -0,0 +1,49 @@
+from src.utils.async_github_session import AsyncGithubSession
+from src.utils.logger import Log, logger
+from typing import Any, Dict, List
+
+
+@Log(logger)
+async def find_organisation_repos_async(session: AsyncGithubSession, organisation: str, repository_type: str = "all",
+                                        sort: str = "full_name", direction: str = "asc") -> List[Dict[str, Any]]:
+    """Get repositories for a GitHub organisation asynchronously.
+
+    An asynchronous version of ``find_organisation_repos``, where all pages of repositories after the first are
+    requested concurrently. For accepted string values for ``repository_type``, ``sort``, and ``direction``, see the
+    `GitHub REST API Reference`__.
+
+    Args:
+        session: An open ``AsyncGithubSession`` object initialised with a GitHub personal access token with the
+            necessary permissions.
+        organisation: A GitHub organisation name.
+        repository_type: The repository types required.
+        sort: How the return should be sorted.
+        direction: The direction of ``sort``.
+
+    Returns:
+        A list of the GitHub API responses for each repository in a GitHub organisation.
+
+    .. _reference:
+        https://docs.github.com/en/free-pro-team@latest/rest/reference/repos#list-organization-repositories
+
+    __ reference_
+
+    """
+    return await session.get_all_pages(f"/orgs/{organisation}/repos",
+                                       {"type": repository_type, "sort": sort, "direction": direction})
+
+
+if __name__ == "__main__":
+    import asyncio
+    import os
+
+    async def main():
+
+        # Open an asynchronous session to gain access to GitHub REST APIv3
+        async with AsyncGithubSession(os.getenv("GITHUB_API_KEY"), per_page=100) as session:
+
+            # Get all the repositories for GITHUB_ORGANISATION
+            return await find_organisation_repos_async(session, os.getenv("GITHUB_ORGANISATION"))
+
+    # Run the asynchronous requests
+    organisation_repositories = asyncio.run(main())
@@ -1,15 +1,58 @@
+from collections.abc import Sized
 from functools import partial
-from github import Github, PaginatedList
+from github import Github, PaginatedList, Repository
 from src.make_data.get_items_for_repo import get_items_for_repo
+from src.utils.entity_store import EntityStore
+from src.utils.journal import Journal
 from src.utils.logger import Log, logger
-from src.utils.parallelise_dictionary_processing import parallelise_dictionary_processing
-from typing import Any, Dict, List, Union
+from src.utils.parallelise_dictionary_processing import (
+    parallelise_dictionary_checkpointing,
+    parallelise_dictionary_processing,
+    parallelise_dictionary_streaming
+)
+from src.utils.retry_policy import DeadLetter, RetryPolicy
+from src.utils.worker_pool import WorkerPool
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
 import multiprocessing as mp
 
 
+def get_repository_name(repository: Union[str, Repository.Repository]) -> str:
+    """Get the full name of a repository, given as a full name, or a ``github.Repository.Repository`` object."""
+    return repository if isinstance(repository, str) else repository.full_name
+
+
+def get_repository_iterable(repositories: Iterable[Repository.Repository],
+                            refetch_repositories: bool = True) -> Iterable[Union[str, Repository.Repository]]:
+    """Get the repositories, or their full names, to parallelise, keeping their length if they have one.
+
+    Lists, and tuples are returned as a list of full names, or unchanged, so their length is known when choosing the
+    chunk size. Repositories without a length, such as a ``github.PaginatedList.PaginatedList`` object, are returned
+    as a lazy iterator, so API requests for the first repositories start whilst later pages are listed.
+
+    Args:
+        repositories: A list of ``github.Repository.Repository`` repositories as a list, or an iterable such as a
+            ``github.PaginatedList.PaginatedList`` object.
+        refetch_repositories: Default: True. If True, the full names of the repositories are returned, otherwise the
+            repositories themselves.
+
+    Returns:
+        The full names of ``repositories`` if ``refetch_repositories`` is True, otherwise ``repositories``; as a list
+        or ``repositories`` itself if ``repositories`` has a length, otherwise as an iterator.
+
+    """
+    if isinstance(repositories, Sized):
+        return [r.full_name for r in repositories] if refetch_repositories else repositories
+    return (r.full_name for r in repositories) if refetch_repositories else iter(repositories)
+
+
 @Log(logger)
 def get_items_for_all_repos(g: Github, method_name: str, repositories: Union[List, PaginatedList.PaginatedList],
-                            cpu_count: int = mp.cpu_count(), max_chunksize: int = 1000) -> Dict[str, List[Any]]:
+                            cpu_count: int = mp.cpu_count(), max_chunksize: int = 1000,
+                            executor: Union[str, WorkerPool] = "thread", refetch_repositories: bool = True,
+                            materialise: bool = False, entity_store: Optional[EntityStore] = None,
+                            journal: Optional[Journal] = None, retry_policy: Optional[RetryPolicy] = None,
+                            dead_letters: Optional[List[DeadLetter]] = None,
+                            adaptive_chunks: bool = False) -> Dict[str, Any]:
     """Get all the items for a list of GitHub repositories, where items is the output from ``method_name``.
 
     Args:
@@ -17,24 +60,128 @@ def get_items_for_all_repos(g: Github, method_name: str, repositories: Union[Lis
             necessary permissions.
         method_name: A method of the ``github.Repository.Repository`` class.
         repositories: A list of ``github.Repository.Repository`` repositories as a list or
-            ``github.PaginatedList.PaginatedList`` object.
+            ``github.PaginatedList.PaginatedList`` object. A ``github.PaginatedList.PaginatedList`` object is paged
+            through lazily, so items are requested for each repository as soon as it is listed.
         cpu_count: Default: maximum number of CPUs. The number of CPUs to parallelise the API requests.
-        max_chunksize: Default: 1000. The maximum number of repositories per CPU to call.
+        max_chunksize: Default: 1000. The maximum number of repositories per CPU to call. Applies if ``repositories``
+            has a length, such as a list, or ``adaptive_chunks`` is True. Otherwise, for example for a
+            ``github.PaginatedList.PaginatedList`` object, repositories are sent to the workers one at a time, as their
+            number is not known in advance. Ignored if ``journal`` is given.
+        executor: Default: 'thread'. The executor backend to parallelise the API requests; either 'thread',
+            'process', or a ``WorkerPool`` object to re-use its workers.
+        refetch_repositories: Default: True. If True, each repository is requested again by its full name before
+            calling ``method_name``. If False, ``method_name`` is called on the ``github.Repository.Repository`` objects
+            in ``repositories`` directly, saving one API request per repository.
+        materialise: Default: False. If True, each repository's items are fully paged through, and converted to lists
+            of dictionaries inside the workers, so all API requests are sent in parallel. If False, the items are
+            usually lazy ``github.PaginatedList.PaginatedList`` objects, whose pages are requested when iterated.
+        entity_store: Default: None. An ``EntityStore`` object. If given, each repository's items are replaced with
+            references to the shared data of each user, team, or other entity in ``entity_store``, so entities that
+            appear in many repositories are only stored once. This also materialises the items, so they are paged
+            through in parallel, and a repository returning an error has None as its items.
+        journal: Default: None. A ``Journal`` object. If given, each repository's items are recorded in ``journal`` as
+            soon as they are returned, and repositories already in ``journal`` are skipped, and their items replayed
+            from it; a sweep that failed part way through then resumes from where it stopped. This also materialises
+            the items.
+        retry_policy: Default: None. A ``RetryPolicy`` object. If given, each repository is retried on transient API
+            errors, and repositories that still fail are left out of the output, instead of aborting the sweep. Only
+            applies to API requests sent whilst getting the items, for example when ``materialise`` is True.
+        dead_letters: Default: None. A list, where a ``DeadLetter`` object is appended for each repository left out of
+            the output by ``retry_policy``.
+        adaptive_chunks: Default: False. If True, repositories are sent to the workers in chunks sized from the
+            observed time per repository, so a few large repositories do not hold up a large chunk of small ones. Only
+            useful if ``materialise`` is True, as otherwise little time is spent per repository.
 
     Returns:
-        A dictionary where the GitHub repositories' full names are keys, and their items are values.
+        A dictionary where the GitHub repositories' full names are keys, and their items are values. If
+        ``materialise`` is True, or ``entity_store``, or ``journal`` is given, the values are lists of dictionaries, or
+        None if an error was returned in the API request.
+
+    """
+
+    # Compile the full names from each GitHub repository in repositories, unless the repositories are used directly;
+    # repositories without a length are compiled lazily, so API requests for the first repositories start whilst later
+    # pages of repositories are listed
+    repositories = get_repository_iterable(repositories, refetch_repositories)
+
+    # Partially complete the get_items_for_repo function with g, method_name, and materialise; items must be
+    # materialised to be recorded in a journal, or interned in the workers, rather than paged through in this process
+    partial_get_items_for_repo = partial(get_items_for_repo, g, method_name,
+                                         materialise=materialise or journal is not None or entity_store is not None)
+
+    # Parallelise the API request, checkpointing each repository if required
+    if journal is None:
+        items = parallelise_dictionary_processing(partial_get_items_for_repo, repositories, cpu_count, max_chunksize,
+                                                  executor, retry_policy, dead_letters, adaptive_chunks)
+    else:
+        items = parallelise_dictionary_checkpointing(partial_get_items_for_repo, repositories, journal,
+                                                     get_repository_name, cpu_count, executor=executor,
+                                                     retry_policy=retry_policy, dead_letters=dead_letters)
+
+    # Return the compiled output, interning the entities in each repository's items if required
+    return items if entity_store is None else entity_store.intern_items(items)
+
+
+def stream_items_for_all_repos(g: Github, method_name: str, repositories: Union[List, PaginatedList.PaginatedList],
+                               cpu_count: int = mp.cpu_count(), max_in_flight: Optional[int] = None,
+                               executor: Union[str, WorkerPool] = "thread",
+                               refetch_repositories: bool = True,
+                               materialise: bool = False,
+                               entity_store: Optional[EntityStore] = None,
+                               retry_policy: Optional[RetryPolicy] = None,
+                               dead_letters: Optional[List[DeadLetter]] = None) -> Iterator[Tuple[str, Any]]:
+    """Stream all the items for a list of GitHub repositories, where items is the output from ``method_name``.
+
+    A streaming version of ``get_items_for_all_repos``; the items for each repository are yielded as soon as they are
+    returned, so they can be written out or processed further whilst the remaining repositories are still requested.
+
+    Args:
+        g: A ``github.Github`` class object initialised with a GitHub username and personal access token with the
+            necessary permissions.
+        method_name: A method of the ``github.Repository.Repository`` class.
+        repositories: A list of ``github.Repository.Repository`` repositories as a list or
+            ``github.PaginatedList.PaginatedList`` object.
+        cpu_count: Default: maximum number of CPUs. The number of CPUs to parallelise the API requests.
+        max_in_flight: Default: None. The maximum number of repositories being requested at once. If None, this is
+            twice ``cpu_count``.
+        executor: Default: 'thread'. The executor backend to parallelise the API requests; either 'thread',
+            'process', or a ``WorkerPool`` object to re-use its workers.
+        refetch_repositories: Default: True. If True, each repository is requested again by its full name before
+            calling ``method_name``. If False, ``method_name`` is called on the ``github.Repository.Repository`` objects
+            in ``repositories`` directly, saving one API request per repository.
+        materialise: Default: False. If True, each repository's items are fully paged through, and converted to lists
+            of dictionaries inside the workers, so all API requests are sent in parallel. If False, the items are
+            usually lazy ``github.PaginatedList.PaginatedList`` objects, whose pages are requested when iterated.
+        entity_store: Default: None. An ``EntityStore`` object. If given, each repository's items are replaced with
+            references to the shared data of each user, team, or other entity in ``entity_store``, so entities that
+            appear in many repositories are only stored once. This also materialises the items, so they are paged
+            through in parallel, and a repository returning an error has None as its items.
+        retry_policy: Default: None. A ``RetryPolicy`` object. If given, each repository is retried on transient API
+            errors, and repositories that still fail are skipped, instead of aborting the sweep.
+        dead_letters: Default: None. A list, where a ``DeadLetter`` object is appended for each repository skipped by
+            ``retry_policy``.
+
+    Yields:
+        Tuples of a GitHub repository's full name, and its items, in the order the API requests finish.
 
     """
 
-    # Compile the full names from each GitHub repository in repositories
-    repositories_full_names = [r.full_name for r in repositories]
+    # Compile the full names from each GitHub repository in repositories, unless the repositories are used directly;
+    # repositories without a length are compiled lazily, so API requests for the first repositories start whilst later
+    # pages of repositories are listed
+    repositories = get_repository_iterable(repositories, refetch_repositories)
 
-    # Partially complete the get_items_for_repo function with g, and method_name
-    partial_get_items_for_repo = partial(get_items_for_repo, g, method_name)
+    # Partially complete the get_items_for_repo function with g, method_name, and materialise; items must be
+    # materialised in the workers to be interned, rather than paged through in this process
+    partial_get_items_for_repo = partial(get_items_for_repo, g, method_name,
+                                         materialise=materialise or entity_store is not None)
 
-    # Parallelise the API request, and return the compiled output
-    return parallelise_dictionary_processing(partial_get_items_for_repo, repositories_full_names, cpu_count,
-                                             max_chunksize)
+    # Parallelise the API request, yielding each repository's items as soon as they are returned, interning the
+    # entities in the items if required
+    for repository_name, items in parallelise_dictionary_streaming(partial_get_items_for_repo, repositories, cpu_count,
+                                                                   max_in_flight, executor, retry_policy,
+                                                                   dead_letters):
+        yield repository_name, items if entity_store is None else entity_store.intern(items)
 
 
 if __name__ == "__main__":
@@ -52,4 +199,5 @@ if __name__ == "__main__":
 
     # Get all the contributors for all repositories, and return a dictionary of key-value pairs of repository full
     # names and contributor lists
-    organisation_contributors = get_items_for_all_repos(github_object, "get_contributors", organisation_repositories)
+    organisation_contributors = get_items_for_all_repos(github_object, "get_contributors", organisation_repositories,
+                                                        refetch_repositories=False, materialise=True)
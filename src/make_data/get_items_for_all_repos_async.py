@@ -0,0 +1,103 @@
+from github import UnknownObjectException
+from src.utils.async_github_session import AsyncGithubSession
+from src.utils.logger import Log, logger
+from typing import Any, Dict, List, Mapping, Optional
+import asyncio
+
+# GitHub REST API endpoints, relative to a repository, for the list methods of the `github.Repository.Repository` class
+REPOSITORY_METHOD_ENDPOINTS = {
+    "get_branches": "branches",
+    "get_collaborators": "collaborators",
+    "get_commits": "commits",
+    "get_contributors": "contributors",
+    "get_deployments": "deployments",
+    "get_forks": "forks",
+    "get_hooks": "hooks",
+    "get_issues": "issues",
+    "get_labels": "labels",
+    "get_milestones": "milestones",
+    "get_pulls": "pulls",
+    "get_releases": "releases",
+    "get_stargazers": "stargazers",
+    "get_subscribers": "subscribers",
+    "get_tags": "tags",
+    "get_teams": "teams",
+}
+
+
+@Log(logger, level="debug")
+async def get_items_for_repo_async(session: AsyncGithubSession, method_name: str,
+                                   repository_name: str) -> Dict[str, Optional[List[Dict[str, Any]]]]:
+    """Get all values of an item for a GitHub repository asynchronously, where items is the output from ``method_name``.
+
+    Args:
+        session: An open ``AsyncGithubSession`` object initialised with a GitHub personal access token with the
+            necessary permissions.
+        method_name: A list method of the ``github.Repository.Repository`` class; see ``REPOSITORY_METHOD_ENDPOINTS``.
+        repository_name: A Github repository full name.
+
+    Returns:
+        A dictionary where the key is the repository name, and the value is a list of the GitHub API responses for
+        each item. If an error was returned in the API request, None is returned instead as the value.
+
+    """
+    try:
+        return {repository_name: await session.get_all_pages(
+            f"/repos/{repository_name}/{REPOSITORY_METHOD_ENDPOINTS[method_name]}"
+        )}
+    except UnknownObjectException:
+        return {repository_name: None}
+
+
+@Log(logger)
+async def get_items_for_all_repos_async(session: AsyncGithubSession, method_name: str,
+                                        repositories: List[Any]) -> Dict[str, Optional[List[Dict[str, Any]]]]:
+    """Asynchronously get all the items for a list of GitHub repositories, where items is the output of ``method_name``.
+
+    An asynchronous version of ``get_items_for_all_repos``. All repositories are requested concurrently over one event
+    loop, with at most ``session.concurrency`` API requests in flight at once.
+
+    Args:
+        session: An open ``AsyncGithubSession`` object initialised with a GitHub personal access token with the
+            necessary permissions.
+        method_name: A list method of the ``github.Repository.Repository`` class; see ``REPOSITORY_METHOD_ENDPOINTS``.
+        repositories: A list of GitHub repositories, either as GitHub API responses, for example from
+            ``find_organisation_repos_async``, or as objects with a ``full_name`` attribute.
+
+    Returns:
+        A dictionary where the GitHub repositories' full names are keys, and a list of the GitHub API responses for
+        their items are values.
+
+    """
+
+    # Check `method_name` has a known GitHub REST API endpoint
+    if method_name not in REPOSITORY_METHOD_ENDPOINTS:
+        raise ValueError(f"Unknown method_name: {method_name!r}; must be one of {sorted(REPOSITORY_METHOD_ENDPOINTS)}")
+
+    # Compile the full names from each GitHub repository in repositories
+    repositories_full_names = [r["full_name"] if isinstance(r, Mapping) else r.full_name for r in repositories]
+
+    # Request all repositories concurrently, and return the compiled output
+    items = await asyncio.gather(*[get_items_for_repo_async(session, method_name, r)
+                                   for r in repositories_full_names])
+    return {k: v for d in items for k, v in d.items()}
+
+
+if __name__ == "__main__":
+    from src.make_data.find_organisation_repos_async import find_organisation_repos_async
+    import os
+
+    async def main():
+
+        # Open an asynchronous session to gain access to GitHub REST APIv3
+        async with AsyncGithubSession(os.getenv("GITHUB_API_KEY"), per_page=100) as session:
+
+            # Get all the repositories for GITHUB_ORGANISATION
+            organisation_repositories = await find_organisation_repos_async(session, os.getenv("GITHUB_ORGANISATION"))
+
+            # Get all the contributors for all repositories, and return a dictionary of key-value pairs of repository
+            # full names and contributor lists
+            return await get_items_for_all_repos_async(session, "get_contributors", organisation_repositories)
+
+    # Run the asynchronous requests
+    organisation_contributors = asyncio.run(main())
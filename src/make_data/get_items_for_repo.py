@@ -1,24 +1,68 @@
-from github import Github
+from github import Github, GithubObject, PaginatedList, UnknownObjectException
+from github.Repository import Repository
 from src.utils.logger import Log, logger
-from typing import Any, Dict
+from typing import Any, Dict, Union
+
+
+def materialise_items(items: Any) -> Any:
+    """Fully page through a ``github.PaginatedList.PaginatedList`` object, and convert its elements to plain data.
+
+    Each element is converted to the dictionary of data returned by the GitHub API for it, so no further API requests
+    are sent when the elements are used later. Plain data is also much cheaper to pass between processes than PyGithub
+    objects.
+
+    Args:
+        items: The output of a ``github.Repository.Repository`` method; usually a
+            ``github.PaginatedList.PaginatedList`` object.
+
+    Returns:
+        If ``items`` is a list or ``github.PaginatedList.PaginatedList`` object, a list of its elements, where PyGithub
+        objects are replaced by dictionaries of their data. If ``items`` is a PyGithub object, a dictionary of its data.
+        Otherwise, ``items`` is returned unchanged.
+
+    """
+    if isinstance(items, (list, PaginatedList.PaginatedList)):
+        return [e._rawData if isinstance(e, GithubObject.GithubObject) else e for e in items]
+    if isinstance(items, GithubObject.GithubObject):
+        return items._rawData
+    return items
 
 
 @Log(logger, level="debug")
-def get_items_for_repo(g: Github, method_name: str, repository_name: str) -> Dict[str, Any]:
+def get_items_for_repo(g: Github, method_name: str, repository: Union[str, Repository],
+                       materialise: bool = False) -> Dict[str, Any]:
     """Get all values of an item for a GitHub repository, where items is the output from ``method_name``.
 
     Args:
         g: A ``github.Github`` class object initialised with a GitHub username and personal access token with the
             necessary permissions.
         method_name: A method of the ``github.Repository.Repository`` class.
-        repository_name: A Github repository name.
+        repository: A Github repository full name, or a ``github.Repository.Repository`` object. If a full name, the
+            repository is requested from the GitHub API first; if an object, ``method_name`` is called on it directly,
+            saving an API request.
+        materialise: Default: False. If True, the result of ``method_name`` is fully paged through, and converted to
+            plain data with ``materialise_items``, so all the API requests are sent by this function.
 
     Returns:
-        A dictionary where the key is the repository name, and the value is the result of executing ``method_name`` on
-        a GitHub repository called ``repository_name``.
+        A dictionary where the key is the repository full name, and the value is the result of executing
+        ``method_name`` on the GitHub repository. If ``materialise`` is True, and an error was returned in the API
+        request, the value is None.
 
     """
-    return {repository_name: getattr(g.get_repo(repository_name), method_name)()}
+
+    # Get the repository, unless a `github.Repository.Repository` object is given
+    repository_name = repository if isinstance(repository, str) else repository.full_name
+    if isinstance(repository, str):
+        repository = g.get_repo(repository)
+
+    # Execute `method_name`, and if required page through all its items; if an error was returned in the API request,
+    # return None instead of raising the UnknownObjectException exception
+    if not materialise:
+        return {repository_name: getattr(repository, method_name)()}
+    try:
+        return {repository_name: materialise_items(getattr(repository, method_name)())}
+    except UnknownObjectException:
+        return {repository_name: None}
 
 
 if __name__ == "__main__":
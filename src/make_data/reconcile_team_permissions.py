@@ -0,0 +1,282 @@
+from functools import partial
+from github import Github, PaginatedList, Repository, Team
+from src.make_data.get_items_for_repo import materialise_items
+from src.utils.fetch_all_pages import fetch_all_pages
+from src.utils.logger import Log, logger
+from src.utils.parallelise_dictionary_processing import parallelise_processing
+from src.utils.rate_limiter import WRITE_VERBS, RateLimiter
+from src.utils.worker_pool import WorkerPool
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Union
+import math
+import multiprocessing as mp
+
+# GitHub repository permission levels for teams, from lowest to highest
+PERMISSION_LEVELS = ("pull", "triage", "push", "maintain", "admin")
+
+
+@Log(logger, level="debug")
+def get_repository_permission(permissions: Optional[Mapping[str, bool]]) -> Optional[str]:
+    """Get the highest permission level from the ``permissions`` data of a GitHub API repository.
+
+    Args:
+        permissions: A dictionary where keys are permission levels, and values are True/False depending on whether the
+            level is granted, for example ``{"admin": False, "push": True, "pull": True}``. If None, no permission
+            levels are granted.
+
+    Returns:
+        The highest permission level granted in ``permissions``, or None if no permission levels are granted.
+
+    """
+    return next((p for p in reversed(PERMISSION_LEVELS) if (permissions or {}).get(p)), None)
+
+
+@Log(logger)
+def get_team_repository_permissions(team: Team.Team, cpu_count: int = mp.cpu_count(),
+                                    executor: Union[str, WorkerPool] = "thread") -> Dict[str, Optional[str]]:
+    """Get the permission level of a GitHub organisation team for all the repositories it has access to.
+
+    The team's repositories, including their permission data, are requested once, with all pages in parallel, rather
+    than requesting the teams of each repository in turn.
+
+    Args:
+        team: A ``github.Team.Team`` object of the GitHub organisation team.
+        cpu_count: Default: maximum number of CPUs. The number of CPUs to parallelise the API requests.
+        executor: Default: 'thread'. The executor backend to parallelise the API requests; either 'thread',
+            'process', or a ``WorkerPool`` object to re-use its workers.
+
+    Returns:
+        A dictionary where the keys are the full names of the GitHub repositories ``team`` has access to, and the
+        values are ``team``'s permission level for the repository.
+
+    """
+
+    # Get all the team's repositories, requesting all pages in parallel, and convert them to dictionaries of data
+    team_repositories = team.get_repos()
+    if isinstance(team_repositories, PaginatedList.PaginatedList):
+        team_repositories = fetch_all_pages(team_repositories, cpu_count, executor)
+
+    # Return the permission level for each repository
+    return {r["full_name"]: get_repository_permission(r.get("permissions"))
+            for r in materialise_items(team_repositories)}
+
+
+@Log(logger)
+def diff_team_repository_permissions(current_permissions: Mapping[str, Optional[str]], permission: str,
+                                     repository_names: Iterable[str]) -> Dict[str, Optional[str]]:
+    """Compare the current permission levels of a GitHub organisation team against a desired permission level.
+
+    Args:
+        current_permissions: A dictionary where keys are GitHub repository full names, and values are the team's
+            current permission level for the repository, for example from ``get_team_repository_permissions``.
+        permission: The desired permission level of the team for all repositories in ``repository_names``.
+        repository_names: The full names of the GitHub repositories the team should have ``permission`` access to.
+
+    Returns:
+        A dictionary of the GitHub repositories that need changing, where keys are the repository full names, and
+        values are the team's current permission level for the repository, or None if the team has no access to it.
+
+    """
+    return {r: current_permissions.get(r) for r in repository_names if current_permissions.get(r) != permission}
+
+
+@Log(logger, level="debug")
+def set_team_repository_permission(team: Team.Team, permission: str, repository: Repository.Repository) -> None:
+    """Set the permission level of a GitHub organisation team for a GitHub repository, adding the team if needed.
+
+    Args:
+        team: A ``github.Team.Team`` object of the GitHub organisation team.
+        permission: A permission level to provide ``team`` within ``repository``.
+        repository: A ``github.Repository.Repository`` object of the GitHub repository.
+
+    Returns:
+        None. ``repository`` will have ``team`` with ``permission`` access to it.
+
+    """
+    team.set_repo_permission(repository, permission)
+
+
+@Log(logger)
+def reconcile_team_permissions(team: Team.Team, permission: str,
+                               repositories: Union[List, PaginatedList.PaginatedList],
+                               cpu_count: int = mp.cpu_count(), max_chunksize: int = 1000,
+                               executor: Union[str, WorkerPool] = "thread") -> Dict[str, Optional[str]]:
+    """Give a GitHub organisation team a permission level for a list of GitHub repositories, only changing what differs.
+
+    A diff-based replacement for ``add_team_with_permissions_to_all_repositories``. Instead of requesting the teams of
+    every repository, and then adding the team, and setting its permission level for every repository, the team's
+    current permission levels are requested once. Only repositories where the team has a different permission level,
+    or no access, are then changed, with a single API request each. Re-running on repositories that already have the
+    desired permission level only costs the requests to page through the team's repositories.
+
+    Args:
+        team: A ``github.Team.Team`` object of the GitHub organisation team.
+        permission: A permission level to provide ``team`` within each repository. See the GitHub API documentation_
+            for possible options.
+        repositories: A list or ``github.PaginatedList.PaginatedList`` objects containing
+            ``github.Repository.Repository`` objects of the GitHub organisation repositories.
+        cpu_count: Default: maximum number of CPUs. The number of CPUs to parallelise the API requests.
+        max_chunksize: Default: 1000. The maximum number of repositories per CPU to change.
+        executor: Default: 'thread'. The executor backend to parallelise the API requests; either 'thread',
+            'process', or a ``WorkerPool`` object to re-use its workers.
+
+    Returns:
+        A dictionary of the GitHub repositories that were changed, where keys are the repository full names, and values
+        are the team's previous permission level for the repository, or None if the team had no access to it.
+
+    .. _documentation:
+        https://docs.github.com/en/free-pro-team@latest/rest/reference/teams#add-or-update-team-repository-permissions
+
+    """
+
+    # Get the team's current permission levels, and the repositories that need changing
+    repositories = {r.full_name: r for r in repositories}
+    changes = diff_team_repository_permissions(get_team_repository_permissions(team, cpu_count, executor), permission,
+                                               repositories)
+
+    # Partially complete the first two arguments of the `set_team_repository_permission` function
+    partial_set_team_repository_permission = partial(set_team_repository_permission, team, permission)
+
+    # Parallelise the requests to change only the repositories that need changing, and return the changes
+    if changes:
+        _ = parallelise_processing(partial_set_team_repository_permission, [repositories[r] for r in changes],
+                                   cpu_count, max_chunksize, executor)
+    return changes
+
+
+@Log(logger)
+def estimate_request_seconds(requests: int, cpu_count: int, seconds_per_request: float = 0.5,
+                             rate_limiter: Optional[RateLimiter] = None, verb: str = "PUT") -> float:
+    """Estimate the wall-clock time to send a number of API requests in parallel.
+
+    Args:
+        requests: The number of API requests.
+        cpu_count: The number of CPUs to parallelise the API requests.
+        seconds_per_request: Default: 0.5. The average number of seconds for a single API request to return.
+        rate_limiter: Default: None. A ``RateLimiter`` object pacing the API requests. If None, requests are assumed
+            not to be paced.
+        verb: Default: 'PUT'. The HTTP verb of the API requests; requests that change data are spaced out by the
+            ``min_write_interval`` of ``rate_limiter``.
+
+    Returns:
+        The estimated number of seconds to send all the API requests.
+
+    """
+
+    # Estimate the time if requests are only limited by the number of CPUs
+    seconds = math.ceil(requests / cpu_count) * seconds_per_request
+
+    # Estimate the time if requests are paced by the rate limiter, and return the slowest estimate
+    if rate_limiter is not None and requests > 0:
+        seconds = max(seconds, (requests - rate_limiter.burst) / rate_limiter.max_requests_per_second)
+        if verb.upper() in WRITE_VERBS:
+            seconds = max(seconds, (requests - 1) * rate_limiter.min_write_interval + seconds_per_request)
+    return seconds
+
+
+@Log(logger)
+def plan_team_permissions(team: Team.Team, permission: str, repositories: Union[List, PaginatedList.PaginatedList],
+                          cpu_count: int = mp.cpu_count(), executor: Union[str, WorkerPool] = "thread",
+                          seconds_per_request: float = 0.5,
+                          rate_limiter: Optional[RateLimiter] = None) -> Dict[str, Any]:
+    """Plan giving a GitHub organisation team a permission level for a list of GitHub repositories, without changes.
+
+    A dry run of ``reconcile_team_permissions``. The team's current permission levels are requested once, and compared
+    against ``permission`` for each repository. The plan is a JSON-serialisable dictionary, so it can be reviewed, saved
+    with ``json.dump``, and applied later with ``apply_team_permissions_plan`` without requesting the team's
+    repositories again.
+
+    Args:
+        team: A ``github.Team.Team`` object of the GitHub organisation team.
+        permission: A permission level to provide ``team`` within each repository.
+        repositories: A list or ``github.PaginatedList.PaginatedList`` objects containing
+            ``github.Repository.Repository`` objects of the GitHub organisation repositories.
+        cpu_count: Default: maximum number of CPUs. The number of CPUs to parallelise the API requests; also used to
+            estimate the time to apply the plan.
+        executor: Default: 'thread'. The executor backend to parallelise the API requests; either 'thread',
+            'process', or a ``WorkerPool`` object to re-use its workers.
+        seconds_per_request: Default: 0.5. The average number of seconds for a single API request to return, used to
+            estimate the time to apply the plan.
+        rate_limiter: Default: None. The ``RateLimiter`` object that will pace the API requests when the plan is
+            applied, used to estimate the time to apply the plan.
+
+    Returns:
+        A dictionary with keys:
+
+        - 'team': the ``id``, ``name``, and ``url`` of ``team``;
+        - 'permission': ``permission``;
+        - 'add': a list of full names of repositories ``team`` will be added to;
+        - 'change': a dictionary of full names of repositories where ``team``'s permission level will change, and the
+          current permission levels;
+        - 'no_op': a list of full names of repositories that already have ``team`` with ``permission`` access;
+        - 'api_requests': a dictionary of the number of 'read' API requests to make the plan, and 'write' API
+          requests to apply it;
+        - 'rate_limit': a dictionary of the 'remaining', and 'limit' API requests in the current rate limit window,
+          its 'reset' time as a Unix timestamp, and the 'budget' fraction of the remaining requests needed to apply
+          the plan. Values are None if unknown; and
+        - 'estimated_seconds': the estimated wall-clock time in seconds to apply the plan.
+
+    """
+
+    # Get the team's current permission levels, and the repositories that need changing
+    repository_names = [r.full_name for r in repositories]
+    current_permissions = get_team_repository_permissions(team, cpu_count, executor)
+    changes = diff_team_repository_permissions(current_permissions, permission, repository_names)
+
+    # Count the API requests to read the team's repositories, and to apply the changes
+    requester = team._requester
+    read_requests = max(math.ceil(len(current_permissions) / requester.per_page), 1)
+    write_requests = len(changes)
+
+    # Get the remaining rate limit budget from the last API response
+    remaining, limit = (None if v < 0 else v for v in requester.rate_limiting)
+
+    # Return the plan
+    return {
+        "team": {"id": team.id, "name": team.name, "url": team.url},
+        "permission": permission,
+        "add": [r for r, p in changes.items() if p is None],
+        "change": {r: p for r, p in changes.items() if p is not None},
+        "no_op": [r for r in repository_names if r not in changes],
+        "api_requests": {"read": read_requests, "write": write_requests},
+        "rate_limit": {"remaining": remaining, "limit": limit, "reset": requester.rate_limiting_resettime or None,
+                       "budget": write_requests / remaining if remaining else None},
+        "estimated_seconds": estimate_request_seconds(write_requests, cpu_count, seconds_per_request, rate_limiter),
+    }
+
+
+@Log(logger)
+def apply_team_permissions_plan(g: Github, plan: Mapping[str, Any], cpu_count: int = mp.cpu_count(),
+                                max_chunksize: int = 1000,
+                                executor: Union[str, WorkerPool] = "thread") -> Dict[str, Optional[str]]:
+    """Apply a plan made by ``plan_team_permissions``, without requesting the team's repositories again.
+
+    Args:
+        g: A ``github.Github`` class object initialised with a GitHub username and personal access token with the
+            necessary permissions.
+        plan: A plan made by ``plan_team_permissions``, for example loaded with ``json.load``.
+        cpu_count: Default: maximum number of CPUs. The number of CPUs to parallelise the API requests.
+        max_chunksize: Default: 1000. The maximum number of repositories per CPU to change.
+        executor: Default: 'thread'. The executor backend to parallelise the API requests; either 'thread',
+            'process', or a ``WorkerPool`` object to re-use its workers.
+
+    Returns:
+        A dictionary of the GitHub repositories that were changed, where keys are the repository full names, and values
+        are the team's previous permission level for the repository, or None if the team had no access to it.
+
+    """
+
+    # Create the team, and repositories from the plan, without requesting them
+    team = g.create_from_raw_data(Team.Team, plan["team"])
+    changes = {**{r: None for r in plan["add"]}, **plan["change"]}
+    repositories = [g.create_from_raw_data(Repository.Repository, {"full_name": r, "name": r.split("/", 1)[1],
+                                                                   "owner": {"login": r.split("/", 1)[0]}})
+                    for r in changes]
+
+    # Partially complete the first two arguments of the `set_team_repository_permission` function
+    partial_set_team_repository_permission = partial(set_team_repository_permission, team, plan["permission"])
+
+    # Parallelise the requests to change the repositories in the plan, and return the changes
+    if changes:
+        _ = parallelise_processing(partial_set_team_repository_permission, repositories, cpu_count, max_chunksize,
+                                   executor)
+    return changes
@@ -0,0 +1,180 @@
+from github import Github, Repository
+from src.make_data.find_organisation_repos import find_organisation_repos
+from src.make_data.get_items_for_all_repos import get_items_for_all_repos
+from src.utils.logger import Log, logger
+from src.utils.worker_pool import WorkerPool
+from typing import Any, Dict, List, Optional, Sequence, Union
+import json
+import multiprocessing as mp
+import os
+
+# Repository list sort orders used to find changed repositories; a repository is changed if either timestamp is after
+# the watermark, as `updated_at` does not always change on a push, nor `pushed_at` on a settings change
+SYNC_SORTS = {"pushed": "pushed_at", "updated": "updated_at"}
+
+
+def get_snapshot_path(organisation: str) -> str:
+    """Get the default file path of the snapshot of a GitHub organisation, in the ``DIR_DATA_INTERIM`` directory."""
+    return os.path.join(os.getenv("DIR_DATA_INTERIM"), f"{organisation}_snapshot.json")
+
+
+@Log(logger, level="debug")
+def load_snapshot(path: str, organisation: str) -> Optional[Dict[str, Any]]:
+    """Load the snapshot of a GitHub organisation saved by ``sync_organisation_repos``.
+
+    Args:
+        path: File path of the snapshot.
+        organisation: A GitHub organisation name.
+
+    Returns:
+        The snapshot as a dictionary. If there is no snapshot, or it is of a different organisation, None.
+
+    """
+    if not os.path.isfile(path):
+        return None
+    with open(path) as f:
+        snapshot = json.load(f)
+    return snapshot if snapshot.get("organisation") == organisation else None
+
+
+@Log(logger, level="debug")
+def save_snapshot(path: str, snapshot: Dict[str, Any]) -> None:
+    """Save the snapshot of a GitHub organisation, replacing any existing snapshot only once it is fully written.
+
+    Args:
+        path: File path of the snapshot.
+        snapshot: The snapshot as a dictionary.
+
+    Returns:
+        None.
+
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(f"{path}.tmp", "w") as f:
+        json.dump(snapshot, f)
+    os.replace(f"{path}.tmp", path)
+
+
+@Log(logger)
+def find_changed_organisation_repos(g: Github, organisation: str, watermark: str,
+                                    repository_type: str = "all") -> List[Repository.Repository]:
+    """Get the repositories of a GitHub organisation pushed to, or updated since a watermark.
+
+    Repositories are listed most recently pushed, and updated first, and paging stops at the first repository older
+    than ``watermark``, so only the pages with changed repositories are requested.
+
+    Args:
+        g: A ``github.Github`` class object initialised with a GitHub username and personal access token with the
+            necessary permissions.
+        organisation: A GitHub organisation name.
+        watermark: An ISO 8601 timestamp, as returned by the GitHub API, for example '2021-01-01T00:00:00Z'.
+        repository_type: Default: 'all'. The repository types required.
+
+    Returns:
+        A list of ``github.Repository.Repository`` objects pushed to, or updated at or after ``watermark``, in the
+        order found.
+
+    """
+    changed_repositories = {}
+    for sort, field in SYNC_SORTS.items():
+
+        # Repositories changed in the same second as the watermark are included, as they may have changed after it
+        for repository in find_organisation_repos(g, organisation, repository_type, sort, "desc"):
+            if (repository._rawData.get(field) or "") < watermark:
+                break
+            changed_repositories.setdefault(repository.full_name, repository)
+
+    return list(changed_repositories.values())
+
+
+@Log(logger)
+def sync_organisation_repos(g: Github, organisation: str, method_names: Sequence[str] = (),
+                            path: Optional[str] = None, repository_type: str = "all", full_sync: bool = False,
+                            cpu_count: int = mp.cpu_count(), max_chunksize: int = 1000,
+                            executor: Union[str, WorkerPool] = "thread") -> Dict[str, Any]:
+    """Incrementally sync the repositories of a GitHub organisation, and their items, to a local snapshot.
+
+    The first sync lists all the repositories, and gets the items of every repository. It saves them to a snapshot,
+    with a watermark of the latest ``pushed_at``, or ``updated_at`` timestamp. Later syncs only list repositories until
+    they pass the watermark, and get the items of the changed repositories, so take time proportional to what changed.
+
+    Deleted, renamed, and transferred repositories are not found by an incremental sync; they are only removed from
+    the snapshot by a full sync.
+
+    Args:
+        g: A ``github.Github`` class object initialised with a GitHub username and personal access token with the
+            necessary permissions.
+        organisation: A GitHub organisation name.
+        method_names: Default: (). Methods of the ``github.Repository.Repository`` class, whose items are stored in the
+            snapshot, for example 'get_contributors'. Items of methods not already in the snapshot are got for every
+            repository.
+        path: Default: None. File path of the snapshot. If None, this is ``<organisation>_snapshot.json`` in the
+            ``DIR_DATA_INTERIM`` directory.
+        repository_type: Default: 'all'. The repository types required.
+        full_sync: Default: False. If True, ignore any existing snapshot, and list all the repositories.
+        cpu_count: Default: maximum number of CPUs. The number of CPUs to parallelise the API requests.
+        max_chunksize: Default: 1000. The maximum number of repositories per CPU to call.
+        executor: Default: 'thread'. The executor backend to parallelise the API requests; either 'thread',
+            'process', or a ``WorkerPool`` object to re-use its workers.
+
+    Returns:
+        The snapshot as a dictionary, with keys:
+
+        - 'organisation': ``organisation``.
+        - 'watermark': The latest ``pushed_at``, or ``updated_at`` timestamp of all the repositories, or None if
+          there are none.
+        - 'repositories': A dictionary of repository full names, and their data, as returned by the GitHub API.
+        - 'items': A dictionary of each method name in ``method_names``, and a dictionary of repository full names,
+          and their items as lists of dictionaries, or None if an error was returned in the API request.
+        - 'changed': A list of the full names of the repositories changed since the previous sync.
+
+    """
+
+    # Load the previous snapshot, unless a full sync is required
+    path = path or get_snapshot_path(organisation)
+    snapshot = None if full_sync else load_snapshot(path, organisation)
+
+    # List all the repositories if there is no previous snapshot, otherwise only the repositories changed since it
+    if snapshot is None or snapshot["watermark"] is None:
+        snapshot = {"organisation": organisation, "watermark": None, "repositories": {}, "items": {}}
+        changed_repositories = find_organisation_repos(g, organisation, repository_type, parallel_pages=True,
+                                                       cpu_count=cpu_count, executor=executor)
+    else:
+        changed_repositories = find_changed_organisation_repos(g, organisation, snapshot["watermark"],
+                                                               repository_type)
+
+    # Update the data of the changed repositories
+    snapshot["repositories"].update({r.full_name: r._rawData for r in changed_repositories})
+
+    # Get the items of the changed repositories, or every repository for methods not already in the snapshot, without
+    # requesting each repository again
+    for method_name in method_names:
+        if method_name in snapshot["items"]:
+            repositories = changed_repositories
+        else:
+            repositories = [g.create_from_raw_data(Repository.Repository, r) for r in snapshot["repositories"].values()]
+        snapshot["items"].setdefault(method_name, {}).update(
+            get_items_for_all_repos(g, method_name, repositories, cpu_count, max_chunksize, executor,
+                                    refetch_repositories=False, materialise=True) if repositories else {}
+        )
+
+    # Move the watermark to the latest change of any repository, and save the snapshot
+    timestamps = [r.get(f) for r in snapshot["repositories"].values() for f in SYNC_SORTS.values() if r.get(f)]
+    snapshot["watermark"] = max(timestamps, default=None)
+    snapshot["changed"] = [r.full_name for r in changed_repositories]
+    save_snapshot(path, snapshot)
+
+    return snapshot
+
+
+if __name__ == "__main__":
+
+    # Load required environment variables
+    GITHUB_ORGANISATION = os.getenv("GITHUB_ORGANISATION")
+
+    # Instantiate the github.Github class to gain access to GitHub REST APIv3
+    github_object = Github(os.getenv("GITHUB_API_KEY"), per_page=100)
+
+    # Sync all the repositories for GITHUB_ORGANISATION, and their contributors, getting only what changed since the
+    # previous sync
+    organisation_snapshot = sync_organisation_repos(github_object, GITHUB_ORGANISATION, ["get_contributors"])
@@ -0,0 +1,190 @@
+from github import GithubException, RateLimitExceededException, UnknownObjectException
+from github.MainClass import DEFAULT_BASE_URL, DEFAULT_PER_PAGE
+from src.utils.http_cache import HTTPCache
+from src.utils.rate_limiter import RateLimiter
+from src.utils.request_accountant import RequestAccountant
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlencode, urlparse
+import aiohttp
+import asyncio
+import json
+
+
+def parse_link_header(link: Optional[str]) -> Dict[str, str]:
+    """Parse a GitHub API ``Link`` response header into a dictionary of relations and URLs.
+
+    Args:
+        link: The value of a ``Link`` response header, for example
+            ``'<https://api.github.com/orgs/foo/repos?page=2>; rel="next"'``. If None, there are no links.
+
+    Returns:
+        A dictionary where the keys are the link relations, for example 'next' or 'last', and the values are their
+        URLs.
+
+    """
+    links = {}
+    for link_header in (link.split(", ") if link else []):
+        url, rel, *_ = link_header.split("; ")
+        links[rel[5:-1]] = url[1:-1]
+    return links
+
+
+def _create_exception(status: int, data: Any) -> GithubException:
+    """Create a PyGithub exception for an unsuccessful GitHub API response, in the same way as PyGithub.
+
+    Args:
+        status: The HTTP status code of the response.
+        data: The decoded JSON body of the response.
+
+    Returns:
+        A ``github.GithubException.GithubException`` object, or one of its subclasses.
+
+    """
+    message = data.get("message", "") if isinstance(data, dict) else ""
+    if status == 403 and message.lower().startswith("api rate limit exceeded"):
+        return RateLimitExceededException(status, data)
+    if status == 404 and message == "Not Found":
+        return UnknownObjectException(status, data)
+    return GithubException(status, data)
+
+
+class AsyncGithubSession:
+
+    def __init__(self, login_or_token: Optional[str] = None, base_url: str = DEFAULT_BASE_URL,
+                 per_page: int = DEFAULT_PER_PAGE, concurrency: int = 100, timeout: int = 15,
+                 rate_limiter: Optional[RateLimiter] = None, cache: Optional[HTTPCache] = None,
+                 request_accountant: Optional[RequestAccountant] = None) -> None:
+        """An asynchronous session to send concurrent requests to the GitHub REST API v3 over one event loop.
+
+        Use as an asynchronous context manager, for example ``async with AsyncGithubSession(token) as session:``.
+
+        Args:
+            login_or_token: Default: None. A GitHub personal access token. If None, requests are unauthenticated.
+            base_url: Default: 'https://api.github.com'. The base URL of the GitHub REST API.
+            per_page: Default: 30. The number of items per page for paginated API requests.
+            concurrency: Default: 100. The maximum number of API requests in flight at once.
+            timeout: Default: 15. The timeout in seconds of each API request.
+            rate_limiter: Default: None. A ``RateLimiter`` object to pace the API requests. If None, requests are not
+                paced.
+            cache: Default: None. A ``HTTPCache`` object to cache the API responses, and send conditional requests. If
+                None, responses are not cached.
+            request_accountant: Default: None. A ``RequestAccountant`` object to record the API requests in. If None,
+                requests are not recorded.
+
+        """
+
+        # Instantiate attributes
+        self.base_url = base_url.rstrip("/")
+        self.per_page = per_page
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.rate_limiter = rate_limiter
+        self.cache = cache
+        self.request_accountant = request_accountant
+        self.headers = {"Accept": "application/vnd.github.v3+json", "User-Agent": "PyGithub/Python"}
+        if login_or_token is not None:
+            self.headers["Authorization"] = f"token {login_or_token}"
+
+        # The session, and semaphore are created when entering the context manager, so they belong to its event loop
+        self._session = None
+        self._semaphore = None
+
+    async def __aenter__(self) -> "AsyncGithubSession":
+        """Open the HTTP session, with at most ``concurrency`` connections."""
+        self._session = aiohttp.ClientSession(headers=self.headers,
+                                              timeout=aiohttp.ClientTimeout(total=self.timeout),
+                                              connector=aiohttp.TCPConnector(limit=self.concurrency))
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        return self
+
+    async def __aexit__(self, *args: Any) -> None:
+        """Close the HTTP session."""
+        await self._session.close()
+
+    async def request_json(self, url: str, parameters: Optional[Dict[str, Any]] = None) -> Tuple[Dict[str, str], Any]:
+        """Send a GET request to the GitHub REST API, and return its headers and decoded JSON body.
+
+        Args:
+            url: An absolute URL, or a URL path relative to ``base_url``, for example '/orgs/foo/repos'.
+            parameters: Default: None. Query parameters of the request.
+
+        Returns:
+            A tuple of the response headers, with lower-case names, and the decoded JSON body of the response. The body
+            is None if the response has no content.
+
+        Raises:
+            github.GithubException.GithubException: If the response has an unsuccessful status code.
+
+        """
+
+        # Use a cached response if it is within its TTL; otherwise make the request conditional on any cached response
+        url = url if "://" in url else self.base_url + url
+        request_headers = dict(self.headers)
+        cache_url = f"{url}?{urlencode(parameters)}" if parameters else url
+        cached = self.cache.lookup(cache_url, request_headers) if self.cache is not None else None
+
+        # Send the request, waiting if the maximum number of requests are already in flight, or for the rate limiter
+        if cached is None:
+            async with self._semaphore:
+                if self.rate_limiter is not None:
+                    await self.rate_limiter.acquire_async("GET")
+                async with self._session.get(url, params=parameters, headers=request_headers) as response:
+                    status = response.status
+                    headers = {k.lower(): v for k, v in response.headers.items()}
+                    text = await response.text()
+
+            # Update the rate limiter with the rate limit headers of the response
+            if self.rate_limiter is not None:
+                self.rate_limiter.update(status, headers)
+
+            # Store the response in the cache, or use the cached response if it has not changed
+            if self.cache is not None:
+                cached = self.cache.store(cache_url, request_headers, status, headers, text)
+
+        # Record the request, where a cached response was either used without a request, or revalidated
+        if self.request_accountant is not None and cached is None:
+            self.request_accountant.record(cache_url, status, len(text.encode("utf-8")))
+        elif self.request_accountant is not None:
+            self.request_accountant.record(cache_url, cached.status if cached.from_cache else status,
+                                           from_cache=cached.from_cache, revalidated=not cached.from_cache)
+
+        # Use the cached response
+        if cached is not None:
+            status, headers, text = cached.status, {k.lower(): v for k, v in cached.getheaders()}, cached.text
+
+        # Decode the response, and raise an exception if the request is unsuccessful
+        data = json.loads(text) if text else None
+        if status >= 400:
+            raise _create_exception(status, data)
+        return headers, data
+
+    async def get_all_pages(self, url: str, parameters: Optional[Dict[str, Any]] = None) -> List[Any]:
+        """Get all the items of a paginated GitHub REST API list.
+
+        The first page is requested on its own. If its ``Link`` header gives the last page, all remaining pages are
+        then requested concurrently.
+
+        Args:
+            url: An absolute URL, or a URL path relative to ``base_url``, for example '/orgs/foo/repos'.
+            parameters: Default: None. Query parameters of the request.
+
+        Returns:
+            A list of all the items in the paginated list, in order.
+
+        """
+
+        # Get the first page
+        parameters = {**(parameters or {}), "per_page": self.per_page}
+        headers, data = await self.request_json(url, parameters)
+        items = list(data or [])
+
+        # Get the number of the last page from the `Link` header; if there are no more pages, return the items
+        last_page_url = parse_link_header(headers.get("link")).get("last")
+        if last_page_url is None:
+            return items
+        last_page = int(parse_qs(urlparse(last_page_url).query)["page"][0])
+
+        # Get all the remaining pages concurrently, and return all the items in order
+        pages = await asyncio.gather(*[self.request_json(url, {**parameters, "page": p})
+                                       for p in range(2, last_page + 1)])
+        return items + [i for _, page_data in pages for i in (page_data or [])]
@@ -0,0 +1,242 @@
+from array import array
+from github import GithubObject
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+import json
+import mmap
+import os
+import sys
+
+# File name of the metadata of a saved `ColumnarResult` object, with the dictionaries of the encoded columns
+_META_FILE = "meta.json"
+
+# Array typecodes of each kind of column; dictionary-encoded columns store a code per row, where -1 means None
+_TYPECODES = {"dictionary": "i", "int": "q", "float": "d"}
+
+
+def _get_value(element: Any, attribute_name: str) -> Any:
+    """Get an attribute of an element, which is a dictionary of data, or a PyGithub object."""
+    if isinstance(element, Mapping):
+        return element.get(attribute_name)
+    return getattr(element, attribute_name, None)
+
+
+def _normalise_value(value: Any) -> Any:
+    """Normalise a value to a JSON-serialisable value; PyGithub objects are replaced by their data."""
+    if isinstance(value, GithubObject.GithubObject):
+        value = value._rawData
+    return json.loads(json.dumps(value, sort_keys=True, default=str))
+
+
+def _encode_column(values: Sequence[Any]) -> Tuple[str, array, Optional[List[Any]]]:
+    """Encode a column of values as an array, dictionary-encoding the values unless they are all numbers.
+
+    Args:
+        values: The values of the column, one per row.
+
+    Returns:
+        A tuple of the kind of column, either 'dictionary', 'int', or 'float', the array of the column, and for
+        dictionary-encoded columns the list of unique values, where each code in the array is an index of this list.
+        Otherwise the list is None.
+
+    """
+
+    # Store numeric columns without missing values as they are; booleans are dictionary-encoded
+    if values and all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in values):
+        kind = "int" if all(isinstance(v, int) for v in values) else "float"
+        return kind, array(_TYPECODES[kind], values), None
+
+    # Dictionary-encode all other columns, where each unique value is stored once in the dictionary
+    codes, dictionary = {}, []
+    column = array(_TYPECODES["dictionary"])
+    for value in values:
+        if value is None:
+            column.append(-1)
+            continue
+        key = json.dumps(_normalise_value(value), sort_keys=True)
+        if key not in codes:
+            codes[key] = len(dictionary)
+            dictionary.append(json.loads(key))
+        column.append(codes[key])
+    return "dictionary", column, dictionary
+
+
+class ColumnarResult:
+
+    def __init__(self, repositories: List[str], columns: Dict[str, Any], dictionaries: Dict[str, Optional[List[Any]]],
+                 missing_repositories: Optional[List[str]] = None) -> None:
+        """A compact columnar table of the elements of every repository in an organisation sweep.
+
+        Each element, for example a contributor of a repository, is one row. The ``repository`` column holds the
+        index of the row's repository in ``repositories``, and the ``entity`` column the code of the row's user, team,
+        or other entity. Every other column holds an attribute of the elements. Columns are ``array.array`` objects,
+        or ``memoryview`` objects of memory-mapped files once loaded. Strings, and other non-numeric values are
+        dictionary-encoded, so each unique value is stored once, and each row holds a 4-byte code; -1 means None.
+
+        Create a ``ColumnarResult`` object with ``from_items``, rather than directly. Save it with ``save``, and load
+        it later with ``load``, which memory-maps the columns instead of reading them into memory. The columns are
+        saved as raw native-endian binary files, so can also be loaded with ``numpy.memmap``, using the typecode of each
+        column in the ``meta.json`` file.
+
+        Args:
+            repositories: The names of all the repositories, including those in ``missing_repositories``.
+            columns: A dictionary of column names, and ``array.array`` or ``memoryview`` objects of the same length.
+                Must include 'repository', and 'entity' columns.
+            dictionaries: A dictionary of column names, and the lists of unique values of dictionary-encoded columns;
+                None for numeric columns.
+            missing_repositories: Default: None. The names of repositories where an error was returned in the
+                original API request, which have no rows.
+
+        """
+        self.repositories = repositories
+        self.columns = columns
+        self.dictionaries = dictionaries
+        self.missing_repositories = missing_repositories or []
+
+    @classmethod
+    def from_items(cls, items: Mapping[str, Optional[Iterable[Any]]], attribute_names: Sequence[str] = (),
+                   entity_attribute: str = "login") -> "ColumnarResult":
+        """Create a ``ColumnarResult`` object from the items of an organisation sweep.
+
+        Args:
+            items: A dictionary where keys are repository names, and values are lists of elements, for example the
+                output of ``get_items_for_all_repos``, or ``extract_attribute_from_dict_of_paginated_lists``. Elements
+                can be PyGithub objects, dictionaries of data, or single values, such as names. Values of None are
+                recorded in ``missing_repositories``.
+            attribute_names: Default: (). The attributes of the elements to store as columns, in addition to the
+                entity.
+            entity_attribute: Default: 'login'. The attribute that identifies the entity of each element, for example
+                'slug' for teams. Elements that are not PyGithub objects, or dictionaries are their own entity.
+
+        Returns:
+            A ``ColumnarResult`` object with a row for each element of each repository.
+
+        """
+
+        # Flatten the items into rows, recording the index of the repository of each row
+        repositories, missing_repositories = list(items), []
+        repository_column, rows = array(_TYPECODES["dictionary"]), []
+        for i, (repository, elements) in enumerate(items.items()):
+            if elements is None:
+                missing_repositories.append(repository)
+                continue
+            for element in elements:
+                repository_column.append(i)
+                rows.append(element)
+
+        # Encode the entity of each row, and each attribute as columns
+        columns, dictionaries = {"repository": repository_column}, {"repository": None}
+        for name, attribute in [("entity", entity_attribute), *((a, a) for a in attribute_names)]:
+            values = [_get_value(e, attribute) if isinstance(e, (Mapping, GithubObject.GithubObject))
+                      else e if name == "entity" else None for e in rows]
+            _, columns[name], dictionaries[name] = _encode_column(values)
+
+        return cls(repositories, columns, dictionaries, missing_repositories)
+
+    def __len__(self) -> int:
+        """Get the number of rows."""
+        return len(self.columns["repository"])
+
+    def decode(self, column_name: str) -> List[Any]:
+        """Decode a column into a list of values, one per row.
+
+        Args:
+            column_name: The name of a column; for the 'repository' column, repository names are returned.
+
+        Returns:
+            A list of the values of the column.
+
+        """
+        if column_name == "repository":
+            return [self.repositories[i] for i in self.columns["repository"]]
+        dictionary = self.dictionaries[column_name]
+        if dictionary is None:
+            return list(self.columns[column_name])
+        return [None if c < 0 else dictionary[c] for c in self.columns[column_name]]
+
+    def get_entity_repositories(self) -> Dict[Any, List[str]]:
+        """Get the repositories of each entity, for example which repositories each user has access to.
+
+        Returns:
+            A dictionary where keys are entities, and values are lists of the names of their repositories, in order.
+
+        """
+        entity_repositories = {}
+        for entity, repository in zip(self.decode("entity"), self.columns["repository"]):
+            entity_repositories.setdefault(entity, []).append(self.repositories[repository])
+        return entity_repositories
+
+    def to_dict(self, column_name: str = "entity") -> Dict[str, Optional[List[Any]]]:
+        """Convert a column back into a dictionary of repository names, and lists of values.
+
+        Args:
+            column_name: Default: 'entity'. The name of the column.
+
+        Returns:
+            A dictionary in the same format as the output of ``extract_attribute_from_dict_of_paginated_lists``, where
+            the values of repositories in ``missing_repositories`` are None.
+
+        """
+        missing_repositories = set(self.missing_repositories)
+        output = {r: None if r in missing_repositories else [] for r in self.repositories}
+        for repository, value in zip(self.columns["repository"], self.decode(column_name)):
+            output[self.repositories[repository]].append(value)
+        return output
+
+    def save(self, path: str) -> None:
+        """Save the columns to a directory, as a ``meta.json`` file, and a binary file per column.
+
+        Args:
+            path: The directory to save the files to. It is created if it does not exist.
+
+        Returns:
+            None.
+
+        """
+        os.makedirs(path, exist_ok=True)
+        for name, column in self.columns.items():
+            with open(os.path.join(path, f"{name}.bin"), "wb") as f:
+                f.write(column)
+        meta = {
+            "byteorder": sys.byteorder,
+            "length": len(self),
+            "repositories": self.repositories,
+            "missing_repositories": self.missing_repositories,
+            "columns": {n: {"typecode": c.format if isinstance(c, memoryview) else c.typecode,
+                            "dictionary": self.dictionaries[n]} for n, c in self.columns.items()},
+        }
+        with open(os.path.join(path, _META_FILE), "w") as f:
+            json.dump(meta, f)
+
+    @classmethod
+    def load(cls, path: str, memory_map: bool = True) -> "ColumnarResult":
+        """Load a ``ColumnarResult`` object saved with ``save``.
+
+        Args:
+            path: The directory the files were saved to.
+            memory_map: Default: True. If True, memory-map the column files as read-only ``memoryview`` objects, so
+                they are paged in from disk only as they are used. Otherwise, read them into ``array.array`` objects.
+
+        Returns:
+            A ``ColumnarResult`` object.
+
+        """
+        with open(os.path.join(path, _META_FILE)) as f:
+            meta = json.load(f)
+        if meta["byteorder"] != sys.byteorder:
+            raise ValueError(f"Columns were saved on a {meta['byteorder']}-endian machine; this machine is "
+                             f"{sys.byteorder}-endian")
+
+        columns = {}
+        for name, column_meta in meta["columns"].items():
+            with open(os.path.join(path, f"{name}.bin"), "rb") as f:
+
+                # Empty files cannot be memory-mapped; the memory map stays open while the `memoryview` object exists
+                if memory_map and meta["length"] > 0:
+                    columns[name] = memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)).cast(
+                        column_meta["typecode"]
+                    )
+                else:
+                    columns[name] = array(column_meta["typecode"], f.read())
+
+        return cls(meta["repositories"], columns, {n: c["dictionary"] for n, c in meta["columns"].items()},
+                   meta["missing_repositories"])
@@ -0,0 +1,147 @@
+from collections import ChainMap
+from collections.abc import MutableMapping
+from github import GithubObject, PaginatedList
+from typing import Any, Dict, Iterable, Iterator, Mapping, Optional
+
+# Fields of GitHub API list responses describing an entity's relationship to a repository, rather than the entity
+# itself, for example the number of contributions a user made to a repository
+RELATIONSHIP_FIELDS = frozenset({"contributions", "permission", "permissions", "role_name"})
+
+
+class EntityStore(MutableMapping):
+
+    def __init__(self, relationship_fields: Iterable[str] = RELATIONSHIP_FIELDS) -> None:
+        """An identity map storing each GitHub user, team, or other entity once, however many repositories it is in.
+
+        The same users, and teams appear in the contributors, collaborators, and teams of many repositories. Interning
+        the results of ``get_items_for_all_repos`` replaces each element with a reference to a single shared dictionary
+        of data per entity, keyed by its GitHub node ID. Fields specific to one repository, such as ``contributions``,
+        are kept separately for each reference with ``collections.ChainMap`` objects layered over the shared data.
+
+        Entities can be looked up by node ID, API URL, or login. Interned references only have the fields of the list
+        responses they came from, for example contributors have no ``name``, and cannot complete themselves like
+        PyGithub objects. To fill in missing fields, pass the interned results, a ``github.Github`` object, and the
+        ``EntityStore`` object as the ``cache`` to ``batch_extract_attribute_from_dict_of_paginated_lists``. Each
+        entity is then requested once by its API URL, and the fields are stored in one place, shared by every
+        reference.
+
+        Args:
+            relationship_fields: Default: ``RELATIONSHIP_FIELDS``. Fields that describe an entity's relationship to a
+                repository, which are not shared between references.
+
+        """
+        self.relationship_fields = frozenset(relationship_fields)
+        self._entities: Dict[str, Dict[str, Any]] = {}
+        self._aliases: Dict[str, str] = {}
+
+    @staticmethod
+    def get_identity(data: Mapping[str, Any]) -> Optional[str]:
+        """Get the key of an entity from its data.
+
+        Args:
+            data: A dictionary of data of a GitHub entity, as returned by the GitHub API.
+
+        Returns:
+            The ``node_id`` of the entity, or if there is none, its API ``url``, or ``login``. If there are none of
+            these, None.
+
+        """
+        return data.get("node_id") or data.get("url") or data.get("login")
+
+    def _resolve(self, key: str) -> str:
+        """Get the node ID, or other identity, of an entity from any of its keys; raise a KeyError if not found."""
+        if key in self._entities:
+            return key
+        return self._aliases[key]
+
+    def __getitem__(self, key: str) -> Dict[str, Any]:
+        """Get the shared data of an entity by its node ID, API URL, or login."""
+        return self._entities[self._resolve(key)]
+
+    def __setitem__(self, key: str, data: Mapping[str, Any]) -> None:
+        """Add, or merge the data of an entity, also making ``key`` an alias of it."""
+        self.add(data)
+        identity = self.get_identity(data)
+        if identity is not None and key != identity:
+            self._aliases[key] = identity
+
+    def __delitem__(self, key: str) -> None:
+        """Remove an entity, and all its aliases."""
+        identity = self._resolve(key)
+        del self._entities[identity]
+        self._aliases = {k: v for k, v in self._aliases.items() if v != identity}
+
+    def __iter__(self) -> Iterator[str]:
+        """Iterate over the node IDs, or other identities, of all the entities."""
+        return iter(self._entities)
+
+    def __len__(self) -> int:
+        """Get the number of unique entities."""
+        return len(self._entities)
+
+    def __contains__(self, key: Any) -> bool:
+        """Check if an entity is stored, by its node ID, API URL, or login."""
+        return key in self._entities or key in self._aliases
+
+    def add(self, data: Mapping[str, Any]) -> Mapping[str, Any]:
+        """Add the data of an entity, merging it with any data already stored for the same entity.
+
+        Args:
+            data: A dictionary of data of a GitHub entity, as returned by the GitHub API.
+
+        Returns:
+            The shared dictionary of data for the entity. If ``data`` has relationship fields, a
+            ``collections.ChainMap`` object of them layered over the shared dictionary. If the entity has no identity,
+            ``data`` is returned unchanged.
+
+        """
+
+        # Return the data unchanged if it cannot be identified
+        identity = self.get_identity(data)
+        if identity is None:
+            return data
+
+        # Merge the data into the shared dictionary, and add its API URL, and login as aliases
+        entity = self._entities.setdefault(identity, {})
+        entity.update({k: v for k, v in data.items() if k not in self.relationship_fields})
+        for alias in (data.get("url"), data.get("login")):
+            if alias and alias != identity:
+                self._aliases.setdefault(alias, identity)
+
+        # Layer any relationship fields over the shared dictionary
+        relationship = {k: v for k, v in data.items() if k in self.relationship_fields}
+        return ChainMap(relationship, entity) if relationship else entity
+
+    def intern(self, items: Any) -> Any:
+        """Replace the elements of a list with references to their shared data.
+
+        Args:
+            items: A list or ``github.PaginatedList.PaginatedList`` object of PyGithub objects, or dictionaries of data;
+                for example a value returned by ``get_items_for_all_repos``. A single PyGithub object, or dictionary is
+                also accepted.
+
+        Returns:
+            A list of the shared data of each element in ``items``, or the shared data of ``items`` if it is a single
+            element. Any other value, including None, is returned unchanged.
+
+        """
+        if isinstance(items, (list, PaginatedList.PaginatedList)):
+            return [self.intern(e) for e in items]
+        if isinstance(items, GithubObject.GithubObject):
+            return self.add(items._rawData)
+        if isinstance(items, Mapping):
+            return self.add(items)
+        return items
+
+    def intern_items(self, items: Mapping[Any, Any]) -> Dict[Any, Any]:
+        """Replace the elements of every value of a dictionary with references to their shared data.
+
+        Args:
+            items: A dictionary where values are lists of PyGithub objects, or dictionaries of data; for example the
+                output of ``get_items_for_all_repos``.
+
+        Returns:
+            A dictionary with the same keys as ``items``, where each value is interned with ``intern``.
+
+        """
+        return {k: self.intern(v) for k, v in items.items()}
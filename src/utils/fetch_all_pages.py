@@ -0,0 +1,65 @@
+from functools import partial
+from github import PaginatedList
+from src.utils.async_github_session import parse_link_header
+from src.utils.logger import Log, logger
+from src.utils.parallelise_dictionary_processing import parallelise_dictionary_processing
+from src.utils.worker_pool import WorkerPool
+from typing import Any, Dict, List, Union
+from urllib.parse import parse_qs, urlparse
+import multiprocessing as mp
+
+
+@Log(logger, level="debug")
+def _get_page(pl: PaginatedList.PaginatedList, page: int) -> Dict[int, List[Any]]:
+    """Get a single page of a ``github.PaginatedList.PaginatedList`` object.
+
+    Args:
+        pl: A ``github.PaginatedList.PaginatedList`` object.
+        page: The zero-based index of the page.
+
+    Returns:
+        A dictionary of one key-value pair, where the key is ``page``, and the value is a list of the elements on the
+        page.
+
+    """
+    return {page: pl.get_page(page)}
+
+
+@Log(logger)
+def fetch_all_pages(pl: PaginatedList.PaginatedList, cpu_count: int = mp.cpu_count(),
+                    executor: Union[str, WorkerPool] = "thread") -> List[Any]:
+    """Get all the elements of a ``github.PaginatedList.PaginatedList`` object, requesting its pages in parallel.
+
+    Iterating a ``github.PaginatedList.PaginatedList`` object requests each page only after the previous page has
+    returned. Instead, the first page is requested on its own; if its ``Link`` header gives the last page, all the
+    remaining pages are then requested in parallel.
+
+    Args:
+        pl: A ``github.PaginatedList.PaginatedList`` object.
+        cpu_count: Default: maximum number of CPUs. The number of CPUs to parallelise the API requests.
+        executor: Default: 'thread'. The executor backend to parallelise the API requests; either 'thread',
+            'process', or a ``WorkerPool`` object to re-use its workers.
+
+    Returns:
+        A list of all the elements of ``pl``, in order.
+
+    """
+
+    # Get the first page; if it is empty, there are no more pages
+    elements = pl.get_page(0)
+    if not elements:
+        return []
+
+    # Get the number of the last page from the `Link` header of the first page; if there are no more pages, return
+    # the elements
+    last_page_url = parse_link_header(elements[0]._headers.get("link")).get("last")
+    last_page = int(parse_qs(urlparse(last_page_url).query)["page"][0]) if last_page_url else 1
+    if last_page <= 1:
+        return elements
+
+    # Partially complete the _get_page function with pl
+    partial_get_page = partial(_get_page, pl)
+
+    # Get all the remaining pages in parallel, one page per API request, and return all the elements in order
+    pages = parallelise_dictionary_processing(partial_get_page, range(1, last_page), cpu_count, 1, executor)
+    return elements + [e for p in sorted(pages) for e in pages[p]]
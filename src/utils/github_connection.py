@@ -0,0 +1,247 @@
+from github.Requester import HTTPRequestsConnectionClass, HTTPSRequestsConnectionClass, Requester, RequestsResponse
+from requests.adapters import HTTPAdapter
+from typing import Any, Dict, List, Optional, Tuple
+import os
+import requests
+import threading
+
+# Default maximum number of connections each session keeps alive per host; raised by `reserve_connections`
+DEFAULT_POOL_MAXSIZE = 10
+
+# Hooks called around every request sent by a `github.Github` object; see `add_connection_hook`
+_connection_hooks: List[Any] = []
+
+# Number of requests sent by each thread; see `get_request_count`
+_request_counts = threading.local()
+
+# Sessions of this process, shared by all `github.Github` objects with the same protocol, host, port, and retries
+_sessions: Dict[Tuple[str, str, int, Any], requests.Session] = {}
+_sessions_lock = threading.Lock()
+_pool_maxsize = DEFAULT_POOL_MAXSIZE
+
+
+def add_connection_hook(hook: Any, index: Optional[int] = None) -> None:
+    """Add a hook that is called around every request sent by a ``github.Github`` object.
+
+    A hook is an object with two methods:
+
+    - ``before_request(verb, url, headers)``, called before a request is sent. If it returns a
+      ``github.Requester.RequestsResponse`` object, that is used as the response, and no request is sent; and
+    - ``after_response(verb, url, headers, response)``, called after a response is received, or returned by
+      ``before_request``. It must return a ``github.Requester.RequestsResponse`` object to use as the response.
+
+    The ``url`` argument of both methods is the absolute URL of the request, including the protocol, host, and port, for
+    example 'https://api.github.com:443/orgs/foo'.
+
+    Hooks are module-level, so they are shared by all threads, and by all worker processes forked after the hook is
+    added.
+
+    Args:
+        hook: An object with ``before_request``, and ``after_response`` methods.
+        index: Default: None. The position to insert ``hook``; hooks are called in order. If None, ``hook`` is called
+            last.
+
+    Returns:
+        None.
+
+    """
+    _connection_hooks.insert(len(_connection_hooks) if index is None else index, hook)
+
+
+def remove_connection_hook(hook: Any) -> None:
+    """Remove a hook added by ``add_connection_hook``.
+
+    Args:
+        hook: A hook previously added by ``add_connection_hook``.
+
+    Returns:
+        None.
+
+    """
+    _connection_hooks.remove(hook)
+
+
+def get_request_count() -> int:
+    """Get the number of requests sent by ``github.Github`` objects in the current thread.
+
+    Responses returned by a connection hook, for example from a cache, are not counted, as no request is sent.
+
+    Returns:
+        The number of requests sent by the current thread, since it started.
+
+    """
+    return getattr(_request_counts, "count", 0)
+
+
+def get_session(protocol: str, host: str, port: int, retry: Any = None) -> requests.Session:
+    """Get the session of this process for a host, creating it with a pool of keep-alive connections if required.
+
+    All ``github.Github`` objects in a process share one ``requests.Session`` object per host, so each request re-uses
+    an open connection where there is one, rather than opening a new connection, and TLS handshake. The pool keeps
+    ``DEFAULT_POOL_MAXSIZE`` connections alive, or more after ``reserve_connections``.
+
+    Sessions are never shared between processes. A forked worker process starts with no sessions, and creates its own
+    on its first request, so connections opened by the parent process are never used by the child.
+
+    Args:
+        protocol: Either 'http', or 'https'.
+        host: The host name, for example 'api.github.com'.
+        port: The port number.
+        retry: Default: None. The ``retry`` argument of the ``github.Github`` object; an integer, or a
+            ``urllib3.util.retry.Retry`` object. Each distinct value has its own session.
+
+    Returns:
+        A ``requests.Session`` object.
+
+    """
+    key = (protocol, host, port, retry)
+    with _sessions_lock:
+        if key not in _sessions:
+            session = requests.Session()
+            session.mount(f"{protocol}://", HTTPAdapter(pool_maxsize=_pool_maxsize, max_retries=retry or 0))
+            _sessions[key] = session
+        return _sessions[key]
+
+
+def reserve_connections(count: int) -> None:
+    """Make sure each session of this process keeps at least ``count`` connections alive per host.
+
+    Called with the number of threads whenever a pool of threads is created, so that every thread sharing a session has
+    a connection to keep alive. Otherwise, connections beyond the pool size are closed after each request, and the next
+    request from the same thread opens a new one.
+
+    Args:
+        count: The minimum number of keep-alive connections per host.
+
+    Returns:
+        None.
+
+    """
+    global _pool_maxsize
+    with _sessions_lock:
+        if count <= _pool_maxsize:
+            return
+        _pool_maxsize = count
+
+        # Resize the connection pools of existing sessions; their idle connections are closed
+        for (protocol, *_), session in _sessions.items():
+            adapter = session.get_adapter(f"{protocol}://")
+            adapter.poolmanager.clear()
+            adapter.init_poolmanager(adapter._pool_connections, count, block=adapter._pool_block)
+
+
+def close_sessions() -> None:
+    """Close all the sessions of this process, and their connections; new sessions are created on the next request.
+
+    Returns:
+        None.
+
+    """
+    with _sessions_lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
+
+
+def _reset_sessions_after_fork() -> None:
+    """Forget the sessions inherited by a forked child process, as their connections belong to the parent process."""
+    global _sessions_lock
+    _sessions_lock = threading.Lock()
+    _sessions.clear()
+
+
+class _ThreadSafeConnectionMixin:
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        """Mixin to make a PyGithub connection class safe to share between threads.
+
+        PyGithub stores the details of the next request on the connection object itself, and each ``github.Github``
+        object re-uses a single connection. When a ``github.Github`` object is shared between threads, two concurrent
+        requests would overwrite each other's details. This mixin stores the details per thread instead.
+
+        Requests are sent with the shared session of the current process for the host, from ``get_session``, rather
+        than a session per connection, so keep-alive connections are re-used by every ``github.Github`` object.
+
+        Args:
+            *args: Positional arguments passed to the PyGithub connection class.
+            **kwargs: Keyword arguments passed to the PyGithub connection class.
+
+        """
+        super().__init__(*args, **kwargs)
+        self._local = threading.local()
+        self.session = None
+
+    def __getstate__(self) -> Dict[str, Any]:
+        """Get the state to pickle without the per-thread request details, so connections can be sent to processes."""
+        state = self.__dict__.copy()
+        del state["_local"]
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        """Restore a pickled connection, with empty per-thread request details."""
+        self.__dict__.update(state)
+        self._local = threading.local()
+
+    def request(self, verb: str, url: str, input: Optional[Any], headers: Dict[str, str]) -> None:
+        """Store the details of a request for the current thread.
+
+        Args:
+            verb: A HTTP verb, for example 'GET'.
+            url: The URL path of the request.
+            input: The encoded body of the request, if any.
+            headers: The request headers.
+
+        Returns:
+            None.
+
+        """
+        self._local.request = (verb, url, input, headers)
+
+    def getresponse(self) -> RequestsResponse:
+        """Send the request stored for the current thread, and return its response.
+
+        Returns:
+            A ``github.Requester.RequestsResponse`` object mimicking a ``http.client.HTTPResponse`` object.
+
+        """
+
+        # Get the request details for the current thread, and the absolute URL of the request
+        verb, path, input, headers = self._local.request
+        url = f"{self.protocol}://{self.host}:{self.port}{path}"
+
+        # Call the `before_request` method of each hook, stopping if a hook returns a response
+        response = None
+        for hook in _connection_hooks:
+            response = hook.before_request(verb, url, headers)
+            if response is not None:
+                break
+
+        # Send the request with the shared session of this process, if no hook returned a response
+        if response is None:
+            _request_counts.count = get_request_count() + 1
+            session = self.session or get_session(self.protocol, self.host, self.port, getattr(self, "retry", None))
+            response = RequestsResponse(getattr(session, verb.lower())(
+                url, headers=headers, data=input, timeout=self.timeout, verify=self.verify, allow_redirects=False
+            ))
+
+        # Call the `after_response` method of each hook, and return the response
+        for hook in _connection_hooks:
+            response = hook.after_response(verb, url, headers, response)
+        return response
+
+
+class HTTPConnection(_ThreadSafeConnectionMixin, HTTPRequestsConnectionClass):
+    """Thread-safe version of the PyGithub HTTP connection class."""
+
+
+class HTTPSConnection(_ThreadSafeConnectionMixin, HTTPSRequestsConnectionClass):
+    """Thread-safe version of the PyGithub HTTPS connection class."""
+
+
+# Use the thread-safe connection classes for all `github.Github` objects created from now on. Injecting connection
+# classes also stops PyGithub re-using each connection, which is safe again with the thread-safe classes
+Requester.injectConnectionClasses(HTTPConnection, HTTPSConnection)
+Requester._Requester__persist = True
+
+# Forget the sessions of the parent process in forked worker processes
+os.register_at_fork(after_in_child=_reset_sessions_after_fork)
@@ -0,0 +1,317 @@
+from requests.structures import CaseInsensitiveDict
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+from urllib.parse import urlparse
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+
+# Conditional request headers, and the response headers their values are taken from
+_CONDITIONAL_HEADERS = {"If-None-Match": "ETag", "If-Modified-Since": "Last-Modified"}
+
+# Response headers describing the body of a response, which are not copied from a `304 Not Modified` response
+_BODY_HEADERS = frozenset({"content-encoding", "content-length", "content-type", "transfer-encoding"})
+
+# Evict cached responses after this many responses are stored
+_EVICTION_INTERVAL = 100
+
+# Table of cached GitHub API responses
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    url TEXT NOT NULL,
+    status INTEGER NOT NULL,
+    headers TEXT NOT NULL,
+    body BLOB NOT NULL,
+    stored_at REAL NOT NULL,
+    accessed_at REAL NOT NULL,
+    size INTEGER NOT NULL
+)
+"""
+
+
+def _normalise_url(url: str) -> str:
+    """Normalise an absolute URL to include its port, so the same request has the same URL with or without the port.
+
+    Examples:
+        >>> _normalise_url("https://api.github.com/orgs/foo?page=2")
+        'https://api.github.com:443/orgs/foo?page=2'
+        >>> _normalise_url("http://localhost:8080/orgs/foo")
+        'http://localhost:8080/orgs/foo'
+        >>> _normalise_url("/orgs/foo")
+        '/orgs/foo'
+
+    """
+    parsed = urlparse(url)
+    if not parsed.scheme:
+        return url
+    port = parsed.port or {"http": 80, "https": 443}.get(parsed.scheme)
+    return f"{parsed.scheme}://{parsed.hostname}:{port}{parsed.path}" + (f"?{parsed.query}" if parsed.query else "")
+
+
+class CachedResponse:
+
+    def __init__(self, status: int, headers: Mapping[str, str], text: str, from_cache: bool) -> None:
+        """A cached GitHub API response, mimicking a ``github.Requester.RequestsResponse`` object.
+
+        Args:
+            status: The HTTP status code of the response.
+            headers: The response headers.
+            text: The body of the response.
+            from_cache: True if the response was served from the cache without sending a request, or False if the
+                cached response was revalidated with a conditional request.
+
+        """
+        self.status = status
+        self.headers = CaseInsensitiveDict(headers)
+        self.text = text
+        self.from_cache = from_cache
+
+    def getheaders(self) -> List[Tuple[str, str]]:
+        """Get the response headers as a list of name-value pairs."""
+        return list(self.headers.items())
+
+    def read(self) -> str:
+        """Get the body of the response."""
+        return self.text
+
+
+class HTTPCache:
+
+    def __init__(self, path: Optional[str] = None, max_size_bytes: int = 256 * 1024 ** 2,
+                 max_age: float = 7 * 24 * 60 * 60, ttl: float = 0.0,
+                 ttl_overrides: Optional[Dict[str, float]] = None) -> None:
+        """A persistent on-disk cache of GitHub API responses, using conditional requests to revalidate them.
+
+        Successful GET responses with an ``ETag`` or ``Last-Modified`` header are stored in a SQLite database. Within
+        their time-to-live (TTL), cached responses are used without sending a request. After their TTL, requests are
+        sent with ``If-None-Match`` and ``If-Modified-Since`` headers; if the response is ``304 Not Modified``, the
+        cached response is used instead. GitHub does not count ``304`` responses against the `API rate limit`__.
+
+        Add the ``HTTPCache`` object with ``src.utils.github_connection.add_connection_hook(cache, 0)`` to cache every
+        request sent by ``github.Github`` objects; adding it as the first hook means cached responses used without a
+        request are not paced by a ``RateLimiter`` object.
+
+        Args:
+            path: Default: None. File path of the SQLite database. If None, this is ``http_cache.sqlite`` in the
+                ``DIR_DATA_INTERIM`` directory.
+            max_size_bytes: Default: 256 MiB. The maximum total size of cached response bodies, in bytes. The least
+                recently used responses are evicted first.
+            max_age: Default: 7 days. The maximum number of seconds to keep a cached response since it was last stored
+                or revalidated.
+            ttl: Default: 0.0. The number of seconds a cached response is used without sending a request. If 0.0, all
+                cached responses are revalidated with a conditional request.
+            ttl_overrides: Default: None. A dictionary where keys are regular expressions matched against the start of
+                request URL paths, for example ``r"/orgs/[^/]+/repos"``, and values are TTLs in seconds to use instead
+                of ``ttl``. The first matching regular expression is used.
+
+        Cached responses are evicted every 100 stored responses, and when the cache is created.
+
+        .. _rate:
+            https://docs.github.com/en/rest/overview/resources-in-the-rest-api#conditional-requests
+
+        __ rate_
+
+        """
+
+        # Instantiate attributes
+        self.path = path or os.path.join(os.getenv("DIR_DATA_INTERIM"), "http_cache.sqlite")
+        self.max_size_bytes = max_size_bytes
+        self.max_age = max_age
+        self.ttl = ttl
+        self.ttl_overrides = [(re.compile(k), v) for k, v in (ttl_overrides or {}).items()]
+
+        # SQLite connections cannot be shared between threads or processes, so each has its own
+        self._local = threading.local()
+        self._stored_since_eviction = 0
+
+        # Create the table if it doesn't exist, and evict any expired responses
+        self.evict()
+
+    @property
+    def _connection(self) -> sqlite3.Connection:
+        """A SQLite connection for the current thread, and process."""
+        if getattr(self._local, "pid", None) != os.getpid():
+            self._local.connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            self._local.connection.execute("PRAGMA journal_mode=WAL")
+            self._local.connection.execute(_SCHEMA)
+            self._local.pid = os.getpid()
+        return self._local.connection
+
+    @staticmethod
+    def key(url: str, headers: Mapping[str, str]) -> str:
+        """Create a cache key for a request, so responses are not shared between hosts, credentials, or media types.
+
+        Args:
+            url: The absolute URL of the request, including any query string.
+            headers: The request headers.
+
+        Returns:
+            A hexadecimal SHA-256 hash of the URL, including its protocol, host, and port, and the ``Authorization`` and
+            ``Accept`` request headers.
+
+        """
+        return hashlib.sha256("\n".join([_normalise_url(url), headers.get("Authorization", ""),
+                                         headers.get("Accept", "")]).encode("utf-8")).hexdigest()
+
+    def get_ttl(self, path: str) -> float:
+        """Get the time-to-live in seconds for cached responses to a request URL path.
+
+        Args:
+            path: The URL path of the request.
+
+        Returns:
+            The TTL of the first regular expression in ``ttl_overrides`` that matches the start of ``path``, otherwise
+            ``ttl``.
+
+        """
+        return next((v for k, v in self.ttl_overrides if k.match(path)), self.ttl)
+
+    def get(self, key: str) -> Optional[Tuple[int, Dict[str, str], str, float]]:
+        """Get a cached response.
+
+        Args:
+            key: A cache key created by ``key``.
+
+        Returns:
+            A tuple of the status code, headers, body, and time the response was stored or last revalidated, or None if
+            there is no cached response.
+
+        """
+        row = self._connection.execute("SELECT status, headers, body, stored_at FROM responses WHERE key = ?",
+                                       (key,)).fetchone()
+        if row is None:
+            return None
+        self._connection.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (time.time(), key))
+        return row[0], json.loads(row[1]), row[2], row[3]
+
+    def set(self, key: str, url: str, status: int, headers: Mapping[str, str], body: str) -> None:
+        """Store a response in the cache, periodically evicting expired and least recently used responses.
+
+        Args:
+            key: A cache key created by ``key``.
+            url: The URL of the request.
+            status: The HTTP status code of the response.
+            headers: The response headers.
+            body: The body of the response.
+
+        Returns:
+            None.
+
+        """
+        now = time.time()
+        self._connection.execute("INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                                 (key, url, status, json.dumps(dict(headers)), body, now, now,
+                                  len(body.encode("utf-8"))))
+        self._stored_since_eviction += 1
+        if self._stored_since_eviction >= _EVICTION_INTERVAL:
+            self.evict()
+
+    def evict(self) -> None:
+        """Evict cached responses older than ``max_age``, then the least recently used until within ``max_size_bytes``.
+
+        Returns:
+            None.
+
+        """
+        self._stored_since_eviction = 0
+        connection = self._connection
+        connection.execute("DELETE FROM responses WHERE stored_at < ?", (time.time() - self.max_age,))
+        total_size = connection.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total_size > self.max_size_bytes:
+            connection.execute("""
+                DELETE FROM responses WHERE key IN (
+                    SELECT key FROM (
+                        SELECT key, SUM(size) OVER (ORDER BY accessed_at DESC, key) AS cumulative_size FROM responses
+                    ) WHERE cumulative_size > ?
+                )
+            """, (self.max_size_bytes,))
+
+    def clear(self) -> None:
+        """Remove all cached responses.
+
+        Returns:
+            None.
+
+        """
+        self._connection.execute("DELETE FROM responses")
+
+    def lookup(self, url: str, headers: Dict[str, str]) -> Optional[CachedResponse]:
+        """Get a cached response within its TTL, or otherwise make a request conditional on the cached response.
+
+        Args:
+            url: The URL of the request, including any query string.
+            headers: The request headers. If there is a cached response outside its TTL, ``If-None-Match`` and
+                ``If-Modified-Since`` headers are added to it.
+
+        Returns:
+            A ``CachedResponse`` object if there is a cached response within its TTL, otherwise None.
+
+        """
+
+        # Get the cached response, if any
+        cached = self.get(self.key(url, headers))
+        if cached is None:
+            return None
+        status, cached_headers, body, stored_at = cached
+
+        # Use the cached response if it is within its TTL; otherwise make the request conditional on it having changed
+        if time.time() - stored_at < self.get_ttl(urlparse(url).path):
+            return CachedResponse(status, cached_headers, body, True)
+        cached_headers = CaseInsensitiveDict(cached_headers)
+        for request_header, response_header in _CONDITIONAL_HEADERS.items():
+            if response_header in cached_headers:
+                headers[request_header] = cached_headers[response_header]
+        return None
+
+    def store(self, url: str, headers: Dict[str, str], status: int, response_headers: Mapping[str, str],
+              body: str) -> Optional[CachedResponse]:
+        """Store a response, or get the cached response if the response is ``304 Not Modified``.
+
+        Args:
+            url: The URL of the request, including any query string.
+            headers: The request headers. Any conditional request headers added by ``lookup`` are removed.
+            status: The HTTP status code of the response.
+            response_headers: The response headers.
+            body: The body of the response.
+
+        Returns:
+            A ``CachedResponse`` object, updated with the headers of the new response, if the response is
+            ``304 Not Modified``, otherwise None.
+
+        """
+
+        # Remove the conditional request headers, so the cache key matches the original request
+        conditional = [headers.pop(h, None) for h in _CONDITIONAL_HEADERS]
+        key = self.key(url, headers)
+
+        # If the response has not changed, return the cached response updated with the headers of the new response,
+        # and store it again to reset its age
+        if status == 304 and any(conditional):
+            cached = self.get(key)
+            if cached is not None:
+                cached_status, cached_headers, cached_body, _ = cached
+                cached_headers = CaseInsensitiveDict(cached_headers)
+                cached_headers.update({k: v for k, v in response_headers.items() if k.lower() not in _BODY_HEADERS})
+                self.set(key, url, cached_status, cached_headers, cached_body)
+                return CachedResponse(cached_status, cached_headers, cached_body, False)
+
+        # Store successful responses that can be revalidated
+        response_headers = CaseInsensitiveDict(response_headers)
+        if status == 200 and any(h in response_headers for h in _CONDITIONAL_HEADERS.values()):
+            self.set(key, url, status, response_headers, body)
+        return None
+
+    def before_request(self, verb: str, url: str, headers: Dict[str, str]) -> Optional[CachedResponse]:
+        """Connection hook to use a cached response, or make the request conditional; see ``add_connection_hook``."""
+        return self.lookup(url, headers) if verb == "GET" else None
+
+    def after_response(self, verb: str, url: str, headers: Dict[str, str], response: Any) -> Any:
+        """Connection hook to store responses, and use cached responses if unchanged; see ``add_connection_hook``."""
+        if verb != "GET" or getattr(response, "from_cache", False):
+            return response
+        cached = self.store(url, headers, response.status, dict(response.getheaders()), response.read())
+        return response if cached is None else cached
@@ -0,0 +1,88 @@
+from collections.abc import Mapping
+from typing import Any, Dict, Iterator
+import json
+import os
+import threading
+
+
+class Journal(Mapping):
+
+    def __init__(self, path: str, fsync: bool = False) -> None:
+        """A durable, append-only journal of completed work, so long-running sweeps can be resumed after a failure.
+
+        Each completed key-value pair is appended to a JSON Lines file as soon as it is recorded. When a ``Journal``
+        object is created for an existing file, the pairs already in it are loaded, so a rerun can skip completed keys,
+        and replay their values; the ``Journal`` object is a read-only mapping of all the recorded pairs. A line left
+        half-written by a crash is discarded.
+
+        Pass a ``Journal`` object as the ``journal`` argument of ``get_items_for_all_repos``, or
+        ``add_team_with_permissions_to_all_repositories`` to checkpoint each repository as it completes.
+
+        Args:
+            path: File path of the journal. It is created if it does not exist.
+            fsync: Default: False. If True, each recorded pair is flushed to disk with ``os.fsync``, so it survives an
+                operating system crash, or power loss, as well as the Python process dying. This is slower.
+
+        """
+        self.path = path
+        self.fsync = fsync
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Any] = {}
+
+        # Load the pairs already recorded, truncating any half-written last line, so new lines are appended cleanly
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "a+b") as f:
+            f.seek(0)
+            content = f.read()
+            complete = content[:content.rfind(b"\n") + 1]
+            if len(complete) < len(content):
+                f.truncate(len(complete))
+        for line in complete.splitlines():
+            entry = json.loads(line)
+            self._entries[entry["key"]] = entry["value"]
+
+        # Open the journal for appending
+        self._file = open(path, "a", encoding="utf-8")
+
+    def __getitem__(self, key: str) -> Any:
+        """Get the recorded value of a key."""
+        return self._entries[key]
+
+    def __iter__(self) -> Iterator[str]:
+        """Iterate over the recorded keys, in the order they were first recorded."""
+        return iter(self._entries)
+
+    def __len__(self) -> int:
+        """Get the number of recorded keys."""
+        return len(self._entries)
+
+    def record(self, key: str, value: Any) -> None:
+        """Record a completed key-value pair, appending it to the journal file immediately.
+
+        Args:
+            key: A key, for example a repository full name.
+            value: A JSON-serialisable value.
+
+        Returns:
+            None.
+
+        """
+        line = json.dumps({"key": key, "value": value})
+        with self._lock:
+            self._file.write(f"{line}\n")
+            self._file.flush()
+            if self.fsync:
+                os.fsync(self._file.fileno())
+            self._entries[key] = value
+
+    def close(self) -> None:
+        """Close the journal file."""
+        self._file.close()
+
+    def __enter__(self) -> "Journal":
+        """Use the journal as a context manager, closing the journal file on exit."""
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        """Close the journal file."""
+        self.close()
@@ -1,16 +1,122 @@
-from time import time
-from typing import Any, Callable, Optional, Union
+from contextvars import ContextVar
+from itertools import count
+from logging.handlers import QueueHandler, QueueListener
+from src.utils.github_connection import get_request_count
+from src.utils.metrics import MetricsRegistry, metrics
+from src.utils.process_queue import ProcessQueue
+from time import perf_counter
+from typing import Any, Callable, List, Optional, Union
+import asyncio
+import atexit
 import functools
 import logging
 import os
+import queue
 
+# Name of the innermost function decorated with `Log` being executed in the current thread, or asynchronous task
+_current_function: ContextVar[Optional[str]] = ContextVar("current_function", default=None)
 
-def create_logger(name: str = None, filename: Optional[str] = None) -> Union[logging.Logger, logging.RootLogger]:
+# Number of characters kept in the message of a record of a forked worker process too large for the process queue
+_TRUNCATED_MESSAGE_LENGTH = 1000
+
+
+class _BatchFlushMixin:
+    """Mixin for a stream handler to flush its stream once per batch of records, rather than after every record."""
+
+    def flush(self) -> None:
+        """Do nothing; the stream is flushed by ``flush_batch`` instead."""
+
+    def flush_batch(self) -> None:
+        """Flush the stream."""
+        super().flush()
+
+
+class _BatchStreamHandler(_BatchFlushMixin, logging.StreamHandler):
+    """Logging console handler that flushes once per batch of records."""
+
+
+class _BatchFileHandler(_BatchFlushMixin, logging.FileHandler):
+    """Logging file handler that flushes once per batch of records."""
+
+
+class _ProcessQueueHandler(QueueHandler):
+
+    def __init__(self, thread_queue: queue.Queue, process_queue: ProcessQueue, listeners: List[QueueListener]) -> None:
+        """A queue handler that puts records on a thread queue, or on a process queue in forked worker processes.
+
+        Putting a record on a ``queue.Queue`` object is cheap, but it is not shared with other processes. Records of
+        forked worker processes are put on a ``ProcessQueue`` object instead, which writes each record to a pipe before
+        returning, so no record is lost if the worker is terminated once its task is done. It needs no lock, so a
+        worker terminated whilst logging cannot stop other processes logging, or this process exiting.
+
+        Args:
+            thread_queue: A ``queue.Queue`` object for records of the process that created the handler.
+            process_queue: A ``ProcessQueue`` object for records of forked worker processes.
+            listeners: The ``logging.handlers.QueueListener`` objects getting records from the queues.
+
+        """
+        super().__init__(thread_queue)
+        self.process_queue = process_queue
+        self.listeners = listeners
+        self._pid = os.getpid()
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        """Put a record on the thread queue, or the process queue if this is a forked worker process.
+
+        A record of a forked worker process too large for the process queue has its message truncated, and is dropped
+        if it is still too large.
+
+        """
+        if os.getpid() == self._pid:
+            self.queue.put_nowait(record)
+        elif not self.process_queue.put(record):
+            record.msg = record.message = f"{record.msg[:_TRUNCATED_MESSAGE_LENGTH]} [truncated]"
+            self.process_queue.put(record)
+
+
+class _BatchQueueListener(QueueListener):
+    """Queue listener that flushes its handlers whenever its queue empties, rather than after every record."""
+
+    def dequeue(self, block: bool) -> Any:
+        """Get the next record from the queue, flushing the handlers first if there is no record waiting."""
+        if self.queue.empty():
+            self.flush()
+        return self.queue.get()
+
+    def enqueue_sentinel(self) -> None:
+        """Put the sentinel on the queue, so the listener stops once it has handled all the records before it."""
+        self.queue.put(self._sentinel)
+
+    def flush(self) -> None:
+        """Flush all the handlers, ignoring streams already closed, for example on exit."""
+        for handler in self.handlers:
+            try:
+                getattr(handler, "flush_batch", handler.flush)()
+            except (OSError, ValueError):
+                pass
+
+    def stop(self) -> None:
+        """Stop the listener once it has handled all the records on the queue, and flush its handlers."""
+        if self._thread is not None:
+            super().stop()
+            self.flush()
+
+
+def create_logger(name: str = None, filename: Optional[str] = None,
+                  use_queue: bool = False) -> Union[logging.Logger, logging.RootLogger]:
     """Create a logger.
 
+    With ``use_queue``, the console, and file handlers are not added to the logger itself. Instead, records are put on
+    a queue, and background threads write them, flushing the handlers once the queue is empty, rather than after every
+    record. Worker processes forked from this process put their records on a queue shared with this process, so only
+    this process writes to the log file, and lines from different workers never interleave. The background threads are
+    stopped, and all outstanding records written, on exit.
+
     Args:
         name: Default: None. Name of the logger. If None, this is the root logger
         filename: Default: None. File path to write out to. If None, no file is created.
+        use_queue: Default: False. If True, write records in a background thread, through a queue shared with forked
+            worker processes.
 
     Returns:
         A logger for logging progress of the code, and a log file, if filename is not None.
@@ -25,28 +131,92 @@ def create_logger(name: str = None, filename: Optional[str] = None) -> Union[log
     log_format = logging.Formatter("%(asctime)s - %(name)s - %(levelname)s: %(message)s")
 
     # Create a logging console handler, and set its level
-    ch = logging.StreamHandler()
+    ch = _BatchStreamHandler() if use_queue else logging.StreamHandler()
     ch.setLevel(logging.INFO)
 
-    # Set the format of `ch`, and add it to `log`
+    # Set the format of `ch`
     ch.setFormatter(log_format)
-    log.addHandler(ch)
+    handlers = [ch]
 
     # Check if `filename` is not None
     if filename is not None:
 
         # Create a file handler, and set its level
-        fh = logging.FileHandler(filename)
+        fh = _BatchFileHandler(filename) if use_queue else logging.FileHandler(filename)
         fh.setLevel(logging.INFO)
 
-        # Set the format of `fh`, and add it to `log`
+        # Set the format of `fh`
         fh.setFormatter(log_format)
-        log.addHandler(fh)
-
-    # Return `log`
+        handlers.append(fh)
+
+    # If `use_queue` is False, add the handlers to `log`, and return it
+    if not use_queue:
+        for handler in handlers:
+            log.addHandler(handler)
+        return log
+
+    # Otherwise, create queues for this process, and forked worker processes, and listeners to write their records to
+    # the handlers in background threads, stopping them on exit
+    thread_queue, process_queue = queue.Queue(), ProcessQueue()
+    listeners = [_BatchQueueListener(q, *handlers, respect_handler_level=True) for q in (thread_queue, process_queue)]
+    for listener in listeners:
+        listener.start()
+        atexit.register(listener.stop)
+
+    # Add a queue handler to `log`, only queueing records at a level written by at least one handler, and return it
+    qh = _ProcessQueueHandler(thread_queue, process_queue, listeners)
+    qh.setLevel(min(h.level for h in handlers))
+    log.addHandler(qh)
     return log
 
 
+def get_current_function() -> Optional[str]:
+    """Get the name of the innermost function decorated with ``Log`` being executed.
+
+    Each thread, and each asynchronous task, has its own current function. Worker threads, and processes, start with
+    none, until they call a decorated function.
+
+    Returns:
+        The name of the function, or None if no decorated function is being executed.
+
+    """
+    return _current_function.get()
+
+
+def _is_handled(logger_obj: Union[logging.Logger, logging.RootLogger], level: int) -> bool:
+    """Check if a message at a logging level would be written by any handler of a logger, or its ancestors.
+
+    ``logging.Logger.isEnabledFor`` only checks the levels of the loggers. The "src" logger accepts all levels, but its
+    handlers only write INFO, and above, so this also checks the levels of the handlers that would receive the message.
+
+    Args:
+        logger_obj: A ``logging.Logger`` or ``logging.RootLogger`` object.
+        level: A logging level, for example ``logging.DEBUG``.
+
+    Returns:
+        True if the message would be written, otherwise False.
+
+    """
+
+    # Check the levels of the loggers first, which is cached by the `logging` module
+    if not logger_obj.isEnabledFor(level):
+        return False
+    if not isinstance(logger_obj, logging.Logger):
+        return True
+
+    # Check the handlers of the logger, and its ancestors, up to the first logger that does not propagate messages
+    current, has_handlers = logger_obj, False
+    while current is not None:
+        for handler in current.handlers:
+            has_handlers = True
+            if level >= handler.level:
+                return True
+        current = current.parent if current.propagate else None
+
+    # If there are no handlers, messages are written by the last resort handler
+    return not has_handlers and logging.lastResort is not None and level >= logging.lastResort.level
+
+
 class Log(object):
 
     # Message formats
@@ -54,14 +224,29 @@ class Log(object):
     MSG_EXIT = "`{}`: Executed in {:,.2f} s"
     MSG_EXCEPTION = "`{}`: Raised an exception!"
 
-    def __init__(self, logger_obj: Union[logging.Logger, logging.RootLogger] = None, level: str = "info") -> None:
+    def __init__(self, logger_obj: Union[logging.Logger, logging.RootLogger] = None, level: str = "info",
+                 sample_every: int = 1, metrics_registry: Optional[MetricsRegistry] = None) -> None:
         """A logging decorator to log entry, and exit into any given function, and also log exceptions.
 
+        Entry, and exit messages are only formatted if a message at ``level`` would be written by a handler, so
+        decorated functions cost little more than undecorated ones when their level is not written. Exceptions are
+        always logged.
+
+        If its ``MetricsRegistry`` object is enabled, every call is also recorded in it, with its duration, whether it
+        raised an exception, and the number of GitHub API requests sent by the calling thread during the call.
+
+        For functions called once per element, such as once per repository in a sweep, set ``sample_every`` to only log
+        the entry, and exit messages of one in every ``sample_every`` calls.
+
         Args:
-            logger_obj: Default: None. A ``logging.Logger`` or ``logging.RootLogger`` object. If None, a root logger is
-                setup later.
+            logger_obj: Default: None. A ``logging.Logger`` or ``logging.RootLogger`` object. If None, the root logger
+                is used.
             level: Default: 'info'. The level of function entry/and exit messages. Must be a one of the levels listed
                 in the documentation here_.
+            sample_every: Default: 1. Log the entry, and exit messages of the first call, and every ``sample_every``
+                calls after it. If 1, log every call.
+            metrics_registry: Default: None. A ``MetricsRegistry`` object to record each call in. If None, this is
+                ``src.utils.metrics.metrics``.
 
         .. _here:
             https://docs.python.org/3/library/logging.html#logging-levels
@@ -71,6 +256,8 @@ class Log(object):
         # Instantiate attributes
         self.logger = logger_obj
         self.level = level.lower()
+        self.sample_every = sample_every
+        self.metrics_registry = metrics_registry
 
     def __call__(self, func: Callable) -> Any:
         """Logging decorator wrapper around a function to log entry/exit messages, and exceptions.
@@ -83,36 +270,123 @@ class Log(object):
 
         """
 
+        # Resolve the logger, its logging method, and level once, rather than on every call
+        self._logger_obj = self.logger or logging.getLogger()
+        self._log_message = getattr(self._logger_obj, self.level)
+        self._level_number = logging.getLevelName(self.level.upper())
+        self._calls = count()
+
+        # Resolve the metrics registry
+        self._metrics_registry = self.metrics_registry or metrics
+
+        # If `func` is a coroutine function, wrap it in a coroutine function, so that the exit message is logged once
+        # it is awaited
+        if asyncio.iscoroutinefunction(func):
+            return self._wrap_coroutine_function(func)
+        return self._wrap_function(func)
+
+    def _is_logged(self) -> bool:
+        """Check if the entry, and exit messages of a call are written, and the call is sampled."""
+        if not _is_handled(self._logger_obj, self._level_number):
+            return False
+        return self.sample_every == 1 or next(self._calls) % self.sample_every == 0
+
+    def _get_request_count(self) -> int:
+        """Get the number of requests sent by this thread, if the metrics registry is enabled, otherwise 0."""
+        return get_request_count() if self._metrics_registry.enabled else 0
+
+    def _record(self, name: str, time_start: float, requests_start: int, failed: bool) -> float:
+        """Record a call in the metrics registry, if it is enabled, and return its duration in seconds."""
+        seconds = perf_counter() - time_start
+        if self._metrics_registry.enabled:
+            self._metrics_registry.record(name, seconds, failed, get_request_count() - requests_start)
+        return seconds
+
+    def _wrap_function(self, func: Callable) -> Callable:
+        """Wrap a function to log entry/exit messages, and exceptions."""
+
         @functools.wraps(func)
         def wrapper(*args, **kwargs):
 
-            # Try to execute the function
+            # Check if this call is logged, and start a timer, and a count of the requests sent by this thread
+            logged = self._is_logged()
+            time_start, requests_start = perf_counter(), self._get_request_count()
+
+            # Try to execute the function, as the current function
+            token = _current_function.set(func.__name__)
             try:
 
                 # Log an entry message into the function
-                getattr(self.logger, self.level)(self.MSG_ENTRY.format(func.__name__))
-
-                # Start a timer
-                time_start = time()
+                if logged:
+                    self._log_message(self.MSG_ENTRY.format(func.__name__))
 
                 # Execute the function
                 output = func(*args, **kwargs)
 
-                # Log an exit message out of the function
-                getattr(self.logger, self.level)(self.MSG_EXIT.format(func.__name__, time() - time_start))
-
-                # Return the output from the function
-                return output
-
             except Exception as e:
 
-                # Log an exception message, and re-raise the error
-                self.logger.exception(self.MSG_EXCEPTION.format(func.__name__))
+                # Record the call, log an exception message, and re-raise the error
+                self._record(func.__name__, time_start, requests_start, True)
+                self._logger_obj.exception(self.MSG_EXCEPTION.format(func.__name__))
                 raise e
 
+            finally:
+                _current_function.reset(token)
+
+            # Record the call, and log an exit message out of the function
+            seconds = self._record(func.__name__, time_start, requests_start, False)
+            if logged:
+                self._log_message(self.MSG_EXIT.format(func.__name__, seconds))
+
+            # Return the output from the function
+            return output
+
         # Return the wrapper
         return wrapper
 
+    def _wrap_coroutine_function(self, func: Callable) -> Callable:
+        """Wrap a coroutine function to log entry/exit messages, and exceptions, once it is awaited."""
+
+        @functools.wraps(func)
+        async def async_wrapper(*args, **kwargs):
+
+            # Check if this call is logged, and start a timer, and a count of the requests sent by this thread
+            logged = self._is_logged()
+            time_start, requests_start = perf_counter(), self._get_request_count()
+
+            # Try to execute the coroutine function, as the current function
+            token = _current_function.set(func.__name__)
+            try:
+
+                # Log an entry message into the function
+                if logged:
+                    self._log_message(self.MSG_ENTRY.format(func.__name__))
+
+                # Execute, and await the coroutine function
+                output = await func(*args, **kwargs)
+
+            except Exception as e:
+
+                # Record the call, log an exception message, and re-raise the error
+                self._record(func.__name__, time_start, requests_start, True)
+                self._logger_obj.exception(self.MSG_EXCEPTION.format(func.__name__))
+                raise e
+
+            finally:
+                _current_function.reset(token)
+
+            # Record the call, and log an exit message out of the function
+            seconds = self._record(func.__name__, time_start, requests_start, False)
+            if logged:
+                self._log_message(self.MSG_EXIT.format(func.__name__, seconds))
+
+            # Return the output from the function
+            return output
+
+        # Return the coroutine function wrapper
+        return async_wrapper
+
 
 # Create the logger
-logger = create_logger("src", os.path.join(os.getenv("DIR_DATA_LOGS"), "github-organisation-administration.log"))
+logger = create_logger("src", os.path.join(os.getenv("DIR_DATA_LOGS"), "github-organisation-administration.log"),
+                       use_queue=True)
@@ -0,0 +1,266 @@
+from bisect import bisect_left
+from multiprocessing.util import Finalize, register_after_fork
+from src.utils.process_queue import ProcessQueue
+from typing import Dict, Iterable, List, Optional
+import json
+import math
+import os
+import threading
+
+# Upper bounds, in seconds, of the buckets of the latency histograms; there is also an unbounded last bucket
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 25.0, 50.0, 100.0,
+                   250.0, 500.0, 1000.0)
+
+# Percentiles of the latency of each function reported by `MetricsRegistry.get_metrics`
+PERCENTILES = (50, 95, 99)
+
+# Positions of each value in the state of each function in a `MetricsRegistry` object; the bucket counts follow
+_CALLS, _EXCEPTIONS, _SECONDS, _REQUESTS, _BUCKETS = range(5)
+
+
+class MetricsRegistry:
+
+    def __init__(self, buckets: Iterable[float] = LATENCY_BUCKETS, enabled: bool = False) -> None:
+        """Structured metrics of the calls of each function decorated with ``Log``.
+
+        For each function, the number of calls, the number of calls that raised an exception, the number of GitHub API
+        requests sent during the calls, and a histogram of the duration of the calls are recorded. Percentiles of the
+        duration are estimated from the histogram, in the same way as the Prometheus ``histogram_quantile`` function.
+
+        Metrics are opt-in; nothing is recorded until ``enable`` is called. Each thread records its calls in its own
+        counters, without a lock. Worker processes forked after ``enable`` is called start with empty counters, and
+        send them to this process through a ``ProcessQueue`` object when they exit, for example when a pool of the
+        parallel processing functions finishes, or a ``WorkerPool`` object is closed. The calls of workers that are
+        terminated, or killed are lost. Export the metrics with ``to_json``, or ``to_prometheus``.
+
+        Args:
+            buckets: Default: ``LATENCY_BUCKETS``. Upper bounds, in seconds, of the buckets of the latency histograms,
+                in increasing order.
+            enabled: Default: False. If True, ``enable`` is called.
+
+        """
+        self.buckets = tuple(buckets)
+        self.enabled = False
+        self._queue: Optional[ProcessQueue] = None
+        self._pid = os.getpid()
+        self._reset_counters()
+        register_after_fork(self, MetricsRegistry._after_fork)
+        if enabled:
+            self.enable()
+
+    def _reset_counters(self) -> None:
+        """Create empty counters for this process, and a lock for adding, or removing the counters of each thread."""
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._thread_states: List[Dict[str, List[float]]] = []
+        self._merged_states: Dict[str, List[float]] = {}
+
+    def enable(self) -> None:
+        """Start recording calls, and adding the calls of forked worker processes when they exit.
+
+        Call ``enable`` before any worker processes are forked for their calls to be added.
+
+        Returns:
+            None.
+
+        """
+        if self._queue is None or self._pid != os.getpid():
+            self._queue, self._pid = ProcessQueue(), os.getpid()
+            threading.Thread(target=self._listen, daemon=True).start()
+        self.enabled = True
+
+    def disable(self) -> None:
+        """Stop recording calls, keeping the calls already recorded.
+
+        Returns:
+            None.
+
+        """
+        self.enabled = False
+
+    def _after_fork(self) -> None:
+        """Empty the counters in a forked worker process, and send them to the parent process when the worker exits."""
+        self._reset_counters()
+        if self._queue is not None:
+            Finalize(self, self._send_states, exitpriority=0)
+
+    def _send_states(self) -> None:
+        """Send the state of each function called in this process to the process that called ``enable``."""
+        for name, state in self._get_local_states().items():
+            self._queue.put((name, state))
+
+    def _listen(self) -> None:
+        """Add the states sent by forked worker processes as they arrive."""
+        while True:
+            self._queue.wait()
+            self._add_sent_states()
+
+    def _add_sent_states(self) -> None:
+        """Add the states sent by forked worker processes, if this process called ``enable``."""
+        if self._queue is None or self._pid != os.getpid():
+            return
+        with self._lock:
+            while not self._queue.empty():
+                name, state = self._queue.get()
+                merged_state = self._merged_states.setdefault(name, [0.0] * len(state))
+                merged_state[:] = [m + v for m, v in zip(merged_state, state)]
+
+    def record(self, name: str, seconds: float, failed: bool = False, requests: int = 0) -> None:
+        """Record a call of a function, if the registry is enabled.
+
+        Args:
+            name: The name of the function.
+            seconds: The duration of the call.
+            failed: Default: False. If True, the call raised an exception.
+            requests: Default: 0. The number of GitHub API requests sent during the call.
+
+        Returns:
+            None.
+
+        """
+        if not self.enabled:
+            return
+
+        # Get the counters of this thread, creating them on its first call
+        states = getattr(self._local, "states", None)
+        if states is None:
+            states = self._local.states = {}
+            with self._lock:
+                self._thread_states.append(states)
+
+        # Add the call to the state of the function
+        state = states.get(name)
+        if state is None:
+            state = states[name] = [0.0] * (_BUCKETS + len(self.buckets) + 1)
+        state[_CALLS] += 1
+        state[_EXCEPTIONS] += failed
+        state[_SECONDS] += seconds
+        state[_REQUESTS] += requests
+        state[_BUCKETS + bisect_left(self.buckets, seconds)] += 1
+
+    def reset(self) -> None:
+        """Reset the metrics of all functions to zero.
+
+        Returns:
+            None.
+
+        """
+        self._add_sent_states()
+        with self._lock:
+            for state in [*self._merged_states.values(), *(s for t in self._thread_states for s in list(t.values()))]:
+                state[:] = [0.0] * len(state)
+
+    def _get_local_states(self) -> Dict[str, List[float]]:
+        """Get the sum of the states of each function over the threads of this process, and the states sent to it."""
+        states: Dict[str, List[float]] = {}
+        with self._lock:
+            for name, state in [*self._merged_states.items(),
+                                *(i for t in self._thread_states for i in list(t.items()))]:
+                summed_state = states.setdefault(name, [0.0] * len(state))
+                summed_state[:] = [m + v for m, v in zip(summed_state, state)]
+        return {name: state for name, state in states.items() if state[_CALLS]}
+
+    def _get_states(self) -> Dict[str, List[float]]:
+        """Get the state of each function called at least once, including by exited worker processes, sorted by name."""
+        self._add_sent_states()
+        return dict(sorted(self._get_local_states().items()))
+
+    def _get_percentile(self, state: List[float], percentile: float) -> float:
+        """Estimate a percentile of the duration of a function from its histogram.
+
+        The rank of the percentile is found in the cumulative bucket counts, and the duration linearly interpolated
+        within its bucket. If the rank is in the unbounded last bucket, the upper bound of the previous bucket is used.
+
+        Args:
+            state: A copy of the state of the function.
+            percentile: The percentile, between 0, and 100.
+
+        Returns:
+            The estimated duration, in seconds.
+
+        """
+        rank, cumulative = percentile / 100 * state[_CALLS], 0.0
+        for i, count in enumerate(state[_BUCKETS:]):
+            if count and cumulative + count >= rank:
+                if i == len(self.buckets):
+                    return self.buckets[-1]
+                lower = self.buckets[i - 1] if i else 0.0
+                return lower + (self.buckets[i] - lower) * (rank - cumulative) / count
+            cumulative += count
+        return 0.0
+
+    def get_metrics(self) -> Dict[str, Dict[str, float]]:
+        """Get the metrics of every function called at least once.
+
+        Returns:
+            A dictionary where keys are function names, and values are dictionaries with keys 'calls', 'exceptions',
+            'http_requests', 'http_requests_per_call', 'seconds_total', 'seconds_mean', and the estimated percentiles
+            of the duration in seconds, 'p50', 'p95', and 'p99'.
+
+        """
+        output = {}
+        for name, state in self._get_states().items():
+            calls = int(state[_CALLS])
+            output[name] = {
+                "calls": calls,
+                "exceptions": int(state[_EXCEPTIONS]),
+                "http_requests": int(state[_REQUESTS]),
+                "http_requests_per_call": state[_REQUESTS] / calls,
+                "seconds_total": state[_SECONDS],
+                "seconds_mean": state[_SECONDS] / calls,
+                **{f"p{p}": self._get_percentile(state, p) for p in PERCENTILES},
+            }
+        return output
+
+    def to_json(self, indent: Optional[int] = None) -> str:
+        """Export the metrics of every function called at least once as JSON.
+
+        Args:
+            indent: Default: None. The indent of the JSON; if None, the JSON is on one line.
+
+        Returns:
+            The output of ``get_metrics`` as a JSON string.
+
+        """
+        return json.dumps(self.get_metrics(), indent=indent)
+
+    def to_prometheus(self, prefix: str = "src") -> str:
+        """Export the metrics of every function called at least once in the Prometheus text exposition format.
+
+        Args:
+            prefix: Default: 'src'. The prefix of the metric names.
+
+        Returns:
+            The metrics as a string, with counters of the calls, exceptions, and GitHub API requests, and a histogram
+            of the duration of each function, labelled by function name.
+
+        """
+        states = self._get_states()
+        lines = []
+
+        # Add the counters
+        for metric, position, description in [("calls", _CALLS, "Number of calls"),
+                                              ("exceptions", _EXCEPTIONS, "Number of calls that raised an exception"),
+                                              ("http_requests", _REQUESTS, "Number of GitHub API requests sent")]:
+            lines.append(f"# HELP {prefix}_function_{metric}_total {description} of each function.")
+            lines.append(f"# TYPE {prefix}_function_{metric}_total counter")
+            lines.extend(f'{prefix}_function_{metric}_total{{function="{n}"}} {int(s[position])}'
+                         for n, s in states.items())
+
+        # Add the histograms, where bucket counts are cumulative
+        lines.append(f"# HELP {prefix}_function_duration_seconds Duration of the calls of each function.")
+        lines.append(f"# TYPE {prefix}_function_duration_seconds histogram")
+        for name, state in states.items():
+            cumulative = 0
+            for bound, count in zip([*self.buckets, math.inf], state[_BUCKETS:]):
+                cumulative += int(count)
+                le = "+Inf" if bound == math.inf else repr(bound)
+                lines.append(f'{prefix}_function_duration_seconds_bucket{{function="{name}",le="{le}"}} {cumulative}')
+            lines.append(f'{prefix}_function_duration_seconds_sum{{function="{name}"}} {state[_SECONDS]!r}')
+            lines.append(f'{prefix}_function_duration_seconds_count{{function="{name}"}} {int(state[_CALLS])}')
+
+        return "\n".join(lines) + "\n"
+
+
+# Create the metrics registry used by `Log` by default; it records nothing until it is enabled
+metrics = MetricsRegistry()
@@ -1,35 +1,223 @@
-from typing import Callable, Dict, List
+from collections.abc import Sized
+from contextlib import contextmanager
+from itertools import islice
+from multiprocessing.pool import Pool, ThreadPool
+from src.utils.github_connection import reserve_connections
+from src.utils.journal import Journal
+from src.utils.retry_policy import DeadLetter, RetryPolicy, with_retry_policy
+from src.utils.worker_pool import WorkerPool
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, Union
+import math
 import multiprocessing as mp
+import queue
+import time
 
+# Target number of seconds each chunk takes to process, when chunk sizes are adaptive
+ADAPTIVE_CHUNK_SECONDS = 0.5
 
-def parallelise_processing(callable_function: Callable, iterable: iter, cpu_count: int, max_chunksize: int) -> List:
+# Weight of the latest chunk in the moving average of the seconds per element, when chunk sizes are adaptive
+_LATENCY_SMOOTHING = 0.3
+
+
+@contextmanager
+def _create_pool(executor: Union[str, WorkerPool], cpu_count: int) -> Iterator[Union[Pool, ThreadPool]]:
+    """Create a pool of workers for an executor backend, or re-use the pool of a ``WorkerPool`` object.
+
+    A new pool is closed once its work is done, and its workers are waited for, so each worker exits normally, and
+    sends, for example, its metrics to this process; see ``MetricsRegistry``. If an exception is raised, or the outputs
+    stop being consumed, the workers are terminated instead.
+
+    Args:
+        executor: The executor backend; either 'thread' for a pool of threads, 'process' for a pool of processes, or a
+            ``WorkerPool`` object.
+        cpu_count: The number of workers in the pool.
+
+    Yields:
+        A ``multiprocessing.pool.ThreadPool`` object if ``executor`` is 'thread', or a ``multiprocessing.Pool`` object
+        if ``executor`` is 'process'. If ``executor`` is a ``WorkerPool`` object, its pool, which is left running.
+        Threads share the sessions of this process, so enough keep-alive connections are reserved for every thread.
+
+    """
+    if isinstance(executor, WorkerPool):
+        yield executor.pool
+        return
+    if executor == "thread":
+        reserve_connections(cpu_count)
+        new_pool = ThreadPool(cpu_count)
+    elif executor == "process":
+        new_pool = mp.Pool(cpu_count)
+    else:
+        raise ValueError(f"Unknown executor: {executor!r}; must be one of 'thread' or 'process'")
+    with new_pool as pool:
+        yield pool
+        pool.close()
+        pool.join()
+
+
+def _get_cpu_count(executor: Union[str, WorkerPool], cpu_count: int) -> int:
+    """Get the number of workers of an executor backend; the ``cpu_count`` of a ``WorkerPool`` object overrides it."""
+    return executor.cpu_count if isinstance(executor, WorkerPool) else cpu_count
+
+
+def _collect_dead_letters(outputs: List, dead_letters: Optional[List[DeadLetter]]) -> List:
+    """Remove ``DeadLetter`` objects from a list of outputs, appending them to ``dead_letters`` if it is a list."""
+    if dead_letters is not None:
+        dead_letters.extend(o for o in outputs if isinstance(o, DeadLetter))
+    return [o for o in outputs if not isinstance(o, DeadLetter)]
+
+
+class _TimedChunk:
+
+    def __init__(self, callable_function: Callable) -> None:
+        """A picklable callable function that processes a chunk of elements, and times it inside the worker.
+
+        Args:
+            callable_function: A callable function, called on each element of the chunk.
+
+        """
+        self.callable_function = callable_function
+
+    def __call__(self, chunk: List) -> Tuple[List, float]:
+        """Process each element of ``chunk``, and return the outputs, and the number of seconds taken."""
+        start = time.perf_counter()
+        outputs = [self.callable_function(e) for e in chunk]
+        return outputs, time.perf_counter() - start
+
+
+def _adaptive_imap_unordered(pool: Union[Pool, ThreadPool], callable_function: Callable, iterable: iter,
+                             cpu_count: int, max_chunksize: int) -> Iterator:
+    """Process an iterable with a pool of workers, sizing each chunk from the observed latency of previous chunks.
+
+    The first chunk sent to each worker has one element. Later chunks are sized to take about
+    ``ADAPTIVE_CHUNK_SECONDS``, from a moving average of the seconds per element, but never more than ``max_chunksize``,
+    nor, if ``iterable`` has a length, an equal share of the remaining elements between twice the number of workers.
+    Chunks therefore shrink towards the end of the iterable. At most two chunks per worker are queued at once, and idle
+    workers take the next chunk from the shared queue, so a slow element only delays the few elements in its own chunk.
+
+    Args:
+        pool: A ``multiprocessing.pool.ThreadPool``, or ``multiprocessing.Pool`` object.
+        callable_function: A callable function.
+        iterable: An iterable that will be split amongst the workers for parallel processing. It is read lazily, one
+            chunk at a time, so it can be a generator.
+        cpu_count: The number of workers in ``pool``.
+        max_chunksize: The maximum number of elements per chunk.
+
+    Yields:
+        Each output of ``callable_function``, in the order the chunks finish.
+
+    """
+
+    # Initialise the number of remaining elements, if known, the moving average of seconds per element, the number of
+    # chunks in flight, and a queue to receive the outputs of the workers
+    remaining = len(iterable) if isinstance(iterable, Sized) else None
+    iterator = iter(iterable)
+    seconds_per_element, in_flight, exhausted = None, 0, False
+    results = queue.Queue()
+    timed_chunk = _TimedChunk(callable_function)
+
+    while True:
+
+        # Submit chunks until two per worker are in flight, sized from the observed latency
+        while in_flight < 2 * cpu_count and not exhausted:
+            chunk_size = max_chunksize
+            if remaining is not None:
+                chunk_size = min(chunk_size, math.ceil(remaining / (2 * cpu_count)))
+            if seconds_per_element is None:
+                chunk_size = 1
+            elif seconds_per_element > 0:
+                chunk_size = min(chunk_size, max(int(ADAPTIVE_CHUNK_SECONDS / seconds_per_element), 1))
+            chunk = list(islice(iterator, max(chunk_size, 1)))
+            if not chunk:
+                exhausted = True
+                break
+            pool.apply_async(timed_chunk, (chunk,), callback=lambda o: results.put((True, o)),
+                             error_callback=lambda e: results.put((False, e)))
+            remaining = None if remaining is None else remaining - len(chunk)
+            in_flight += 1
+
+        # Stop if there is no more work
+        if in_flight == 0:
+            return
+
+        # Wait for the next chunk; re-raise any exception raised by `callable_function`
+        succeeded, output = results.get()
+        in_flight -= 1
+        if not succeeded:
+            raise output
+
+        # Update the moving average of seconds per element, and yield the outputs of the chunk
+        outputs, seconds = output
+        latest = seconds / len(outputs)
+        seconds_per_element = latest if seconds_per_element is None else \
+            _LATENCY_SMOOTHING * latest + (1 - _LATENCY_SMOOTHING) * seconds_per_element
+        yield from outputs
+
+
+def parallelise_processing(callable_function: Callable, iterable: iter, cpu_count: int, max_chunksize: int,
+                           executor: Union[str, WorkerPool] = "thread", retry_policy: Optional[RetryPolicy] = None,
+                           dead_letters: Optional[List[DeadLetter]] = None, adaptive_chunks: bool = False) -> List:
     """Parallelise processing of an iterable.
 
+    Threads are the default executor backend, as GitHub API requests spend nearly all their time waiting on the
+    network. Threads also avoid pickling ``callable_function``, and any ``github.Github`` object it holds, for each
+    worker. Use the 'process' backend for CPU-bound work.
+
+    ``iterable`` does not need a length; generators, and ``github.PaginatedList.PaginatedList`` objects are read
+    lazily, and each element sent to a worker as soon as it is read, so processing overlaps with, for example, listing
+    the repositories of an organisation.
+
     Args:
         callable_function: A callable function that returns a dictionary.
-        iterable: An iterable that will be split amongst the CPUs for parallel processing.
+        iterable: An iterable that will be split amongst the CPUs for parallel processing. If it has no length, each
+            element is sent to the workers on its own, and ``max_chunksize`` is ignored.
         cpu_count: The number of CPUs to parallelise the processing.
         max_chunksize: The maximum number of iterables per CPU.
+        executor: Default: 'thread'. The executor backend; either 'thread' for a pool of threads, 'process' for a
+            pool of processes, or a ``WorkerPool`` object to re-use its workers.
+        retry_policy: Default: None. A ``RetryPolicy`` object. If given, each element is retried on transient
+            failures, and elements that still fail are left out of the outputs, instead of aborting the processing.
+        dead_letters: Default: None. A list, where a ``DeadLetter`` object is appended for each element left out of
+            the outputs by ``retry_policy``.
+        adaptive_chunks: Default: False. If True, chunks start with one element, and are then sized from the observed
+            latency of each element, shrinking towards the end, so a few slow elements, such as large repositories,
+            do not hold up a large chunk of other elements. If False, ``iterable`` is split into equal chunks.
 
     Returns:
         All the outputs of ``callable_function`` as a list.
 
     """
 
-    # Calculate the number of chunks to be sent to each process; if this exceeds max_chunksize, set to max_chunksize
-    chunk_size = len(iterable) / cpu_count
-    chunk_size = min(int(chunk_size) + bool(chunk_size), max_chunksize)
+    # Retry each element on transient failures if required, and use the number of workers of any `WorkerPool` object
+    callable_function = with_retry_policy(callable_function, retry_policy)
+    cpu_count = _get_cpu_count(executor, cpu_count)
+
+    # Set up a pool of workers, and use it to get items for each iterable in parallel, with adaptive chunks if required
+    if adaptive_chunks:
+        with _create_pool(executor, cpu_count) as pool:
+            mp_items = list(_adaptive_imap_unordered(pool, callable_function, iterable, cpu_count, max_chunksize))
+        return _collect_dead_letters(mp_items, dead_letters)
+
+    # Calculate the number of chunks to be sent to each process; if this exceeds max_chunksize, set to max_chunksize.
+    # If the iterable has no length, send each element as soon as it is read
+    if isinstance(iterable, Sized):
+        chunk_size = len(iterable) / cpu_count
+        chunk_size = min(int(chunk_size) + bool(chunk_size), max_chunksize)
+    else:
+        chunk_size = 1
 
-    # Set up a `multiprocessing.Pool` object, and use it to get items for each iterable in parallel
-    with mp.Pool(cpu_count) as pool:
+    # Set up a pool of workers, and use it to get items for each iterable in parallel
+    with _create_pool(executor, cpu_count) as pool:
         mp_items = list(pool.imap_unordered(callable_function, iterable, chunksize=chunk_size))
 
-    # Return `mp_items`
-    return mp_items
+    # Return `mp_items`, without any elements that failed after all their retries
+    return _collect_dead_letters(mp_items, dead_letters)
 
 
 def parallelise_dictionary_processing(callable_function: Callable[..., Dict], iterable: iter,
-                                      cpu_count: int, max_chunksize: int) -> Dict:
+                                      cpu_count: int, max_chunksize: int, executor: Union[str, WorkerPool] = "thread",
+                                      retry_policy: Optional[RetryPolicy] = None,
+                                      dead_letters: Optional[List[DeadLetter]] = None,
+                                      adaptive_chunks: bool = False) -> Dict:
     """Parallelise processing of a dictionary.
 
     Args:
@@ -37,6 +225,14 @@ def parallelise_dictionary_processing(callable_function: Callable[..., Dict], it
         iterable: An iterable that will be split amongst the CPUs for parallel processing.
         cpu_count: The number of CPUs to parallelise the processing.
         max_chunksize: The maximum number of iterables per CPU.
+        executor: Default: 'thread'. The executor backend; either 'thread' for a pool of threads, 'process' for a
+            pool of processes, or a ``WorkerPool`` object to re-use its workers.
+        retry_policy: Default: None. A ``RetryPolicy`` object. If given, each element is retried on transient
+            failures, and elements that still fail are left out of the output, instead of aborting the processing.
+        dead_letters: Default: None. A list, where a ``DeadLetter`` object is appended for each element left out of
+            the output by ``retry_policy``.
+        adaptive_chunks: Default: False. If True, chunks are sized from the observed latency of each element; see
+            ``parallelise_processing``.
 
     Returns:
         All the outputs of ``callable_function`` collapsing into a single dictionary.
@@ -44,7 +240,8 @@ def parallelise_dictionary_processing(callable_function: Callable[..., Dict], it
     """
 
     # Process the iterable in parallel
-    mp_items = parallelise_processing(callable_function, iterable, cpu_count, max_chunksize)
+    mp_items = parallelise_processing(callable_function, iterable, cpu_count, max_chunksize, executor, retry_policy,
+                                      dead_letters, adaptive_chunks)
 
     # Collapse the list of dictionaries in mp_items into a single dictionary - assumes there are no duplicate keys
     items = {k: v for d in mp_items for k, v in d.items()}
@@ -52,3 +249,123 @@ def parallelise_dictionary_processing(callable_function: Callable[..., Dict], it
     # Assert that the above assumption is correct; if so return items
     assert len(items) == len(mp_items), "Iterable names are not unique!"
     return items
+
+
+def parallelise_dictionary_streaming(callable_function: Callable[..., Dict], iterable: iter, cpu_count: int,
+                                     max_in_flight: Optional[int] = None, executor: Union[str, WorkerPool] = "thread",
+                                     retry_policy: Optional[RetryPolicy] = None,
+                                     dead_letters: Optional[List[DeadLetter]] = None) -> Iterator[Tuple[Any, Any]]:
+    """Parallelise processing of a dictionary, yielding key-value pairs as soon as each worker finishes.
+
+    At most ``max_in_flight`` elements of ``iterable`` are being processed, or waiting to be consumed, at any one time.
+    ``iterable`` is only read when there is room for more work, so a slow consumer holds back the workers rather than
+    letting results build up in memory.
+
+    Args:
+        callable_function: A callable function that returns a dictionary.
+        iterable: An iterable that will be split amongst the CPUs for parallel processing.
+        cpu_count: The number of CPUs to parallelise the processing.
+        max_in_flight: Default: None. The maximum number of elements of ``iterable`` being processed at once. If None,
+            this is twice ``cpu_count``.
+        executor: Default: 'thread'. The executor backend; either 'thread' for a pool of threads, 'process' for a
+            pool of processes, or a ``WorkerPool`` object to re-use its workers.
+        retry_policy: Default: None. A ``RetryPolicy`` object. If given, each element is retried on transient
+            failures, and elements that still fail are skipped, instead of aborting the processing.
+        dead_letters: Default: None. A list, where a ``DeadLetter`` object is appended for each element skipped by
+            ``retry_policy``.
+
+    Yields:
+        Each key-value pair of the outputs of ``callable_function``, in the order they finish.
+
+    """
+
+    # Retry each element on transient failures if required, and use the number of workers of any `WorkerPool` object
+    callable_function = with_retry_policy(callable_function, retry_policy)
+    cpu_count = _get_cpu_count(executor, cpu_count)
+
+    # Set the default maximum number of elements in flight, and a queue to receive the outputs of the workers
+    max_in_flight = max_in_flight or 2 * cpu_count
+    results = queue.Queue()
+
+    # Initialise the number of elements in flight, and the keys already yielded
+    in_flight = 0
+    keys = set()
+
+    # Set up a pool of workers, and submit elements of the iterable whenever there is room for more work
+    iterator = iter(iterable)
+    with _create_pool(executor, cpu_count) as pool:
+        while True:
+            for element in iterator:
+                pool.apply_async(callable_function, (element,), callback=lambda o: results.put((True, o)),
+                                 error_callback=lambda e: results.put((False, e)))
+                in_flight += 1
+                if in_flight >= max_in_flight:
+                    break
+
+            # Stop if there is no more work
+            if in_flight == 0:
+                return
+
+            # Wait for the next output; re-raise any exception raised by `callable_function`
+            succeeded, output = results.get()
+            in_flight -= 1
+            if not succeeded:
+                raise output
+
+            # Skip any element that failed after all its retries
+            if not _collect_dead_letters([output], dead_letters):
+                continue
+
+            # Yield each key-value pair, checking the keys are unique
+            for k, v in output.items():
+                assert k not in keys, "Iterable names are not unique!"
+                keys.add(k)
+                yield k, v
+
+
+def parallelise_dictionary_checkpointing(callable_function: Callable[..., Dict], iterable: iter, journal: Journal,
+                                         get_key: Callable[[Any], Any], cpu_count: int,
+                                         max_in_flight: Optional[int] = None,
+                                         executor: Union[str, WorkerPool] = "thread",
+                                         retry_policy: Optional[RetryPolicy] = None,
+                                         dead_letters: Optional[List[DeadLetter]] = None) -> Dict:
+    """Parallelise processing of a dictionary, recording each key-value pair in a journal as soon as it finishes.
+
+    Elements of ``iterable`` whose keys are already in ``journal`` are skipped, so a sweep that failed part way through
+    resumes from where it stopped. Their values are replayed from ``journal`` instead.
+
+    Args:
+        callable_function: A callable function that returns a dictionary of one key-value pair, where the key is
+            ``get_key`` of its argument, and the value is JSON-serialisable.
+        iterable: An iterable that will be split amongst the CPUs for parallel processing.
+        journal: A ``Journal`` object, where each key-value pair is recorded.
+        get_key: A callable function that returns the key of an element of ``iterable``, without processing it.
+        cpu_count: The number of CPUs to parallelise the processing.
+        max_in_flight: Default: None. The maximum number of elements of ``iterable`` being processed at once. If None,
+            this is twice ``cpu_count``.
+        executor: Default: 'thread'. The executor backend; either 'thread' for a pool of threads, 'process' for a
+            pool of processes, or a ``WorkerPool`` object to re-use its workers.
+        retry_policy: Default: None. A ``RetryPolicy`` object. If given, each element is retried on transient
+            failures, and elements that still fail are neither recorded, nor returned, so they are processed again by
+            the next run.
+        dead_letters: Default: None. A list, where a ``DeadLetter`` object is appended for each element skipped by
+            ``retry_policy``.
+
+    Returns:
+        All the outputs of ``callable_function`` for every element of ``iterable``, including those replayed from
+        ``journal``, collapsed into a single dictionary in the order of ``iterable``.
+
+    """
+
+    # Get the key of every element, and skip the elements already completed
+    elements = list(iterable)
+    keys = [get_key(e) for e in elements]
+    pending = [e for e, k in zip(elements, keys) if k not in journal]
+
+    # Process the remaining elements in parallel, recording each key-value pair as soon as it finishes
+    for k, v in parallelise_dictionary_streaming(callable_function, pending, cpu_count, max_in_flight, executor,
+                                                 retry_policy, dead_letters):
+        journal.record(k, v)
+
+    # Return the key-value pairs of all the completed elements from the journal
+    return {k: journal[k] for k in keys if k in journal}
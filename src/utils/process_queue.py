@@ -0,0 +1,72 @@
+from typing import Any, Optional
+import multiprocessing as mp
+import pickle
+import select
+
+# Maximum number of bytes the operating system writes to a pipe in one go, without interleaving other writes; a
+# message is written with its 4-byte length header
+_MAX_MESSAGE_BYTES = getattr(select, "PIPE_BUF", 512) - 4
+
+
+class ProcessQueue:
+
+    def __init__(self) -> None:
+        """A queue for forked worker processes to send small objects to the process that created it, without a lock.
+
+        A ``multiprocessing.SimpleQueue`` object shares a write lock between all processes. A worker process
+        terminated whilst putting an object on it, for example by ``multiprocessing.pool.Pool.terminate``, leaves the
+        lock held, so every later ``put`` blocks forever, including on exit. Instead, each object is pickled, and
+        written to a pipe in a single write of at most ``select.PIPE_BUF`` bytes. The operating system never splits, or
+        interleaves such a write with other writes, so no lock is needed, and a terminated worker cannot leave part of
+        an object in the pipe. Objects that are too large to be written in one go are dropped.
+
+        Only the process that created the queue should ``get`` objects from it.
+
+        """
+        self._reader, self._writer = mp.Pipe(duplex=False)
+
+    def put(self, obj: Any) -> bool:
+        """Put an object on the queue, if it can be written in a single write.
+
+        Args:
+            obj: A picklable object.
+
+        Returns:
+            True if ``obj`` was put on the queue, or False if it was dropped, as it is too large.
+
+        """
+        message = pickle.dumps(obj)
+        if len(message) > _MAX_MESSAGE_BYTES:
+            return False
+        self._writer.send_bytes(message)
+        return True
+
+    def get(self) -> Any:
+        """Get the next object from the queue, waiting until there is one.
+
+        Returns:
+            The next object put on the queue.
+
+        """
+        return pickle.loads(self._reader.recv_bytes())
+
+    def empty(self) -> bool:
+        """Check if there is no object waiting on the queue.
+
+        Returns:
+            True if there is no object waiting on the queue, otherwise False.
+
+        """
+        return not self._reader.poll()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Wait until there is an object waiting on the queue, without getting it.
+
+        Args:
+            timeout: Default: None. The maximum number of seconds to wait. If None, wait until there is an object.
+
+        Returns:
+            True if there is an object waiting on the queue, otherwise False.
+
+        """
+        return self._reader.poll(timeout)
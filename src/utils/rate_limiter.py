@@ -0,0 +1,202 @@
+from contextlib import contextmanager
+from github.Requester import RequestsResponse
+from typing import Any, Dict, Iterator, Mapping
+import asyncio
+import multiprocessing as mp
+import os
+import time
+
+# HTTP verbs that change data, which GitHub recommends sending at most once per second
+WRITE_VERBS = frozenset({"DELETE", "PATCH", "POST", "PUT"})
+
+# Positions of each value in the shared state of a `RateLimiter` object; `_HOLDER` is the process ID holding its lock
+_TOKENS, _LAST_REFILL, _RATE, _PAUSED_UNTIL, _NEXT_WRITE, _HOLDER = range(6)
+
+# Number of seconds to wait for the lock of a `RateLimiter` object before checking if the process holding it has exited;
+# the lock is only ever held for a few microseconds
+LOCK_TIMEOUT = 1.0
+
+
+def _is_running(pid: int) -> bool:
+    """Check if a process is running; on platforms other than POSIX, processes are always assumed to be running."""
+    if os.name != "posix":
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class RateLimiter:
+
+    def __init__(self, max_requests_per_second: float = 10.0, burst: int = 10, min_write_interval: float = 1.0,
+                 pace_below_remaining: int = 500) -> None:
+        """A token bucket shared by all workers, pacing GitHub API requests within the GitHub API rate limits.
+
+        Requests are sent at up to ``max_requests_per_second``, to avoid the secondary (abuse) rate limits_, until
+        the ``X-RateLimit-Remaining`` response header drops to ``pace_below_remaining``. The remaining requests are
+        then spread evenly until the ``X-RateLimit-Reset`` time, so the hourly budget is used in full without being
+        exceeded. All requests pause if the budget runs out, or a response has a ``Retry-After`` header.
+
+        The state is held in shared memory, so one ``RateLimiter`` object paces all threads, and all worker processes
+        forked after it is created. Its lock records the process holding it, so a worker terminated whilst holding the
+        lock, for example by ``multiprocessing.pool.Pool.terminate``, does not stop all other workers; once the lock
+        has been waited for ``LOCK_TIMEOUT`` seconds, it is released if the process holding it has exited, and been
+        waited for by its parent. Use ``acquire`` before each request in threads, and processes, ``acquire_async`` in
+        an event loop, and ``update`` with each response. Add the ``RateLimiter`` object with
+        ``src.utils.github_connection.add_connection_hook`` to pace every request sent by ``github.Github`` objects.
+
+        Args:
+            max_requests_per_second: Default: 10.0. The maximum sustained number of requests per second.
+            burst: Default: 10. The maximum number of requests that can be sent at once after a quiet period.
+            min_write_interval: Default: 1.0. The minimum number of seconds between requests that change data, for
+                example 'PUT' requests.
+            pace_below_remaining: Default: 500. The number of remaining requests in the rate limit window below which
+                requests are spread evenly until the window resets.
+
+        .. _limits:
+            https://docs.github.com/en/rest/guides/best-practices-for-integrators#dealing-with-abuse-rate-limits
+
+        """
+
+        # Instantiate attributes
+        self.max_requests_per_second = max_requests_per_second
+        self.burst = burst
+        self.min_write_interval = min_write_interval
+        self.pace_below_remaining = pace_below_remaining
+
+        # Create the shared state, a lock to guard it, and a lock to release the first lock if its holder has exited
+        self._lock = mp.Lock()
+        self._release_lock = mp.Lock()
+        self._state = mp.RawArray("d", [burst, time.monotonic(), max_requests_per_second, 0.0, 0.0, 0.0])
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        """Hold the lock guarding the shared state, releasing it first if the process holding it has exited."""
+        while not self._lock.acquire(timeout=LOCK_TIMEOUT):
+            self._release_lock_of_exited_holder()
+        self._state[_HOLDER] = os.getpid()
+        try:
+            yield
+        finally:
+            self._state[_HOLDER] = 0.0
+            self._lock.release()
+
+    def _release_lock_of_exited_holder(self) -> None:
+        """Release the lock guarding the shared state if the process holding it has exited."""
+
+        # Only let one process check, and release the lock at a time; others wait for the lock again
+        if not self._release_lock.acquire(block=False):
+            return
+        try:
+            holder = int(self._state[_HOLDER])
+            if self._lock.acquire(block=False):
+                self._lock.release()
+            elif holder and holder != os.getpid() and not _is_running(holder):
+                self._state[_HOLDER] = 0.0
+                self._lock.release()
+        finally:
+            self._release_lock.release()
+
+    def reserve(self, verb: str = "GET") -> float:
+        """Reserve a request, and return the number of seconds to wait before sending it.
+
+        Args:
+            verb: Default: 'GET'. The HTTP verb of the request.
+
+        Returns:
+            The number of seconds to wait before sending the request.
+
+        """
+        with self._locked():
+            now = time.monotonic()
+            state = self._state
+
+            # Refill the bucket for the time since the last refill, and take a token; a negative number of tokens means
+            # requests are queued for future tokens, which are only paced out after any pause ends
+            state[_TOKENS] = min(self.burst, state[_TOKENS] + (now - state[_LAST_REFILL]) * state[_RATE]) - 1
+            state[_LAST_REFILL] = now
+            wait = max(state[_PAUSED_UNTIL] - now, 0.0) + max(-state[_TOKENS] / state[_RATE], 0.0)
+
+            # Space out requests that change data
+            if verb.upper() in WRITE_VERBS:
+                wait = max(wait, state[_NEXT_WRITE] - now)
+                state[_NEXT_WRITE] = now + wait + self.min_write_interval
+
+        return wait
+
+    def acquire(self, verb: str = "GET") -> None:
+        """Block until a request can be sent.
+
+        Args:
+            verb: Default: 'GET'. The HTTP verb of the request.
+
+        Returns:
+            None.
+
+        """
+        wait = self.reserve(verb)
+        if wait > 0:
+            time.sleep(wait)
+
+    async def acquire_async(self, verb: str = "GET") -> None:
+        """Wait asynchronously until a request can be sent.
+
+        Args:
+            verb: Default: 'GET'. The HTTP verb of the request.
+
+        Returns:
+            None.
+
+        """
+        wait = self.reserve(verb)
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def update(self, status: int, headers: Mapping[str, str]) -> None:
+        """Update the pacing from the rate limit headers of a GitHub API response.
+
+        Args:
+            status: The HTTP status code of the response.
+            headers: The response headers, with lower-case names.
+
+        Returns:
+            None.
+
+        """
+        remaining = headers.get("x-ratelimit-remaining")
+        reset = headers.get("x-ratelimit-reset")
+        retry_after = headers.get("retry-after")
+
+        with self._locked():
+            now = time.monotonic()
+            state = self._state
+
+            # Pause until the rate limit window resets if there are no requests left, or spread the remaining requests
+            # evenly until the reset once few remain
+            if remaining is not None and reset is not None:
+                seconds_until_reset = max(float(reset) - time.time(), 1.0)
+                state[_RATE] = self.max_requests_per_second
+                if int(remaining) <= 0:
+                    state[_PAUSED_UNTIL] = max(state[_PAUSED_UNTIL], now + seconds_until_reset)
+                elif int(remaining) <= self.pace_below_remaining:
+                    state[_RATE] = min(self.max_requests_per_second, int(remaining) / seconds_until_reset)
+
+            # Pause all requests if a secondary rate limit has been hit
+            if retry_after is not None and status in (403, 429):
+                state[_PAUSED_UNTIL] = max(state[_PAUSED_UNTIL], now + float(retry_after))
+
+    def before_request(self, verb: str, url: str, headers: Dict[str, str]) -> None:
+        """Connection hook to block until a request can be sent; see ``add_connection_hook``."""
+        self.acquire(verb)
+
+    def after_response(self, verb: str, url: str, headers: Dict[str, str], response: RequestsResponse) -> Any:
+        """Connection hook to update the pacing from each response; see ``add_connection_hook``."""
+
+        # Responses used from a cache, without sending a request, have out-of-date rate limit headers
+        if not getattr(response, "from_cache", False):
+            self.update(response.status, {k.lower(): v for k, v in response.getheaders()})
+        return response
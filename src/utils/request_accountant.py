@@ -0,0 +1,257 @@
+from collections import Counter
+from github.Requester import RequestsResponse
+from src.utils.github_connection import add_connection_hook, remove_connection_hook
+from src.utils.logger import get_current_function, logger
+from src.utils.process_queue import ProcessQueue
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import urlparse
+import json
+import os
+import re
+import threading
+
+# Name used for requests sent outside any function decorated with `Log`, or not about a repository
+UNATTRIBUTED = "(none)"
+
+# Counts in the report of each function, repository, and in total
+FIELDS = ("requests", "sent", "cache_hits", "revalidated", "bytes", "rate_limit_cost")
+
+# Pattern of the full name of a repository in the URL path of a GitHub API request
+_REPOSITORY_PATTERN = re.compile(r"/repos/([^/]+/[^/]+)")
+
+
+def _get_repository(url: str) -> str:
+    """Get the full name of the repository of a GitHub API request from its URL, or ``UNATTRIBUTED`` if there is none.
+
+    Examples:
+        >>> _get_repository("/repos/foo/bar/contributors?per_page=100")
+        'foo/bar'
+        >>> _get_repository("https://api.github.com/orgs/foo/repos")
+        '(none)'
+
+    """
+    match = _REPOSITORY_PATTERN.search(urlparse(url).path)
+    return match.group(1) if match else UNATTRIBUTED
+
+
+def _add_count(counts: Dict[str, Any], field: Any, value: int) -> None:
+    """Add a tally to a dictionary of counts; status codes are added to its 'statuses' counter."""
+    if isinstance(field, int):
+        counts["statuses"][field] += value
+    else:
+        counts[field] += value
+
+
+class RequestAccountant:
+
+    def __init__(self, top: int = 10) -> None:
+        """Account for every GitHub API request, attributed to the calling function, and repository.
+
+        For each function decorated with ``Log``, and each repository, the number of requests, requests sent, cache
+        hits, conditional requests revalidated with a ``304 Not Modified`` response, bytes received, rate limit cost,
+        and response status codes are counted. This includes requests hidden inside PyGithub, such as the lazy
+        completion of an object when one of its attributes is first read. Requests are attributed to the innermost
+        decorated function being executed, so a function sending one request per element of a list, the "N+1" pattern,
+        stands out in the report.
+
+        Use a ``RequestAccountant`` object as a context manager around a run, before creating any worker processes. It
+        is added as the first connection hook on entry, so it sees every response before any ``HTTPCache`` object
+        replaces it. On exit, it is removed, and the report is logged. Requests of forked worker processes are sent to
+        this process through a ``ProcessQueue`` object, and counted in a background thread; it needs no lock, so a
+        worker terminated whilst sending a request cannot stop other workers, or ``stop``. Pass it as the
+        ``request_accountant`` argument of an ``AsyncGithubSession`` object to also count its requests.
+
+        Args:
+            top: Default: 10. The number of functions, and repositories with the highest rate limit cost in the
+                logged report.
+
+        """
+        self.top = top
+        self._tallies: Counter = Counter()
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+        self._queue = ProcessQueue()
+        self._thread: Optional[threading.Thread] = None
+
+    def record(self, url: str, status: int, size: int = 0, from_cache: bool = False,
+               revalidated: bool = False) -> None:
+        """Record a GitHub API request, attributed to the current function.
+
+        Args:
+            url: The URL, or URL path of the request.
+            status: The HTTP status code of the response.
+            size: Default: 0. The number of bytes in the body of the response received.
+            from_cache: Default: False. If True, the response was used from a cache, without sending a request.
+            revalidated: Default: False. If True, a cached response was revalidated with a conditional request.
+
+        Returns:
+            None.
+
+        """
+        event = (get_current_function() or UNATTRIBUTED, _get_repository(url), status, size, from_cache, revalidated)
+        if os.getpid() == self._pid:
+            self._add(event)
+        else:
+            self._queue.put(event)
+
+    def _add(self, event: Tuple[str, str, int, int, bool, bool]) -> None:
+        """Add a recorded request to the tallies of its function, and repository."""
+        function, repository, status, size, from_cache, revalidated = event
+        with self._lock:
+            tallies = self._tallies
+            tallies[function, repository, "requests"] += 1
+            tallies[function, repository, "sent"] += not from_cache
+            tallies[function, repository, "cache_hits"] += from_cache
+            tallies[function, repository, "revalidated"] += revalidated
+            tallies[function, repository, "bytes"] += size
+            tallies[function, repository, "rate_limit_cost"] += not (from_cache or revalidated)
+            tallies[function, repository, status] += 1
+
+    def _listen(self) -> None:
+        """Add the requests recorded by forked worker processes until the sentinel is received."""
+        for event in iter(self._queue.get, None):
+            self._add(event)
+
+    def start(self) -> None:
+        """Add the connection hook, and start counting the requests of forked worker processes.
+
+        Returns:
+            None.
+
+        """
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._listen, daemon=True)
+            self._thread.start()
+            add_connection_hook(self, 0)
+
+    def stop(self) -> None:
+        """Remove the connection hook, and stop once all the requests of forked worker processes are counted.
+
+        Returns:
+            None.
+
+        """
+        if self._thread is not None:
+            remove_connection_hook(self)
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+
+    def reset(self) -> None:
+        """Forget all the recorded requests.
+
+        Returns:
+            None.
+
+        """
+        with self._lock:
+            self._tallies.clear()
+
+    def get_report(self) -> Dict[str, Any]:
+        """Get the counts of the recorded requests in total, by function, and by repository.
+
+        Requests of forked worker processes are only all counted once ``stop`` is called.
+
+        Returns:
+            A dictionary with keys 'total', 'functions', and 'repositories'. The value of 'total' is a dictionary with
+            keys 'requests', 'sent', 'cache_hits', 'revalidated', 'bytes', 'rate_limit_cost', and 'statuses', a
+            dictionary of the number of responses with each status code. The values of 'functions', and
+            'repositories' are dictionaries where keys are function names, and repository full names, and values are
+            dictionaries with the same keys, and also 'repositories', or 'functions', the number of distinct
+            repositories, or decorated functions. They are sorted by rate limit cost, then number of requests, highest
+            first.
+
+        """
+        with self._lock:
+            tallies = list(self._tallies.items())
+
+        # Sum the counts in total, by function, and by repository, and count the distinct repositories of each
+        # function, and the functions of each repository
+        groups: Dict[str, Dict[str, Dict[str, Any]]] = {"functions": {}, "repositories": {}}
+        total: Dict[str, Any] = {**dict.fromkeys(FIELDS, 0), "statuses": Counter()}
+        for (function, repository, field), value in tallies:
+            for group, name, other in [("functions", function, repository), ("repositories", repository, function)]:
+                counts = groups[group].setdefault(name, {**dict.fromkeys(FIELDS, 0), "statuses": Counter(),
+                                                         "others": set()})
+                if other != UNATTRIBUTED:
+                    counts["others"].add(other)
+                _add_count(counts, field, value)
+            _add_count(total, field, value)
+
+        # Sort the functions, and repositories, and replace the sets of other names by their number
+        report = {"total": {**total, "statuses": dict(sorted(total["statuses"].items()))}}
+        for group, other_group in [("functions", "repositories"), ("repositories", "functions")]:
+            report[group] = {
+                name: {**{f: counts[f] for f in FIELDS}, other_group: len(counts["others"]),
+                       "statuses": dict(sorted(counts["statuses"].items()))}
+                for name, counts in sorted(groups[group].items(),
+                                           key=lambda kv: (-kv[1]["rate_limit_cost"], -kv[1]["requests"], kv[0]))
+            }
+        return report
+
+    def to_json(self, indent: Optional[int] = None) -> str:
+        """Export the report as JSON.
+
+        Args:
+            indent: Default: None. The indent of the JSON; if None, the JSON is on one line.
+
+        Returns:
+            The output of ``get_report`` as a JSON string.
+
+        """
+        return json.dumps(self.get_report(), indent=indent)
+
+    def format_report(self) -> str:
+        """Format the report as text, with the ``top`` functions, and repositories with the highest rate limit cost.
+
+        Returns:
+            The report as a multi-line string.
+
+        """
+        report = self.get_report()
+        total = report["total"]
+        repositories = [r for r in report["repositories"] if r != UNATTRIBUTED]
+        lines = [
+            f"GitHub API requests: {total['requests']:,} ({total['sent']:,} sent, {total['cache_hits']:,} cache hits, "
+            f"{total['revalidated']:,} revalidated), {total['bytes']:,} bytes received, rate limit cost "
+            f"{total['rate_limit_cost']:,}",
+            "Status codes: " + ", ".join(f"{s}: {n:,}" for s, n in total["statuses"].items()),
+        ]
+        if repositories:
+            cost = sum(report["repositories"][r]["rate_limit_cost"] for r in repositories)
+            lines.append(f"Mean rate limit cost per repository: {cost / len(repositories):,.2f} over "
+                         f"{len(repositories):,} repositories")
+
+        # Add a table of the functions, and repositories with the highest rate limit cost
+        for group, column, other_group in [("functions", "function", "repositories"),
+                                           ("repositories", "repository", "functions")]:
+            lines.append(f"Top {group} by rate limit cost:")
+            lines.append(f"  {column:<50} {'requests':>10} {'cost':>10} {'cache hits':>10} {'bytes':>14} "
+                         f"{other_group:>12}")
+            lines.extend(f"  {name:<50} {c['requests']:>10,} {c['rate_limit_cost']:>10,} {c['cache_hits']:>10,} "
+                         f"{c['bytes']:>14,} {c[other_group]:>12,}" for name, c in [*report[group].items()][:self.top])
+        return "\n".join(lines)
+
+    def before_request(self, verb: str, url: str, headers: Dict[str, str]) -> None:
+        """Connection hook that does nothing before a request is sent; see ``add_connection_hook``."""
+
+    def after_response(self, verb: str, url: str, headers: Dict[str, str], response: RequestsResponse) -> Any:
+        """Connection hook to record each response; see ``add_connection_hook``."""
+
+        # Responses used from a cache have no body received; a cached response revalidated by a later hook is a
+        # `CachedResponse` object that is not from the cache
+        from_cache = getattr(response, "from_cache", None)
+        revalidated = response.status == 304 or from_cache is False
+        size = 0 if from_cache is not None or revalidated else len(response.text.encode("utf-8"))
+        self.record(url, 304 if revalidated else response.status, size, bool(from_cache), revalidated)
+        return response
+
+    def __enter__(self) -> "RequestAccountant":
+        """Use the request accountant as a context manager, starting it on entry, and logging the report on exit."""
+        self.start()
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        """Stop the request accountant, and log the report."""
+        self.stop()
+        logger.info(self.format_report())
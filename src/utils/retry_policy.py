@@ -0,0 +1,147 @@
+from github import GithubException, RateLimitExceededException
+from src.utils.logger import logger
+from typing import Any, Callable, Optional, Tuple, Type
+import random
+import requests
+import time
+
+# HTTP status codes of GitHub API errors that are usually transient
+RETRYABLE_STATUSES = frozenset({500, 502, 503, 504})
+
+# Exceptions that are always retryable, such as dropped connections, and timeouts
+RETRYABLE_EXCEPTIONS = (RateLimitExceededException, ConnectionError, TimeoutError,
+                        requests.exceptions.ConnectionError, requests.exceptions.Timeout)
+
+
+class DeadLetter:
+
+    def __init__(self, element: Any, exception: str, attempts: int) -> None:
+        """An element of an iterable that still failed after all the attempts of a ``RetryPolicy`` object.
+
+        Args:
+            element: The element of the iterable.
+            exception: The ``repr`` of the exception raised by the last attempt. Exceptions are not stored directly, as
+                many PyGithub exceptions cannot be sent back from worker processes.
+            attempts: The number of attempts made.
+
+        """
+        self.element = element
+        self.exception = exception
+        self.attempts = attempts
+
+    def __repr__(self) -> str:
+        """Represent the dead letter by its element, exception, and number of attempts."""
+        return f"DeadLetter({self.element!r}, {self.exception!r}, {self.attempts!r})"
+
+    def __eq__(self, other: Any) -> bool:
+        """Check if two dead letters have the same element, exception, and number of attempts."""
+        return isinstance(other, DeadLetter) and (self.element, self.exception, self.attempts) == (
+            other.element, other.exception, other.attempts
+        )
+
+
+class RetryPolicy:
+
+    def __init__(self, max_attempts: int = 5, base_delay: float = 1.0, max_delay: float = 60.0, jitter: bool = True,
+                 retry_on: Tuple[Type[BaseException], ...] = RETRYABLE_EXCEPTIONS,
+                 retry_statuses: frozenset = RETRYABLE_STATUSES) -> None:
+        """A per-element retry policy for the parallel processing functions, with exponential backoff, and jitter.
+
+        Each failed attempt waits ``base_delay * 2 ** (attempt - 1)`` seconds, up to ``max_delay`` seconds, before the
+        next attempt. With ``jitter``, the wait is drawn uniformly between zero and this value instead ("full
+        jitter"), so workers that failed together do not retry together.
+
+        Pass a ``RetryPolicy`` object as the ``retry_policy`` argument of ``parallelise_processing``, or any function
+        that uses it. Elements that still fail after ``max_attempts`` are returned as ``DeadLetter`` objects, rather
+        than aborting the whole batch; exceptions that are not retryable are raised as before.
+
+        Args:
+            max_attempts: Default: 5. The maximum number of attempts for each element, including the first.
+            base_delay: Default: 1.0. The number of seconds to wait after the first failed attempt.
+            max_delay: Default: 60.0. The maximum number of seconds to wait between attempts.
+            jitter: Default: True. If True, randomise each wait between zero and the exponential backoff.
+            retry_on: Default: ``RETRYABLE_EXCEPTIONS``. Exception classes that are always retried.
+            retry_statuses: Default: ``RETRYABLE_STATUSES``. HTTP status codes of ``github.GithubException``
+                exceptions that are retried.
+
+        """
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.jitter = jitter
+        self.retry_on = retry_on
+        self.retry_statuses = retry_statuses
+
+    def is_retryable(self, exception: BaseException) -> bool:
+        """Check if an exception is transient, and the attempt should be retried.
+
+        Args:
+            exception: The exception raised by an attempt.
+
+        Returns:
+            True if ``exception`` is an instance of ``retry_on``, or a ``github.GithubException`` with a status in
+            ``retry_statuses``, otherwise False.
+
+        """
+        if isinstance(exception, self.retry_on):
+            return True
+        return isinstance(exception, GithubException) and exception.status in self.retry_statuses
+
+    def get_delay(self, attempt: int) -> float:
+        """Get the number of seconds to wait after a failed attempt.
+
+        Args:
+            attempt: The number of the failed attempt, starting from 1.
+
+        Returns:
+            The number of seconds to wait before the next attempt.
+
+        """
+        delay = min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+        return random.uniform(0, delay) if self.jitter else delay
+
+    def call(self, callable_function: Callable, element: Any) -> Any:
+        """Call a function on an element, retrying transient failures.
+
+        Args:
+            callable_function: A callable function.
+            element: The argument of ``callable_function``.
+
+        Returns:
+            The output of ``callable_function``. If it still fails with a retryable exception after ``max_attempts``,
+            a ``DeadLetter`` object instead.
+
+        """
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                return callable_function(element)
+            except Exception as e:
+                if not self.is_retryable(e):
+                    raise
+                if attempt == self.max_attempts:
+                    logger.warning(f"Giving up on {element!r} after {attempt} attempts: {e!r}")
+                    return DeadLetter(element, repr(e), attempt)
+                time.sleep(self.get_delay(attempt))
+
+
+class RetryingCallable:
+
+    def __init__(self, callable_function: Callable, retry_policy: RetryPolicy) -> None:
+        """A picklable callable function that calls ``callable_function`` with the retries of ``retry_policy``.
+
+        Args:
+            callable_function: A callable function.
+            retry_policy: A ``RetryPolicy`` object.
+
+        """
+        self.callable_function = callable_function
+        self.retry_policy = retry_policy
+
+    def __call__(self, element: Any) -> Any:
+        """Call ``callable_function`` on ``element`` with ``retry_policy.call``."""
+        return self.retry_policy.call(self.callable_function, element)
+
+
+def with_retry_policy(callable_function: Callable, retry_policy: Optional[RetryPolicy]) -> Callable:
+    """Wrap a callable function with a retry policy, or return it unchanged if there is none."""
+    return callable_function if retry_policy is None else RetryingCallable(callable_function, retry_policy)
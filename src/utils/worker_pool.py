@@ -0,0 +1,61 @@
+from multiprocessing.pool import Pool, ThreadPool
+from src.utils.github_connection import reserve_connections
+from typing import Any, Optional, Union
+import multiprocessing as mp
+
+# Executor backends of a `WorkerPool` object
+EXECUTORS = ("thread", "process")
+
+
+class WorkerPool:
+
+    def __init__(self, cpu_count: int = mp.cpu_count(), executor: str = "thread") -> None:
+        """A long-lived pool of workers, shared by several calls to the parallel processing functions.
+
+        By default, each call to ``parallelise_processing``, or any function that uses it, creates its own pool of
+        workers, and tears it down at the end. When several calls are chained, for example getting the contributors,
+        and then the teams of every repository, each call pays to start the workers again. A ``WorkerPool`` object
+        starts its workers once, and keeps them until it is closed.
+
+        Use a ``WorkerPool`` object as a context manager, and pass it as the ``executor`` argument of any function that
+        has one, for example ``get_items_for_all_repos``. Its workers are used instead of a new pool, and its
+        ``cpu_count`` replaces the ``cpu_count`` argument. Each worker keeps its keep-alive connections to the GitHub
+        API between calls; threads share the sessions of this process, and each worker process has its own.
+
+        Args:
+            cpu_count: Default: maximum number of CPUs. The number of workers in the pool.
+            executor: Default: 'thread'. The executor backend; either 'thread' for a pool of threads, or 'process' for
+                a pool of processes.
+
+        """
+        if executor not in EXECUTORS:
+            raise ValueError(f"Unknown executor: {executor!r}; must be one of 'thread' or 'process'")
+        self.cpu_count = cpu_count
+        self.executor = executor
+        self._pool: Optional[Union[Pool, ThreadPool]] = None
+
+    @property
+    def pool(self) -> Union[Pool, ThreadPool]:
+        """Get the pool of workers, starting it if it has not been started, or was closed."""
+        if self._pool is None and self.executor == "thread":
+            reserve_connections(self.cpu_count)
+            self._pool = ThreadPool(self.cpu_count)
+        elif self._pool is None:
+            self._pool = mp.Pool(self.cpu_count)
+        return self._pool
+
+    def close(self) -> None:
+        """Stop the workers once they finish any outstanding work, and wait for them to exit."""
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
+
+    def __enter__(self) -> "WorkerPool":
+        """Use the worker pool as a context manager, starting the workers on entry, and closing them on exit."""
+        _ = self.pool
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        """Close the workers."""
+        self.close()
@@ -1,4 +1,6 @@
 from src.make_data.add_team_with_permissions_to_all_repositories import (
+    _add_team_with_permissions_to_key_repository,
+    _cost_plan_without_reconciling,
     add_team_with_permissions_to_all_repositories,
     add_team_with_permissions_to_repository,
     check_team_added_already
@@ -209,5 +211,99 @@ class TestAddTeamWithPermissionsToAllRepositories:
         # Assert that `parallelise_processing` is called once with the correct arguments
         patch_add_team_with_permissions_to_all_repositories_parallelise_processing.assert_called_once_with(
             patch_add_team_with_permissions_to_all_repositories_partial.return_value, test_input_repositories,
-            test_input_cpu_count, test_input_max_chunksize
+            test_input_cpu_count, test_input_max_chunksize, "thread", None, None, False
         )
+
+    def test_dry_run_returns_plan_without_changes(
+            self, patch_add_team_with_permissions_to_all_repositories_partial: MagicMock,
+            patch_add_team_with_permissions_to_repository: MagicMock,
+            patch_add_team_with_permissions_to_all_repositories_parallelise_processing: MagicMock,
+            patch_add_team_with_permissions_to_all_repositories_plan_team_permissions: MagicMock,
+            test_input_team: str, test_input_permission: str, test_input_repositories: List[str],
+            test_input_cpu_count: int, test_input_max_chunksize: int
+    ) -> None:
+        """Test that, if `dry_run` is True, a plan is returned, and no changes are made."""
+
+        # Define a plan to be returned by `plan_team_permissions`
+        patch_add_team_with_permissions_to_all_repositories_plan_team_permissions.return_value = {
+            "add": [], "change": {}, "no_op": [], "api_requests": {"read": 1, "write": 0},
+            "rate_limit": {"remaining": None, "limit": None, "reset": None, "budget": None}, "estimated_seconds": 0.0
+        }
+
+        # Execute the `add_team_with_permissions_to_all_repositories` function
+        test_output = add_team_with_permissions_to_all_repositories(
+            test_input_team, test_input_permission, test_input_repositories, test_input_cpu_count,
+            test_input_max_chunksize, dry_run=True
+        )
+
+        # Assert that `plan_team_permissions` is called once correctly, its output returned, and no changes are made
+        patch_add_team_with_permissions_to_all_repositories_plan_team_permissions.assert_called_once_with(
+            test_input_team, test_input_permission, test_input_repositories, test_input_cpu_count, "thread"
+        )
+        assert test_output["api_requests"] == {"read": 0, "write": 0}
+        patch_add_team_with_permissions_to_all_repositories_parallelise_processing.assert_not_called()
+
+    def test_journal_checkpoints_repositories(
+            self, patch_add_team_with_permissions_to_all_repositories_partial: MagicMock,
+            patch_add_team_with_permissions_to_all_repositories_parallelise_processing: MagicMock,
+            patch_add_team_with_permissions_to_all_repositories_parallelise_dictionary_checkpointing: MagicMock,
+            test_input_team: str, test_input_permission: str, test_input_repositories: List[str],
+            test_input_cpu_count: int, test_input_max_chunksize: int
+    ) -> None:
+        """Test that, if a `Journal` object is given, each repository is checkpointed in it."""
+
+        # Execute the `add_team_with_permissions_to_all_repositories` function with a mock `Journal` object
+        test_journal = MagicMock()
+        add_team_with_permissions_to_all_repositories(test_input_team, test_input_permission, test_input_repositories,
+                                                      test_input_cpu_count, test_input_max_chunksize,
+                                                      journal=test_journal)
+
+        # Assert `functools.partial`, and `parallelise_dictionary_checkpointing` are called once correctly
+        patch_add_team_with_permissions_to_all_repositories_partial.assert_called_once_with(
+            _add_team_with_permissions_to_key_repository, test_input_team, test_input_permission
+        )
+        patch_add_team_with_permissions_to_all_repositories_parallelise_dictionary_checkpointing.assert_called_once()
+        test_args = patch_add_team_with_permissions_to_all_repositories_parallelise_dictionary_checkpointing.call_args
+        assert test_args[0][:3] == (patch_add_team_with_permissions_to_all_repositories_partial.return_value,
+                                    test_input_repositories, test_journal)
+        patch_add_team_with_permissions_to_all_repositories_parallelise_processing.assert_not_called()
+
+
+@pytest.mark.parametrize("test_input_permission", ["pull", "admin"])
+def test_add_team_with_permissions_to_key_repository(patch_add_team_with_permissions_to_repository: MagicMock,
+                                                     test_input_permission: str) -> None:
+    """Test the team is added to the repository, and the repository full name is returned with the permission."""
+    test_team, test_repository = MagicMock(), MagicMock(full_name="foo/bar")
+    assert _add_team_with_permissions_to_key_repository(test_team, test_input_permission, test_repository) == {
+        "foo/bar": test_input_permission
+    }
+    patch_add_team_with_permissions_to_repository.assert_called_once_with(test_team, test_input_permission,
+                                                                          test_repository)
+
+
+# Define arguments for the `test_cost_plan_without_reconciling` test
+args_test_cost_plan_without_reconciling = [
+    ((), 100, {"read": 4, "write": 6}, 0.1),
+    (("foo/a",), None, {"read": 3, "write": 4}, None),
+    (("foo/a", "foo/b", "foo/c", "foo/d"), 100, {"read": 0, "write": 0}, 0.0),
+]
+
+
+@pytest.mark.parametrize("test_input_skip, test_input_remaining, test_expected_api_requests, test_expected_budget",
+                         args_test_cost_plan_without_reconciling)
+def test_cost_plan_without_reconciling(test_input_skip: tuple, test_input_remaining: Any,
+                                       test_expected_api_requests: dict, test_expected_budget: Any) -> None:
+    """Test the plan's cost is replaced by the cost of adding the team to each repository not skipped."""
+    test_plan = {
+        "permission": "pull", "add": ["foo/a", "foo/b"], "change": {"foo/c": "push"}, "no_op": ["foo/d"],
+        "api_requests": {"read": 1, "write": 3},
+        "rate_limit": {"remaining": test_input_remaining, "limit": 5000, "reset": None, "budget": None},
+        "estimated_seconds": 1.5,
+    }
+    test_output = _cost_plan_without_reconciling(test_plan, 2, test_input_skip)
+    assert test_output["api_requests"] == test_expected_api_requests
+    assert test_output["rate_limit"]["budget"] == test_expected_budget
+    assert test_output["estimated_seconds"] == -(-sum(test_expected_api_requests.values()) // 2) * 0.5
+    assert {k: v for k, v in test_output.items() if k not in ("api_requests", "rate_limit", "estimated_seconds")} == {
+        "permission": "pull", "add": ["foo/a", "foo/b"], "change": {"foo/c": "push"}, "no_op": ["foo/d"]
+    }
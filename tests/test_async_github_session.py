@@ -0,0 +1,134 @@
+from conftest import StubGitHubServer
+from github import GithubException, RateLimitExceededException, UnknownObjectException
+from src.utils.async_github_session import AsyncGithubSession, parse_link_header
+from src.utils.request_accountant import RequestAccountant
+from typing import Any, Dict, List, Optional
+from unittest.mock import AsyncMock, MagicMock
+import asyncio
+import pytest
+
+# Define test cases for the `TestParseLinkHeader` test class
+args_test_parse_link_header = [
+    (None, {}),
+    ("", {}),
+    ('<https://api.github.com/orgs/foo/repos?page=2>; rel="next"',
+     {"next": "https://api.github.com/orgs/foo/repos?page=2"}),
+    ('<https://api.github.com/orgs/foo/repos?page=2>; rel="next", <https://api.github.com/orgs/foo/repos?page=5>; '
+     'rel="last"', {"next": "https://api.github.com/orgs/foo/repos?page=2",
+                    "last": "https://api.github.com/orgs/foo/repos?page=5"}),
+]
+
+
+@pytest.mark.parametrize("test_input_link, test_expected", args_test_parse_link_header)
+def test_parse_link_header(test_input_link: Optional[str], test_expected: Dict[str, str]) -> None:
+    """Test the `parse_link_header` function returns correctly."""
+    assert parse_link_header(test_input_link) == test_expected
+
+
+async def request_json(server: StubGitHubServer, url: str, **kwargs: Any) -> Any:
+    """Send a request with `AsyncGithubSession.request_json` to the stub GitHub server."""
+    async with AsyncGithubSession(base_url=server.base_url, **kwargs) as session:
+        return await session.request_json(url)
+
+
+async def get_all_pages(server: StubGitHubServer, url: str, per_page: int) -> List[Any]:
+    """Get all pages with `AsyncGithubSession.get_all_pages` from the stub GitHub server."""
+    async with AsyncGithubSession(base_url=server.base_url, per_page=per_page) as session:
+        return await session.get_all_pages(url)
+
+
+class TestAsyncGithubSession:
+
+    @pytest.mark.parametrize("test_input_token", [None, "hello"])
+    def test_request_json_returns_correctly(self, stub_github_server: StubGitHubServer,
+                                            test_input_token: Optional[str]) -> None:
+        """Test `request_json` returns the response headers and body, and sends the correct authorisation."""
+
+        # Set a canned response
+        stub_github_server.routes["/orgs/foo"] = (200, {"ETag": "world"}, {"login": "foo"})
+
+        # Execute the `request_json` method
+        test_headers, test_data = asyncio.run(request_json(stub_github_server, "/orgs/foo",
+                                                           login_or_token=test_input_token))
+
+        # Assert the output is as expected, and the authorisation header is only sent with a token
+        assert test_headers["etag"] == "world"
+        assert test_data == {"login": "foo"}
+        assert stub_github_server.requests[0][2].get("Authorization") == (
+            f"token {test_input_token}" if test_input_token else None
+        )
+
+    @pytest.mark.parametrize("test_input_status, test_input_message, test_expected", [
+        (404, "Not Found", UnknownObjectException),
+        (403, "API rate limit exceeded for user ID 1.", RateLimitExceededException),
+        (500, "Server Error", GithubException)
+    ])
+    def test_request_json_raises_exceptions(self, stub_github_server: StubGitHubServer, test_input_status: int,
+                                            test_input_message: str, test_expected: type) -> None:
+        """Test `request_json` raises the same exceptions as PyGithub for unsuccessful responses."""
+
+        # Set a canned unsuccessful response
+        stub_github_server.routes["/orgs/foo"] = (test_input_status, {}, {"message": test_input_message})
+
+        # Execute the `request_json` method, and assert it raises the expected exception
+        with pytest.raises(test_expected):
+            _ = asyncio.run(request_json(stub_github_server, "/orgs/foo"))
+
+    @pytest.mark.parametrize("test_input_pages", [1, 2, 5])
+    def test_get_all_pages_returns_correctly(self, stub_github_server: StubGitHubServer, test_input_pages: int) -> None:
+        """Test `get_all_pages` returns all items in order, requesting each page once."""
+
+        # Set canned responses for each page, where the first page has a `Link` header to the last page
+        url = "/orgs/foo/repos"
+        link = {"Link": f'<{stub_github_server.base_url}{url}?per_page=2&page=2>; rel="next", '
+                        f'<{stub_github_server.base_url}{url}?per_page=2&page={test_input_pages}>; rel="last"'}
+        stub_github_server.routes[f"{url}?per_page=2"] = (200, link if test_input_pages > 1 else {}, [0, 1])
+        for p in range(2, test_input_pages + 1):
+            stub_github_server.routes[f"{url}?per_page=2&page={p}"] = (200, {}, [2 * p - 2, 2 * p - 1])
+
+        # Execute the `get_all_pages` method, and assert the output is as expected
+        assert asyncio.run(get_all_pages(stub_github_server, url, 2)) == [*range(2 * test_input_pages)]
+        assert len(stub_github_server.requests) == test_input_pages
+
+    def test_get_all_pages_returns_empty_list_for_no_content(self, stub_github_server: StubGitHubServer) -> None:
+        """Test `get_all_pages` returns an empty list if the response has no content."""
+        stub_github_server.routes["/repos/foo/bar/contributors?per_page=2"] = (204, {}, None)
+        assert asyncio.run(get_all_pages(stub_github_server, "/repos/foo/bar/contributors", 2)) == []
+
+    def test_request_json_uses_rate_limiter(self, stub_github_server: StubGitHubServer) -> None:
+        """Test `request_json` waits for the rate limiter before each request, and updates it with each response."""
+
+        # Set a canned response with rate limit headers, and create a mock rate limiter
+        stub_github_server.routes["/orgs/foo"] = (200, {"X-RateLimit-Remaining": "42"}, {"login": "foo"})
+        test_input_rate_limiter = MagicMock(acquire_async=AsyncMock())
+
+        # Execute the `request_json` method
+        _ = asyncio.run(request_json(stub_github_server, "/orgs/foo", rate_limiter=test_input_rate_limiter))
+
+        # Assert the rate limiter is awaited, and updated with the response
+        test_input_rate_limiter.acquire_async.assert_awaited_once_with("GET")
+        test_input_rate_limiter.update.assert_called_once()
+        assert test_input_rate_limiter.update.call_args[0][0] == 200
+        assert test_input_rate_limiter.update.call_args[0][1]["x-ratelimit-remaining"] == "42"
+
+    @pytest.mark.parametrize("test_input_status", [200, 404])
+    def test_request_json_recorded_by_request_accountant(self, stub_github_server: StubGitHubServer,
+                                                         test_input_status: int) -> None:
+        """Test `request_json` records each request, and the size of its response, in the request accountant."""
+
+        # Set a canned response, and create a request accountant
+        stub_github_server.routes["/repos/foo/bar"] = (test_input_status, {}, {"name": "bar"})
+        test_input_request_accountant = RequestAccountant()
+
+        # Execute the `request_json` method, ignoring any exception
+        try:
+            _ = asyncio.run(request_json(stub_github_server, "/repos/foo/bar",
+                                         request_accountant=test_input_request_accountant))
+        except GithubException:
+            pass
+
+        # Assert the request is recorded for the repository
+        test_output = test_input_request_accountant.get_report()["repositories"]["foo/bar"]
+        assert test_output["statuses"] == {test_input_status: 1}
+        assert test_output["bytes"] == len('{"name": "bar"}')
+        assert test_output["rate_limit_cost"] == 1
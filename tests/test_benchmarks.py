@@ -0,0 +1,153 @@
+from benchmarks.fake_github_server import TEAM_SLUG, FakeGitHubServer
+from benchmarks.run_benchmarks import SCENARIOS, compare_results, run_benchmark
+from github import Github, RateLimitExceededException
+from typing import Any, Callable, Dict, List
+import os
+import pytest
+
+
+@pytest.fixture
+def fake_github_server() -> FakeGitHubServer:
+    """Serve a fake GitHub organisation of 25 repositories, with 3 contributors each, from 10 users."""
+    with FakeGitHubServer(repos=25, contributors_per_repo=3, users=10) as server:
+        yield server
+
+
+class TestFakeGitHubServer:
+
+    def test_repositories_paginated(self, fake_github_server: FakeGitHubServer) -> None:
+        """Test the repositories of the organisation are paginated, and counted like the GitHub API."""
+        test_repositories = Github(base_url=fake_github_server.base_url, per_page=10).get_organization(
+            fake_github_server.organisation
+        ).get_repos()
+        assert [r.name for r in test_repositories] == [f"repo-{i:05d}" for i in range(25)]
+        assert test_repositories.totalCount == 25
+        assert fake_github_server.requests["GET /orgs/{org}/repos"] == 4
+
+    def test_contributors_completed_lazily(self, fake_github_server: FakeGitHubServer) -> None:
+        """Test contributors are listed without their names, and reading a name sends a request to get the user."""
+        test_repository = Github(base_url=fake_github_server.base_url).get_repo(
+            f"{fake_github_server.organisation}/repo-00004"
+        )
+        assert [c.name for c in test_repository.get_contributors()] == ["User 2", "User 3", "User 4"]
+        assert fake_github_server.requests["GET /users/{login}"] == 3
+
+    def test_team_added_to_repository(self, fake_github_server: FakeGitHubServer) -> None:
+        """Test the team starts with access to every other repository, and can be added to the others."""
+        test_github = Github(base_url=fake_github_server.base_url)
+        test_team = test_github.get_organization(fake_github_server.organisation).get_team_by_slug(TEAM_SLUG)
+        test_repositories = [test_github.get_repo(f"{fake_github_server.organisation}/repo-{i:05d}") for i in range(2)]
+        assert [r.get_teams().totalCount for r in test_repositories] == [1, 0]
+        test_team.set_repo_permission(test_repositories[1], "push")
+        assert test_repositories[1].get_teams().totalCount == 1
+
+    def test_unknown_repository_not_found(self, fake_github_server: FakeGitHubServer) -> None:
+        """Test requesting a repository beyond the size of the organisation gets a '404 Not Found' response."""
+        test_status, _, _ = fake_github_server.respond("GET", f"/repos/{fake_github_server.organisation}/repo-00025")
+        assert test_status == 404
+
+
+@pytest.mark.parametrize("test_input_rate_limit", [1, 5, 10])
+def test_fake_github_server_rate_limited(test_input_rate_limit: int) -> None:
+    """Test requests beyond the rate limit get a '403' response, and the rate limit headers count down."""
+    with FakeGitHubServer(rate_limit=test_input_rate_limit) as test_server:
+        test_github = Github(base_url=test_server.base_url)
+        for i in range(test_input_rate_limit):
+            _ = test_github.get_repo(f"{test_server.organisation}/repo-{i:05d}")
+            assert test_github.rate_limiting[0] == test_input_rate_limit - i - 1
+        with pytest.raises(RateLimitExceededException):
+            _ = test_github.get_repo(f"{test_server.organisation}/repo-00000")
+    assert test_server.rate_limited == 1
+
+
+# Define test cases for the `TestRunBenchmark` test class; these are the number of repositories in the organisation,
+# and, with 10 items per page, and 5 contributors per repository, functions of the number of repositories giving the
+# expected number of requests for each scenario
+args_test_run_benchmark_repos = [10, 25]
+args_test_run_benchmark_scenarios = [
+    ("find_organisation_repos", lambda n: 1 + (n + 9) // 10),
+    ("get_items_for_all_repos", lambda n: 2 * n),
+    ("extract_attribute_from_dict_of_paginated_lists", lambda n: 6 * n),
+    ("add_team_with_permissions_to_all_repositories", lambda n: 2 * n + n // 2),
+]
+
+
+@pytest.mark.parametrize("test_input_repos", args_test_run_benchmark_repos)
+@pytest.mark.parametrize("test_input_scenario, test_expected", args_test_run_benchmark_scenarios)
+class TestRunBenchmark:
+
+    def test_requests_counted(self, test_input_repos: int, test_input_scenario: str,
+                              test_expected: Callable[[int], int]) -> None:
+        """Test each scenario runs without errors, and sends the expected number of requests."""
+        test_output = run_benchmark(test_input_scenario, test_input_repos, cpu_count=2, repeat=1, per_page=10)
+        assert test_output["error"] is None
+        assert test_output["requests"] == test_expected(test_input_repos)
+        assert sum(test_output["requests_by_function"].values()) == test_output["requests"]
+        assert test_output["rate_limited_requests"] == 0
+
+    def test_measurements_returned(self, test_input_repos: int, test_input_scenario: str,
+                                   test_expected: Callable[[int], int]) -> None:
+        """Test the median run is returned with its parameters, throughput, and latency distribution."""
+        test_output = run_benchmark(test_input_scenario, test_input_repos, latency=0.001, cpu_count=2, repeat=3,
+                                    per_page=10)
+        assert {k: test_output[k] for k in ["scenario", "repos", "latency", "repeat"]} == {
+            "scenario": test_input_scenario, "repos": test_input_repos, "latency": 0.001, "repeat": 3
+        }
+        assert test_output["repos_per_second"] == pytest.approx(test_input_repos / test_output["seconds"])
+        test_latency = test_output["latency_seconds"]
+        assert 0.001 <= test_latency["p50"] <= test_latency["p95"] <= test_latency["p99"] <= test_latency["max"]
+        assert test_output["peak_memory_bytes"] >= 0
+
+
+@pytest.mark.parametrize("test_input_scenario",
+                         ["get_items_for_all_repos", "add_team_with_permissions_to_all_repositories"])
+def test_failed_setup_recorded(test_input_scenario: str) -> None:
+    """Test a scenario whose setup is rate limited is returned as a failed run, rather than waited for forever."""
+    test_output = run_benchmark(test_input_scenario, 10, rate_limit=1, cpu_count=2, repeat=1, per_page=10)
+    assert "RateLimitExceededException" in test_output["error"]
+    assert test_output["requests"] == 0 and test_output["repos_per_second"] == 0.0
+
+
+def test_exited_process_recorded(monkeypatch) -> None:
+    """Test a benchmark process that exits without sending its measurements is returned as a failed run."""
+    monkeypatch.setitem(SCENARIOS, "find_organisation_repos", lambda *args: os._exit(1))
+    test_output = run_benchmark("find_organisation_repos", 10, cpu_count=2, repeat=1, per_page=10)
+    assert test_output["error"].startswith("EOFError")
+
+
+def test_scenarios_cover_functions() -> None:
+    """Test there is a benchmark scenario for each function benchmarked."""
+    assert list(SCENARIOS) == [s for s, _ in args_test_run_benchmark_scenarios]
+
+
+def make_result(scenario: str, seconds: float, requests: int, peak_memory_bytes: int) -> Dict[str, Any]:
+    """Make a benchmark result with the measurements compared between commits."""
+    return {"scenario": scenario, "repos": 100, "latency": 0.0, "rate_limit": None, "rate_limit_window": 3600.0,
+            "cpu_count": 2, "seconds": seconds, "requests": requests, "peak_memory_bytes": peak_memory_bytes}
+
+
+# Define test cases for the `test_compare_results` test function; these are the results compared with a baseline of
+# 1 second, 100 requests, and 10 MiB, and the measurements expected to regress
+args_test_compare_results = [
+    (make_result("foo", 1.1, 100, 10 * 1024 ** 2), []),
+    (make_result("foo", 0.5, 90, 5 * 1024 ** 2), []),
+    (make_result("foo", 1.5, 100, 10 * 1024 ** 2), ["seconds"]),
+    (make_result("foo", 1.0, 101, 10 * 1024 ** 2), ["requests"]),
+    (make_result("foo", 1.0, 100, 13 * 1024 ** 2), ["peak_memory_bytes"]),
+    (make_result("foo", 2.0, 200, 20 * 1024 ** 2), ["seconds", "requests", "peak_memory_bytes"]),
+    (make_result("bar", 2.0, 200, 20 * 1024 ** 2), []),
+    ({**make_result("foo", 2.0, 200, 20 * 1024 ** 2), "repos": 1000}, []),
+]
+
+
+@pytest.mark.parametrize("test_input_result, test_expected", args_test_compare_results)
+def test_compare_results(test_input_result: Dict[str, Any], test_expected: List[str]) -> None:
+    """Test only increases beyond the threshold, and margin of the same benchmark are regressions."""
+    _, test_output = compare_results([make_result("foo", 1.0, 100, 10 * 1024 ** 2)], [test_input_result])
+    assert [r.split(": ")[1].split()[0] for r in test_output] == test_expected
+
+
+def test_compare_results_small_increases_not_regressions() -> None:
+    """Test increases in duration, and peak memory within their margins are not regressions, however large the ratio."""
+    _, test_output = compare_results([make_result("foo", 0.01, 100, 0)], [make_result("foo", 0.05, 100, 1024 ** 2)])
+    assert test_output == []
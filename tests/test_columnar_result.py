@@ -0,0 +1,109 @@
+from github import Github
+from github.NamedUser import NamedUser
+from src.utils.columnar_result import ColumnarResult
+from typing import Any, Dict, List, Optional
+import os
+import pytest
+
+
+def create_user(login: str, **kwargs: Any) -> Dict[str, Any]:
+    """Create the data of a GitHub user, as returned by the GitHub API."""
+    return {"login": login, "url": f"https://api.github.com/users/{login}", **kwargs}
+
+
+# Define test cases for the `TestColumnarResult` test class
+args_test_columnar_result = [
+    {"foo/a": ["hello"]},
+    {"foo/a": ["hello", "world"], "foo/b": ["world", "hello"], "foo/c": ["world"]},
+    {"foo/a": [], "foo/b": ["hello", "octocat"], "foo/c": None},
+    {"foo/a": None},
+]
+
+
+@pytest.mark.parametrize("test_input_items", args_test_columnar_result)
+class TestColumnarResult:
+
+    def test_from_items_round_trip(self, test_input_items: Dict[str, Optional[List[str]]]) -> None:
+        """Test the entities, and attributes of each repository are returned in order, including missing values."""
+
+        # Create the columns from users with a name, except 'world', and a number of contributions
+        test_output = ColumnarResult.from_items({
+            k: None if v is None else [create_user(u, name=None if u == "world" else u.title(), contributions=i)
+                                       for i, u in enumerate(v)]
+            for k, v in test_input_items.items()
+        }, ["name", "contributions"])
+
+        # Assert the columns convert back into the original items
+        assert test_output.to_dict() == test_input_items
+        assert test_output.to_dict("name") == {
+            k: None if v is None else [None if u == "world" else u.title() for u in v]
+            for k, v in test_input_items.items()
+        }
+        assert test_output.to_dict("contributions") == {
+            k: None if v is None else list(range(len(v))) for k, v in test_input_items.items()
+        }
+        assert test_output.missing_repositories == [k for k, v in test_input_items.items() if v is None]
+
+    def test_entities_dictionary_encoded(self, test_input_items: Dict[str, Optional[List[str]]]) -> None:
+        """Test each unique entity is stored once in the dictionary, however many repositories it is in."""
+        test_output = ColumnarResult.from_items(test_input_items)
+        assert sorted(test_output.dictionaries["entity"]) == sorted({u for v in test_input_items.values()
+                                                                    for u in (v or [])})
+        assert test_output.columns["entity"].typecode == "i"
+
+    def test_get_entity_repositories(self, test_input_items: Dict[str, Optional[List[str]]]) -> None:
+        """Test the repositories of each entity are returned."""
+        test_expected = {}
+        for k, v in test_input_items.items():
+            for u in (v or []):
+                test_expected.setdefault(u, []).append(k)
+        assert ColumnarResult.from_items(test_input_items).get_entity_repositories() == test_expected
+
+    @pytest.mark.parametrize("test_input_memory_map", [True, False])
+    def test_save_load(self, tmpdir, test_input_items: Dict[str, Optional[List[str]]],
+                       test_input_memory_map: bool) -> None:
+        """Test the columns are saved to disk, and loaded, optionally memory-mapped, without changes."""
+
+        # Save the columns, and load them again
+        test_input = ColumnarResult.from_items({
+            k: None if v is None else [create_user(u, site_admin=u == "hello", score=len(u) / 2) for u in v]
+            for k, v in test_input_items.items()
+        }, ["site_admin", "score", "url"])
+        test_input.save(os.path.join(tmpdir, "sweep"))
+        test_output = ColumnarResult.load(os.path.join(tmpdir, "sweep"), test_input_memory_map)
+
+        # Assert every column is unchanged, and memory-mapped if required
+        assert len(test_output) == len(test_input)
+        for column_name in ["repository", "entity", "site_admin", "score", "url"]:
+            assert test_output.to_dict(column_name) == test_input.to_dict(column_name)
+        if test_input_memory_map and len(test_input) > 0:
+            assert isinstance(test_output.columns["entity"], memoryview)
+
+
+class TestColumnarResultFromItems:
+
+    def test_pygithub_objects(self) -> None:
+        """Test attributes are read from PyGithub objects, and PyGithub object values are stored as their data."""
+        test_requester = Github()._Github__requester
+        test_input = {"foo/a": [NamedUser(test_requester, {}, create_user("hello", name="Hello"), completed=True)]}
+        test_output = ColumnarResult.from_items(test_input, ["name", "url"])
+        assert test_output.to_dict("name") == {"foo/a": ["Hello"]}
+        assert test_output.to_dict("url") == {"foo/a": ["https://api.github.com/users/hello"]}
+
+    def test_unhashable_values_dictionary_encoded(self) -> None:
+        """Test unhashable values, such as permissions, are dictionary-encoded by their contents."""
+        test_input = {"foo/a": [create_user(u, permissions={"pull": True, "push": u == "world"})
+                                for u in ["hello", "world", "octocat"]]}
+        test_output = ColumnarResult.from_items(test_input, ["permissions"])
+        assert test_output.dictionaries["permissions"] == [{"pull": True, "push": False}, {"pull": True, "push": True}]
+        assert list(test_output.columns["permissions"]) == [0, 1, 0]
+
+    def test_load_rejects_other_byteorder(self, tmpdir) -> None:
+        """Test loading columns saved on a machine with a different byte order raises a `ValueError`."""
+        ColumnarResult.from_items({"foo/a": ["hello"]}).save(str(tmpdir))
+        with open(os.path.join(tmpdir, "meta.json")) as f:
+            test_meta = f.read()
+        with open(os.path.join(tmpdir, "meta.json"), "w") as f:
+            f.write(test_meta.replace('"little"', '"other"').replace('"big"', '"other"'))
+        with pytest.raises(ValueError):
+            _ = ColumnarResult.load(str(tmpdir))
@@ -0,0 +1,171 @@
+from collections import ChainMap
+from conftest import StubGitHubServer
+from github import Github
+from github.NamedUser import NamedUser
+from github.Repository import Repository
+from src.make_data.extract_attribute_from_dict_of_paginated_lists import (
+    batch_extract_attribute_from_dict_of_paginated_lists
+)
+from src.make_data.get_items_for_all_repos import get_items_for_all_repos, stream_items_for_all_repos
+from src.utils.entity_store import EntityStore
+from typing import Any, Dict, List
+import pickle
+import pytest
+
+
+def create_user(login: str, **kwargs: Any) -> Dict[str, Any]:
+    """Create the data of a GitHub user, as returned by the GitHub API."""
+    return {"login": login, "node_id": f"MDQ6{login}", "url": f"https://api.github.com/users/{login}", **kwargs}
+
+
+# Define test cases for the `TestEntityStore` test class
+args_test_entity_store = [
+    {"foo/a": ["hello"]},
+    {"foo/a": ["hello", "world"], "foo/b": ["world", "hello"], "foo/c": ["world"]},
+    {"foo/a": [], "foo/b": ["hello", "octocat"], "foo/c": None},
+]
+
+
+@pytest.mark.parametrize("test_input_items", args_test_entity_store)
+class TestEntityStore:
+
+    def test_intern_items_stores_each_entity_once(self, test_input_items: Dict[str, List[str]]) -> None:
+        """Test each entity is stored once, and every reference to it is the same shared dictionary."""
+
+        # Intern the items, where each repository has separate copies of each user's data
+        test_store = EntityStore()
+        test_output = test_store.intern_items({k: None if v is None else [create_user(u) for u in v]
+                                               for k, v in test_input_items.items()})
+
+        # Assert the output is equal to the input, each entity is stored once, and references are shared
+        assert test_output == {k: None if v is None else [create_user(u) for u in v]
+                               for k, v in test_input_items.items()}
+        assert len(test_store) == len({u for v in test_input_items.values() for u in (v or [])})
+        for v in test_output.values():
+            for e in (v or []):
+                assert e is test_store[e["login"]]
+
+    def test_relationship_fields_kept_per_reference(self, test_input_items: Dict[str, List[str]]) -> None:
+        """Test fields describing the relationship to a repository are not shared between references."""
+
+        # Intern the items with a different number of contributions per repository
+        test_store = EntityStore()
+        test_output = test_store.intern_items({k: [create_user(u, contributions=i) for u in v]
+                                               for i, (k, v) in enumerate(test_input_items.items()) if v is not None})
+
+        # Assert each reference has its own contributions, layered over the shared data
+        for i, (k, v) in enumerate(test_input_items.items()):
+            for e in test_output.get(k, []):
+                assert isinstance(e, ChainMap) and e["contributions"] == i
+                assert e.maps[1] is test_store[e["login"]] and "contributions" not in e.maps[1]
+
+    def test_intern_pygithub_objects(self, test_input_items: Dict[str, List[str]]) -> None:
+        """Test PyGithub objects are interned as their data."""
+        test_requester = Github()._Github__requester
+        test_store = EntityStore()
+        test_output = test_store.intern_items({
+            k: None if v is None else [NamedUser(test_requester, {}, create_user(u), completed=False) for u in v]
+            for k, v in test_input_items.items()
+        })
+        assert test_output == {k: None if v is None else [create_user(u) for u in v]
+                               for k, v in test_input_items.items()}
+
+
+@pytest.mark.parametrize("test_input_items", args_test_entity_store)
+@pytest.mark.parametrize("test_input_use_cache", [True, False])
+def test_interned_entities_completed_in_batches(stub_github_server: StubGitHubServer,
+                                                test_input_items: Dict[str, List[str]],
+                                                test_input_use_cache: bool) -> None:
+    """Test interned entities missing a field are completed once each, and the field shared by every reference."""
+
+    # Intern contributors with the list data of the stub GitHub server, and set canned responses of their full data
+    test_store = EntityStore()
+    for u in {u for v in test_input_items.values() for u in (v or [])}:
+        test_url = f"{stub_github_server.base_url}/users/{u}"
+        stub_github_server.routes[f"/users/{u}"] = (200, {}, create_user(u, name=u.title(), url=test_url))
+    test_interned = test_store.intern_items({
+        k: None if v is None else [create_user(u, url=f"{stub_github_server.base_url}/users/{u}", contributions=1)
+                                   for u in v] for k, v in test_input_items.items()
+    })
+
+    # Extract the names of the contributors, optionally using the `EntityStore` object as the cache
+    test_output = batch_extract_attribute_from_dict_of_paginated_lists(
+        test_interned, "name", g=Github(base_url=stub_github_server.base_url),
+        cache=test_store if test_input_use_cache else None
+    )
+
+    # Assert the names are extracted, each contributor is requested once, and the name is in the shared data
+    assert test_output == {k: None if v is None else [u.title() for u in v] for k, v in test_input_items.items()}
+    assert len(stub_github_server.requests) == len(test_store)
+    assert all(test_store[u]["name"] == u.title() for u in {u for v in test_input_items.values() for u in (v or [])})
+    assert all(e.maps[0] == {"contributions": 1} for v in test_interned.values() for e in (v or []))
+
+
+@pytest.mark.parametrize("test_input_stream", [True, False])
+def test_interned_items_of_missing_repository_none(stub_github_server: StubGitHubServer,
+                                                   test_input_stream: bool) -> None:
+    """Test items interned from a sweep are paged through in the workers, so a missing repository has None items."""
+
+    # Set the canned contributors of one repository, and create the repositories without requesting them
+    stub_github_server.routes["/repos/foo/ok/contributors"] = (200, {}, [create_user("hello")])
+    test_github = Github(base_url=stub_github_server.base_url)
+    test_repositories = [test_github.create_from_raw_data(Repository, {
+        "full_name": f"foo/{n}", "name": n, "url": f"{stub_github_server.base_url}/repos/foo/{n}"
+    }) for n in ["ok", "bad"]]
+
+    # Get the contributors of every repository, interning them in an `EntityStore` object
+    test_store = EntityStore()
+    if test_input_stream:
+        test_output = dict(stream_items_for_all_repos(test_github, "get_contributors", test_repositories, 2,
+                                                      refetch_repositories=False, entity_store=test_store))
+    else:
+        test_output = get_items_for_all_repos(test_github, "get_contributors", test_repositories, 2,
+                                              refetch_repositories=False, entity_store=test_store)
+
+    # Assert the missing repository has None items, and the contributors of the other repository are interned
+    assert test_output == {"foo/ok": [create_user("hello")], "foo/bad": None}
+    assert len(test_store) == 1
+
+
+class TestEntityStoreMapping:
+
+    @pytest.mark.parametrize("test_input_key", ["MDQ6hello", "https://api.github.com/users/hello", "hello"])
+    def test_lookup_by_any_key(self, test_input_key: str) -> None:
+        """Test entities can be looked up by node ID, API URL, or login."""
+        test_store = EntityStore()
+        _ = test_store.add(create_user("hello"))
+        assert test_input_key in test_store
+        assert test_store[test_input_key] == create_user("hello")
+
+    def test_setitem_merges_data(self) -> None:
+        """Test setting data for an existing entity merges it into the shared dictionary, for example from a cache."""
+
+        # Intern a user from list data, then update it by API URL with the complete data
+        test_store = EntityStore()
+        test_reference = test_store.add(create_user("hello"))
+        test_store.update({"https://api.github.com/users/hello": create_user("hello", name="Hello")})
+
+        # Assert the existing reference sees the complete data, and the entity is only stored once
+        assert test_reference["name"] == "Hello"
+        assert len(test_store) == 1
+
+    def test_delitem_removes_aliases(self) -> None:
+        """Test deleting an entity also removes its aliases."""
+        test_store = EntityStore()
+        _ = test_store.add(create_user("hello"))
+        del test_store["hello"]
+        assert "MDQ6hello" not in test_store and "https://api.github.com/users/hello" not in test_store
+
+    @pytest.mark.parametrize("test_input", [{"name": "no identity"}, "hello", None])
+    def test_unidentifiable_returned_unchanged(self, test_input: Any) -> None:
+        """Test values that cannot be identified are returned unchanged, and not stored."""
+        test_store = EntityStore()
+        assert test_store.intern(test_input) == test_input
+        assert len(test_store) == 0
+
+    def test_can_be_pickled(self) -> None:
+        """Test interned items keep their shared references when pickled together, for example to save them."""
+        test_store = EntityStore()
+        test_items = test_store.intern_items({"foo/a": [create_user("hello")], "foo/b": [create_user("hello")]})
+        test_output = pickle.loads(pickle.dumps(test_items))
+        assert test_output["foo/a"][0] is test_output["foo/b"][0]
@@ -1,5 +1,9 @@
-from github import UnknownObjectException
+from conftest import StubGitHubServer
+from github import Github, UnknownObjectException
+from github.NamedUser import NamedUser
+from src.utils.entity_store import EntityStore
 from src.make_data.extract_attribute_from_dict_of_paginated_lists import (
+    batch_extract_attribute_from_dict_of_paginated_lists,
     extract_attribute_from_paginated_list_elements,
     _extract_attributes_from_key_paginated_list_pair,
     extract_attribute_from_dict_of_paginated_lists
@@ -58,6 +62,29 @@ class TestExtractAttributeFromPaginatedListElements:
         # Assert the output is as expected
         assert test_output == test_input_list
 
+    @pytest.mark.parametrize("test_input_list", args_test_extract_attribute_from_paginated_list_elements_list)
+    def test_returns_correctly_for_dictionary_elements(self, test_input_list: List,
+                                                       test_input_attribute_name: str) -> None:
+        """Test that the attribute is extracted by key from elements that are dictionaries, for example raw data."""
+        test_output = extract_attribute_from_paginated_list_elements(
+            [{test_input_attribute_name: e, "other": None} for e in test_input_list], test_input_attribute_name
+        )
+        assert test_output == test_input_list
+
+    @pytest.mark.parametrize("test_input_list", args_test_extract_attribute_from_paginated_list_elements_list)
+    def test_missing_key_returns_none_for_dictionary_elements(self, test_input_list: List,
+                                                              test_input_attribute_name: str) -> None:
+        """Test that None is extracted from dictionary elements without the key, rather than raising a KeyError."""
+        test_output = extract_attribute_from_paginated_list_elements(
+            [{test_input_attribute_name: e} if e % 4 else {"other": e} for e in test_input_list],
+            test_input_attribute_name
+        )
+        assert test_output == [e if e % 4 else None for e in test_input_list]
+
+    def test_none_returns_correctly(self, test_input_attribute_name: str) -> None:
+        """Test that None is returned if there are no elements, for example if an error was returned earlier."""
+        assert extract_attribute_from_paginated_list_elements(None, test_input_attribute_name) is None
+
     @staticmethod
     def create_iterable_raises_exception(exception: Exception) -> object:
         """Create a class that raises an exception when iterated over."""
@@ -180,7 +207,7 @@ class TestExtractAttributeFromDictOfPaginatedLists:
         # Assert `parallelise_dictionary_processing` function is called once correctly
         patch_extract_attribute_from_dict_of_paginated_lists_parallelise_dictionary_processing.assert_called_once_with(
             patch_extract_attribute_from_dict_of_paginated_lists_partial.return_value, test_input_pl.keys(),
-            test_input_cpu_count, test_input_max_chunksize
+            test_input_cpu_count, test_input_max_chunksize, "thread"
         )
 
     def test_returns_correctly(
@@ -198,3 +225,156 @@ class TestExtractAttributeFromDictOfPaginatedLists:
         # Assert the return is as expected
         assert test_output == patch_extract_attribute_from_dict_of_paginated_lists_parallelise_dictionary_processing\
             .return_value
+
+    def test_batch_completion_calls_batch_extract(
+            self, mocker, patch_extract_attribute_from_dict_of_paginated_lists_partial: MagicMock,
+            patch_extract_attribute_from_dict_of_paginated_lists_parallelise_dictionary_processing: MagicMock,
+            test_input_pl: Dict[str, Any], test_input_attribute_name: str, test_input_cpu_count: int,
+            test_input_max_chunksize: int
+    ) -> None:
+        """Test the function uses `batch_extract_attribute_from_dict_of_paginated_lists` if `batch_completion`."""
+
+        # Patch the `batch_extract_attribute_from_dict_of_paginated_lists` function
+        patch_batch_extract = mocker.patch("src.make_data.extract_attribute_from_dict_of_paginated_lists."
+                                           "batch_extract_attribute_from_dict_of_paginated_lists")
+
+        # Execute the `extract_attribute_from_dict_of_paginated_lists` function
+        test_output = extract_attribute_from_dict_of_paginated_lists(test_input_pl, test_input_attribute_name,
+                                                                     test_input_cpu_count, test_input_max_chunksize,
+                                                                     batch_completion=True)
+
+        # Assert the return is from `batch_extract_attribute_from_dict_of_paginated_lists`
+        patch_batch_extract.assert_called_once_with(test_input_pl, test_input_attribute_name, test_input_cpu_count,
+                                                    test_input_max_chunksize, "thread", g=None)
+        assert test_output == patch_batch_extract.return_value
+
+
+def create_contributors(server: StubGitHubServer, contributors: Dict[str, List[str]]) -> Dict[str, Any]:
+    """Create lists of lazy `github.NamedUser.NamedUser` objects, and canned responses for their full data."""
+    requester = Github(base_url=server.base_url)._Github__requester
+    for login in {u for v in contributors.values() for u in v}:
+        server.routes[f"/users/{login}"] = (200, {}, {"login": login, "name": login.title(),
+                                                      "url": f"{server.base_url}/users/{login}"})
+    return {k: [NamedUser(requester, {}, {"login": u, "url": f"{server.base_url}/users/{u}"}, completed=False)
+                for u in v] for k, v in contributors.items()}
+
+
+# Define test cases for the `TestBatchExtractAttributeFromDictOfPaginatedLists` test class
+args_test_batch_extract_attribute_from_dict_of_paginated_lists = [
+    {"foo/a": ["hello"]},
+    {"foo/a": ["hello", "world"], "foo/b": ["world", "hello"], "foo/c": ["world"]},
+    {"foo/a": [], "foo/b": ["hello", "hello", "octocat"]},
+]
+
+
+@pytest.mark.parametrize("test_input_contributors", args_test_batch_extract_attribute_from_dict_of_paginated_lists)
+@pytest.mark.parametrize("test_input_executor", ["thread", "process"])
+class TestBatchExtractAttributeFromDictOfPaginatedLists:
+
+    def test_requests_each_unique_element_once(self, stub_github_server: StubGitHubServer,
+                                               test_input_contributors: Dict[str, List[str]],
+                                               test_input_executor: str) -> None:
+        """Test each unique element missing the attribute is requested once, and the attribute filled in."""
+
+        # Execute the `batch_extract_attribute_from_dict_of_paginated_lists` function
+        test_output = batch_extract_attribute_from_dict_of_paginated_lists(
+            create_contributors(stub_github_server, test_input_contributors), "name", 4, executor=test_input_executor
+        )
+
+        # Assert the output is as expected, and each unique contributor is requested once
+        assert test_output == {k: [u.title() for u in v] for k, v in test_input_contributors.items()}
+        assert sorted(r[1] for r in stub_github_server.requests) == sorted(
+            f"/users/{u}" for u in {u for v in test_input_contributors.values() for u in v}
+        )
+
+    def test_attributes_in_data_and_cache_not_requested(self, stub_github_server: StubGitHubServer,
+                                                        test_input_contributors: Dict[str, List[str]],
+                                                        test_input_executor: str) -> None:
+        """Test no requests are sent for attributes in the list data, or elements in the cache."""
+
+        # Extract an attribute in the list data, and then extract `name` twice, re-using the cache
+        test_cache = {}
+        test_logins = batch_extract_attribute_from_dict_of_paginated_lists(
+            create_contributors(stub_github_server, test_input_contributors), "login", executor=test_input_executor
+        )
+        for _ in range(2):
+            _ = batch_extract_attribute_from_dict_of_paginated_lists(
+                create_contributors(stub_github_server, test_input_contributors), "name", executor=test_input_executor,
+                cache=test_cache
+            )
+
+        # Assert the output is as expected, and each unique contributor is only requested once
+        assert test_logins == test_input_contributors
+        assert len(stub_github_server.requests) == len({u for v in test_input_contributors.values() for u in v})
+
+    def test_entity_store_as_cache(self, stub_github_server: StubGitHubServer,
+                                   test_input_contributors: Dict[str, List[str]], test_input_executor: str) -> None:
+        """Test an `EntityStore` object can be the cache, so completed data is shared with interned references."""
+
+        # Intern the contributors' list data, then extract their names using the `EntityStore` object as the cache
+        test_store = EntityStore()
+        test_input = create_contributors(stub_github_server, test_input_contributors)
+        test_interned = test_store.intern_items(test_input)
+        _ = batch_extract_attribute_from_dict_of_paginated_lists(test_input, "name", 2, executor=test_input_executor,
+                                                                 cache=test_store)
+
+        # Assert the interned references now have the complete data
+        assert {k: [u["name"] for u in v] for k, v in test_interned.items()} == {
+            k: [u.title() for u in v] for k, v in test_input_contributors.items()
+        }
+
+    def test_dictionary_elements_completed(self, stub_github_server: StubGitHubServer,
+                                           test_input_contributors: Dict[str, List[str]],
+                                           test_input_executor: str) -> None:
+        """Test elements that are dictionaries, for example materialised items, are completed with `g`."""
+
+        # Replace the contributors with dictionaries of their list data, and extract their names
+        test_input = {k: [dict(u._rawData) for u in v]
+                      for k, v in create_contributors(stub_github_server, test_input_contributors).items()}
+        test_output = batch_extract_attribute_from_dict_of_paginated_lists(
+            test_input, "name", 2, executor=test_input_executor, g=Github(base_url=stub_github_server.base_url)
+        )
+
+        # Assert the output is as expected, and each unique contributor is requested once
+        assert test_output == {k: [u.title() for u in v] for k, v in test_input_contributors.items()}
+        assert len(stub_github_server.requests) == len({u for v in test_input_contributors.values() for u in v})
+
+    def test_dictionary_elements_without_github_raise_value_error(self, stub_github_server: StubGitHubServer,
+                                                                  test_input_contributors: Dict[str, List[str]],
+                                                                  test_input_executor: str) -> None:
+        """Test a `ValueError` is raised if elements that are dictionaries need completing, but `g` is None."""
+        test_input = {k: [dict(u._rawData) for u in v]
+                      for k, v in create_contributors(stub_github_server, test_input_contributors).items()}
+        with pytest.raises(ValueError):
+            _ = batch_extract_attribute_from_dict_of_paginated_lists(test_input, "name", executor=test_input_executor)
+        assert stub_github_server.requests == []
+
+    def test_unknownobjectexception_returns_none(self, stub_github_server: StubGitHubServer,
+                                                 test_input_contributors: Dict[str, List[str]],
+                                                 test_input_executor: str) -> None:
+        """Test None is returned for lists that raise an `UnknownObjectException` exception, or are None."""
+        test_input = {**create_contributors(stub_github_server, test_input_contributors), "foo/none": None,
+                      "foo/missing": TestExtractAttributeFromPaginatedListElements.create_iterable_raises_exception(
+                          UnknownObjectException(404, "Not Found"))}
+        test_output = batch_extract_attribute_from_dict_of_paginated_lists(test_input, "name", 2,
+                                                                           executor="thread")
+        assert test_output["foo/none"] is None and test_output["foo/missing"] is None
+
+    def test_element_not_found_returns_none_for_its_lists(self, stub_github_server: StubGitHubServer,
+                                                          test_input_contributors: Dict[str, List[str]],
+                                                          test_input_executor: str) -> None:
+        """Test None is returned for only the lists with an element that cannot be completed, for example if deleted."""
+
+        # Add a deleted user to the first list, without a canned response for their full data
+        test_input = create_contributors(stub_github_server, {**test_input_contributors, "foo/deleted": ["ghost"]})
+        del stub_github_server.routes["/users/ghost"]
+        test_input = {k: v + test_input["foo/deleted"] if k == "foo/a" else v for k, v in test_input.items()}
+
+        # Execute the `batch_extract_attribute_from_dict_of_paginated_lists` function
+        test_output = batch_extract_attribute_from_dict_of_paginated_lists(test_input, "name", 2,
+                                                                           executor=test_input_executor)
+
+        # Assert None is returned for the lists with the deleted user, and the names for all the other lists
+        assert test_output == {"foo/a": None, "foo/deleted": None, **{
+            k: [u.title() for u in v] for k, v in test_input_contributors.items() if k != "foo/a"
+        }}
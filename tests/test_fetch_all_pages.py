@@ -0,0 +1,54 @@
+from conftest import StubGitHubServer
+from github import Github
+from github.NamedUser import NamedUser
+from github.PaginatedList import PaginatedList
+from src.utils.fetch_all_pages import fetch_all_pages
+import pytest
+
+
+def create_paginated_list(server: StubGitHubServer, per_page: int) -> PaginatedList:
+    """Create a `github.PaginatedList.PaginatedList` object of users from the stub GitHub server."""
+    test_requester = Github(base_url=server.base_url, per_page=per_page)._Github__requester
+    return PaginatedList(NamedUser, test_requester, "/users", None)
+
+
+# Define test cases for the `TestFetchAllPages` test class
+args_test_fetch_all_pages = [(0, 2), (1, 2), (2, 2), (5, 2), (7, 3), (30, 4)]
+
+
+@pytest.mark.parametrize("test_input_count, test_input_per_page", args_test_fetch_all_pages)
+@pytest.mark.parametrize("test_input_executor", ["thread", "process"])
+class TestFetchAllPages:
+
+    @staticmethod
+    def set_routes(server: StubGitHubServer, count: int, per_page: int) -> None:
+        """Set canned responses for `count` users over pages of `per_page` users, with GitHub `Link` headers."""
+        last_page = max((count - 1) // per_page + 1, 1)
+        for page in range(1, last_page + 1):
+            link = ", ".join(f'<{server.base_url}/users?page={p}&per_page={per_page}>; rel="{r}"'
+                             for p, r in [(page + 1, "next"), (last_page, "last")] if p <= last_page)
+            body = [{"login": f"user{i}"} for i in range((page - 1) * per_page, min(page * per_page, count))]
+            path = f"/users?per_page={per_page}" if page == 1 else f"/users?page={page}&per_page={per_page}"
+            server.routes[path] = (200, {"Link": link} if link else {}, body)
+
+    def test_returns_all_elements_in_order(self, stub_github_server: StubGitHubServer, test_input_count: int,
+                                           test_input_per_page: int, test_input_executor: str) -> None:
+        """Test all the elements are returned in order, requesting each page once."""
+
+        # Set the canned responses, and execute the `fetch_all_pages` function
+        self.set_routes(stub_github_server, test_input_count, test_input_per_page)
+        test_output = fetch_all_pages(create_paginated_list(stub_github_server, test_input_per_page), 4,
+                                      test_input_executor)
+
+        # Assert the output is as expected, and each page is requested once
+        assert [u.login for u in test_output] == [f"user{i}" for i in range(test_input_count)]
+        assert len(stub_github_server.requests) == len(stub_github_server.routes)
+
+    def test_matches_paginated_list_iteration(self, stub_github_server: StubGitHubServer, test_input_count: int,
+                                              test_input_per_page: int, test_input_executor: str) -> None:
+        """Test the output is the same as iterating the `github.PaginatedList.PaginatedList` object."""
+        self.set_routes(stub_github_server, test_input_count, test_input_per_page)
+        test_expected = [u.login for u in create_paginated_list(stub_github_server, test_input_per_page)]
+        test_output = fetch_all_pages(create_paginated_list(stub_github_server, test_input_per_page), 4,
+                                      test_input_executor)
+        assert [u.login for u in test_output] == test_expected
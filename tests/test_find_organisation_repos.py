@@ -52,3 +52,25 @@ class TestFindOrganisationRepos:
 
         # Assert `test_output` is as expected
         assert test_output == patch_find_organisation_repos_github.get_organization.return_value.get_repos.return_value
+
+    @pytest.mark.parametrize("test_input_cpu_count", [1, 4])
+    @pytest.mark.parametrize("test_input_executor", ["thread", "process"])
+    def test_parallel_pages_returns_correctly(self, patch_find_organisation_repos_github: MagicMock,
+                                              patch_find_organisation_repos_fetch_all_pages: MagicMock,
+                                              test_input_organisation: str, test_input_repository_type: str,
+                                              test_input_sort: str, test_input_direction: str,
+                                              test_input_cpu_count: int, test_input_executor: str) -> None:
+        """Test all pages are requested with `fetch_all_pages` if `parallel_pages` is True."""
+
+        # Execute the `find_organisation_repos` function
+        test_output = find_organisation_repos(patch_find_organisation_repos_github, test_input_organisation,
+                                              test_input_repository_type, test_input_sort, test_input_direction,
+                                              parallel_pages=True, cpu_count=test_input_cpu_count,
+                                              executor=test_input_executor)
+
+        # Assert the `fetch_all_pages` function is called once correctly, and its output returned
+        patch_find_organisation_repos_fetch_all_pages.assert_called_once_with(
+            patch_find_organisation_repos_github.get_organization.return_value.get_repos.return_value,
+            test_input_cpu_count, test_input_executor
+        )
+        assert test_output == patch_find_organisation_repos_fetch_all_pages.return_value
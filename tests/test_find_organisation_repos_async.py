@@ -0,0 +1,45 @@
+from src.make_data.find_organisation_repos_async import find_organisation_repos_async
+from unittest.mock import AsyncMock, MagicMock
+import asyncio
+import pytest
+
+# Define test cases for the `TestFindOrganisationReposAsync` test class
+args_test_find_organisation_repos_async = [
+    ("hello", "all", "full_name", "asc"),
+    ("world", "public", "created", "desc")
+]
+
+
+@pytest.mark.parametrize("test_input_organisation, test_input_repository_type, test_input_sort, test_input_direction",
+                         args_test_find_organisation_repos_async)
+class TestFindOrganisationReposAsync:
+
+    def test_get_all_pages_called_once_correctly(self, test_input_organisation: str, test_input_repository_type: str,
+                                                 test_input_sort: str, test_input_direction: str) -> None:
+        """Test the `get_all_pages` method of the session is called once correctly."""
+
+        # Create a mock session
+        test_input_session = MagicMock(get_all_pages=AsyncMock())
+
+        # Execute the `find_organisation_repos_async` function
+        _ = asyncio.run(find_organisation_repos_async(test_input_session, test_input_organisation,
+                                                      test_input_repository_type, test_input_sort,
+                                                      test_input_direction))
+
+        # Assert the `get_all_pages` method is called once correctly
+        test_input_session.get_all_pages.assert_awaited_once_with(
+            f"/orgs/{test_input_organisation}/repos",
+            {"type": test_input_repository_type, "sort": test_input_sort, "direction": test_input_direction}
+        )
+
+    def test_returns_correctly(self, test_input_organisation: str, test_input_repository_type: str,
+                               test_input_sort: str, test_input_direction: str) -> None:
+        """Test the output of the function is as expected."""
+
+        # Create a mock session
+        test_input_session = MagicMock(get_all_pages=AsyncMock(return_value=[{"full_name": "foo/bar"}]))
+
+        # Execute the `find_organisation_repos_async` function, and assert the output is as expected
+        assert asyncio.run(find_organisation_repos_async(test_input_session, test_input_organisation,
+                                                         test_input_repository_type, test_input_sort,
+                                                         test_input_direction)) == [{"full_name": "foo/bar"}]
@@ -1,4 +1,9 @@
-from src.make_data.get_items_for_all_repos import get_items_for_all_repos
+from src.make_data.get_items_for_all_repos import (
+    get_items_for_all_repos,
+    get_repository_iterable,
+    get_repository_name,
+    stream_items_for_all_repos
+)
 from typing import Any, List
 from unittest.mock import MagicMock
 import pytest
@@ -53,7 +58,7 @@ class TestGetItemsForAllRepos:
         # Assert that `functools.partial` is called once with the correct arguments
         patch_get_items_for_all_repos_partial.assert_called_once_with(patch_get_items_for_repo,
                                                                       patch_get_items_for_all_repos_github,
-                                                                      test_input_method_name)
+                                                                      test_input_method_name, materialise=False)
 
     def test_parallelise_dictionary_processing_called_once_correctly(
             self, patch_get_items_for_all_repos_github: MagicMock, patch_get_items_for_repo: MagicMock,
@@ -71,11 +76,13 @@ class TestGetItemsForAllRepos:
                                     test_input_cpu_count,
                                     test_input_max_chunksize)
 
-        # Assert that the `parallelise_dictionary_processing` function is called once correctly
-        patch_get_items_for_all_repo_parallelise_dictionary_processing.assert_called_once_with(
-            patch_get_items_for_all_repos_partial.return_value, test_input_repositories, test_input_cpu_count,
-            test_input_max_chunksize
-        )
+        # Assert that the `parallelise_dictionary_processing` function is called once correctly, with the repository
+        # full names passed as a list, so their length is known
+        patch_get_items_for_all_repo_parallelise_dictionary_processing.assert_called_once()
+        test_args = patch_get_items_for_all_repo_parallelise_dictionary_processing.call_args[0]
+        assert test_args[0] == patch_get_items_for_all_repos_partial.return_value
+        assert test_args[1] == test_input_repositories
+        assert test_args[2:] == (test_input_cpu_count, test_input_max_chunksize, "thread", None, None, False)
 
     def test_returns_correctly(self, patch_get_items_for_all_repos_github: MagicMock,
                                patch_get_items_for_repo: MagicMock, patch_get_items_for_all_repos_partial: MagicMock,
@@ -93,3 +100,202 @@ class TestGetItemsForAllRepos:
 
         # Assert the output is as expected
         assert test_output == patch_get_items_for_all_repo_parallelise_dictionary_processing.return_value
+
+    def test_repositories_passed_directly_without_refetch(
+            self, patch_get_items_for_all_repos_github: MagicMock, patch_get_items_for_repo: MagicMock,
+            patch_get_items_for_all_repos_partial: MagicMock,
+            patch_get_items_for_all_repo_parallelise_dictionary_processing: MagicMock,
+            test_input_method_name: str, test_input_repositories: List[str], test_input_cpu_count: int,
+            test_input_max_chunksize: int
+    ) -> None:
+        """Test the repository objects are passed to `parallelise_dictionary_processing` if not refetched."""
+
+        # Create a list of classes with a `full_name` attribute
+        test_input = self.create_list_of_classes_with_full_name(test_input_repositories)
+
+        # Execute the `get_items_for_all_repos` function, passing an iterator to check it is passed on lazily
+        _ = get_items_for_all_repos(patch_get_items_for_all_repos_github, test_input_method_name, iter(test_input),
+                                    test_input_cpu_count, test_input_max_chunksize, refetch_repositories=False)
+
+        # Assert that the `parallelise_dictionary_processing` function is called once with the repository objects
+        patch_get_items_for_all_repo_parallelise_dictionary_processing.assert_called_once()
+        test_args = patch_get_items_for_all_repo_parallelise_dictionary_processing.call_args[0]
+        assert test_args[0] == patch_get_items_for_all_repos_partial.return_value
+        assert list(test_args[1]) == test_input
+        assert test_args[2:] == (test_input_cpu_count, test_input_max_chunksize, "thread", None, None, False)
+
+    def test_entity_store_interns_items(self, patch_get_items_for_all_repos_github: MagicMock,
+                                        patch_get_items_for_repo: MagicMock,
+                                        patch_get_items_for_all_repos_partial: MagicMock,
+                                        patch_get_items_for_all_repo_parallelise_dictionary_processing: MagicMock,
+                                        test_input_method_name: str, test_input_repositories: List[str],
+                                        test_input_cpu_count: int, test_input_max_chunksize: int) -> None:
+        """Test the items are interned if an `EntityStore` object is given."""
+
+        # Execute the `get_items_for_all_repos` function with a mock `EntityStore` object
+        test_entity_store = MagicMock()
+        test_output = get_items_for_all_repos(patch_get_items_for_all_repos_github, test_input_method_name,
+                                              self.create_list_of_classes_with_full_name(test_input_repositories),
+                                              test_input_cpu_count, test_input_max_chunksize,
+                                              entity_store=test_entity_store)
+
+        # Assert the items are materialised in the workers, and the output is interned
+        patch_get_items_for_all_repos_partial.assert_called_once_with(patch_get_items_for_repo,
+                                                                      patch_get_items_for_all_repos_github,
+                                                                      test_input_method_name, materialise=True)
+        test_entity_store.intern_items.assert_called_once_with(
+            patch_get_items_for_all_repo_parallelise_dictionary_processing.return_value
+        )
+        assert test_output == test_entity_store.intern_items.return_value
+
+    def test_journal_checkpoints_items(self, patch_get_items_for_all_repos_github: MagicMock,
+                                       patch_get_items_for_repo: MagicMock,
+                                       patch_get_items_for_all_repos_partial: MagicMock,
+                                       patch_get_items_for_all_repo_parallelise_dictionary_processing: MagicMock,
+                                       patch_get_items_for_all_repo_parallelise_dictionary_checkpointing: MagicMock,
+                                       test_input_method_name: str, test_input_repositories: List[str],
+                                       test_input_cpu_count: int, test_input_max_chunksize: int) -> None:
+        """Test the items are materialised, and checkpointed with `parallelise_dictionary_checkpointing`, if a
+        `Journal` object is given."""
+
+        # Execute the `get_items_for_all_repos` function with a mock `Journal` object
+        test_journal = MagicMock()
+        test_output = get_items_for_all_repos(patch_get_items_for_all_repos_github, test_input_method_name,
+                                              self.create_list_of_classes_with_full_name(test_input_repositories),
+                                              test_input_cpu_count, test_input_max_chunksize, journal=test_journal)
+
+        # Assert the items are materialised, and checkpointed in the journal
+        patch_get_items_for_all_repos_partial.assert_called_once_with(patch_get_items_for_repo,
+                                                                      patch_get_items_for_all_repos_github,
+                                                                      test_input_method_name, materialise=True)
+        patch_get_items_for_all_repo_parallelise_dictionary_checkpointing.assert_called_once()
+        test_args = patch_get_items_for_all_repo_parallelise_dictionary_checkpointing.call_args
+        assert test_args[0][0] == patch_get_items_for_all_repos_partial.return_value
+        assert list(test_args[0][1]) == test_input_repositories
+        assert test_args[0][2:] == (test_journal, get_repository_name, test_input_cpu_count)
+        assert test_args[1] == {"executor": "thread", "retry_policy": None, "dead_letters": None}
+        patch_get_items_for_all_repo_parallelise_dictionary_processing.assert_not_called()
+        assert test_output == patch_get_items_for_all_repo_parallelise_dictionary_checkpointing.return_value
+
+    @pytest.mark.parametrize("test_input_materialise", [True, False])
+    def test_partial_called_with_materialise(self, patch_get_items_for_all_repos_github: MagicMock,
+                                             patch_get_items_for_repo: MagicMock,
+                                             patch_get_items_for_all_repos_partial: MagicMock,
+                                             patch_get_items_for_all_repo_parallelise_dictionary_processing: MagicMock,
+                                             test_input_method_name: str, test_input_repositories: List[str],
+                                             test_input_cpu_count: int, test_input_max_chunksize: int,
+                                             test_input_materialise: bool) -> None:
+        """Test that `functools.partial` function is called with the `materialise` argument."""
+
+        # Execute the `get_items_for_all_repos` function
+        _ = get_items_for_all_repos(patch_get_items_for_all_repos_github, test_input_method_name,
+                                    self.create_list_of_classes_with_full_name(test_input_repositories),
+                                    test_input_cpu_count, test_input_max_chunksize,
+                                    materialise=test_input_materialise)
+
+        # Assert that `functools.partial` is called once with the correct arguments
+        patch_get_items_for_all_repos_partial.assert_called_once_with(patch_get_items_for_repo,
+                                                                      patch_get_items_for_all_repos_github,
+                                                                      test_input_method_name,
+                                                                      materialise=test_input_materialise)
+
+
+@pytest.mark.parametrize("test_input_repositories", args_test_get_items_for_all_repos_repositories)
+@pytest.mark.parametrize("test_input_method_name", args_test_get_items_for_all_repos_method_name)
+@pytest.mark.parametrize("test_input_cpu_count", args_test_get_items_for_all_repos_cpu_count)
+@pytest.mark.parametrize("test_input_max_in_flight", [None, 2])
+class TestStreamItemsForAllRepos:
+
+    def test_parallelise_dictionary_streaming_called_once_correctly(
+            self, patch_get_items_for_all_repos_github: MagicMock, patch_get_items_for_repo: MagicMock,
+            patch_get_items_for_all_repos_partial: MagicMock,
+            patch_get_items_for_all_repo_parallelise_dictionary_streaming: MagicMock,
+            test_input_method_name: str, test_input_repositories: List[str], test_input_cpu_count: int,
+            test_input_max_in_flight: int
+    ) -> None:
+        """Test the `parallelise_dictionary_streaming` function is called once correctly."""
+
+        # Create a list of classes with a `full_name` attribute
+        test_input = TestGetItemsForAllRepos.create_list_of_classes_with_full_name(test_input_repositories)
+
+        # Execute the `stream_items_for_all_repos` function, and consume its output
+        _ = list(stream_items_for_all_repos(patch_get_items_for_all_repos_github, test_input_method_name, test_input,
+                                            test_input_cpu_count, test_input_max_in_flight))
+
+        # Assert that `functools.partial` is called once with the correct arguments
+        patch_get_items_for_all_repos_partial.assert_called_once_with(patch_get_items_for_repo,
+                                                                      patch_get_items_for_all_repos_github,
+                                                                      test_input_method_name, materialise=False)
+
+        # Assert that the `parallelise_dictionary_streaming` function is called once correctly, with the repository
+        # full names
+        patch_get_items_for_all_repo_parallelise_dictionary_streaming.assert_called_once()
+        test_args = patch_get_items_for_all_repo_parallelise_dictionary_streaming.call_args[0]
+        assert test_args[0] == patch_get_items_for_all_repos_partial.return_value
+        assert list(test_args[1]) == test_input_repositories
+        assert test_args[2:] == (test_input_cpu_count, test_input_max_in_flight, "thread", None, None)
+
+    def test_yields_correctly(self, patch_get_items_for_all_repos_github: MagicMock,
+                              patch_get_items_for_repo: MagicMock, patch_get_items_for_all_repos_partial: MagicMock,
+                              patch_get_items_for_all_repo_parallelise_dictionary_streaming: MagicMock,
+                              test_input_method_name: str, test_input_repositories: List[str],
+                              test_input_cpu_count: int, test_input_max_in_flight: int) -> None:
+        """Test the output of the function is as expected."""
+
+        # Set the return value of `patch_get_items_for_all_repo_parallelise_dictionary_streaming`
+        patch_get_items_for_all_repo_parallelise_dictionary_streaming.return_value = iter(
+            [(r, ["octocat"]) for r in test_input_repositories]
+        )
+
+        # Create a list of classes with a `full_name` attribute
+        test_input = TestGetItemsForAllRepos.create_list_of_classes_with_full_name(test_input_repositories)
+
+        # Execute the `stream_items_for_all_repos` function
+        test_output = stream_items_for_all_repos(patch_get_items_for_all_repos_github, test_input_method_name,
+                                                 test_input, test_input_cpu_count, test_input_max_in_flight)
+
+        # Assert the output is as expected
+        assert list(test_output) == [(r, ["octocat"]) for r in test_input_repositories]
+
+    def test_repositories_passed_directly_without_refetch(
+            self, patch_get_items_for_all_repos_github: MagicMock, patch_get_items_for_repo: MagicMock,
+            patch_get_items_for_all_repos_partial: MagicMock,
+            patch_get_items_for_all_repo_parallelise_dictionary_streaming: MagicMock,
+            test_input_method_name: str, test_input_repositories: List[str], test_input_cpu_count: int,
+            test_input_max_in_flight: int
+    ) -> None:
+        """Test the repository objects are passed lazily to `parallelise_dictionary_streaming` if not refetched."""
+
+        # Create a list of classes with a `full_name` attribute
+        test_input = TestGetItemsForAllRepos.create_list_of_classes_with_full_name(test_input_repositories)
+
+        # Execute the `stream_items_for_all_repos` function, and consume its output
+        _ = list(stream_items_for_all_repos(patch_get_items_for_all_repos_github, test_input_method_name, test_input,
+                                            test_input_cpu_count, test_input_max_in_flight,
+                                            refetch_repositories=False))
+
+        # Assert that the `parallelise_dictionary_streaming` function is called once with the repository objects
+        test_args = patch_get_items_for_all_repo_parallelise_dictionary_streaming.call_args[0]
+        assert list(test_args[1]) == test_input
+
+
+@pytest.mark.parametrize("test_input_refetch_repositories", [True, False])
+@pytest.mark.parametrize("test_input_container", [list, tuple])
+def test_get_repository_iterable_keeps_length(test_input_container: type, test_input_refetch_repositories: bool
+                                              ) -> None:
+    """Test repositories with a length are passed on with a length, and unchanged if not refetched."""
+    test_input = test_input_container(MagicMock(full_name=f"foo/{i}") for i in range(3))
+    test_output = get_repository_iterable(test_input, test_input_refetch_repositories)
+    if test_input_refetch_repositories:
+        assert test_output == ["foo/0", "foo/1", "foo/2"]
+    else:
+        assert test_output is test_input
+
+
+@pytest.mark.parametrize("test_input_refetch_repositories", [True, False])
+def test_get_repository_iterable_lazy_without_length(test_input_refetch_repositories: bool) -> None:
+    """Test repositories without a length are passed on lazily."""
+    test_input = [MagicMock(full_name=f"foo/{i}") for i in range(3)]
+    test_output = get_repository_iterable(iter(test_input), test_input_refetch_repositories)
+    assert not isinstance(test_output, list)
+    assert list(test_output) == ([r.full_name for r in test_input] if test_input_refetch_repositories else test_input)
@@ -0,0 +1,51 @@
+from conftest import StubGitHubServer
+from src.make_data.get_items_for_all_repos_async import get_items_for_all_repos_async
+from src.utils.async_github_session import AsyncGithubSession
+from typing import Any, Dict, List
+import asyncio
+import pytest
+
+# Define test cases for the `TestGetItemsForAllReposAsync` test class
+args_test_get_items_for_all_repos_async = [
+    ("get_contributors", "contributors", {"foo/hello": [{"login": "octocat"}], "foo/world": []}),
+    ("get_teams", "teams", {"foo/hello": [{"name": "admins"}, {"name": "devs"}], "foo/bar": None}),
+]
+
+
+async def get_items_for_all_repos(server: StubGitHubServer, method_name: str, repositories: List[Any],
+                                  concurrency: int) -> Dict[str, Any]:
+    """Execute the `get_items_for_all_repos_async` function against the stub GitHub server."""
+    async with AsyncGithubSession(base_url=server.base_url, concurrency=concurrency) as session:
+        return await get_items_for_all_repos_async(session, method_name, repositories)
+
+
+@pytest.mark.parametrize("test_input_method_name, test_input_endpoint, test_expected",
+                         args_test_get_items_for_all_repos_async)
+@pytest.mark.parametrize("test_input_concurrency", [1, 100])
+class TestGetItemsForAllReposAsync:
+
+    def test_returns_correctly(self, stub_github_server: StubGitHubServer, test_input_method_name: str,
+                               test_input_endpoint: str, test_expected: Dict[str, Any],
+                               test_input_concurrency: int) -> None:
+        """Test the function returns the items for each repository, and None for repositories that are not found."""
+
+        # Set canned responses for each repository that has items; all other repositories return 404 responses
+        for k, v in test_expected.items():
+            if v is not None:
+                stub_github_server.routes[f"/repos/{k}/{test_input_endpoint}?per_page=30"] = (200, {}, v)
+
+        # Execute the `get_items_for_all_repos_async` function with repositories as GitHub API responses, and assert
+        # the output is as expected
+        test_input_repositories = [{"full_name": k} for k in test_expected]
+        assert asyncio.run(get_items_for_all_repos(stub_github_server, test_input_method_name,
+                                                   test_input_repositories, test_input_concurrency)) == test_expected
+
+    def test_raises_value_error_for_unknown_method_name(self, stub_github_server: StubGitHubServer,
+                                                        test_input_method_name: str, test_input_endpoint: str,
+                                                        test_expected: Dict[str, Any],
+                                                        test_input_concurrency: int) -> None:
+        """Test a `ValueError` is raised for a method name without a known GitHub REST API endpoint."""
+        with pytest.raises(ValueError):
+            _ = asyncio.run(get_items_for_all_repos(stub_github_server, test_input_method_name.upper(),
+                                                    [{"full_name": k} for k in test_expected],
+                                                    test_input_concurrency))
@@ -1,5 +1,10 @@
-from src.make_data.get_items_for_repo import get_items_for_repo
+from github import UnknownObjectException
+from github.NamedUser import NamedUser
+from github.PaginatedList import PaginatedList
+from src.make_data.get_items_for_repo import get_items_for_repo, materialise_items
+from typing import Any
 from unittest.mock import MagicMock
+import logging
 import pytest
 
 # Define test cases for the `TestGetItemsForRepo` test class
@@ -36,3 +41,92 @@ class TestGetItemsForRepo:
 
         # Assert the return is as expected
         assert test_output == {test_input_repository_name: test_expected_value}
+
+    def test_repository_object_used_directly(self, patch_get_items_for_repo_github: MagicMock,
+                                             test_input_method_name: str, test_input_repository_name: str) -> None:
+        """Test a `github.Repository.Repository` object is used directly, without calling `github.Github.get_repo`."""
+
+        # Create a mock repository with a `full_name` attribute
+        test_input_repository = MagicMock(full_name=test_input_repository_name)
+
+        # Execute the `get_items_for_repo` function
+        test_output = get_items_for_repo(patch_get_items_for_repo_github, test_input_method_name,
+                                         test_input_repository)
+
+        # Assert the `github.Github.get_repo` method is not called, and the return is as expected
+        patch_get_items_for_repo_github.get_repo.assert_not_called()
+        assert test_output == {
+            test_input_repository_name: getattr(test_input_repository, test_input_method_name).return_value
+        }
+
+    def test_materialise_returns_correctly(self, patch_get_items_for_repo_github: MagicMock,
+                                           test_input_method_name: str, test_input_repository_name: str) -> None:
+        """Test the items are materialised if `materialise` is True."""
+
+        # Set the return value of `method_name` to a list of PyGithub objects
+        test_input_raw_data = [{"login": "hello"}, {"login": "world"}]
+        getattr(patch_get_items_for_repo_github.get_repo.return_value, test_input_method_name).return_value = [
+            NamedUser(MagicMock(), {}, d, completed=False) for d in test_input_raw_data
+        ]
+
+        # Execute the `get_items_for_repo` function, and assert the return is as expected
+        test_output = get_items_for_repo(patch_get_items_for_repo_github, test_input_method_name,
+                                         test_input_repository_name, materialise=True)
+        assert test_output == {test_input_repository_name: test_input_raw_data}
+
+    def test_materialise_unknownobjectexception_returns_none(self, patch_get_items_for_repo_github: MagicMock,
+                                                             test_input_method_name: str,
+                                                             test_input_repository_name: str) -> None:
+        """Test None is returned if an `UnknownObjectException` is raised whilst materialising the items."""
+        getattr(patch_get_items_for_repo_github.get_repo.return_value, test_input_method_name).side_effect = \
+            UnknownObjectException(404, "Not Found")
+        test_output = get_items_for_repo(patch_get_items_for_repo_github, test_input_method_name,
+                                         test_input_repository_name, materialise=True)
+        assert test_output == {test_input_repository_name: None}
+
+    def test_materialise_unknownobjectexception_not_logged_as_error(
+            self, caplog, patch_get_items_for_repo_github: MagicMock, test_input_method_name: str,
+            test_input_repository_name: str
+    ) -> None:
+        """Test a repository not found whilst paging through its items is not logged as an error."""
+
+        # Set the return value of `method_name` to an iterable raising an `UnknownObjectException` when paged through
+        test_items = MagicMock(spec=list)
+        test_items.__iter__.side_effect = UnknownObjectException(404, "Not Found")
+        getattr(patch_get_items_for_repo_github.get_repo.return_value, test_input_method_name).return_value = \
+            test_items
+
+        # Execute the `get_items_for_repo` function, and assert None is returned without logging an error
+        with caplog.at_level(logging.DEBUG):
+            test_output = get_items_for_repo(patch_get_items_for_repo_github, test_input_method_name,
+                                             test_input_repository_name, materialise=True)
+        assert test_output == {test_input_repository_name: None}
+        assert not [r for r in caplog.records if r.levelno >= logging.ERROR]
+
+
+class TestMaterialiseItems:
+
+    def test_paginated_list_fully_paged(self) -> None:
+        """Test all pages of a `github.PaginatedList.PaginatedList` object are requested, and converted to dicts."""
+
+        # Create a `github.PaginatedList.PaginatedList` object with a mock requester returning two pages
+        test_input_requester = MagicMock(per_page=30)
+        test_input_requester.requestJsonAndCheck.side_effect = [
+            ({"link": '<https://api.github.com/hello?page=2>; rel="next"'}, [{"login": "hello"}]),
+            ({}, [{"login": "world"}])
+        ]
+        test_input = PaginatedList(NamedUser, test_input_requester, "https://api.github.com/hello", None)
+
+        # Execute the `materialise_items` function, and assert the return is as expected
+        assert materialise_items(test_input) == [{"login": "hello"}, {"login": "world"}]
+        assert test_input_requester.requestJsonAndCheck.call_count == 2
+
+    @pytest.mark.parametrize("test_input, test_expected", [
+        (NamedUser(MagicMock(), {}, {"login": "hello"}, completed=False), {"login": "hello"}),
+        (["hello", "world"], ["hello", "world"]),
+        ("hello", "hello"),
+        (None, None)
+    ])
+    def test_returns_correctly(self, test_input: Any, test_expected: Any) -> None:
+        """Test PyGithub objects are converted to dicts, and other values are returned unchanged."""
+        assert materialise_items(test_input) == test_expected
@@ -0,0 +1,207 @@
+from conftest import StubGitHubServer
+from github import Github
+from src.utils.github_connection import (
+    HTTPConnection,
+    HTTPSConnection,
+    add_connection_hook,
+    close_sessions,
+    get_session,
+    remove_connection_hook,
+    reserve_connections
+)
+from src.utils.parallelise_dictionary_processing import parallelise_processing
+from threading import Thread
+from typing import Any, Dict, Iterator, List
+from unittest.mock import MagicMock
+import multiprocessing as mp
+import pickle
+import pytest
+import src.utils.github_connection
+
+# Define test cases for the `TestThreadSafeConnection` test class
+args_test_thread_safe_connection = [
+    (HTTPConnection, "http", 80, "/hello", "/world"),
+    (HTTPSConnection, "https", 443, "/foo", "/bar")
+]
+
+
+@pytest.mark.parametrize("test_input_class, test_expected_protocol, test_expected_port, test_input_url, "
+                         "test_input_other_url", args_test_thread_safe_connection)
+class TestThreadSafeConnection:
+
+    def test_getresponse_uses_request_from_same_thread(self, test_input_class: type, test_expected_protocol: str,
+                                                       test_expected_port: int, test_input_url: str,
+                                                       test_input_other_url: str) -> None:
+        """Test `getresponse` sends the request stored by the same thread, even if another thread stores a request."""
+
+        # Create a connection with a patched session
+        test_connection = test_input_class("api.github.com")
+        test_connection.session = MagicMock()
+
+        # Store a request in this thread, then store another request in a separate thread
+        test_connection.request("GET", test_input_url, None, {})
+        test_thread = Thread(target=test_connection.request, args=("GET", test_input_other_url, None, {}))
+        test_thread.start()
+        test_thread.join()
+
+        # Send the request for this thread
+        _ = test_connection.getresponse()
+
+        # Assert the session sends the request stored by this thread
+        test_connection.session.get.assert_called_once_with(
+            f"{test_expected_protocol}://api.github.com:{test_expected_port}{test_input_url}", headers={}, data=None,
+            timeout=None, verify=True, allow_redirects=False
+        )
+
+
+@pytest.mark.parametrize("test_input_class", [HTTPConnection, HTTPSConnection])
+def test_connection_can_be_pickled(test_input_class: type) -> None:
+    """Test connections can be pickled with a stored request, for example to pass to worker processes."""
+
+    # Create a connection, store a request, and pickle, and unpickle it
+    test_connection = test_input_class("api.github.com")
+    test_connection.request("GET", "/hello", None, {})
+    test_output = pickle.loads(pickle.dumps(test_connection))
+
+    # Assert the connection is restored without the stored request
+    assert test_output.host == "api.github.com"
+    assert not hasattr(test_output._local, "request")
+
+
+@pytest.mark.parametrize("test_input_base_url, test_expected", [("https://api.github.com", HTTPSConnection),
+                                                                ("http://localhost", HTTPConnection)])
+def test_github_uses_thread_safe_connection(test_input_base_url: str, test_expected: type) -> None:
+    """Test `github.Github` objects are created with the thread-safe connection classes."""
+    test_requester = Github(base_url=test_input_base_url)._Github__requester
+    assert test_requester._Requester__connectionClass == test_expected
+
+
+@pytest.mark.parametrize("test_input_base_url", ["https://api.github.com", "http://localhost"])
+def test_github_reuses_connection(test_input_base_url: str) -> None:
+    """Test `github.Github` objects re-use one connection, and its session, for every request."""
+    test_requester = Github(base_url=test_input_base_url)._Github__requester
+    assert test_requester._Requester__createConnection() is test_requester._Requester__createConnection()
+
+
+class ExampleHook:
+
+    def __init__(self, name: str, calls: List[str], response: Any = None) -> None:
+        """Example connection hook that records its calls, and optionally returns a response before a request."""
+        self.name = name
+        self.calls = calls
+        self.response = response
+
+    def before_request(self, verb: str, url: str, headers: Dict[str, str]) -> Any:
+        self.calls.append(f"{self.name}.before_request {verb} {url}")
+        return self.response
+
+    def after_response(self, verb: str, url: str, headers: Dict[str, str], response: Any) -> Any:
+        self.calls.append(f"{self.name}.after_response {verb} {url} {response.status}")
+        return response
+
+
+@pytest.fixture
+def example_hooks() -> Iterator[List[str]]:
+    """Add two example connection hooks for the duration of a test, and return a list of their calls."""
+    calls = []
+    hooks = [ExampleHook("first", calls), ExampleHook("second", calls)]
+    for hook in hooks:
+        add_connection_hook(hook)
+    yield calls
+    for hook in hooks:
+        remove_connection_hook(hook)
+
+
+class TestConnectionHooks:
+
+    def test_hooks_called_in_order(self, stub_github_server: StubGitHubServer, example_hooks: List[str]) -> None:
+        """Test connection hooks are called in order around each request sent by a `github.Github` object."""
+
+        # Set a canned response, and get the organisation
+        stub_github_server.routes["/orgs/foo"] = (200, {}, {"login": "foo"})
+        _ = Github(base_url=stub_github_server.base_url).get_organization("foo")
+
+        # Assert the hooks are called in order, with the absolute URL of the request
+        test_url = f"{stub_github_server.base_url}/orgs/foo"
+        assert example_hooks == [
+            f"first.before_request GET {test_url}", f"second.before_request GET {test_url}",
+            f"first.after_response GET {test_url} 200", f"second.after_response GET {test_url} 200"
+        ]
+
+    def test_hook_response_used_instead_of_request(self, stub_github_server: StubGitHubServer,
+                                                   example_hooks: List[str]) -> None:
+        """Test no request is sent if a hook returns a response, and later hooks' `before_request` are not called."""
+
+        # Add a hook at the start that returns a response
+        test_response = MagicMock(status=200, headers={}, getheaders=lambda: [], read=lambda: '{"login": "bar"}')
+        test_hook = ExampleHook("zeroth", example_hooks, test_response)
+        add_connection_hook(test_hook, 0)
+
+        # Get the organisation, and remove the hook
+        try:
+            test_output = Github(base_url=stub_github_server.base_url).get_organization("foo")
+        finally:
+            remove_connection_hook(test_hook)
+
+        # Assert the response from the hook is used, no request is sent, and only `after_response` hooks are called
+        assert test_output.login == "bar"
+        assert stub_github_server.requests == []
+        test_url = f"{stub_github_server.base_url}/orgs/foo"
+        assert example_hooks == [
+            f"zeroth.before_request GET {test_url}", f"zeroth.after_response GET {test_url} 200",
+            f"first.after_response GET {test_url} 200", f"second.after_response GET {test_url} 200"
+        ]
+
+
+def count_sessions(_: Any) -> int:
+    """Count the sessions of the current process."""
+    return len(src.utils.github_connection._sessions)
+
+
+class TestSessions:
+
+    @pytest.mark.parametrize("test_input_github_count", [1, 2, 3])
+    @pytest.mark.parametrize("test_input_request_count", [1, 5])
+    def test_connection_kept_alive(self, stub_github_server: StubGitHubServer, test_input_github_count: int,
+                                   test_input_request_count: int) -> None:
+        """Test every request, from every `github.Github` object, re-uses one keep-alive connection."""
+        stub_github_server.routes["/orgs/foo"] = (200, {}, {"login": "foo"})
+        for _ in range(test_input_github_count):
+            test_github = Github(base_url=stub_github_server.base_url)
+            for _ in range(test_input_request_count):
+                _ = test_github.get_organization("foo")
+        assert len(stub_github_server.requests) == test_input_github_count * test_input_request_count
+        assert stub_github_server.connections == 1
+
+    @pytest.mark.parametrize("test_input_cpu_count", [2, 16])
+    def test_one_connection_per_thread(self, stub_github_server: StubGitHubServer, test_input_cpu_count: int) -> None:
+        """Test each thread keeps one connection between calls, even with more threads than the default pool size."""
+        stub_github_server.routes["/orgs/foo"] = (200, {}, {"login": "foo"})
+        stub_github_server.latency = 0.01
+        test_github = Github(base_url=stub_github_server.base_url)
+        for _ in range(2):
+            _ = parallelise_processing(lambda _: test_github.get_organization("foo").login, range(50),
+                                       test_input_cpu_count, 1)
+        assert len(stub_github_server.requests) == 100
+        assert stub_github_server.connections <= test_input_cpu_count
+
+    def test_reserve_connections_resizes_existing_sessions(self) -> None:
+        """Test `reserve_connections` raises the pool size of sessions that already exist."""
+        test_session = get_session("https", "example.com", 443)
+        reserve_connections(64)
+        assert test_session.get_adapter("https://").poolmanager.connection_pool_kw["maxsize"] >= 64
+        assert get_session("https", "example.com", 443) is test_session
+
+    def test_sessions_not_shared_with_forked_processes(self) -> None:
+        """Test forked worker processes start without the sessions of the parent process."""
+        _ = get_session("https", "example.com", 443)
+        with mp.get_context("fork").Pool(1) as test_pool:
+            assert test_pool.map(count_sessions, [None]) == [0]
+        assert count_sessions(None) > 0
+
+    def test_close_sessions(self) -> None:
+        """Test `close_sessions` closes all sessions, and a new session is created on the next request."""
+        test_session = get_session("https", "example.com", 443)
+        close_sessions()
+        assert count_sessions(None) == 0
+        assert get_session("https", "example.com", 443) is not test_session
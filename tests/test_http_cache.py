@@ -0,0 +1,213 @@
+from conftest import StubGitHubServer
+from github import Github
+from src.utils.async_github_session import AsyncGithubSession
+from src.utils.github_connection import add_connection_hook, remove_connection_hook
+from src.utils.http_cache import CachedResponse, HTTPCache
+from src.utils.rate_limiter import RateLimiter
+from typing import Any, Dict, Iterator, Optional
+from unittest.mock import MagicMock
+import asyncio
+import os
+import pytest
+import time
+
+
+@pytest.fixture
+def example_cache(tmpdir) -> HTTPCache:
+    """Create a `HTTPCache` object in a temporary directory."""
+    return HTTPCache(os.path.join(tmpdir, "http_cache.sqlite"))
+
+
+@pytest.fixture
+def example_cache_hook(example_cache: HTTPCache) -> Iterator[HTTPCache]:
+    """Add a `HTTPCache` object as the first connection hook for the duration of a test."""
+    add_connection_hook(example_cache, 0)
+    yield example_cache
+    remove_connection_hook(example_cache)
+
+
+def get_organisation_login(server: StubGitHubServer) -> str:
+    """Get the login of the 'foo' organisation with a `github.Github` object from the stub GitHub server."""
+    return Github("hello", base_url=server.base_url).get_organization("foo").login
+
+
+async def request_json(server: StubGitHubServer, url: str, cache: HTTPCache) -> Any:
+    """Send a request with `AsyncGithubSession.request_json`, and a cache, to the stub GitHub server."""
+    async with AsyncGithubSession("hello", base_url=server.base_url, cache=cache) as session:
+        return await session.request_json(url, {"type": "all"})
+
+
+# Define test cases for the `TestHTTPCacheHooks` test class
+args_test_http_cache_hooks = [
+    ({"ETag": '"abc"'}, "If-None-Match", '"abc"'),
+    ({"Last-Modified": "Mon, 01 Feb 2021 00:00:00 GMT"}, "If-Modified-Since", "Mon, 01 Feb 2021 00:00:00 GMT"),
+]
+
+
+@pytest.mark.parametrize("test_input_headers, test_expected_header, test_expected_value", args_test_http_cache_hooks)
+class TestHTTPCacheHooks:
+
+    def test_revalidates_with_conditional_request(self, stub_github_server: StubGitHubServer,
+                                                  example_cache_hook: HTTPCache, test_input_headers: Dict[str, str],
+                                                  test_expected_header: str, test_expected_value: str) -> None:
+        """Test cached responses are revalidated with a conditional request, and used if unchanged."""
+
+        # Get the organisation, then change the canned response to `304 Not Modified`, and get it again
+        stub_github_server.routes["/orgs/foo"] = (200, test_input_headers, {"login": "foo"})
+        assert get_organisation_login(stub_github_server) == "foo"
+        stub_github_server.routes["/orgs/foo"] = (304, {}, None)
+        assert get_organisation_login(stub_github_server) == "foo"
+
+        # Assert the first request is unconditional, and the second is conditional on the cached response
+        assert test_expected_header not in stub_github_server.requests[0][2]
+        assert stub_github_server.requests[1][2][test_expected_header] == test_expected_value
+
+    def test_ttl_uses_cached_response_without_request(self, stub_github_server: StubGitHubServer,
+                                                      example_cache_hook: HTTPCache,
+                                                      test_input_headers: Dict[str, str], test_expected_header: str,
+                                                      test_expected_value: str) -> None:
+        """Test cached responses within their TTL are used without sending a request."""
+        example_cache_hook.ttl = 60.0
+        stub_github_server.routes["/orgs/foo"] = (200, test_input_headers, {"login": "foo"})
+        assert [get_organisation_login(stub_github_server) for _ in range(3)] == ["foo"] * 3
+        assert len(stub_github_server.requests) == 1
+
+    def test_async_github_session_revalidates(self, stub_github_server: StubGitHubServer, example_cache: HTTPCache,
+                                              test_input_headers: Dict[str, str], test_expected_header: str,
+                                              test_expected_value: str) -> None:
+        """Test `AsyncGithubSession` objects revalidate cached responses with a conditional request."""
+
+        # Request the repositories, then change the canned response to `304 Not Modified`, and request them again
+        stub_github_server.routes["/orgs/foo/repos?type=all"] = (200, test_input_headers, [{"name": "bar"}])
+        _, test_first = asyncio.run(request_json(stub_github_server, "/orgs/foo/repos", example_cache))
+        stub_github_server.routes["/orgs/foo/repos?type=all"] = (304, {}, None)
+        _, test_second = asyncio.run(request_json(stub_github_server, "/orgs/foo/repos", example_cache))
+
+        # Assert both responses are the same, and the second request is conditional on the cached response
+        assert test_first == test_second == [{"name": "bar"}]
+        assert stub_github_server.requests[1][2][test_expected_header] == test_expected_value
+
+
+class TestHTTPCache:
+
+    @pytest.mark.parametrize("test_input_status, test_input_headers", [(200, {}), (404, {"ETag": '"abc"'})])
+    def test_store_skips_uncacheable_responses(self, example_cache: HTTPCache, test_input_status: int,
+                                               test_input_headers: Dict[str, str]) -> None:
+        """Test responses are only stored if successful, and with an `ETag` or `Last-Modified` header."""
+        example_cache.store("/orgs/foo", {}, test_input_status, test_input_headers, "{}")
+        assert example_cache.get(example_cache.key("/orgs/foo", {})) is None
+
+    @pytest.mark.parametrize("test_input_authorization", ["token hello", "token world"])
+    def test_key_separates_credentials(self, example_cache: HTTPCache, test_input_authorization: str) -> None:
+        """Test responses to requests with different credentials are cached separately."""
+        example_cache.store("/orgs/foo", {"Authorization": "token foo"}, 200, {"ETag": '"abc"'}, "{}")
+        assert example_cache.lookup("/orgs/foo", {"Authorization": test_input_authorization}) is None
+
+    @pytest.mark.parametrize("test_input_url, test_expected_hit", [
+        ("https://api.github.com/orgs/foo", True), ("https://api.github.com:443/orgs/foo", True),
+        ("https://github.example.com/api/v3/orgs/foo", False), ("http://api.github.com/orgs/foo", False),
+        ("https://api.github.com:8443/orgs/foo", False),
+    ])
+    def test_key_separates_hosts(self, example_cache: HTTPCache, test_input_url: str,
+                                 test_expected_hit: bool) -> None:
+        """Test responses from different protocols, hosts, or ports are cached separately."""
+        example_cache.ttl = 60.0
+        example_cache.store("https://api.github.com/orgs/foo", {}, 200, {"ETag": '"abc"'}, "{}")
+        assert (example_cache.lookup(test_input_url, {}) is not None) == test_expected_hit
+
+    def test_size_in_bytes(self, example_cache: HTTPCache) -> None:
+        """Test the size of a cached response is the number of bytes of its encoded body, not its characters."""
+        example_cache.store("/orgs/foo", {}, 200, {"ETag": '"abc"'}, '{"name": "héllo ✓"}')
+        assert example_cache._connection.execute("SELECT size FROM responses").fetchone()[0] == 22
+
+    @pytest.mark.parametrize("test_input_path, test_expected", [
+        ("/orgs/foo/repos", 60.0), ("/repos/foo/bar/teams", 3600.0), ("/repos/foo/bar", 0.0)
+    ])
+    def test_get_ttl_uses_overrides(self, tmpdir, test_input_path: str, test_expected: float) -> None:
+        """Test the TTL of the first matching override is used, otherwise the default TTL."""
+        test_cache = HTTPCache(os.path.join(tmpdir, "http_cache.sqlite"), ttl_overrides={
+            r"/orgs/[^/]+/repos": 60.0, r"/repos/[^/]+/[^/]+/teams": 3600.0
+        })
+        assert test_cache.get_ttl(test_input_path) == test_expected
+
+    @pytest.mark.parametrize("test_input_age, test_expected_hit", [(10.0, True), (120.0, False)])
+    def test_lookup_uses_ttl(self, example_cache: HTTPCache, test_input_age: float, test_expected_hit: bool) -> None:
+        """Test cached responses are only used without a request within their TTL, otherwise made conditional."""
+
+        # Store a response, and age it by `test_input_age` seconds
+        example_cache.ttl = 60.0
+        example_cache.store("/orgs/foo", {}, 200, {"ETag": '"abc"'}, '{"login": "foo"}')
+        example_cache._connection.execute("UPDATE responses SET stored_at = stored_at - ?", (test_input_age,))
+
+        # Look up the response, and assert it is used, or the request made conditional
+        test_headers = {}
+        test_output = example_cache.lookup("/orgs/foo", test_headers)
+        if test_expected_hit:
+            assert isinstance(test_output, CachedResponse) and test_output.from_cache
+            assert test_output.read() == '{"login": "foo"}'
+            assert test_headers == {}
+        else:
+            assert test_output is None
+            assert test_headers == {"If-None-Match": '"abc"'}
+
+    def test_store_304_merges_headers(self, example_cache: HTTPCache) -> None:
+        """Test a `304 Not Modified` response returns the cached response, with updated rate limit headers."""
+        example_cache.store("/orgs/foo", {}, 200, {"ETag": '"abc"', "X-RateLimit-Remaining": "10",
+                                                   "Content-Type": "application/json"}, "{}")
+        test_output = example_cache.store("/orgs/foo", {"If-None-Match": '"abc"'}, 304,
+                                          {"X-RateLimit-Remaining": "9", "Content-Type": "text/plain"}, "")
+        assert test_output.status == 200 and not test_output.from_cache
+        assert test_output.headers["x-ratelimit-remaining"] == "9"
+        assert test_output.headers["content-type"] == "application/json"
+        assert test_output.read() == "{}"
+
+    def test_evict_removes_old_responses(self, example_cache: HTTPCache) -> None:
+        """Test responses older than `max_age` are evicted."""
+        example_cache.max_age = 60.0
+        for url in ["/old", "/new"]:
+            example_cache.store(url, {}, 200, {"ETag": '"abc"'}, "{}")
+        example_cache._connection.execute("UPDATE responses SET stored_at = stored_at - 120 WHERE url = '/old'")
+        example_cache.evict()
+        assert example_cache.get(example_cache.key("/old", {})) is None
+        assert example_cache.get(example_cache.key("/new", {})) is not None
+
+    def test_evict_removes_least_recently_used(self, example_cache: HTTPCache) -> None:
+        """Test the least recently used responses are evicted once the cache exceeds `max_size_bytes`."""
+
+        # Store three 10-byte responses in a cache with space for two, and access the first, so the second is the
+        # least recently used
+        example_cache.max_size_bytes = 20
+        for url in ["/a", "/b", "/c"]:
+            example_cache.store(url, {}, 200, {"ETag": '"abc"'}, "x" * 10)
+            time.sleep(0.01)
+        _ = example_cache.get(example_cache.key("/a", {}))
+        example_cache.evict()
+
+        # Assert only the second response is evicted
+        assert [example_cache.get(example_cache.key(u, {})) is not None for u in ["/a", "/b", "/c"]] == [
+            True, False, True
+        ]
+
+    @pytest.mark.parametrize("test_input_verb", ["PUT", "POST"])
+    def test_hooks_ignore_write_requests(self, example_cache: HTTPCache, test_input_verb: str) -> None:
+        """Test requests that change data are neither cached, nor made conditional."""
+        example_cache.store("/orgs/foo", {}, 200, {"ETag": '"abc"'}, "{}")
+        test_headers = {}
+        test_response = MagicMock()
+        assert example_cache.before_request(test_input_verb, "/orgs/foo", test_headers) is None
+        assert example_cache.after_response(test_input_verb, "/orgs/foo", test_headers, test_response) is test_response
+        assert test_headers == {}
+
+
+@pytest.mark.parametrize("test_input_from_cache, test_expected_remaining", [(True, None), (False, "0")])
+def test_rate_limiter_ignores_cached_responses(test_input_from_cache: bool,
+                                               test_expected_remaining: Optional[str]) -> None:
+    """Test `RateLimiter` objects only update their pacing from responses that were not used from a cache."""
+    test_limiter = RateLimiter()
+    test_limiter.update = MagicMock()
+    test_response = CachedResponse(200, {"X-RateLimit-Remaining": "0"}, "{}", test_input_from_cache)
+    assert test_limiter.after_response("GET", "/orgs/foo", {}, test_response) is test_response
+    if test_expected_remaining is None:
+        test_limiter.update.assert_not_called()
+    else:
+        test_limiter.update.assert_called_once_with(200, {"x-ratelimit-remaining": test_expected_remaining})
@@ -0,0 +1,51 @@
+from src.utils.journal import Journal
+from typing import Any, Dict
+import os
+import pytest
+
+# Define test cases for the `TestJournal` test class
+args_test_journal = [
+    {},
+    {"foo/a": [{"login": "hello"}]},
+    {"foo/a": [{"login": "hello"}], "foo/b": None, "foo/c": "push"},
+]
+
+
+@pytest.mark.parametrize("test_input_entries", args_test_journal)
+@pytest.mark.parametrize("test_input_fsync", [True, False])
+class TestJournal:
+
+    def test_entries_replayed(self, tmpdir, test_input_entries: Dict[str, Any], test_input_fsync: bool) -> None:
+        """Test recorded entries are replayed, in order, by a new `Journal` object of the same file."""
+        test_path = os.path.join(tmpdir, "journal.jsonl")
+        with Journal(test_path, test_input_fsync) as test_journal:
+            for k, v in test_input_entries.items():
+                test_journal.record(k, v)
+        assert list(Journal(test_path).items()) == list(test_input_entries.items())
+
+    def test_entries_written_immediately(self, tmpdir, test_input_entries: Dict[str, Any],
+                                         test_input_fsync: bool) -> None:
+        """Test each entry is written to the file as soon as it is recorded, before the journal is closed."""
+        test_path = os.path.join(tmpdir, "journal.jsonl")
+        test_journal = Journal(test_path, test_input_fsync)
+        for i, (k, v) in enumerate(test_input_entries.items()):
+            test_journal.record(k, v)
+            assert len(Journal(test_path)) == i + 1
+        test_journal.close()
+
+    def test_half_written_line_discarded(self, tmpdir, test_input_entries: Dict[str, Any],
+                                         test_input_fsync: bool) -> None:
+        """Test a line half-written by a crash is discarded, and new entries are appended cleanly after it."""
+
+        # Record the entries, then append half a line, as if the process died whilst writing
+        test_path = os.path.join(tmpdir, "journal.jsonl")
+        with Journal(test_path, test_input_fsync) as test_journal:
+            for k, v in test_input_entries.items():
+                test_journal.record(k, v)
+        with open(test_path, "a") as f:
+            f.write('{"key": "foo/z", "val')
+
+        # Record another entry, and assert only the complete entries are replayed
+        with Journal(test_path, test_input_fsync) as test_journal:
+            test_journal.record("foo/y", 1)
+        assert dict(Journal(test_path)) == {**test_input_entries, "foo/y": 1}
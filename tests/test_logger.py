@@ -1,11 +1,24 @@
 from py.path import local
-from src.utils.logger import Log, create_logger
-from typing import Dict, Union
+from src.utils.logger import (
+    Log,
+    _BatchFileHandler,
+    _ProcessQueueHandler,
+    _is_handled,
+    create_logger,
+    get_current_function
+)
+from src.utils.metrics import MetricsRegistry
+from threading import Thread
+from typing import Any, Dict, List, Tuple, Union
 from unittest.mock import MagicMock
+import asyncio
 import logging
+import math
+import multiprocessing as mp
 import os
 import pytest
 import re
+import time
 
 # Define the expected logging format for the `create_logger` function
 EXPECTED_LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s: %(message)s"
@@ -220,6 +233,128 @@ class TestCreateLogger:
         assert test_output == patch_logging_getlogger.return_value
 
 
+def log_from_worker(args: Tuple[str, Any]) -> None:
+    """Log a numbered message with a named logger, for example from a worker process."""
+    name, i = args
+    logging.getLogger(name).info(f"worker message {i}")
+
+
+def log_forever(name: str) -> None:
+    """Log messages with a named logger until the process is terminated, for example from a worker process."""
+    while True:
+        logging.getLogger(name).info("worker message")
+
+
+def stop_listeners(log: logging.Logger) -> None:
+    """Stop the queue listeners of a logger created with `use_queue`, so all its records are written."""
+    for handler in log.handlers:
+        for listener in handler.listeners:
+            listener.stop()
+
+
+class TestCreateLoggerQueue:
+    """Test the `create_logger` function with `use_queue`."""
+
+    def test_only_queue_handler_added(self, example_queue_log_file: Dict[str, Union[logging.Logger, str]]) -> None:
+        """Test only a queue handler is added to the log, which only queues records written by a handler."""
+        test_handlers = example_queue_log_file["logger"].handlers
+        assert len(test_handlers) == 1
+        assert isinstance(test_handlers[0], _ProcessQueueHandler)
+        assert test_handlers[0].level == logging.INFO
+
+    def test_log_output(self, example_queue_log_file: Dict[str, Union[logging.Logger, str]]) -> None:
+        """Test records at, or above the handler levels are written to the log file in the expected format."""
+
+        # Log messages at different levels, and stop the listeners
+        example_queue_log_file["logger"].debug("`hello`: debug")
+        example_queue_log_file["logger"].info("`hello`: info")
+        example_queue_log_file["logger"].warning("`hello`: warning")
+        stop_listeners(example_queue_log_file["logger"])
+
+        # Define the base regular expression pattern of each expected message
+        test_expected = [EXPECTED_LOG_MESSAGE_BASE.format(name=example_queue_log_file["logger"].name, level=L.upper(),
+                                                          function="hello") + f" {L}" for L in ["info", "warning"]]
+
+        # Assert only the expected messages are written
+        with open(example_queue_log_file["path"], "r") as f:
+            test_output = f.read().splitlines()
+        assert len(test_output) == len(test_expected)
+        assert all(re.fullmatch(e, o) for e, o in zip(test_expected, test_output))
+
+    @pytest.mark.parametrize("test_input_executor", ["thread", "process"])
+    @pytest.mark.parametrize("test_input_messages", [1, 200])
+    def test_concurrent_messages_written_intact(self, example_queue_log_file: Dict[str, Union[logging.Logger, str]],
+                                                test_input_executor: str, test_input_messages: int) -> None:
+        """Test messages logged concurrently by threads, or forked worker processes, are all written, one per line."""
+
+        # Log numbered messages from threads, or forked worker processes, and stop the listeners
+        test_input_args = [(example_queue_log_file["logger"].name, i) for i in range(test_input_messages)]
+        if test_input_executor == "process":
+            with mp.get_context("fork").Pool(4) as test_pool:
+                test_pool.map(log_from_worker, test_input_args, chunksize=1)
+        else:
+            test_threads = [Thread(target=log_from_worker, args=(a,)) for a in test_input_args]
+            for t in test_threads:
+                t.start()
+            for t in test_threads:
+                t.join()
+        stop_listeners(example_queue_log_file["logger"])
+
+        # Assert every message is written intact on its own line
+        with open(example_queue_log_file["path"], "r") as f:
+            test_output = f.read().splitlines()
+        test_pattern = re.compile(r".* - INFO: worker message (\d+)")
+        assert sorted(int(test_pattern.fullmatch(o).group(1)) for o in test_output) == [*range(test_input_messages)]
+
+    def test_large_messages_truncated(self, example_queue_log_file: Dict[str, Union[logging.Logger, str]]) -> None:
+        """Test a message of a forked worker process too large for the process queue is truncated, not lost."""
+
+        # Log a large message from a forked worker process, and stop the listeners
+        test_input_args = (example_queue_log_file["logger"].name, "x" * 10000)
+        with mp.get_context("fork").Pool(1) as test_pool:
+            test_pool.map(log_from_worker, [test_input_args])
+        stop_listeners(example_queue_log_file["logger"])
+
+        # Assert the message is written truncated
+        with open(example_queue_log_file["path"], "r") as f:
+            test_output = f.read().splitlines()
+        assert len(test_output) == 1
+        assert test_output[0].endswith(" [truncated]") and len(test_output[0]) < 10000
+
+    def test_logging_continues_after_workers_terminated(
+            self, example_queue_log_file: Dict[str, Union[logging.Logger, str]]
+    ) -> None:
+        """Test worker processes terminated whilst logging stop neither later workers logging, nor the listeners."""
+        test_name = example_queue_log_file["logger"].name
+
+        # Terminate forked worker processes whilst they are logging, then log from new worker processes, and stop the
+        # listeners in a thread
+        with mp.get_context("fork").Pool(2) as test_pool:
+            test_pool.map_async(log_forever, [test_name] * 2)
+            time.sleep(0.2)
+        with mp.get_context("fork").Pool(2) as test_pool:
+            test_pool.map(log_from_worker, [(test_name, -1)], chunksize=1)
+        test_thread = Thread(target=stop_listeners, args=(example_queue_log_file["logger"],))
+        test_thread.start()
+        test_thread.join(30)
+
+        # Assert the listeners stopped, and the message logged after the workers were terminated is written
+        assert not test_thread.is_alive()
+        with open(example_queue_log_file["path"], "r") as f:
+            assert f.read().splitlines()[-1].endswith("worker message -1")
+
+
+def test_batch_file_handler_flushes_in_batches(temporary_log_directory: local) -> None:
+    """Test the batch file handler only flushes records to the file when `flush_batch` is called."""
+    test_path = os.path.join(temporary_log_directory, "batch.log")
+    test_handler = _BatchFileHandler(test_path)
+    test_handler.handle(logging.makeLogRecord({"msg": "hello", "levelno": logging.INFO}))
+    assert os.path.getsize(test_path) == 0
+    test_handler.flush_batch()
+    assert os.path.getsize(test_path) > 0
+    test_handler.close()
+
+
 # Define test cases for test_input_level argument in the `TestLog` test class
 args_test_log_test_input_level = list(sum(
     [(L, L.lower()) for L in ["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"]],
@@ -241,14 +376,14 @@ class TestLog:
 
     @pytest.mark.parametrize("test_input_function_duration", range(1, 5))
     def test_log_messages_correct_for_no_exceptions(
-            self, patch_src_utils_logger_time: MagicMock,
+            self, patch_src_utils_logger_perf_counter: MagicMock,
             example_log_file: Dict[str, Union[logging.Logger, logging.RootLogger, str]], test_input_level: str,
             test_input_function_duration: int
     ) -> None:
         """Test the decorator creates the correct log messages, if the function it wraps raises no exceptions."""
 
-        # Set the `side_effect` of `patch_src_utils_logger_time`
-        patch_src_utils_logger_time.side_effect = [0, test_input_function_duration]
+        # Set the `side_effect` of `patch_src_utils_logger_perf_counter`
+        patch_src_utils_logger_perf_counter.side_effect = [0, test_input_function_duration]
 
         @Log(example_log_file["logger"], test_input_level)
         def example_function():
@@ -277,14 +412,14 @@ class TestLog:
 
     @pytest.mark.parametrize("test_input_function_duration", range(1, 5))
     def test_log_messages_correct_for_exceptions(
-            self, patch_src_utils_logger_time: MagicMock,
+            self, patch_src_utils_logger_perf_counter: MagicMock,
             example_log_file: Dict[str, Union[logging.Logger, logging.RootLogger, str]], test_input_level: str,
             test_input_function_duration: int
     ) -> None:
         """Test the decorator creates the correct log messages, if the function it wraps raises exceptions."""
 
-        # Set the `side_effect` of `patch_src_utils_logger_time`
-        patch_src_utils_logger_time.side_effect = [0, test_input_function_duration]
+        # Set the `side_effect` of `patch_src_utils_logger_perf_counter`
+        patch_src_utils_logger_perf_counter.side_effect = [0, test_input_function_duration]
 
         @Log(example_log_file["logger"], test_input_level)
         def example_function():
@@ -312,3 +447,189 @@ class TestLog:
                 assert re.match(test_expected_error_log_regex_pattern, f.read())
             else:
                 assert re.match(test_expected_entry_log_regex_pattern + test_expected_error_log_regex_pattern, f.read())
+
+    @pytest.mark.parametrize("test_input_function_duration", range(1, 5))
+    def test_log_messages_correct_for_coroutine_functions(
+            self, patch_src_utils_logger_perf_counter: MagicMock,
+            example_log_file: Dict[str, Union[logging.Logger, logging.RootLogger, str]], test_input_level: str,
+            test_input_function_duration: int
+    ) -> None:
+        """Test the decorator creates the correct log messages once a coroutine function it wraps is awaited."""
+
+        # Set the `side_effect` of `patch_src_utils_logger_perf_counter`
+        patch_src_utils_logger_perf_counter.side_effect = [0, test_input_function_duration]
+
+        @Log(example_log_file["logger"], test_input_level)
+        async def example_function():
+            """Example coroutine function that raises no errors."""
+            return "hello"
+
+        # Define the base regular expression pattern of the log message
+        log_base_pattern = EXPECTED_LOG_MESSAGE_BASE.format(name=example_log_file["logger"].name,
+                                                            level=test_input_level.upper(),
+                                                            function=example_function.__name__)
+
+        # Define the complete log message expected
+        test_expected_regex_pattern = fr"{log_base_pattern} Executing function\n{log_base_pattern} Executed in " \
+                                      fr"{test_input_function_duration:0.2f} s"
+
+        # Execute, and await the `example_function`, asserting its output is returned
+        assert asyncio.run(example_function()) == "hello"
+
+        # Open the log file, and assert the message is as expected. If level is DEBUG, assert the log is empty
+        with open(example_log_file["path"], "r") as f:
+            if test_input_level.upper() == "DEBUG":
+                assert f.read() == ""
+            else:
+                assert re.match(test_expected_regex_pattern, f.read())
+
+    def test_messages_not_formatted_unless_written(
+            self, mocker, example_log_file: Dict[str, Union[logging.Logger, logging.RootLogger, str]],
+            test_input_level: str
+    ) -> None:
+        """Test entry, and exit messages are only formatted if written; the handlers only write INFO, and above."""
+
+        # Patch the message formats, and stop messages reaching the handler pytest adds to the root logger
+        patch_msg_entry = mocker.patch.object(Log, "MSG_ENTRY")
+        patch_msg_exit = mocker.patch.object(Log, "MSG_EXIT")
+        mocker.patch.object(example_log_file["logger"], "propagate", False)
+
+        @Log(example_log_file["logger"], test_input_level, metrics_registry=MetricsRegistry())
+        def example_function():
+            """Example function that raises no errors."""
+            return "hello"
+
+        # Execute the `example_function`, and assert the messages are only formatted if the level is written
+        assert example_function() == "hello"
+        assert patch_msg_entry.format.called == (test_input_level.upper() != "DEBUG")
+        assert patch_msg_exit.format.called == (test_input_level.upper() != "DEBUG")
+
+    @pytest.mark.parametrize("test_input_calls", [1, 3])
+    def test_calls_recorded_in_metrics_registry(
+            self, example_log_file: Dict[str, Union[logging.Logger, logging.RootLogger, str]], test_input_level: str,
+            test_input_calls: int
+    ) -> None:
+        """Test every call is recorded in the metrics registry, whether or not its messages are written."""
+
+        # Create a metrics registry, and decorate a function that raises an error for every other call
+        test_registry = MetricsRegistry(enabled=True)
+
+        @Log(example_log_file["logger"], test_input_level, metrics_registry=test_registry)
+        def example_function(x: int) -> int:
+            """Example function that raises a ValueError for odd numbers."""
+            if x % 2:
+                raise ValueError("Testing for errors")
+            return x
+
+        # Execute the `example_function`
+        for x in range(test_input_calls):
+            try:
+                _ = example_function(x)
+            except ValueError:
+                pass
+
+        # Assert the calls, and exceptions are recorded
+        test_output = test_registry.get_metrics()["example_function"]
+        assert test_output["calls"] == test_input_calls
+        assert test_output["exceptions"] == test_input_calls // 2
+
+    def test_current_function_set_during_calls(
+            self, example_log_file: Dict[str, Union[logging.Logger, logging.RootLogger, str]], test_input_level: str
+    ) -> None:
+        """Test the current function is the innermost decorated function being executed, including coroutines."""
+
+        # Decorate a function, and a coroutine function, that call a nested decorated function
+        @Log(example_log_file["logger"], test_input_level, metrics_registry=MetricsRegistry())
+        def inner_function() -> str:
+            """Example function that gets the current function."""
+            return get_current_function()
+
+        @Log(example_log_file["logger"], test_input_level, metrics_registry=MetricsRegistry())
+        def outer_function() -> List[str]:
+            """Example function that gets the current function before, and after calling `inner_function`."""
+            return [get_current_function(), inner_function(), get_current_function()]
+
+        @Log(example_log_file["logger"], test_input_level, metrics_registry=MetricsRegistry())
+        async def outer_coroutine_function() -> List[str]:
+            """Example coroutine function that gets the current function before, and after calling `inner_function`."""
+            return [get_current_function(), inner_function(), get_current_function()]
+
+        # Assert the current function is as expected inside, and outside the functions
+        assert outer_function() == ["outer_function", "inner_function", "outer_function"]
+        assert asyncio.run(outer_coroutine_function()) == ["outer_coroutine_function", "inner_function",
+                                                           "outer_coroutine_function"]
+        assert get_current_function() is None
+
+
+@pytest.mark.parametrize("test_input_sample_every", [1, 2, 10])
+@pytest.mark.parametrize("test_input_calls", [1, 9, 25])
+class TestLogSampling:
+
+    def test_sampled_calls_logged(self, example_log_file: Dict[str, Union[logging.Logger, logging.RootLogger, str]],
+                                  test_input_sample_every: int, test_input_calls: int) -> None:
+        """Test only the first call, and every `sample_every` calls after it, are logged."""
+
+        @Log(example_log_file["logger"], sample_every=test_input_sample_every)
+        def example_function(x: int) -> int:
+            """Example function that raises no errors."""
+            return x
+
+        # Execute the `example_function`, and assert its outputs are returned
+        assert [example_function(x) for x in range(test_input_calls)] == [*range(test_input_calls)]
+
+        # Assert the expected number of calls are logged
+        with open(example_log_file["path"], "r") as f:
+            test_output = f.read()
+        assert test_output.count("Executing function") == math.ceil(test_input_calls / test_input_sample_every)
+        assert test_output.count("Executed in") == math.ceil(test_input_calls / test_input_sample_every)
+
+    def test_exceptions_always_logged(self, example_log_file: Dict[str, Union[logging.Logger, logging.RootLogger, str]],
+                                      test_input_sample_every: int, test_input_calls: int) -> None:
+        """Test exceptions are logged for every call, whether or not it is sampled."""
+
+        @Log(example_log_file["logger"], sample_every=test_input_sample_every)
+        def example_function():
+            """Example function that raises a ValueError."""
+            raise ValueError("Testing for errors")
+
+        # Execute the `example_function`, which should raise a `ValueError` each time
+        for _ in range(test_input_calls):
+            with pytest.raises(ValueError):
+                _ = example_function()
+
+        # Assert every exception is logged
+        with open(example_log_file["path"], "r") as f:
+            assert f.read().count("Raised an exception!") == test_input_calls
+
+
+# Define test cases for the `test_is_handled` test function; these are the logger level, handler levels, whether the
+# logger propagates to a parent with an INFO handler, the level of the message, and the expected output
+args_test_is_handled = [
+    (logging.DEBUG, [logging.INFO], False, logging.DEBUG, False),
+    (logging.DEBUG, [logging.INFO], False, logging.INFO, True),
+    (logging.DEBUG, [logging.INFO, logging.DEBUG], False, logging.DEBUG, True),
+    (logging.WARNING, [logging.DEBUG], False, logging.INFO, False),
+    (logging.DEBUG, [], True, logging.DEBUG, False),
+    (logging.DEBUG, [], True, logging.INFO, True),
+    (logging.DEBUG, [logging.ERROR], True, logging.INFO, True),
+    (logging.DEBUG, [], False, logging.INFO, False),
+    (logging.DEBUG, [], False, logging.WARNING, True),
+]
+
+
+@pytest.mark.parametrize("test_input_logger_level, test_input_handler_levels, test_input_propagate, test_input_level, "
+                         "test_expected", args_test_is_handled)
+def test_is_handled(test_input_logger_level: int, test_input_handler_levels: List[int], test_input_propagate: bool,
+                    test_input_level: int, test_expected: bool) -> None:
+    """Test `_is_handled` checks the levels of the logger, and the handlers that would receive the message."""
+
+    # Create a parent logger with an INFO handler, and a child logger with the required handlers
+    test_parent = logging.Logger("test_parent")
+    test_parent.addHandler(logging.NullHandler(logging.INFO))
+    test_logger = logging.Logger("test_parent.child", test_input_logger_level)
+    test_logger.parent = test_parent if test_input_propagate else None
+    for level in test_input_handler_levels:
+        test_logger.addHandler(logging.NullHandler(level))
+
+    # Assert the output is as expected
+    assert _is_handled(test_logger, test_input_level) == test_expected
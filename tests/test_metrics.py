@@ -0,0 +1,193 @@
+from conftest import StubGitHubServer
+from github import Github
+from src.utils.logger import Log
+from src.utils.metrics import LATENCY_BUCKETS, MetricsRegistry
+from src.utils.parallelise_dictionary_processing import parallelise_processing
+from src.utils.worker_pool import WorkerPool
+from threading import Thread
+from typing import List, Tuple
+import json
+import logging
+import multiprocessing as mp
+import pytest
+import re
+
+# Create a metrics registry, and enable it, before any worker processes are forked
+example_registry = MetricsRegistry(enabled=True)
+
+
+def record_example_function(args: Tuple[float, bool, int]) -> None:
+    """Record a call of `example_function` in `example_registry`, for example from a worker process."""
+    example_registry.record("example_function", *args)
+
+
+# Define test cases for the `TestMetricsRegistry` test class; these are lists of the duration, whether it raised an
+# exception, and the number of requests of each call
+args_test_metrics_registry = [
+    [(0.003, False, 1)],
+    [(0.003, False, 1), (0.2, True, 0), (7.0, False, 3)],
+    [(0.0001 * i, i % 10 == 0, i % 3) for i in range(1, 101)],
+]
+
+
+@pytest.mark.parametrize("test_input_calls", args_test_metrics_registry)
+class TestMetricsRegistry:
+
+    def test_get_metrics(self, test_input_calls: List[Tuple[float, bool, int]]) -> None:
+        """Test the calls, exceptions, requests, and durations of each call are aggregated."""
+
+        # Record the calls
+        test_registry = MetricsRegistry(enabled=True)
+        for c in test_input_calls:
+            test_registry.record("example_function", *c)
+
+        # Assert the metrics are as expected
+        test_output = test_registry.get_metrics()["example_function"]
+        assert test_output["calls"] == len(test_input_calls)
+        assert test_output["exceptions"] == sum(c[1] for c in test_input_calls)
+        assert test_output["http_requests"] == sum(c[2] for c in test_input_calls)
+        assert test_output["http_requests_per_call"] == pytest.approx(
+            test_output["http_requests"] / len(test_input_calls)
+        )
+        assert test_output["seconds_total"] == pytest.approx(sum(c[0] for c in test_input_calls))
+        assert test_output["p50"] <= test_output["p95"] <= test_output["p99"]
+
+    def test_aggregated_across_threads_and_processes(self, test_input_calls: List[Tuple[float, bool, int]]) -> None:
+        """Test calls recorded by threads, and forked worker processes, are aggregated in the parent process."""
+
+        # Record the calls in the threads, then in forked worker processes
+        example_registry.reset()
+        test_threads = [Thread(target=record_example_function, args=(c,)) for c in test_input_calls]
+        for t in test_threads:
+            t.start()
+        for t in test_threads:
+            t.join()
+        with mp.get_context("fork").Pool(3) as test_pool:
+            test_pool.map(record_example_function, test_input_calls, chunksize=1)
+            test_pool.close()
+            test_pool.join()
+
+        # Assert all the calls are recorded
+        test_output = example_registry.get_metrics()["example_function"]
+        assert test_output["calls"] == 2 * len(test_input_calls)
+        assert test_output["exceptions"] == 2 * sum(c[1] for c in test_input_calls)
+        assert test_output["http_requests"] == 2 * sum(c[2] for c in test_input_calls)
+
+    @pytest.mark.parametrize("test_input_worker_pool", [True, False])
+    def test_added_when_pool_finishes(self, test_input_calls: List[Tuple[float, bool, int]],
+                                      test_input_worker_pool: bool) -> None:
+        """Test calls recorded by worker processes are added once a pool, or a `WorkerPool` object finishes."""
+        example_registry.reset()
+        if test_input_worker_pool:
+            with WorkerPool(2, "process") as test_pool:
+                _ = parallelise_processing(record_example_function, test_input_calls, 2, 1, test_pool)
+        else:
+            _ = parallelise_processing(record_example_function, test_input_calls, 2, 1, "process")
+        assert example_registry.get_metrics()["example_function"]["calls"] == len(test_input_calls)
+
+    def test_to_json(self, test_input_calls: List[Tuple[float, bool, int]]) -> None:
+        """Test the metrics are exported as JSON."""
+        test_registry = MetricsRegistry(enabled=True)
+        for c in test_input_calls:
+            test_registry.record("example_function", *c)
+        assert json.loads(test_registry.to_json()) == test_registry.get_metrics()
+
+    def test_to_prometheus(self, test_input_calls: List[Tuple[float, bool, int]]) -> None:
+        """Test the metrics are exported in the Prometheus text format, with cumulative histogram buckets."""
+
+        # Record the calls, and export the metrics
+        test_registry = MetricsRegistry(enabled=True)
+        for c in test_input_calls:
+            test_registry.record("example_function", *c)
+        test_output = test_registry.to_prometheus()
+
+        # Get each sample as a dictionary of metric names, and labels, and values
+        test_samples = dict(re.findall(r"^(\w+(?:\{.*\})?) (\S+)$", test_output, flags=re.MULTILINE))
+
+        # Assert the counters, and histogram are as expected
+        assert test_samples['src_function_calls_total{function="example_function"}'] == str(len(test_input_calls))
+        assert test_samples['src_function_exceptions_total{function="example_function"}'] == \
+            str(sum(c[1] for c in test_input_calls))
+        assert test_samples['src_function_duration_seconds_bucket{function="example_function",le="+Inf"}'] == \
+            str(len(test_input_calls))
+        test_buckets = [int(test_samples[f'src_function_duration_seconds_bucket{{function="example_function",'
+                                         f'le="{b!r}"}}']) for b in LATENCY_BUCKETS]
+        assert test_buckets == [sum(c[0] <= b for c in test_input_calls) for b in LATENCY_BUCKETS]
+        assert "# TYPE src_function_duration_seconds histogram" in test_output
+
+    def test_reset(self, test_input_calls: List[Tuple[float, bool, int]]) -> None:
+        """Test resetting the registry removes all recorded calls."""
+        test_registry = MetricsRegistry(enabled=True)
+        for c in test_input_calls:
+            test_registry.record("example_function", *c)
+        test_registry.reset()
+        assert test_registry.get_metrics() == {}
+
+    @pytest.mark.parametrize("test_input_disable", [True, False])
+    def test_disabled(self, test_input_calls: List[Tuple[float, bool, int]], test_input_disable: bool) -> None:
+        """Test no calls are recorded if the registry is not enabled, which is the default, or is disabled."""
+        test_registry = MetricsRegistry(enabled=test_input_disable)
+        if test_input_disable:
+            test_registry.disable()
+        for c in test_input_calls:
+            test_registry.record("example_function", *c)
+        assert not test_registry.enabled
+        assert test_registry.get_metrics() == {}
+
+
+# Define test cases for the `test_percentiles_interpolated_within_buckets` test function; these are the duration of
+# every call, the percentile, and the expected estimate
+args_test_percentiles = [
+    (0.003, 50, 0.00375),
+    (0.003, 100, 0.005),
+    (0.0005, 50, 0.0005),
+    (2000.0, 99, 1000.0),
+]
+
+
+@pytest.mark.parametrize("test_input_seconds, test_input_percentile, test_expected", args_test_percentiles)
+def test_percentiles_interpolated_within_buckets(test_input_seconds: float, test_input_percentile: float,
+                                                 test_expected: float) -> None:
+    """Test percentiles are linearly interpolated within their bucket, or the last bound for the unbounded bucket."""
+    test_registry = MetricsRegistry(enabled=True)
+    for _ in range(100):
+        test_registry.record("example_function", test_input_seconds)
+    test_state = test_registry._get_states()["example_function"]
+    assert test_registry._get_percentile(test_state, test_input_percentile) == pytest.approx(test_expected)
+
+
+@pytest.mark.parametrize("test_input_requests", [0, 1, 3])
+def test_log_records_requests_per_call(stub_github_server: StubGitHubServer, test_input_requests: int) -> None:
+    """Test the `Log` decorator records the number of GitHub API requests sent during each call."""
+
+    # Set a canned response, and decorate a function that sends a number of requests
+    stub_github_server.routes["/orgs/foo"] = (200, {}, {"login": "foo"})
+    test_github = Github(base_url=stub_github_server.base_url)
+    test_registry = MetricsRegistry(enabled=True)
+
+    @Log(logging.getLogger("test_metrics"), "debug", metrics_registry=test_registry)
+    def example_function(n: int) -> None:
+        """Example function that gets an organisation `n` times."""
+        for _ in range(n):
+            _ = test_github.get_organization("foo")
+
+    # Execute the `example_function` twice, and assert the requests are recorded
+    example_function(test_input_requests)
+    example_function(test_input_requests)
+    assert test_registry.get_metrics()["example_function"]["http_requests"] == 2 * test_input_requests
+
+
+def test_log_records_nothing_unless_enabled() -> None:
+    """Test the `Log` decorator records nothing in a registry that is not enabled."""
+    test_registry = MetricsRegistry()
+
+    @Log(logging.getLogger("test_metrics"), "debug", metrics_registry=test_registry)
+    def example_function() -> None:
+        """Example function that does nothing."""
+
+    # Execute the `example_function` before, and after the registry is enabled, and assert only the latter is recorded
+    example_function()
+    assert test_registry.get_metrics() == {}
+    test_registry.enable()
+    example_function()
+    assert test_registry.get_metrics()["example_function"]["calls"] == 1
@@ -1,6 +1,17 @@
-from itertools import cycle, islice
-from src.utils.parallelise_dictionary_processing import parallelise_dictionary_processing, parallelise_processing
+from contextlib import nullcontext
+from itertools import count, cycle, islice
+from src.utils.journal import Journal
+from src.utils.parallelise_dictionary_processing import (
+    _adaptive_imap_unordered,
+    parallelise_dictionary_checkpointing,
+    parallelise_dictionary_processing,
+    parallelise_dictionary_streaming,
+    parallelise_processing
+)
+from threading import Event, Lock
+from time import sleep
 from typing import Callable, Dict
+import os
 from unittest.mock import MagicMock
 import pytest
 
@@ -24,7 +35,7 @@ class TestParalleliseProcessing:
 
         # Execute the `parallelise_processing` function
         _ = parallelise_processing(test_input_callable_function, test_input_iterable, test_input_cpu_count,
-                                   test_input_max_chunksize)
+                                   test_input_max_chunksize, "process")
 
         # Assert `multiprocessing.Pool` is called once with the correct arguments
         patch_multiprocessing_pool.assert_called_once_with(test_input_cpu_count)
@@ -42,7 +53,7 @@ class TestParalleliseProcessing:
 
         # Execute the `parallelise_processing` function
         _ = parallelise_processing(test_input_callable_function, test_input_iterable, test_input_cpu_count,
-                                   test_input_max_chunksize)
+                                   test_input_max_chunksize, "process")
 
         # Assert `multiprocessing.Pool.imap_unordered` is called with the correct arguments
         patch_multiprocessing_pool_enter_imap_unordered.assert_called_once_with(
@@ -61,11 +72,45 @@ class TestParalleliseProcessing:
 
         # Execute the `parallelise_processing` function
         test_output = parallelise_processing(test_input_callable_function, test_input_iterable, test_input_cpu_count,
-                                             test_input_max_chunksize)
+                                             test_input_max_chunksize, "process")
 
         # Assert the output is as expected
         assert test_output == [{r: ["octocat"]} for r in test_input_iterable]
 
+    def test_thread_pool_called_once_correctly(self, patch_thread_pool: MagicMock,
+                                               patch_multiprocessing_pool: MagicMock,
+                                               test_input_callable_function: Callable, test_input_iterable: iter,
+                                               test_input_cpu_count: int, test_input_max_chunksize: int) -> None:
+        """Test `multiprocessing.pool.ThreadPool` is called once by default instead of `multiprocessing.Pool`."""
+
+        # Execute the `parallelise_processing` function
+        _ = parallelise_processing(test_input_callable_function, test_input_iterable, test_input_cpu_count,
+                                   test_input_max_chunksize)
+
+        # Assert `multiprocessing.pool.ThreadPool` is called once with the correct arguments, and `multiprocessing.Pool`
+        # is not called
+        patch_thread_pool.assert_called_once_with(test_input_cpu_count)
+        assert not patch_multiprocessing_pool.called
+
+    def test_thread_pool_returns_correctly(self, test_input_callable_function: Callable, test_input_iterable: iter,
+                                           test_input_cpu_count: int, test_input_max_chunksize: int) -> None:
+        """Test the output of the function is as expected using an unpatched thread pool."""
+
+        # Execute the `parallelise_processing` function
+        test_output = parallelise_processing(test_input_callable_function, test_input_iterable, test_input_cpu_count,
+                                             test_input_max_chunksize, "thread")
+
+        # Assert the output is as expected, ignoring the order of the outputs
+        assert sorted(test_output, key=str) == sorted(map(test_input_callable_function, test_input_iterable), key=str)
+
+    def test_raises_value_error_for_unknown_executor(self, test_input_callable_function: Callable,
+                                                     test_input_iterable: iter, test_input_cpu_count: int,
+                                                     test_input_max_chunksize: int) -> None:
+        """Test a `ValueError` is raised if the executor backend is unknown."""
+        with pytest.raises(ValueError):
+            _ = parallelise_processing(test_input_callable_function, test_input_iterable, test_input_cpu_count,
+                                       test_input_max_chunksize, "hello")
+
 
 # Define test cases for the `TestParalleliseDictionaryProcessing` test class
 args_test_parallelise_dictionary_processing_callable_function = [lambda x: {x: x ** 2}]
@@ -99,7 +144,7 @@ class TestParalleliseDictionaryProcessing:
         # Execute the `parallelise_dictionary_processing` function, checking that it raises an `AssertionError`
         with pytest.raises(AssertionError):
             _ = parallelise_dictionary_processing(test_input_callable_function, test_input_duplicate_iterable,
-                                                  test_input_cpu_count, test_input_max_chunksize)
+                                                  test_input_cpu_count, test_input_max_chunksize, "process")
 
     def test_returns_correctly(self, patch_parallelise_processing: MagicMock,
                                test_input_callable_function: Callable[..., Dict], test_input_iterable: iter,
@@ -112,3 +157,265 @@ class TestParalleliseDictionaryProcessing:
 
         # Assert the output is as expected
         assert test_output == {k: v for d in patch_parallelise_processing.return_value for k, v in d.items()}
+
+    @pytest.mark.parametrize("test_input_executor", ["thread", "process"])
+    def test_parallelise_processing_called_once_correctly(self, patch_parallelise_processing: MagicMock,
+                                                          test_input_callable_function: Callable[..., Dict],
+                                                          test_input_iterable: iter, test_input_cpu_count: int,
+                                                          test_input_max_chunksize: int,
+                                                          test_input_executor: str) -> None:
+        """Test the `parallelise_processing` function is called once correctly."""
+
+        # Execute the `parallelise_dictionary_processing` function
+        _ = parallelise_dictionary_processing(test_input_callable_function, test_input_iterable, test_input_cpu_count,
+                                              test_input_max_chunksize, test_input_executor)
+
+        # Assert `parallelise_processing` is called once with the correct arguments
+        patch_parallelise_processing.assert_called_once_with(test_input_callable_function, test_input_iterable,
+                                                             test_input_cpu_count, test_input_max_chunksize,
+                                                             test_input_executor, None, None, False)
+
+
+# Define test cases for the `TestParalleliseProcessingUnsized` test class
+args_test_parallelise_processing_unsized_iterable = [range(0), range(1), range(10)]
+
+
+@pytest.mark.parametrize("test_input_iterable", args_test_parallelise_processing_unsized_iterable)
+@pytest.mark.parametrize("test_input_adaptive_chunks", [False, True])
+class TestParalleliseProcessingUnsized:
+
+    @pytest.mark.parametrize("test_input_executor", ["thread", "process"])
+    def test_generator_returns_correctly(self, test_input_iterable: iter, test_input_adaptive_chunks: bool,
+                                         test_input_executor: str) -> None:
+        """Test a generator, which has no length, is processed correctly."""
+        test_output = parallelise_processing(abs, (x for x in test_input_iterable), 3, 4, test_input_executor,
+                                             adaptive_chunks=test_input_adaptive_chunks)
+        assert sorted(test_output) == list(test_input_iterable)
+
+    def test_processing_overlaps_reading(self, test_input_iterable: iter, test_input_adaptive_chunks: bool) -> None:
+        """Test elements of a generator are processed whilst later elements are still being read."""
+
+        # Define a generator that only reads each element after the previous element has been processed
+        test_processed = {x: Event() for x in test_input_iterable}
+
+        def test_generator():
+            for x in test_input_iterable:
+                yield x
+                assert test_processed[x].wait(5), "Element was not processed before the next element was read"
+
+        def test_callable(x: int) -> int:
+            test_processed[x].set()
+            return x
+
+        # Assert all the elements are processed, with one element per chunk, as each chunk is read before it is sent
+        test_output = parallelise_processing(test_callable, test_generator(), 2, 1,
+                                             adaptive_chunks=test_input_adaptive_chunks)
+        assert sorted(test_output) == list(test_input_iterable)
+
+
+class SynchronousPool:
+
+    def __init__(self) -> None:
+        """Define a pool that runs each task immediately when it is submitted, and records the arguments of each."""
+        self.tasks = []
+
+    def apply_async(self, func: Callable, args: tuple, callback: Callable, error_callback: Callable) -> None:
+        self.tasks.append(args[0])
+        try:
+            callback(func(*args))
+        except Exception as e:
+            error_callback(e)
+
+
+# Define test cases for the `TestParalleliseProcessingAdaptiveChunks` test class
+args_test_adaptive_chunks_iterable = [range(0), range(1), range(7), range(100)]
+args_test_adaptive_chunks_cpu_count = [1, 4]
+
+
+@pytest.mark.parametrize("test_input_iterable", args_test_adaptive_chunks_iterable)
+@pytest.mark.parametrize("test_input_cpu_count", args_test_adaptive_chunks_cpu_count)
+class TestParalleliseProcessingAdaptiveChunks:
+
+    @pytest.mark.parametrize("test_input_executor", ["thread", "process"])
+    def test_returns_correctly(self, test_input_iterable: iter, test_input_cpu_count: int,
+                               test_input_executor: str) -> None:
+        """Test all the outputs are returned with adaptive chunks."""
+        test_output = parallelise_processing(abs, test_input_iterable, test_input_cpu_count, 10, test_input_executor,
+                                             adaptive_chunks=True)
+        assert sorted(test_output) == list(test_input_iterable)
+
+    @pytest.mark.parametrize("test_input_seconds_per_chunk", [1e-6, 100.0])
+    @pytest.mark.parametrize("test_input_max_chunksize", [1, 5, 1000])
+    def test_chunk_sizes_adapt_to_latency(self, mocker, test_input_iterable: iter, test_input_cpu_count: int,
+                                          test_input_seconds_per_chunk: float, test_input_max_chunksize: int) -> None:
+        """Test the first chunks have one element, and later chunks grow if elements are fast, but not if slow."""
+
+        # Make every chunk appear to take `test_input_seconds_per_chunk` seconds, and process the iterable
+        _ = mocker.patch("src.utils.parallelise_dictionary_processing.time.perf_counter",
+                         side_effect=count(step=test_input_seconds_per_chunk))
+        test_pool = SynchronousPool()
+        test_output = list(_adaptive_imap_unordered(test_pool, abs, test_input_iterable, test_input_cpu_count,
+                                                    test_input_max_chunksize))
+
+        # Assert every element is processed once, in chunks of at most `max_chunksize` elements
+        test_sizes = [len(c) for c in test_pool.tasks]
+        assert [e for c in test_pool.tasks for e in c] == list(test_input_iterable) == test_output
+        assert test_sizes[:2 * test_input_cpu_count] == [1] * min(2 * test_input_cpu_count, len(test_input_iterable))
+        assert max(test_sizes, default=0) <= test_input_max_chunksize
+
+        # Assert chunks only grow beyond one element if elements are fast
+        if test_input_seconds_per_chunk > 1:
+            assert set(test_sizes) <= {1}
+        elif len(test_input_iterable) > 4 * test_input_cpu_count and test_input_max_chunksize > 1:
+            assert max(test_sizes) > 1
+
+    def test_exceptions_reraised(self, test_input_iterable: iter, test_input_cpu_count: int) -> None:
+        """Test exceptions raised by the callable function are re-raised."""
+
+        def test_callable(x: int) -> int:
+            raise ValueError("Testing for errors")
+
+        if len(test_input_iterable) > 0:
+            with pytest.raises(ValueError):
+                _ = parallelise_processing(test_callable, test_input_iterable, test_input_cpu_count, 10,
+                                           adaptive_chunks=True)
+
+
+class ConcurrencyRecorder:
+
+    def __init__(self, delay: float) -> None:
+        """Callable class that records the maximum number of concurrent calls, and returns a dictionary."""
+        self.delay = delay
+        self.lock = Lock()
+        self.concurrent = 0
+        self.max_concurrent = 0
+
+    def __call__(self, x: int) -> Dict[int, int]:
+        with self.lock:
+            self.concurrent += 1
+            self.max_concurrent = max(self.max_concurrent, self.concurrent)
+        sleep(self.delay)
+        with self.lock:
+            self.concurrent -= 1
+        return {x: x ** 2}
+
+
+# Define test cases for the `TestParalleliseDictionaryStreaming` test class
+args_test_parallelise_dictionary_streaming_iterable = [range(5), range(20)]
+args_test_parallelise_dictionary_streaming_max_in_flight = [1, 2, 5]
+
+
+@pytest.mark.parametrize("test_input_iterable", args_test_parallelise_dictionary_streaming_iterable)
+@pytest.mark.parametrize("test_input_cpu_count", [1, 4])
+@pytest.mark.parametrize("test_input_max_in_flight", args_test_parallelise_dictionary_streaming_max_in_flight)
+class TestParalleliseDictionaryStreaming:
+
+    def test_yields_correctly(self, test_input_iterable: iter, test_input_cpu_count: int,
+                              test_input_max_in_flight: int) -> None:
+        """Test the function yields every key-value pair."""
+
+        # Execute the `parallelise_dictionary_streaming` function
+        test_output = parallelise_dictionary_streaming(lambda x: {x: x ** 2}, test_input_iterable,
+                                                       test_input_cpu_count, test_input_max_in_flight)
+
+        # Assert the output is as expected, ignoring the order of the outputs
+        assert dict(test_output) == {x: x ** 2 for x in test_input_iterable}
+
+    def test_max_in_flight_respected(self, test_input_iterable: iter, test_input_cpu_count: int,
+                                     test_input_max_in_flight: int) -> None:
+        """Test no more than `max_in_flight` elements are processed at once."""
+
+        # Execute the `parallelise_dictionary_streaming` function with a callable that records concurrency
+        test_callable = ConcurrencyRecorder(0.005)
+        _ = list(parallelise_dictionary_streaming(test_callable, test_input_iterable, test_input_cpu_count,
+                                                  test_input_max_in_flight))
+
+        # Assert the maximum concurrency is within the limits
+        assert test_callable.max_concurrent <= min(test_input_cpu_count, test_input_max_in_flight)
+
+    def test_iterable_read_lazily(self, test_input_iterable: iter, test_input_cpu_count: int,
+                                  test_input_max_in_flight: int) -> None:
+        """Test the iterable is only read when there is room for more work."""
+
+        # Define a generator that records how many elements have been read
+        test_read = []
+
+        def test_generator():
+            for x in test_input_iterable:
+                test_read.append(x)
+                yield x
+
+        # Get the first key-value pair from the `parallelise_dictionary_streaming` function
+        test_output = parallelise_dictionary_streaming(lambda x: {x: x}, test_generator(), test_input_cpu_count,
+                                                       test_input_max_in_flight)
+        _ = next(test_output)
+
+        # Assert that no more than `max_in_flight` elements have been read, plus one replacement for the yielded pair
+        assert len(test_read) <= test_input_max_in_flight + 1
+        test_output.close()
+
+    def test_assertion_error_raised_for_duplicate_keys(self, test_input_iterable: iter, test_input_cpu_count: int,
+                                                       test_input_max_in_flight: int) -> None:
+        """Test an `AssertionError` is raised if duplicate keys (repository names) are returned."""
+        with pytest.raises(AssertionError):
+            _ = list(parallelise_dictionary_streaming(lambda x: {"hello": x}, test_input_iterable,
+                                                      test_input_cpu_count, test_input_max_in_flight))
+
+    def test_exceptions_reraised(self, test_input_iterable: iter, test_input_cpu_count: int,
+                                 test_input_max_in_flight: int) -> None:
+        """Test exceptions raised by the callable function are re-raised."""
+
+        def test_callable(x: int) -> Dict[int, int]:
+            raise ValueError("Testing for errors")
+
+        with pytest.raises(ValueError):
+            _ = list(parallelise_dictionary_streaming(test_callable, test_input_iterable, test_input_cpu_count,
+                                                      test_input_max_in_flight))
+
+
+# Define test cases for the `TestParalleliseDictionaryCheckpointing` test class
+args_test_parallelise_dictionary_checkpointing_fail_at = [0, 3, 10]
+
+
+@pytest.mark.parametrize("test_input_iterable", args_test_parallelise_dictionary_streaming_iterable)
+@pytest.mark.parametrize("test_input_fail_at", args_test_parallelise_dictionary_checkpointing_fail_at)
+@pytest.mark.parametrize("test_input_executor", ["thread", "process"])
+class TestParalleliseDictionaryCheckpointing:
+
+    def test_resumes_from_journal(self, tmpdir, test_input_iterable: iter, test_input_fail_at: int,
+                                  test_input_executor: str) -> None:
+        """Test a run that fails part way through resumes, only processing the elements not in the journal."""
+
+        # Run until the element `test_input_fail_at`, if any, raises an exception, with one worker, so only earlier
+        # elements finish
+        test_path = os.path.join(tmpdir, "journal.jsonl")
+        with Journal(test_path) as test_journal:
+            with pytest.raises(ValueError) if test_input_fail_at < len(test_input_iterable) else nullcontext():
+                _ = parallelise_dictionary_checkpointing(fail_at(test_input_fail_at), test_input_iterable,
+                                                         test_journal, str, 1, 1, test_input_executor)
+            test_completed = set(test_journal)
+
+        # Rerun with a new journal object of the same file, recording which elements are processed
+        test_processed = []
+        with Journal(test_path) as test_journal:
+            test_output = parallelise_dictionary_checkpointing(
+                lambda x: test_processed.append(x) or {str(x): x ** 2}, test_input_iterable, test_journal, str, 2
+            )
+
+        # Assert the output includes every element in order, and only the elements not completed were processed
+        assert test_output == {str(x): x ** 2 for x in test_input_iterable}
+        assert list(test_output) == [str(x) for x in test_input_iterable]
+        assert sorted(test_processed) == [x for x in test_input_iterable if str(x) not in test_completed]
+        assert len(test_completed) == min(test_input_fail_at, len(test_input_iterable))
+
+
+class fail_at:
+
+    def __init__(self, n: int) -> None:
+        """Define a picklable callable that squares its argument, but raises a `ValueError` for the element `n`."""
+        self.n = n
+
+    def __call__(self, x: int) -> Dict[str, int]:
+        if x == self.n:
+            raise ValueError("Testing for errors")
+        return {str(x): x ** 2}
@@ -0,0 +1,67 @@
+from src.utils.process_queue import _MAX_MESSAGE_BYTES, ProcessQueue
+from threading import Thread
+from typing import Any
+import multiprocessing as mp
+import os
+import pytest
+import signal
+import time
+
+# Define test cases for the `TestProcessQueue` test class
+args_test_process_queue = [None, "hello", {"foo": [1, 2, 3]}, ("world", 200, 1024, True, False)]
+
+
+def put_forever(process_queue: ProcessQueue) -> None:
+    """Put objects on a queue until the process is killed."""
+    while True:
+        process_queue.put("x" * 100)
+
+
+@pytest.mark.parametrize("test_input_obj", args_test_process_queue)
+class TestProcessQueue:
+
+    def test_put_get(self, test_input_obj: Any) -> None:
+        """Test an object put on the queue is returned by `get`, and the queue is then empty."""
+        test_queue = ProcessQueue()
+        assert test_queue.empty()
+        assert test_queue.put(test_input_obj)
+        assert not test_queue.empty()
+        assert test_queue.get() == test_input_obj
+        assert test_queue.empty()
+
+    def test_put_from_forked_process(self, test_input_obj: Any) -> None:
+        """Test objects put on the queue by a forked worker process are received intact."""
+        test_queue = ProcessQueue()
+        test_process = mp.get_context("fork").Process(target=test_queue.put, args=(test_input_obj,))
+        test_process.start()
+        test_process.join()
+        assert test_queue.get() == test_input_obj
+
+
+@pytest.mark.parametrize("test_input_bytes", [_MAX_MESSAGE_BYTES + 1, 10 * _MAX_MESSAGE_BYTES])
+def test_large_objects_dropped(test_input_bytes: int) -> None:
+    """Test objects too large to be written to the pipe in one go are dropped."""
+    test_queue = ProcessQueue()
+    assert not test_queue.put(b"x" * test_input_bytes)
+    assert test_queue.empty()
+
+
+def test_put_after_killed_writer() -> None:
+    """Test a worker process killed whilst putting objects on the queue leaves no lock held, or partial object."""
+
+    # Get objects from the queue in a thread, whilst a forked worker process puts objects on it, and kill the worker
+    # part way through
+    test_queue, test_output = ProcessQueue(), []
+    test_thread = Thread(target=lambda: test_output.extend(iter(test_queue.get, None)))
+    test_thread.start()
+    test_process = mp.get_context("fork").Process(target=put_forever, args=(test_queue,))
+    test_process.start()
+    time.sleep(0.1)
+    os.kill(test_process.pid, signal.SIGKILL)
+    test_process.join()
+
+    # Assert another object can be put on the queue, and every object before it is received intact
+    assert test_queue.put(None)
+    test_thread.join(10)
+    assert not test_thread.is_alive()
+    assert test_output and all(o == "x" * 100 for o in test_output)
@@ -0,0 +1,149 @@
+from src.utils.rate_limiter import RateLimiter
+from threading import Thread
+from unittest.mock import MagicMock
+import multiprocessing as mp
+import asyncio
+import os
+import pytest
+import time
+
+# Define test cases for the `TestRateLimiter` test class
+args_test_rate_limiter = [(10.0, 5), (2.0, 1), (50.0, 20)]
+
+
+@pytest.mark.parametrize("test_input_max_requests_per_second, test_input_burst", args_test_rate_limiter)
+class TestRateLimiter:
+
+    def test_reserve_allows_burst_then_paces(self, test_input_max_requests_per_second: float,
+                                             test_input_burst: int) -> None:
+        """Test `burst` requests can be sent at once, and later requests are paced at `max_requests_per_second`."""
+
+        # Create a `RateLimiter` object, and reserve `burst` requests
+        test_limiter = RateLimiter(test_input_max_requests_per_second, test_input_burst)
+        test_burst_waits = [test_limiter.reserve() for _ in range(test_input_burst)]
+
+        # Assert the burst is not paced, and the next two requests are paced in turn
+        assert test_burst_waits == pytest.approx([0.0] * test_input_burst, abs=0.01)
+        assert test_limiter.reserve() == pytest.approx(1 / test_input_max_requests_per_second, abs=0.01)
+        assert test_limiter.reserve() == pytest.approx(2 / test_input_max_requests_per_second, abs=0.01)
+
+    @pytest.mark.parametrize("test_input_verb", ["POST", "PUT", "patch", "DELETE"])
+    def test_reserve_spaces_out_write_requests(self, test_input_max_requests_per_second: float, test_input_burst: int,
+                                               test_input_verb: str) -> None:
+        """Test requests that change data are sent at most once per `min_write_interval` seconds."""
+        test_limiter = RateLimiter(test_input_max_requests_per_second, test_input_burst, min_write_interval=3.0)
+        assert test_limiter.reserve(test_input_verb) == pytest.approx(0.0, abs=0.01)
+        assert test_limiter.reserve(test_input_verb) == pytest.approx(3.0, abs=0.01)
+        assert test_limiter.reserve(test_input_verb) == pytest.approx(6.0, abs=0.01)
+
+    def test_update_paces_remaining_requests_until_reset(self, test_input_max_requests_per_second: float,
+                                                         test_input_burst: int) -> None:
+        """Test the remaining requests are spread evenly until the reset, once fewer than `pace_below_remaining`."""
+
+        # Create a `RateLimiter` object, and update it with 10 remaining requests for the next 100 seconds
+        test_limiter = RateLimiter(test_input_max_requests_per_second, test_input_burst, pace_below_remaining=10)
+        test_limiter.update(200, {"x-ratelimit-remaining": "10", "x-ratelimit-reset": str(time.time() + 100)})
+
+        # Use up the burst, and assert the next request is paced at one request per 10 seconds
+        _ = [test_limiter.reserve() for _ in range(test_input_burst)]
+        assert test_limiter.reserve() == pytest.approx(10.0, abs=0.1)
+
+    def test_update_does_not_pace_above_pace_below_remaining(self, test_input_max_requests_per_second: float,
+                                                             test_input_burst: int) -> None:
+        """Test requests are not paced by the reset time if more than `pace_below_remaining` requests remain."""
+        test_limiter = RateLimiter(test_input_max_requests_per_second, test_input_burst, pace_below_remaining=10)
+        test_limiter.update(200, {"x-ratelimit-remaining": "11", "x-ratelimit-reset": str(time.time() + 100)})
+        _ = [test_limiter.reserve() for _ in range(test_input_burst)]
+        assert test_limiter.reserve() == pytest.approx(1 / test_input_max_requests_per_second, abs=0.01)
+
+    def test_update_pauses_until_reset_if_no_requests_remain(self, test_input_max_requests_per_second: float,
+                                                             test_input_burst: int) -> None:
+        """Test requests pause until the reset if no requests remain."""
+        test_limiter = RateLimiter(test_input_max_requests_per_second, test_input_burst)
+        test_limiter.update(403, {"x-ratelimit-remaining": "0", "x-ratelimit-reset": str(time.time() + 30)})
+        assert test_limiter.reserve() == pytest.approx(30.0, abs=0.1)
+
+    @pytest.mark.parametrize("test_input_status, test_expected", [(403, 60.0), (429, 60.0), (200, 0.0)])
+    def test_update_pauses_for_retry_after(self, test_input_max_requests_per_second: float, test_input_burst: int,
+                                           test_input_status: int, test_expected: float) -> None:
+        """Test requests pause for the `Retry-After` time of a secondary rate limit response."""
+        test_limiter = RateLimiter(test_input_max_requests_per_second, test_input_burst)
+        test_limiter.update(test_input_status, {"retry-after": "60"})
+        assert test_limiter.reserve() == pytest.approx(test_expected, abs=0.1)
+
+    def test_state_shared_with_forked_processes(self, test_input_max_requests_per_second: float,
+                                                test_input_burst: int) -> None:
+        """Test requests reserved in a forked worker process count against the same token bucket."""
+
+        # Create a `RateLimiter` object, and use up the burst in a forked process
+        test_limiter = RateLimiter(test_input_max_requests_per_second, test_input_burst)
+        test_process = mp.get_context("fork").Process(target=lambda: [test_limiter.reserve()
+                                                                      for _ in range(test_input_burst)])
+        test_process.start()
+        test_process.join()
+
+        # Assert the next request in this process is paced
+        assert test_limiter.reserve() > 0
+
+    def test_acquire_async_waits(self, test_input_max_requests_per_second: float, test_input_burst: int) -> None:
+        """Test `acquire_async` waits for the reserved time."""
+        test_limiter = RateLimiter(test_input_max_requests_per_second, test_input_burst)
+        test_limiter.update(429, {"retry-after": "0.05"})
+        test_start = time.monotonic()
+        asyncio.run(test_limiter.acquire_async())
+        assert time.monotonic() - test_start >= 0.04
+
+    def test_connection_hooks(self, test_input_max_requests_per_second: float, test_input_burst: int) -> None:
+        """Test the connection hooks reserve a request, and update the pacing from the response."""
+
+        # Create a `RateLimiter` object, and a mock response with a `Retry-After` header
+        test_limiter = RateLimiter(test_input_max_requests_per_second, test_input_burst)
+        test_response = MagicMock(status=403, from_cache=False)
+        test_response.getheaders.return_value = [("Retry-After", "60")]
+
+        # Call the hooks, and assert the response is returned unchanged, and later requests are paused
+        assert test_limiter.before_request("GET", "/orgs/foo", {}) is None
+        assert test_limiter.after_response("GET", "/orgs/foo", {}, test_response) == test_response
+        assert test_limiter.reserve() >= 59.9
+
+
+def hold_lock_and_exit(limiter: RateLimiter) -> None:
+    """Exit whilst holding the lock of a `RateLimiter` object, as if the process was terminated."""
+    with limiter._locked():
+        os._exit(0)
+
+
+@pytest.mark.parametrize("test_input_verb", ["GET", "PUT"])
+def test_lock_released_if_holder_exited(monkeypatch, test_input_verb: str) -> None:
+    """Test a process exiting whilst holding the lock does not stop other processes reserving requests."""
+
+    # Hold the lock in a forked process that exits without releasing it
+    monkeypatch.setattr("src.utils.rate_limiter.LOCK_TIMEOUT", 0.05)
+    test_limiter = RateLimiter()
+    test_process = mp.get_context("fork").Process(target=hold_lock_and_exit, args=(test_limiter,))
+    test_process.start()
+    test_process.join()
+
+    # Assert a request can still be reserved, and the lock is released afterwards
+    test_thread = Thread(target=test_limiter.reserve, args=(test_input_verb,))
+    test_thread.start()
+    test_thread.join(10)
+    assert not test_thread.is_alive()
+    assert test_limiter.reserve() >= 0.0
+
+
+def test_lock_kept_if_holder_running(monkeypatch) -> None:
+    """Test the lock is not released whilst the process holding it is still running."""
+
+    # Hold the lock in this process, and reserve a request in another thread
+    monkeypatch.setattr("src.utils.rate_limiter.LOCK_TIMEOUT", 0.05)
+    test_limiter = RateLimiter()
+    with test_limiter._locked():
+        test_thread = Thread(target=test_limiter.reserve)
+        test_thread.start()
+        time.sleep(0.3)
+
+        # Assert the request waits for the lock, and is reserved once the lock is released
+        assert test_thread.is_alive()
+    test_thread.join(10)
+    assert not test_thread.is_alive()
@@ -0,0 +1,166 @@
+from conftest import StubGitHubServer
+from github import Github
+from github.Repository import Repository
+from github.Team import Team
+from src.make_data.reconcile_team_permissions import (
+    PERMISSION_LEVELS,
+    apply_team_permissions_plan,
+    diff_team_repository_permissions,
+    estimate_request_seconds,
+    get_repository_permission,
+    get_team_repository_permissions,
+    plan_team_permissions,
+    reconcile_team_permissions
+)
+from src.utils.rate_limiter import RateLimiter
+from typing import Dict, List, Optional, Tuple
+import json
+import pytest
+
+# Define test cases for the `test_get_repository_permission` test function
+args_test_get_repository_permission = [
+    (None, None),
+    ({}, None),
+    ({"admin": False, "push": False, "pull": False}, None),
+    ({"admin": False, "push": False, "pull": True}, "pull"),
+    ({"admin": False, "maintain": False, "push": True, "triage": True, "pull": True}, "push"),
+    ({"admin": False, "maintain": True, "push": True, "triage": True, "pull": True}, "maintain"),
+    ({"admin": True, "push": True, "pull": True}, "admin"),
+]
+
+
+@pytest.mark.parametrize("test_input_permissions, test_expected", args_test_get_repository_permission)
+def test_get_repository_permission(test_input_permissions: Optional[Dict[str, bool]],
+                                   test_expected: Optional[str]) -> None:
+    """Test the `get_repository_permission` function returns the highest permission level."""
+    assert get_repository_permission(test_input_permissions) == test_expected
+
+
+# Define test cases for the `test_diff_team_repository_permissions` test function
+args_test_diff_team_repository_permissions = [
+    ({}, "push", ["foo/a", "foo/b"], {"foo/a": None, "foo/b": None}),
+    ({"foo/a": "push", "foo/b": "push"}, "push", ["foo/a", "foo/b"], {}),
+    ({"foo/a": "pull", "foo/b": "push", "foo/c": "admin"}, "push", ["foo/a", "foo/b"], {"foo/a": "pull"}),
+    ({"foo/a": "admin"}, "pull", ["foo/a", "foo/b"], {"foo/a": "admin", "foo/b": None}),
+]
+
+
+@pytest.mark.parametrize("test_input_current_permissions, test_input_permission, test_input_repository_names, "
+                         "test_expected", args_test_diff_team_repository_permissions)
+def test_diff_team_repository_permissions(test_input_current_permissions: Dict[str, Optional[str]],
+                                          test_input_permission: str, test_input_repository_names: List[str],
+                                          test_expected: Dict[str, Optional[str]]) -> None:
+    """Test the `diff_team_repository_permissions` function only returns repositories that need changing."""
+    assert diff_team_repository_permissions(test_input_current_permissions, test_input_permission,
+                                            test_input_repository_names) == test_expected
+
+
+def create_team_and_repositories(server: StubGitHubServer, names: List[str]) -> Tuple[Team, List[Repository]]:
+    """Create a `github.Team.Team` object, and `github.Repository.Repository` objects, for the stub GitHub server."""
+    g = Github(base_url=server.base_url)
+    team = g.create_from_raw_data(Team, {"id": 1, "name": "hello", "url": f"{server.base_url}/teams/1"})
+    repositories = [g.create_from_raw_data(Repository, {"name": n, "full_name": f"foo/{n}", "owner": {"login": "foo"}})
+                    for n in names]
+    return team, repositories
+
+
+# Define test cases for the `TestReconcileTeamPermissions` test class
+args_test_reconcile_team_permissions = [
+    ({}, "push", {"a": None, "b": None, "c": None}),
+    ({"a": "push", "b": "push", "c": "push"}, "push", {}),
+    ({"a": "pull", "b": "push", "d": "admin"}, "push", {"a": "pull", "c": None}),
+    ({"a": "admin", "b": "maintain", "c": "triage"}, "maintain", {"a": "admin", "c": "triage"}),
+]
+
+
+@pytest.mark.parametrize("test_input_current, test_input_permission, test_expected",
+                         args_test_reconcile_team_permissions)
+class TestReconcileTeamPermissions:
+
+    @staticmethod
+    def set_team_repositories(server: StubGitHubServer, current: Dict[str, str]) -> None:
+        """Set a canned response of the team's repositories, with their permission data."""
+        server.routes["/teams/1/repos"] = (200, {}, [
+            {"name": n, "full_name": f"foo/{n}", "owner": {"login": "foo"},
+             "permissions": {p: i <= PERMISSION_LEVELS.index(c) for i, p in enumerate(PERMISSION_LEVELS)}}
+            for n, c in current.items()
+        ])
+        for n in "abcd":
+            server.routes[f"/teams/1/repos/foo/{n}"] = (204, {}, None)
+
+    def test_get_team_repository_permissions(self, stub_github_server: StubGitHubServer,
+                                             test_input_current: Dict[str, str], test_input_permission: str,
+                                             test_expected: Dict[str, Optional[str]]) -> None:
+        """Test the team's permission levels are returned for each of its repositories."""
+        self.set_team_repositories(stub_github_server, test_input_current)
+        test_team, _ = create_team_and_repositories(stub_github_server, [])
+        assert get_team_repository_permissions(test_team, 2) == {f"foo/{n}": p for n, p in test_input_current.items()}
+
+    @pytest.mark.parametrize("test_input_executor", ["thread", "process"])
+    def test_only_changed_repositories_are_written(self, stub_github_server: StubGitHubServer,
+                                                   test_input_current: Dict[str, str], test_input_permission: str,
+                                                   test_expected: Dict[str, Optional[str]],
+                                                   test_input_executor: str) -> None:
+        """Test the team's repositories are requested once, and only repositories that differ are changed."""
+
+        # Set the canned responses, and execute the `reconcile_team_permissions` function for repositories a, b, and c
+        self.set_team_repositories(stub_github_server, test_input_current)
+        test_team, test_repositories = create_team_and_repositories(stub_github_server, ["a", "b", "c"])
+        test_output = reconcile_team_permissions(test_team, test_input_permission, test_repositories, 2,
+                                                 executor=test_input_executor)
+
+        # Assert the output is as expected, and only the changed repositories are requested to change
+        assert test_output == {f"foo/{n}": p for n, p in test_expected.items()}
+        assert [r[:2] for r in stub_github_server.requests if r[0] == "GET"] == [("GET", "/teams/1/repos")]
+        assert sorted(r[1] for r in stub_github_server.requests if r[0] == "PUT") == [
+            f"/teams/1/repos/foo/{n}" for n in sorted(test_expected)
+        ]
+
+    def test_plan_then_apply(self, stub_github_server: StubGitHubServer, test_input_current: Dict[str, str],
+                             test_input_permission: str, test_expected: Dict[str, Optional[str]]) -> None:
+        """Test a serialised plan lists the changes, and applying it changes only those repositories, without reads."""
+
+        # Set the canned responses, with rate limit headers, and plan the changes for repositories a, b, and c
+        self.set_team_repositories(stub_github_server, test_input_current)
+        test_headers = {"X-RateLimit-Remaining": "100", "X-RateLimit-Limit": "5000", "X-RateLimit-Reset": "1600000000"}
+        stub_github_server.routes["/teams/1/repos"][1].update(test_headers)
+        test_team, test_repositories = create_team_and_repositories(stub_github_server, ["a", "b", "c"])
+        test_plan = plan_team_permissions(test_team, test_input_permission, test_repositories, 2)
+        test_plan = json.loads(json.dumps(test_plan))
+
+        # Assert the plan is as expected, without any changes made
+        assert test_plan["add"] == [f"foo/{n}" for n, p in test_expected.items() if p is None]
+        assert test_plan["change"] == {f"foo/{n}": p for n, p in test_expected.items() if p is not None}
+        assert test_plan["no_op"] == [f"foo/{n}" for n in "abc" if n not in test_expected]
+        assert test_plan["api_requests"] == {"read": 1, "write": len(test_expected)}
+        assert test_plan["rate_limit"] == {"remaining": 100, "limit": 5000, "reset": 1600000000,
+                                           "budget": len(test_expected) / 100}
+        assert [r[0] for r in stub_github_server.requests] == ["GET"]
+
+        # Apply the plan, and assert only the changed repositories are requested to change, without any reads
+        test_output = apply_team_permissions_plan(Github(base_url=stub_github_server.base_url), test_plan, 2)
+        assert test_output == {f"foo/{n}": p for n, p in test_expected.items()}
+        assert [r[0] for r in stub_github_server.requests[1:]] == ["PUT"] * len(test_expected)
+        assert sorted(r[1] for r in stub_github_server.requests[1:]) == [
+            f"/teams/1/repos/foo/{n}" for n in sorted(test_expected)
+        ]
+
+
+# Define test cases for the `test_estimate_request_seconds` test function
+args_test_estimate_request_seconds = [
+    (0, 4, None, "PUT", 0.0),
+    (8, 4, None, "PUT", 1.0),
+    (9, 4, None, "GET", 1.5),
+    (10, 4, RateLimiter(10.0, 5, min_write_interval=1.0), "PUT", 9.5),
+    (55, 10, RateLimiter(10.0, 5, min_write_interval=1.0), "GET", 5.0),
+]
+
+
+@pytest.mark.parametrize("test_input_requests, test_input_cpu_count, test_input_rate_limiter, test_input_verb, "
+                         "test_expected", args_test_estimate_request_seconds)
+def test_estimate_request_seconds(test_input_requests: int, test_input_cpu_count: int,
+                                  test_input_rate_limiter: Optional[RateLimiter], test_input_verb: str,
+                                  test_expected: float) -> None:
+    """Test the `estimate_request_seconds` function returns the slowest of the concurrency, and pacing estimates."""
+    assert estimate_request_seconds(test_input_requests, test_input_cpu_count, 0.5, test_input_rate_limiter,
+                                    test_input_verb) == pytest.approx(test_expected)
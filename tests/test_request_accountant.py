@@ -0,0 +1,217 @@
+from conftest import StubGitHubServer
+from github import Github, GithubException
+from github.Requester import RequestsResponse
+from py.path import local
+from src.utils.github_connection import add_connection_hook, remove_connection_hook
+from src.utils.http_cache import CachedResponse, HTTPCache
+from src.utils.logger import Log
+from src.utils.metrics import MetricsRegistry
+from src.utils.request_accountant import UNATTRIBUTED, RequestAccountant, _get_repository
+from threading import Thread
+from typing import Any, List, Optional, Tuple
+from unittest.mock import MagicMock
+import json
+import logging
+import multiprocessing as mp
+import os
+import pytest
+import time
+
+
+def record_forever(request_accountant: RequestAccountant) -> None:
+    """Record requests until the process is terminated, for example from a worker process."""
+    while True:
+        request_accountant.record("/repos/foo/forever", 200)
+
+
+@Log(logging.getLogger("test_request_accountant"), "debug", metrics_registry=MetricsRegistry())
+def get_owner_names(base_url: str, names: List[str]) -> List[str]:
+    """Example function that gets the name of the owner of each repository, completing each owner lazily."""
+    g = Github(base_url=base_url)
+    return [g.get_repo(f"foo/{n}").owner.name for n in names]
+
+
+@Log(logging.getLogger("test_request_accountant"), "debug", metrics_registry=MetricsRegistry())
+def get_repository_full_name(args: Tuple[str, str]) -> Optional[str]:
+    """Example function that gets the full name of a repository, or None if it does not exist."""
+    base_url, name = args
+    try:
+        return Github(base_url=base_url).get_repo(f"foo/{name}").full_name
+    except GithubException:
+        return None
+
+
+def set_routes(server: StubGitHubServer, names: List[str]) -> None:
+    """Set canned responses of the repositories, and their owner."""
+    for n in names:
+        server.routes[f"/repos/foo/{n}"] = (200, {"ETag": f'"{n}"'}, {
+            "name": n, "full_name": f"foo/{n}", "owner": {"login": "foo", "url": f"{server.base_url}/users/foo"}
+        })
+    server.routes["/users/foo"] = (200, {}, {"login": "foo", "name": "Foo"})
+
+
+# Define test cases for the `test_get_repository` test function
+args_test_get_repository = [
+    ("/repos/foo/bar", "foo/bar"),
+    ("/repos/foo/bar/contributors?per_page=100&page=2", "foo/bar"),
+    ("https://api.github.com/repos/foo/bar.baz/teams", "foo/bar.baz"),
+    ("https://github.example.com/api/v3/repos/foo/bar", "foo/bar"),
+    ("/orgs/foo/repos", UNATTRIBUTED),
+    ("/users/foo", UNATTRIBUTED),
+]
+
+
+@pytest.mark.parametrize("test_input_url, test_expected", args_test_get_repository)
+def test_get_repository(test_input_url: str, test_expected: str) -> None:
+    """Test the `_get_repository` function returns correctly."""
+    assert _get_repository(test_input_url) == test_expected
+
+
+# Define test cases for the `test_after_response_records_correctly` test function; these are the response, and the
+# expected status, size, whether it was used from the cache, and whether it was revalidated
+args_test_after_response = [
+    (MagicMock(spec=RequestsResponse, status=200, text='{"name": "héllo"}'), (200, 18, False, False)),
+    (MagicMock(spec=RequestsResponse, status=404, text=""), (404, 0, False, False)),
+    (MagicMock(spec=RequestsResponse, status=304, text=""), (304, 0, False, True)),
+    (CachedResponse(200, {}, '{"name": "hello"}', True), (200, 0, True, False)),
+    (CachedResponse(200, {}, '{"name": "hello"}', False), (304, 0, False, True)),
+]
+
+
+@pytest.mark.parametrize("test_input_response, test_expected", args_test_after_response)
+def test_after_response_records_correctly(mocker, test_input_response: Any,
+                                          test_expected: Tuple[int, int, bool, bool]) -> None:
+    """Test the `after_response` hook records the response, and returns it unchanged."""
+    test_accountant = RequestAccountant()
+    patch_record = mocker.patch.object(test_accountant, "record")
+    assert test_accountant.after_response("GET", "/repos/foo/bar", {}, test_input_response) is test_input_response
+    patch_record.assert_called_once_with("/repos/foo/bar", *test_expected)
+
+
+# Define test cases for the `TestRequestAccountant` test class
+args_test_request_accountant = [["bar"], ["bar", "baz"], [f"repo{i}" for i in range(10)]]
+
+
+@pytest.mark.parametrize("test_input_names", args_test_request_accountant)
+class TestRequestAccountant:
+
+    def test_requests_attributed_to_functions_and_repositories(self, stub_github_server: StubGitHubServer,
+                                                               test_input_names: List[str]) -> None:
+        """Test requests, including lazy completions, are attributed to the calling function, and repository."""
+
+        # Set the canned responses, and get the owner names while accounting for the requests
+        set_routes(stub_github_server, test_input_names)
+        with RequestAccountant() as test_accountant:
+            assert get_owner_names(stub_github_server.base_url, test_input_names) == ["Foo"] * len(test_input_names)
+        test_output = test_accountant.get_report()
+
+        # Assert one request for each repository, and one lazy completion of the owner for each repository, the N+1
+        # pattern, are attributed to `get_owner_names`
+        assert test_output["total"]["requests"] == 2 * len(test_input_names)
+        assert test_output["total"]["statuses"] == {200: 2 * len(test_input_names)}
+        assert test_output["functions"]["get_owner_names"]["rate_limit_cost"] == 2 * len(test_input_names)
+        assert test_output["functions"]["get_owner_names"]["repositories"] == len(test_input_names)
+        assert test_output["repositories"][UNATTRIBUTED]["requests"] == len(test_input_names)
+        for n in test_input_names:
+            assert test_output["repositories"][f"foo/{n}"]["requests"] == 1
+            assert test_output["repositories"][f"foo/{n}"]["functions"] == 1
+        assert test_output["total"]["bytes"] == sum(len(json.dumps(stub_github_server.routes[p][2]))
+                                                    for _, p, _ in stub_github_server.requests)
+
+    def test_requests_of_forked_worker_processes_counted(self, stub_github_server: StubGitHubServer,
+                                                         test_input_names: List[str]) -> None:
+        """Test the requests of forked worker processes are counted, including unsuccessful ones."""
+
+        # Set the canned responses for all but the first repository, and get the full names in forked worker processes
+        set_routes(stub_github_server, test_input_names[1:])
+        with RequestAccountant() as test_accountant:
+            with mp.get_context("fork").Pool(2) as test_pool:
+                test_pool.map(get_repository_full_name,
+                              [(stub_github_server.base_url, n) for n in test_input_names], chunksize=1)
+        test_output = test_accountant.get_report()
+
+        # Assert all the requests are counted, and attributed to `get_repository_full_name`
+        assert test_output["functions"]["get_repository_full_name"]["requests"] == len(test_input_names)
+        test_expected = {200: len(test_input_names) - 1, 404: 1}
+        assert test_output["functions"]["get_repository_full_name"]["statuses"] == {
+            k: v for k, v in test_expected.items() if v
+        }
+
+    def test_stops_after_workers_terminated(self, test_input_names: List[str]) -> None:
+        """Test worker processes terminated whilst recording requests stop neither later workers, nor `stop`."""
+
+        # Record requests from forked worker processes until they are terminated, then from new worker processes, and
+        # stop the request accountant in a thread
+        test_accountant = RequestAccountant()
+        test_accountant.start()
+        try:
+            test_processes = [mp.get_context("fork").Process(target=record_forever, args=(test_accountant,))
+                              for _ in range(2)]
+            for p in test_processes:
+                p.start()
+            time.sleep(0.2)
+            for p in test_processes:
+                p.terminate()
+                p.join()
+            test_accountant.reset()
+            test_processes = [mp.get_context("fork").Process(target=test_accountant.record,
+                                                             args=(f"/repos/foo/{n}", 200)) for n in test_input_names]
+            for p in test_processes:
+                p.start()
+            for p in test_processes:
+                p.join()
+        finally:
+            test_thread = Thread(target=test_accountant.stop)
+            test_thread.start()
+            test_thread.join(30)
+
+        # Assert the request accountant stopped, and counted the requests of the new worker processes
+        assert not test_thread.is_alive()
+        assert test_accountant.get_report()["repositories"].keys() >= {f"foo/{n}" for n in test_input_names}
+
+    def test_cache_hits_not_counted_against_rate_limit(self, stub_github_server: StubGitHubServer, tmpdir: local,
+                                                       test_input_names: List[str]) -> None:
+        """Test responses used from a `HTTPCache` object are counted as cache hits, with no rate limit cost."""
+
+        # Set the canned responses, and get the full names twice, with a cache in front of the request accountant
+        set_routes(stub_github_server, test_input_names)
+        test_cache = HTTPCache(os.path.join(tmpdir, "http_cache.sqlite"), ttl=60)
+        with RequestAccountant() as test_accountant:
+            add_connection_hook(test_cache, 0)
+            try:
+                for _ in range(2):
+                    for n in test_input_names:
+                        _ = get_repository_full_name((stub_github_server.base_url, n))
+            finally:
+                remove_connection_hook(test_cache)
+        test_output = test_accountant.get_report()
+
+        # Assert the second requests are cache hits
+        assert test_output["total"]["requests"] == 2 * len(test_input_names)
+        assert test_output["total"]["cache_hits"] == len(test_input_names)
+        assert test_output["total"]["rate_limit_cost"] == len(test_input_names)
+        assert len(stub_github_server.requests) == len(test_input_names)
+
+    def test_format_report(self, test_input_names: List[str]) -> None:
+        """Test the report is formatted with the top repositories by rate limit cost."""
+
+        # Record a number of requests for each repository
+        test_accountant = RequestAccountant(top=3)
+        for i, n in enumerate(test_input_names):
+            for _ in range(i + 1):
+                test_accountant.record(f"/repos/foo/{n}", 200, 10)
+        test_output = test_accountant.format_report().splitlines()
+
+        # Assert the totals, and the top repositories are as expected
+        test_expected_requests = len(test_input_names) * (len(test_input_names) + 1) // 2
+        assert test_output[0].startswith(f"GitHub API requests: {test_expected_requests:,} ")
+        test_repositories = test_output[test_output.index("Top repositories by rate limit cost:") + 2:]
+        assert [r.split()[0] for r in test_repositories] == [f"foo/{n}" for n in test_input_names[::-1][:3]]
+
+    def test_reset(self, test_input_names: List[str]) -> None:
+        """Test resetting the request accountant forgets all the recorded requests."""
+        test_accountant = RequestAccountant()
+        for n in test_input_names:
+            test_accountant.record(f"/repos/foo/{n}", 200, 10)
+        test_accountant.reset()
+        assert test_accountant.get_report()["total"]["requests"] == 0
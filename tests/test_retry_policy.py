@@ -0,0 +1,173 @@
+from github import GithubException, RateLimitExceededException, UnknownObjectException
+from src.utils.journal import Journal
+from src.utils.parallelise_dictionary_processing import (
+    parallelise_dictionary_checkpointing,
+    parallelise_dictionary_processing,
+    parallelise_dictionary_streaming,
+    parallelise_processing
+)
+from src.utils.retry_policy import DeadLetter, RetryPolicy
+from typing import Dict, List, Union
+from unittest.mock import MagicMock
+import os
+import pytest
+import requests
+
+
+class FailingCallable:
+
+    def __init__(self, fail_elements: List[int], exception: Exception, failures: int = -1) -> None:
+        """Define a picklable callable that squares its argument, or its argument as an integer, but raises `exception`
+        for `fail_elements`.
+
+        Each element in `fail_elements` fails `failures` times before succeeding, or always if `failures` is -1.
+        """
+        self.fail_elements = fail_elements
+        self.exception = exception
+        self.failures = failures
+        self.attempts: Dict[Union[int, str], int] = {}
+
+    def __call__(self, x: Union[int, str]) -> Dict[Union[int, str], int]:
+        self.attempts[x] = self.attempts.get(x, 0) + 1
+        if int(x) in self.fail_elements and (self.failures < 0 or self.attempts[x] <= self.failures):
+            raise self.exception
+        return {x: int(x) ** 2}
+
+
+# Define test cases for the `TestRetryPolicy` test class
+args_test_retry_policy_retryable = [
+    (GithubException(502, {"message": "Bad Gateway"}), True),
+    (GithubException(503, {"message": "Service Unavailable"}), True),
+    (RateLimitExceededException(403, {"message": "API rate limit exceeded"}), True),
+    (requests.exceptions.ConnectionError(), True),
+    (requests.exceptions.ReadTimeout(), True),
+    (ConnectionResetError(), True),
+    (GithubException(422, {"message": "Validation Failed"}), False),
+    (UnknownObjectException(404, {"message": "Not Found"}), False),
+    (ValueError(), False),
+]
+
+
+@pytest.mark.parametrize("test_input_exception, test_expected", args_test_retry_policy_retryable)
+class TestRetryPolicy:
+
+    def test_is_retryable(self, test_input_exception: Exception, test_expected: bool) -> None:
+        """Test transient exceptions are retryable, and other exceptions are not."""
+        assert RetryPolicy().is_retryable(test_input_exception) == test_expected
+
+    @pytest.mark.parametrize("test_input_failures", [1, 2])
+    def test_call_retries_transient_failures(self, mocker, test_input_exception: Exception, test_expected: bool,
+                                             test_input_failures: int) -> None:
+        """Test retryable exceptions are retried until the call succeeds, and other exceptions raised immediately."""
+        patch_sleep = mocker.patch("src.utils.retry_policy.time.sleep")
+        test_callable = FailingCallable([3], test_input_exception, test_input_failures)
+        if test_expected:
+            assert RetryPolicy(max_attempts=3).call(test_callable, 3) == {3: 9}
+            assert test_callable.attempts[3] == test_input_failures + 1
+            assert patch_sleep.call_count == test_input_failures
+        else:
+            with pytest.raises(type(test_input_exception)):
+                _ = RetryPolicy(max_attempts=3).call(test_callable, 3)
+            patch_sleep.assert_not_called()
+
+    def test_call_returns_dead_letter(self, mocker, test_input_exception: Exception, test_expected: bool) -> None:
+        """Test a `DeadLetter` object is returned if retryable exceptions are still raised after all attempts."""
+        _ = mocker.patch("src.utils.retry_policy.time.sleep")
+        if test_expected:
+            assert RetryPolicy(max_attempts=3).call(FailingCallable([3], test_input_exception), 3) == DeadLetter(
+                3, repr(test_input_exception), 3
+            )
+
+
+@pytest.mark.parametrize("test_input_base_delay, test_input_max_delay", [(1.0, 60.0), (0.5, 3.0)])
+@pytest.mark.parametrize("test_input_attempt", [*range(1, 8)])
+class TestRetryPolicyGetDelay:
+
+    def test_exponential_backoff(self, test_input_base_delay: float, test_input_max_delay: float,
+                                 test_input_attempt: int) -> None:
+        """Test the delay doubles after each attempt, up to `max_delay`, without jitter."""
+        test_policy = RetryPolicy(base_delay=test_input_base_delay, max_delay=test_input_max_delay, jitter=False)
+        assert test_policy.get_delay(test_input_attempt) == min(test_input_max_delay,
+                                                                test_input_base_delay * 2 ** (test_input_attempt - 1))
+
+    def test_full_jitter(self, mocker, test_input_base_delay: float, test_input_max_delay: float,
+                         test_input_attempt: int) -> None:
+        """Test the delay is drawn uniformly between zero and the exponential backoff, with jitter."""
+        patch_uniform = mocker.patch("src.utils.retry_policy.random.uniform")
+        test_policy = RetryPolicy(base_delay=test_input_base_delay, max_delay=test_input_max_delay)
+        assert test_policy.get_delay(test_input_attempt) == patch_uniform.return_value
+        patch_uniform.assert_called_once_with(0, min(test_input_max_delay,
+                                                     test_input_base_delay * 2 ** (test_input_attempt - 1)))
+
+
+# Define test cases for the `TestParalleliseWithRetryPolicy` test class
+args_test_parallelise_with_retry_policy_fail_elements = [[], [0], [2, 5, 7]]
+
+
+@pytest.mark.parametrize("test_input_fail_elements", args_test_parallelise_with_retry_policy_fail_elements)
+@pytest.mark.parametrize("test_input_executor", ["thread", "process"])
+class TestParalleliseWithRetryPolicy:
+
+    test_policy = RetryPolicy(max_attempts=2, base_delay=0.0)
+    test_exception = GithubException(502, {"message": "Bad Gateway"})
+
+    def get_expected_dead_letters(self, fail_elements: List[int]) -> List[DeadLetter]:
+        """Get the expected dead letters for the elements that always fail."""
+        return [DeadLetter(x, repr(self.test_exception), 2) for x in fail_elements]
+
+    def test_parallelise_processing(self, test_input_fail_elements: List[int], test_input_executor: str) -> None:
+        """Test elements that keep failing are moved to the dead letters, and the other elements are processed."""
+        test_dead_letters = []
+        test_output = parallelise_processing(FailingCallable(test_input_fail_elements, self.test_exception),
+                                             range(10), 3, 2, test_input_executor, self.test_policy,
+                                             test_dead_letters)
+        test_expected = [{x: x ** 2} for x in range(10) if x not in test_input_fail_elements]
+        assert sorted(test_output, key=lambda d: [*d][0]) == test_expected
+        assert sorted(test_dead_letters, key=lambda d: d.element) == self.get_expected_dead_letters(
+            test_input_fail_elements
+        )
+
+    def test_parallelise_dictionary_processing(self, test_input_fail_elements: List[int],
+                                               test_input_executor: str) -> None:
+        """Test elements that keep failing are left out of the output dictionary."""
+        test_dead_letters = []
+        test_output = parallelise_dictionary_processing(
+            FailingCallable(test_input_fail_elements, self.test_exception), range(10), 3, 2, test_input_executor,
+            self.test_policy, test_dead_letters
+        )
+        assert test_output == {x: x ** 2 for x in range(10) if x not in test_input_fail_elements}
+        assert len(test_dead_letters) == len(test_input_fail_elements)
+
+    def test_parallelise_dictionary_streaming(self, test_input_fail_elements: List[int],
+                                              test_input_executor: str) -> None:
+        """Test elements that keep failing are skipped, and the other key-value pairs are yielded."""
+        test_dead_letters = []
+        test_output = dict(parallelise_dictionary_streaming(
+            FailingCallable(test_input_fail_elements, self.test_exception), range(10), 3, 2, test_input_executor,
+            self.test_policy, test_dead_letters
+        ))
+        assert test_output == {x: x ** 2 for x in range(10) if x not in test_input_fail_elements}
+        assert sorted(test_dead_letters, key=lambda d: d.element) == self.get_expected_dead_letters(
+            test_input_fail_elements
+        )
+
+    def test_parallelise_dictionary_checkpointing(self, tmpdir, test_input_fail_elements: List[int],
+                                                  test_input_executor: str) -> None:
+        """Test elements that keep failing are not recorded in the journal, so a rerun processes them again."""
+
+        # Run with elements that keep failing, then rerun without any failures
+        test_path = os.path.join(tmpdir, "journal.jsonl")
+        with Journal(test_path) as test_journal:
+            test_output = parallelise_dictionary_checkpointing(
+                FailingCallable(test_input_fail_elements, self.test_exception), [str(x) for x in range(10)],
+                test_journal, str, 3, executor=test_input_executor, retry_policy=self.test_policy
+            )
+        test_rerun = MagicMock(side_effect=lambda x: {x: int(x) ** 2})
+        with Journal(test_path) as test_journal:
+            test_rerun_output = parallelise_dictionary_checkpointing(test_rerun, [str(x) for x in range(10)],
+                                                                     test_journal, str, 3)
+
+        # Assert the failed elements are only in the output of the rerun, and only they are processed by the rerun
+        assert test_output == {str(x): x ** 2 for x in range(10) if x not in test_input_fail_elements}
+        assert test_rerun_output == {str(x): x ** 2 for x in range(10)}
+        assert sorted(c[0][0] for c in test_rerun.call_args_list) == sorted(str(x) for x in test_input_fail_elements)
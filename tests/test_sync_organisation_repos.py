@@ -0,0 +1,146 @@
+from conftest import StubGitHubServer
+from github import Github
+from src.make_data.sync_organisation_repos import load_snapshot, sync_organisation_repos
+from typing import Any, Dict, List
+import os
+import pytest
+
+
+def create_repository(server: StubGitHubServer, name: str, pushed_at: str, updated_at: str) -> Dict[str, Any]:
+    """Create the data of a GitHub repository, as returned by the GitHub API."""
+    return {"name": name, "full_name": f"foo/{name}", "url": f"{server.base_url}/repos/foo/{name}",
+            "pushed_at": pushed_at, "updated_at": updated_at}
+
+
+def set_routes(server: StubGitHubServer, repositories: List[Dict[str, Any]]) -> None:
+    """Set canned responses for the 'foo' organisation, its repositories in each sort order, and their contributors.
+
+    Repositories sorted by full name are on one page; repositories sorted by when they were pushed, or updated, are on
+    pages of two repositories, with GitHub `Link` headers.
+    """
+    server.routes["/orgs/foo"] = (200, {}, {"login": "foo", "url": f"{server.base_url}/orgs/foo"})
+    server.routes["/orgs/foo/repos?type=all&sort=full_name&direction=asc&per_page=2"] = (
+        200, {}, sorted(repositories, key=lambda r: r["full_name"])
+    )
+    for sort in ["pushed", "updated"]:
+        ordered = sorted(repositories, key=lambda r: r[f"{sort}_at"], reverse=True)
+        for page in range(1, (len(ordered) - 1) // 2 + 2):
+            next_path = f"/orgs/foo/repos?sort={sort}&page={page + 1}"
+            path = f"/orgs/foo/repos?type=all&sort={sort}&direction=desc&per_page=2" if page == 1 else \
+                f"/orgs/foo/repos?sort={sort}&page={page}"
+            server.routes[path] = (200, {"Link": f'<{server.base_url}{next_path}>; rel="next"'}
+                                   if 2 * page < len(ordered) else {}, ordered[2 * (page - 1):2 * page])
+    for repository in repositories:
+        server.routes[f"/repos/foo/{repository['name']}/contributors?per_page=2"] = (
+            200, {}, [{"login": f"{repository['name']}-{repository['pushed_at'][:4]}"}]
+        )
+
+
+def get_requested_contributors(server: StubGitHubServer) -> List[str]:
+    """Get the names of the repositories whose contributors were requested from the stub GitHub server."""
+    return sorted(p.split("/")[3] for _, p, _ in server.requests if "/contributors" in p)
+
+
+# Define test cases for the `TestSyncOrganisationRepos` test class; each is the name, and `pushed_at`, and `updated_at`
+# timestamps of each repository
+args_test_sync_organisation_repos = [
+    [("a", "2020-01-01T00:00:00Z", "2020-01-01T00:00:00Z")],
+    [("a", "2020-01-01T00:00:00Z", "2020-06-01T00:00:00Z"), ("b", "2020-02-01T00:00:00Z", "2020-02-01T00:00:00Z"),
+     ("c", "2020-03-01T00:00:00Z", "2020-01-01T00:00:00Z"), ("d", "2020-04-01T00:00:00Z", "2020-04-01T00:00:00Z"),
+     ("e", "2020-05-01T00:00:00Z", "2020-05-01T00:00:00Z")],
+]
+
+
+@pytest.mark.parametrize("test_input_repositories", args_test_sync_organisation_repos)
+class TestSyncOrganisationRepos:
+
+    def test_first_sync_gets_all_repositories(self, tmpdir, stub_github_server: StubGitHubServer,
+                                              test_input_repositories: List[Any]) -> None:
+        """Test the first sync gets every repository, and its items, and saves them with the latest timestamp."""
+
+        # Sync the organisation with no previous snapshot
+        set_routes(stub_github_server, [create_repository(stub_github_server, *r) for r in test_input_repositories])
+        test_path = os.path.join(tmpdir, "foo_snapshot.json")
+        test_output = sync_organisation_repos(Github(base_url=stub_github_server.base_url, per_page=2), "foo",
+                                              ["get_contributors"], test_path, cpu_count=2)
+
+        # Assert all the repositories, and their contributors are in the saved snapshot
+        assert sorted(test_output["changed"]) == sorted(f"foo/{r[0]}" for r in test_input_repositories)
+        assert test_output["watermark"] == max(t for r in test_input_repositories for t in r[1:])
+        assert test_output["items"]["get_contributors"] == {
+            f"foo/{r[0]}": [{"login": f"{r[0]}-2020"}] for r in test_input_repositories
+        }
+        assert load_snapshot(test_path, "foo") == test_output
+        assert get_requested_contributors(stub_github_server) == sorted(r[0] for r in test_input_repositories)
+
+    @pytest.mark.parametrize("test_input_field", ["pushed_at", "updated_at"])
+    def test_later_sync_gets_changed_repositories(self, tmpdir, stub_github_server: StubGitHubServer,
+                                                  test_input_repositories: List[Any], test_input_field: str) -> None:
+        """Test a later sync only gets the items of repositories changed since the watermark, without paging further."""
+
+        # Sync the organisation, then change the first repository, and sync it again
+        test_repositories = [create_repository(stub_github_server, *r) for r in test_input_repositories]
+        set_routes(stub_github_server, test_repositories)
+        test_path = os.path.join(tmpdir, "foo_snapshot.json")
+        test_github = Github(base_url=stub_github_server.base_url, per_page=2)
+        _ = sync_organisation_repos(test_github, "foo", ["get_contributors"], test_path, cpu_count=2)
+        test_repositories[0][test_input_field] = "2021-01-01T00:00:00Z"
+        set_routes(stub_github_server, test_repositories)
+        stub_github_server.requests.clear()
+        test_output = sync_organisation_repos(test_github, "foo", ["get_contributors"], test_path, cpu_count=2)
+
+        # Assert only the changed repository, and the repository last changed at the previous watermark, are synced,
+        # and only the first page of each sort order is requested
+        test_expected = sorted({"a", max(test_input_repositories, key=lambda r: max(r[1:]))[0]})
+        assert sorted(r.split("/")[1] for r in test_output["changed"]) == test_expected
+        assert get_requested_contributors(stub_github_server) == test_expected
+        assert test_output["watermark"] == "2021-01-01T00:00:00Z"
+        assert test_output["repositories"]["foo/a"][test_input_field] == "2021-01-01T00:00:00Z"
+        assert not any("&page=" in p for _, p, _ in stub_github_server.requests)
+
+    def test_new_method_gets_all_repositories(self, tmpdir, stub_github_server: StubGitHubServer,
+                                              test_input_repositories: List[Any]) -> None:
+        """Test items of a method not in the snapshot are got for every repository, without requesting them again."""
+
+        # Sync the organisation without any methods, then with the `get_contributors` method
+        set_routes(stub_github_server, [create_repository(stub_github_server, *r) for r in test_input_repositories])
+        test_path = os.path.join(tmpdir, "foo_snapshot.json")
+        test_github = Github(base_url=stub_github_server.base_url, per_page=2)
+        _ = sync_organisation_repos(test_github, "foo", path=test_path, cpu_count=2)
+        test_output = sync_organisation_repos(test_github, "foo", ["get_contributors"], test_path, cpu_count=2)
+
+        # Assert the contributors of every repository are in the snapshot
+        assert sorted(test_output["items"]["get_contributors"]) == sorted(
+            f"foo/{r[0]}" for r in test_input_repositories
+        )
+        assert get_requested_contributors(stub_github_server) == sorted(r[0] for r in test_input_repositories)
+        assert not any(p.startswith("/repos/foo/") and "/contributors" not in p
+                       for _, p, _ in stub_github_server.requests)
+
+    def test_full_sync_ignores_snapshot(self, tmpdir, stub_github_server: StubGitHubServer,
+                                        test_input_repositories: List[Any]) -> None:
+        """Test a full sync replaces the snapshot, removing repositories that no longer exist."""
+
+        # Sync the organisation, remove the last repository, and sync it fully
+        test_repositories = [create_repository(stub_github_server, *r) for r in test_input_repositories]
+        set_routes(stub_github_server, test_repositories)
+        test_path = os.path.join(tmpdir, "foo_snapshot.json")
+        test_github = Github(base_url=stub_github_server.base_url, per_page=2)
+        _ = sync_organisation_repos(test_github, "foo", path=test_path, cpu_count=2)
+        stub_github_server.routes.clear()
+        set_routes(stub_github_server, test_repositories[:-1])
+        test_output = sync_organisation_repos(test_github, "foo", path=test_path, full_sync=True, cpu_count=2)
+
+        # Assert the removed repository is no longer in the snapshot
+        assert sorted(test_output["repositories"]) == sorted(r["full_name"] for r in test_repositories[:-1])
+
+
+@pytest.mark.parametrize("test_input_organisation, test_expected", [("foo", True), ("bar", False)])
+def test_load_snapshot_checks_organisation(tmpdir, stub_github_server: StubGitHubServer, test_input_organisation: str,
+                                           test_expected: bool) -> None:
+    """Test a snapshot is only loaded for the same organisation it was saved for."""
+    set_routes(stub_github_server, [])
+    test_path = os.path.join(tmpdir, "foo_snapshot.json")
+    _ = sync_organisation_repos(Github(base_url=stub_github_server.base_url, per_page=2), "foo", path=test_path)
+    assert (load_snapshot(test_path, test_input_organisation) is not None) == test_expected
+    assert load_snapshot(os.path.join(tmpdir, "missing.json"), "foo") is None
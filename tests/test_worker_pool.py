@@ -0,0 +1,69 @@
+from src.utils.parallelise_dictionary_processing import (
+    parallelise_dictionary_processing,
+    parallelise_dictionary_streaming,
+    parallelise_processing
+)
+from src.utils.worker_pool import WorkerPool
+from typing import Dict, Tuple
+import os
+import pytest
+import threading
+
+
+def get_worker(x: int) -> Tuple[int, int]:
+    """Get the process, and thread identifiers of the worker processing an element."""
+    return os.getpid(), threading.get_ident()
+
+
+def square(x: int) -> Dict[int, int]:
+    """Get a dictionary of an element, and its square."""
+    return {x: x ** 2}
+
+
+# Define test cases for the `TestWorkerPool` test class
+args_test_worker_pool_iterable = [[*range(10)], [*range(50)]]
+args_test_worker_pool_cpu_count = [1, 2, 3]
+args_test_worker_pool_executor = ["thread", "process"]
+
+
+@pytest.mark.parametrize("test_input_iterable", args_test_worker_pool_iterable)
+@pytest.mark.parametrize("test_input_cpu_count", args_test_worker_pool_cpu_count)
+@pytest.mark.parametrize("test_input_executor", args_test_worker_pool_executor)
+class TestWorkerPool:
+
+    def test_workers_reused_across_calls(self, test_input_iterable: iter, test_input_cpu_count: int,
+                                         test_input_executor: str) -> None:
+        """Test the same workers process every call, rather than new workers for each call."""
+        with WorkerPool(test_input_cpu_count, test_input_executor) as test_pool:
+            test_workers = {w for _ in range(3)
+                            for w in parallelise_processing(get_worker, test_input_iterable, 100, 4, test_pool)}
+        assert len(test_workers) <= test_input_cpu_count
+
+    def test_pool_kept_running_between_calls(self, test_input_iterable: iter, test_input_cpu_count: int,
+                                             test_input_executor: str) -> None:
+        """Test the pool is not closed by a call, and returns correctly for later calls."""
+        test_expected = {x: x ** 2 for x in test_input_iterable}
+        with WorkerPool(test_input_cpu_count, test_input_executor) as test_pool:
+            test_input_pool = test_pool.pool
+            assert parallelise_dictionary_processing(square, test_input_iterable, 1, 4, test_pool) == test_expected
+            assert dict(parallelise_dictionary_streaming(square, test_input_iterable, 1, None,
+                                                         test_pool)) == test_expected
+            assert parallelise_dictionary_processing(square, test_input_iterable, 1, 4, test_pool, None, None,
+                                                     True) == test_expected
+            assert test_pool.pool is test_input_pool
+
+    def test_pool_closed_on_exit(self, test_input_iterable: iter, test_input_cpu_count: int,
+                                 test_input_executor: str) -> None:
+        """Test the pool is closed on exit, and a new pool is started if the `WorkerPool` object is used again."""
+        with WorkerPool(test_input_cpu_count, test_input_executor) as test_pool:
+            test_input_pool = test_pool.pool
+        assert test_pool._pool is None
+        with test_pool:
+            assert test_pool.pool is not test_input_pool
+            assert len(parallelise_processing(square, test_input_iterable, 1, 4, test_pool)) == len(test_input_iterable)
+
+
+def test_worker_pool_raises_value_error_for_unknown_executor() -> None:
+    """Test a `ValueError` is raised for an unknown executor backend."""
+    with pytest.raises(ValueError):
+        WorkerPool(1, "fibre")